@@ -0,0 +1,30 @@
+"""keyset pagination indexes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Indeksy pod ORDER BY (timestamp DESC, id DESC) i warunek keyset
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_patients_przyjecie_id "
+        "ON patients (data_przyjecia DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_audit_timestamp_id "
+        "ON audit_log (timestamp DESC, id DESC)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_audit_timestamp_id")
+    op.execute("DROP INDEX IF EXISTS idx_patients_przyjecie_id")
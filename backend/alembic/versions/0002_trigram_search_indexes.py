@@ -0,0 +1,37 @@
+"""trigram search indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # GIN z gin_trgm_ops obsługuje ILIKE '%q%' i operator similarity
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_patients_szablon_trgm "
+        "ON patients USING gin (szablon_przypadku gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_username_trgm "
+        "ON users USING gin (username gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_email_trgm "
+        "ON users USING gin (email gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_users_email_trgm")
+    op.execute("DROP INDEX IF EXISTS idx_users_username_trgm")
+    op.execute("DROP INDEX IF EXISTS idx_patients_szablon_trgm")
@@ -0,0 +1,42 @@
+"""triage rollup tables
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'triage_rollup_hourly',
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('kategoria_triazu', sa.Integer(), nullable=False),
+        sa.Column('przypisany_oddzial', sa.String(50), nullable=False),
+        sa.Column('model_version', sa.String(50), nullable=False),
+        sa.Column('prediction_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('confidence_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('confidence_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('triage_seconds_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('triage_seconds_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('bucket', 'kategoria_triazu', 'przypisany_oddzial', 'model_version')
+    )
+    
+    op.create_table(
+        'patient_rollup_hourly',
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('patient_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('bucket')
+    )
+
+
+def downgrade():
+    op.drop_table('patient_rollup_hourly')
+    op.drop_table('triage_rollup_hourly')
@@ -0,0 +1,38 @@
+"""occupancy events ledger
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'occupancy_events',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('department', sa.String(50), nullable=False),
+        sa.Column('delta', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(20), nullable=False),
+        sa.Column('patient_id', sa.Integer(), sa.ForeignKey('patients.id', ondelete='SET NULL')),
+        sa.CheckConstraint(
+            "event_type IN ('admission', 'discharge', 'transfer', 'correction')",
+            name='occupancy_events_type_check'
+        )
+    )
+    
+    # Suma delt od snapshotu: zakres po timestamp
+    op.create_index('idx_occupancy_events_timestamp', 'occupancy_events', ['timestamp'])
+
+
+def downgrade():
+    op.drop_index('idx_occupancy_events_timestamp', table_name='occupancy_events')
+    op.drop_table('occupancy_events')
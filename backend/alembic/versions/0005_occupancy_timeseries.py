@@ -0,0 +1,41 @@
+"""occupancy hourly and daily aggregates
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def _aggregate_table(name):
+    op.create_table(
+        name,
+        sa.Column('department', sa.String(50), primary_key=True),
+        sa.Column('bucket', sa.DateTime(), primary_key=True),
+        sa.Column('last_value', sa.Integer(), nullable=False),
+        sa.Column('mean_value', sa.Float(), nullable=False),
+        sa.Column('min_value', sa.Integer(), nullable=False),
+        sa.Column('max_value', sa.Integer(), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False)
+    )
+
+
+def upgrade():
+    _aggregate_table('occupancy_hourly')
+    _aggregate_table('occupancy_daily')
+    
+    # Macierz godzinowa wszystkich oddziałów: zakres po bucket
+    op.create_index('idx_occupancy_hourly_bucket', 'occupancy_hourly', ['bucket'])
+
+
+def downgrade():
+    op.drop_index('idx_occupancy_hourly_bucket', table_name='occupancy_hourly')
+    op.drop_table('occupancy_daily')
+    op.drop_table('occupancy_hourly')
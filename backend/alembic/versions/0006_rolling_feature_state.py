@@ -0,0 +1,29 @@
+"""rolling feature state
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rolling_feature_state',
+        sa.Column('name', sa.String(50), primary_key=True),
+        sa.Column('last_hour', sa.DateTime()),
+        sa.Column('state', postgresql.JSONB(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now())
+    )
+
+
+def downgrade():
+    op.drop_table('rolling_feature_state')
@@ -0,0 +1,30 @@
+"""export watermark indexes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Indeksy pod eksport przyrostowy: WHERE znacznik > since ORDER BY (znacznik, id)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_patients_updated_id "
+        "ON patients (updated_at, id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_predictions_date_id "
+        "ON triage_predictions (predicted_at, id)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_predictions_date_id")
+    op.execute("DROP INDEX IF EXISTS idx_patients_updated_id")
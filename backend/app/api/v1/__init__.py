@@ -4,7 +4,7 @@ API v1 Routers
 Eksportuje wszystkie routery dla wersji 1 API.
 """
 
-from app.api.v1 import auth, patients, triage, departments, users, audit
+from app.api.v1 import auth, patients, triage, departments, users, audit, export
 
 __all__ = [
     "auth",
@@ -12,5 +12,6 @@ __all__ = [
     "triage",
     "departments",
     "users",
-    "audit"
+    "audit",
+    "export"
 ]
@@ -6,6 +6,8 @@ from app.api.deps import get_db, get_current_active_user
 from app.schemas import AuditLogWithUser, AuditLogFilter
 from app.services import AuditService
 from app.models import User
+from app.utils.pagination import encode_cursor
+from app.utils.fast_json import FastJSONResponse
 
 router = APIRouter()
 
@@ -18,6 +20,7 @@ async def get_audit_logs(
     date_to: Optional[datetime] = Query(None, description="Data końcowa (ISO format)"),
     limit: int = Query(100, ge=1, le=1000, description="Limit wyników"),
     offset: int = Query(0, ge=0, description="Offset dla paginacji"),
+    cursor: Optional[str] = Query(None, description="Kursor z nagłówka X-Next-Cursor poprzedniej odpowiedzi"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -34,9 +37,11 @@ async def get_audit_logs(
     - date_to: Opcjonalna data końcowa
     - limit: Maksymalna liczba wyników (domyślnie 100, max 1000)
     - offset: Offset dla paginacji
+    - cursor: Opcjonalny kursor keyset - gdy podany, offset jest ignorowany
     
     **Zwraca:**
     - Lista logów z informacjami o użytkownikach
+    - Nagłówek X-Next-Cursor z kursorem kolejnej strony (gdy strona jest pełna)
     
     **Uprawnienia:**
     - Admin: Widzi wszystkie logi
@@ -57,10 +62,18 @@ async def get_audit_logs(
         date_from=date_from,
         date_to=date_to,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor
     )
     
-    return AuditService.get_logs(db, filters)
+    logs = AuditService.get_logs(db, filters, raw=True)
+    
+    response = FastJSONResponse(logs)
+    
+    if len(logs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1]["timestamp"], logs[-1]["id"])
+    
+    return response
 
 @router.get("/user/{user_id}/activity", response_model=list)
 async def get_user_activity(
@@ -229,6 +242,9 @@ async def get_available_actions(
             {"action": "CHANGE_USER_ROLE", "description": "Zmiana roli użytkownika"},
             {"action": "DEACTIVATE_USER", "description": "Dezaktywacja użytkownika"},
             {"action": "ACTIVATE_USER", "description": "Aktywacja użytkownika"}
+        ],
+        "export": [
+            {"action": "EXPORT_DATA", "description": "Eksport tabeli dla hurtowni danych"}
         ]
     }
     
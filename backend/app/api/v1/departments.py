@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.api.deps import get_db, get_current_active_user
@@ -10,8 +11,12 @@ from app.schemas import (
     DepartmentStats,
     MessageResponse
 )
-from app.services import DepartmentService
+from app.services import DepartmentService, occupancy_monitor
+from app.services.department_service import DEPARTMENT_CAPACITY, HISTORY_STREAM_THRESHOLD
 from app.models import User
+from app.utils.broadcast import SSE_HEADERS, sse_events
+from app.utils.fast_json import FastJSONResponse
+from app.utils.response_cache import response_cache, SCOPE_OCCUPANCY
 
 router = APIRouter()
 
@@ -30,7 +35,7 @@ async def get_current_occupancy(
     **Wymaga:** Bearer Token
     
     **Zwraca:**
-    - Timestamp (czas ostatniego zapisu)
+    - Timestamp (chwila obliczenia obłożenia)
     - Obłożenie każdego oddziału:
       - Nazwa oddziału
       - Aktualne obłożenie (liczba pacjentów)
@@ -50,6 +55,44 @@ async def get_current_occupancy(
     """
     return DepartmentService.get_current_occupancy(db)
 
+@router.get("/occupancy/stream")
+async def stream_occupancy(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Strumień obłożenia oddziałów na żywo (Server-Sent Events)
+    
+    Zastępuje odpytywanie /occupancy, /summary/all i /alerts/critical.
+    
+    **Wymaga:** Bearer Token
+    
+    **Zdarzenia:**
+    - capacity: pojemności oddziałów (raz, na początku)
+    - snapshot: obłożenie każdego oddziału (occupancy, percentage, status);
+      wysyłany na początku i przy każdej zmianie obłożenia
+    - alert: zmiana statusu oddziału (department, from, to, percentage)
+    
+    Gdy nic się nie zmienia, co 15 s wysyłany jest komentarz heartbeat.
+    """
+    queue = occupancy_monitor.broadcaster.subscribe()
+    snapshot = occupancy_monitor.current(db)
+    
+    # Połączenie SSE może trwać godzinami - nie trzymamy sesji z puli
+    db.close()
+    
+    initial = [
+        ("capacity", {"departments": DEPARTMENT_CAPACITY}),
+        ("snapshot", {"type": "snapshot", **snapshot})
+    ]
+    
+    return StreamingResponse(
+        sse_events(request, occupancy_monitor.broadcaster, queue, initial),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/occupancy", response_model=DepartmentOccupancyResponse, status_code=201)
 async def record_occupancy(
     occupancy_data: DepartmentOccupancyCreate,
@@ -96,7 +139,9 @@ async def record_occupancy(
 @router.get("/{department}/history", response_model=OccupancyHistory)
 async def get_department_history(
     department: str,
-    hours: int = Query(24, ge=1, le=168, description="Liczba godzin wstecz (1-168, czyli max 7 dni)"),
+    hours: int = Query(24, ge=1, le=8760, description="Liczba godzin wstecz (1-8760, czyli max rok)"),
+    points: Optional[int] = Query(None, ge=10, le=5000, description="Maksymalna liczba punktów historii"),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$", description="Metoda downsamplingu"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -107,7 +152,12 @@ async def get_department_history(
     
     **Parametry:**
     - department: Nazwa oddziału (SOR, Interna, Kardiologia, Chirurgia, Ortopedia, Neurologia, Pediatria, Ginekologia)
-    - hours: Liczba godzin wstecz (domyślnie 24, max 168)
+    - hours: Liczba godzin wstecz (domyślnie 24, max 8760)
+    - points: Maksymalna liczba punktów (opcjonalnie, 10-5000)
+    - method: lttb (zachowuje kształt wykresu) lub minmax (zachowuje szczyty)
+    
+    **Rozdzielczość:** do 24h surowe pomiary, do 31 dni średnie godzinowe,
+    dłużej średnie dzienne (pole resolution w odpowiedzi).
     
     **Zwraca:**
     - Nazwa oddziału
@@ -115,8 +165,21 @@ async def get_department_history(
     - Średnie obłożenie w okresie
     - Szczytowe obłożenie
     - Czas szczytu
+    
+    Średnia i szczyt liczone są z pełnego szeregu, przed downsamplingiem.
+    Historia dłuższa niż 1000 punktów jest wysyłana strumieniowo.
     """
-    return DepartmentService.get_occupancy_history(db, department, hours)
+    series, summary = DepartmentService.get_history_series(
+        db, department, hours, points, method
+    )
+    
+    if len(series) > HISTORY_STREAM_THRESHOLD:
+        return StreamingResponse(
+            DepartmentService.iter_history_json(series, summary),
+            media_type="application/json"
+        )
+    
+    return FastJSONResponse(DepartmentService.history_dict(series, summary))
 
 @router.get("/{department}/stats", response_model=DepartmentStats)
 async def get_department_stats(
@@ -138,7 +201,9 @@ async def get_department_stats(
     - Procent obłożenia
     - Liczba pacjentów w ostatnich 24h
     - Średni czas pobytu (jeśli dostępny)
-    - Godziny szczytu (na podstawie ostatnich 7 dni)
+    - Godziny szczytu (z profilu godzin tygodnia, ostatnie 8 tygodni)
+    - Typowe obłożenie o tej porze tygodnia (średnia i przedział p10-p90)
+    - Flaga anomalii (obłożenie poza typowym przedziałem)
     """
     return DepartmentService.get_department_stats(db, department)
 
@@ -180,6 +245,7 @@ async def predict_occupancy(
 
 @router.get("/summary/all")
 async def get_all_departments_summary(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -199,11 +265,21 @@ async def get_all_departments_summary(
       - Procent
       - Status
       - Dostępne łóżka
+    
+    **Cache:** ETag, unieważniany przy każdej zmianie obłożenia, także
+    spoza API - najpóźniej po SYNC_INTERVAL (timestamp to chwila
+    ostatniego przeliczenia)
     """
-    return DepartmentService.get_all_departments_summary(db)
+    response_cache.sync(SCOPE_OCCUPANCY, lambda: DepartmentService.occupancy_version(db))
+    return response_cache.respond(
+        request,
+        (SCOPE_OCCUPANCY,),
+        lambda: DepartmentService.get_all_departments_summary(db)
+    )
 
 @router.get("/capacity/list")
 async def get_departments_capacity(
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -213,15 +289,15 @@ async def get_departments_capacity(
     
     **Zwraca:**
     - Lista oddziałów z pojemnościami
-    """
-    from app.services.department_service import DEPARTMENT_CAPACITY
     
-    return {
+    **Cache:** ETag (treść stała)
+    """
+    return response_cache.respond(request, (), lambda: {
         "departments": [
             {"name": dept, "capacity": cap}
             for dept, cap in DEPARTMENT_CAPACITY.items()
         ]
-    }
+    })
 
 @router.get("/alerts/critical")
 async def get_critical_departments(
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from app.api.deps import get_db, get_current_active_user
+from app.services.export_service import ExportService, FORMATS
+from app.models import User
+
+router = APIRouter()
+
+@router.get("/{dataset}")
+async def export_dataset(
+    request: Request,
+    dataset: str = Path(..., pattern="^(patients|predictions|audit_log)$", description="Eksportowany zbiór"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$", description="Format pliku"),
+    since: Optional[datetime] = Query(None, description="Eksport przyrostowy - wiersze zmienione po tym czasie (X-Export-Until poprzedniego eksportu)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Strumieniowy eksport tabeli dla hurtowni danych
+    
+    **Wymaga:** Bearer Token (tylko admin)
+    
+    **Zbiory:**
+    - patients: pacjenci (znacznik: updated_at)
+    - predictions: predykcje triażu (znacznik: predicted_at)
+    - audit_log: log audytowy (znacznik: timestamp)
+    
+    **Parametry:**
+    - format: ndjson (domyślnie), csv (z nagłówkiem) lub parquet
+    - since: Opcjonalny znacznik - tylko wiersze zmienione później
+    
+    **Zwraca:**
+    - Plik strumieniowany porcjami (kursor serwerowy, stała pamięć)
+    - Nagłówek X-Export-Until - górna granica eksportu, do użycia
+      jako since w kolejnym eksporcie przyrostowym (cofnięta o kilka minut
+      i przed najstarszą trwającą transakcję, żeby nie gubić wierszy)
+    
+    Eksport przyrostowy nie obejmuje usuniętych wierszy - do ich
+    uzgodnienia służy pełny eksport (bez since).
+    
+    Liczba wierszy i przepustowość trafiają do audit logu (EXPORT_DATA).
+    """
+    if current_user.role != 'admin':
+        raise HTTPException(
+            status_code=403,
+            detail="Only admin can export data"
+        )
+    
+    until = ExportService.snapshot(db)
+    media_type, extension = FORMATS[format]
+    
+    return StreamingResponse(
+        ExportService.stream_export(
+            dataset, format, since, until, current_user.id,
+            request.client.host if request.client else None
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{dataset}_{until:%Y%m%dT%H%M%S}.{extension}"',
+            "X-Export-Until": until.isoformat()
+        }
+    )
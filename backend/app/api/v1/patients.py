@@ -1,4 +1,6 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.api.deps import get_db, get_current_active_user
@@ -12,8 +14,10 @@ from app.schemas import (
     PaginatedResponse,
     MessageResponse
 )
-from app.services import PatientService
+from app.services import PatientService, waiting_queue
 from app.models import User
+from app.utils.broadcast import SSE_HEADERS, sse_events
+from app.utils.fast_json import FastJSONResponse
 
 router = APIRouter()
 
@@ -27,6 +31,8 @@ async def get_patients(
     size: int = Query(20, ge=1, le=100, description="Rozmiar strony"),
     status: Optional[str] = Query(None, description="Filtr po statusie (oczekujący, w_leczeniu, wypisany, przekazany)"),
     triage_category: Optional[int] = Query(None, ge=1, le=5, description="Filtr po kategorii triaży (1-5)"),
+    cursor: Optional[str] = Query(None, description="Kursor następnej strony (next_cursor z poprzedniej odpowiedzi)"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$", description="Tryb liczenia total: exact, estimated, none"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -40,17 +46,26 @@ async def get_patients(
     - size: Liczba rekordów na stronę (1-100, domyślnie 20)
     - status: Opcjonalny filtr po statusie
     - triage_category: Opcjonalny filtr po kategorii triaży
+    - cursor: Opcjonalny kursor - gdy podany, page jest ignorowany (paginacja keyset)
+    - count: exact (domyślnie), estimated (estymata planera) lub none (bez total)
     
     **Zwraca:**
     - Lista pacjentów z informacjami o paginacji
+    - next_cursor do pobrania kolejnej strony (null na ostatniej stronie)
+    
+    **Uwaga:** Przy głębokim przewijaniu używaj cursor zamiast page -
+    koszt zapytania nie rośnie wtedy z numerem strony.
     """
-    return PatientService.list_patients(
+    return FastJSONResponse(PatientService.list_patients(
         db=db,
         page=page,
         size=size,
         status=status,
-        triage_category=triage_category
-    )
+        triage_category=triage_category,
+        cursor=cursor,
+        count=count,
+        raw=True
+    ))
 
 @router.post("/", response_model=PatientResponse, status_code=201)
 async def create_patient(
@@ -256,6 +271,51 @@ async def get_waiting_patients(
     """
     return PatientService.get_waiting_patients(db)
 
+@router.get("/waiting/stream")
+async def stream_waiting_patients(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Strumień zmian kolejki oczekujących (Server-Sent Events)
+    
+    **Wymaga:** Bearer Token
+    
+    **Zdarzenia:**
+    - snapshot: pełna lista oczekujących (pierwsze zdarzenie po połączeniu)
+    - upsert: pacjent dodany lub przesunięty (patient, position)
+    - remove: pacjent opuścił kolejkę (patient_id)
+    - reset: klient powinien pobrać pełną listę od nowa
+    
+    Każde zdarzenie ma pole version. Co 15 s wysyłany jest komentarz
+    heartbeat, żeby proxy nie zamykały bezczynnego połączenia.
+    """
+    queue = waiting_queue.broadcaster.subscribe()
+    # Lista i wersja z jednej blokady - inaczej zmiana między odczytami
+    # nie trafiłaby ani do listy, ani do delt (version <= version)
+    snapshot, version = waiting_queue.snapshot(db)
+    
+    # Połączenie SSE może trwać godzinami - nie trzymamy sesji z puli
+    db.close()
+    
+    initial = [("snapshot", {
+        "version": version,
+        "patients": [json.loads(p.model_dump_json()) for p in snapshot]
+    })]
+    
+    return StreamingResponse(
+        sse_events(
+            request,
+            waiting_queue.broadcaster,
+            queue,
+            initial,
+            skip=lambda event: event["version"] <= version
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.get("/search/query", response_model=list[PatientListItem])
 async def search_patients(
     q: str = Query(..., min_length=1, description="Zapytanie wyszukiwania"),
@@ -273,7 +333,8 @@ async def search_patients(
     - limit: Maksymalna liczba wyników (domyślnie 20)
     
     **Zwraca:**
-    - Lista znalezionych pacjentów
+    - Dla zapytania numerycznego: pacjent o dokładnie tym ID
+    - W przeciwnym razie: pacjenci z pasującym szablonem, najlepiej dopasowani pierwsi
     """
     return PatientService.search_patients(db, q, limit)
 
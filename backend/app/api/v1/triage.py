@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime, timedelta
@@ -6,6 +7,8 @@ from app.api.deps import get_db, get_current_active_user
 from app.schemas import (
     TriagePredictRequest,
     TriagePredictResponse,
+    TriageBatchPredictRequest,
+    TriageBatchPredictResponse,
     TriagePredictionResponse,
     TriageStatsResponse,
     DailyTriageStats,
@@ -15,9 +18,11 @@ from app.schemas import (
     TriageConfirmRequest,
     TriageConfirmResponse,
 )
-from app.services import TriageService
+from app.services import TriageService, BulkIntakeService, PredictionBackfillService
 from app.ml.predictor import predictor
 from app.models import User
+from app.utils.response_cache import response_cache, SCOPE_MODEL
+from app.utils.fast_json import FastJSONResponse
 from typing import List, Dict
 
 from app.services.orchestrator_service import TriageOrchestrator
@@ -73,6 +78,47 @@ async def predict_triage(
         ip_address=ip_address
     )
 
+@router.post("/predict/batch", response_model=TriageBatchPredictResponse)
+async def predict_triage_batch(
+    batch_request: TriageBatchPredictRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Predykcja triaży dla istniejących pacjentów bez predykcji
+    
+    **Wymaga:** Bearer Token (tylko admin)
+    
+    **Parametry:**
+    - patient_ids: Konkretni pacjenci (opcjonalne, domyślnie wszyscy bez predykcji)
+    - after_id: Kursor - pacjenci o ID większym (z last_patient_id poprzedniego wywołania)
+    - limit: Maksymalna liczba pacjentów (1-10000)
+    
+    **Zwraca:**
+    - processed / predicted / skipped: Liczniki wywołania
+    - invalid_patient_ids: Pacjenci z danymi odrzuconymi przez model
+    - last_patient_id, has_more: Kursor do kolejnego wywołania
+    
+    **Proces:** jedno wywołanie modelu dla całej paczki i jeden INSERT
+    z ON CONFLICT (patient_id) DO NOTHING - pacjenci przewidziani
+    w międzyczasie są pomijani. Pełny backfill: scripts/backfill_predictions.py
+    """
+    if current_user.role != 'admin':
+        raise HTTPException(
+            status_code=403,
+            detail="Only admin can run batch predictions"
+        )
+    
+    return PredictionBackfillService.predict_chunk(
+        db=db,
+        after_id=batch_request.after_id,
+        limit=batch_request.limit,
+        patient_ids=batch_request.patient_ids,
+        user_id=current_user.id,
+        ip_address=get_ip_address(request)
+    )
+
 @router.get("/prediction/{patient_id}", response_model=TriagePredictionResponse)
 async def get_prediction(
     patient_id: int,
@@ -141,7 +187,7 @@ async def get_daily_stats(
       - Średni czas do wykonania triaży
       - Średnią pewność predykcji
     """
-    return TriageService.get_daily_stats(db, days)
+    return FastJSONResponse(TriageService.get_daily_stats(db, days, raw=True))
 
 @router.get("/analytics", response_model=TriageAnalytics)
 async def get_analytics(
@@ -170,6 +216,7 @@ async def get_analytics(
 
 @router.get("/model-info")
 async def get_model_info(
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -184,11 +231,14 @@ async def get_model_info(
     - Parametry modelu (n_estimators, max_depth, etc.)
     - Liczba cech (features)
     - Informacje o preprocessorze
+    
+    **Cache:** ETag, unieważniany przy przeładowaniu modelu
     """
-    return predictor.get_model_info()
+    return response_cache.respond(request, (SCOPE_MODEL,), predictor.get_model_info)
 
 @router.get("/feature-importance")
 async def get_feature_importance(
+    request: Request,
     top_n: int = Query(20, ge=1, le=50, description="Liczba najważniejszych cech do zwrócenia"),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -205,19 +255,24 @@ async def get_feature_importance(
     - Posortowany od najważniejszej cechy
     
     **Uwaga:** Działa tylko dla modeli tree-based (Random Forest, Gradient Boosting)
-    """
-    importance = predictor.get_feature_importance(top_n=top_n)
-    
-    if not importance:
-        raise HTTPException(
-            status_code=400,
-            detail="Feature importance not available for this model type"
-        )
     
-    return {
-        "features": importance,
-        "model_type": type(predictor.model).__name__ if predictor.model else "unknown"
-    }
+    **Cache:** ETag, unieważniany przy przeładowaniu modelu
+    """
+    def build():
+        importance = predictor.get_feature_importance(top_n=top_n)
+        
+        if not importance:
+            raise HTTPException(
+                status_code=400,
+                detail="Feature importance not available for this model type"
+            )
+        
+        return {
+            "features": importance,
+            "model_type": type(predictor.model).__name__ if predictor.model else "unknown"
+        }
+    
+    return response_cache.respond(request, (SCOPE_MODEL,), build)
 
 @router.post("/reload-model")
 async def reload_model(
@@ -248,6 +303,7 @@ async def reload_model(
 
 @router.get("/categories/info")
 async def get_categories_info(
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -259,8 +315,10 @@ async def get_categories_info(
     - Opis każdej kategorii (1-5)
     - Typowe czasy oczekiwania
     - Przykładowe przypadki
+    
+    **Cache:** ETag (treść stała)
     """
-    return {
+    return response_cache.respond(request, (), lambda: {
         "categories": [
             {
                 "category": 1,
@@ -303,11 +361,15 @@ async def get_categories_info(
                 "examples": ["Przeziębienie", "Kontrola", "Receptura"]
             }
         ]
-    }
+    })
 
 @router.get("/templates", response_model=List[Dict[str, str]])
-async def get_available_templates():
-    """Zwraca listę dostępnych szablonów przypadków medycznych"""
+async def get_available_templates(request: Request):
+    """Zwraca listę dostępnych szablonów przypadków medycznych (cache: ETag)"""
+    return response_cache.respond(request, (SCOPE_MODEL,), build_templates)
+
+def build_templates() -> List[Dict[str, str]]:
+    """Lista szablonów z etykietami (z preprocessora)"""
     from app.ml.preprocessor import preprocessor
     
     template_labels = {
@@ -390,4 +452,42 @@ async def confirm_and_create_patient(
         ip_address=ip_address
     )
 
-
+@router.post("/bulk-intake")
+async def bulk_intake(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Format uploadu (domyślnie z Content-Type)"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Masowa rejestracja pacjentów (ćwiczenia, zdarzenia masowe)
+    
+    **Wymaga:** Bearer Token
+    
+    **Treść:** NDJSON (obiekt w linii, Content-Type application/x-ndjson)
+    albo CSV z nagłówkiem (text/csv). Pola jak w /triage/confirm, przy czym
+    kategoria_triazu i przypisany_oddzial są opcjonalne - gdy puste,
+    używana jest predykcja modeli (triaż + alokacja).
+    
+    **Zwraca:** strumień NDJSON - wynik dla każdego wiersza
+    (line, status: created / invalid / failed, patient_id, ...) wysyłany
+    po każdej paczce, na końcu {"summary": {...}}.
+    
+    **Uwaga:** Wiersze są zapisywane paczkami w osobnych transakcjach -
+    błąd jednej paczki nie cofa wcześniejszych.
+    """
+    if predictor.model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="ML model not loaded. Check server logs for details."
+        )
+    
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    
+    rows = await BulkIntakeService.read_rows(request.stream(), format)
+    
+    return StreamingResponse(
+        BulkIntakeService.iter_results(rows, current_user.id, get_ip_address(request)),
+        media_type="application/x-ndjson"
+    )
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from app.api.deps import get_db, get_current_active_user
 from app.schemas import UserResponse, UserUpdate, MessageResponse
-from app.services import AuthService
+from app.services import AuthService, SearchService
 from app.models import User
 
 router = APIRouter()
@@ -332,7 +332,7 @@ async def search_users(
     - limit: Maksymalna liczba wyników
     
     **Zwraca:**
-    - Lista znalezionych użytkowników
+    - Lista znalezionych użytkowników, najlepiej dopasowani pierwsi
     """
     if current_user.role != 'admin':
         raise HTTPException(
@@ -340,9 +340,4 @@ async def search_users(
             detail="Only admin can search users"
         )
     
-    users = db.query(User).filter(
-        (User.email.like(f"%{q}%")) |
-        (User.username.like(f"%{q}%"))
-    ).limit(limit).all()
-    
-    return [UserResponse.model_validate(user) for user in users]
+    return SearchService.search_users(db, q, limit)
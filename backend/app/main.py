@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.v1 import auth, patients, triage, departments, users, audit
+from app.api.v1 import auth, patients, triage, departments, users, audit, export
 from sqlalchemy import text
 from app.middleware import setup_exception_handlers, setup_logging_middleware
 from datetime import datetime
@@ -32,6 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Export-Until"],
 )
 
 setup_logging_middleware(app)
@@ -98,6 +99,16 @@ app.include_router(
     }
 )
 
+app.include_router(
+    export.router,
+    prefix=f"{settings.API_V1_PREFIX}/export",
+    tags=["Export"],
+    responses={
+        401: {"description": "Unauthorized"},
+        403: {"description": "Forbidden"}
+    }
+)
+
 @app.get("/", tags=["Root"])
 async def root():
     """
@@ -197,6 +208,7 @@ async def startup_event():
     from app.ml.predictor import predictor
     from app.services.occupancy_service import occupancy_predictor
     from app.services.allocation_service import allocation_predictor
+    from app.ml.feature_spec import FeatureSpecError
     
     print(" STARTUP - Wczytywanie modeli ML...")
     
@@ -205,6 +217,9 @@ async def startup_event():
     try:
         occupancy_predictor.load_model()
         print(f" Model 2 (Occupancy) - v{occupancy_predictor.model_version}")
+    except FeatureSpecError:
+        # Model jest, ale nie pasuje do serwowania - nie startujemy z cichym fallbackiem
+        raise
     except Exception as e:
         print(f"  Model 2 (Occupancy) NIE załadowany: {e}")
     
@@ -212,6 +227,8 @@ async def startup_event():
     try:
         allocation_predictor.load_model()
         print(f" Model 3 (Allocation) - v{allocation_predictor.model_version}")
+    except FeatureSpecError:
+        raise
     except Exception as e:
         print(f"  Model 3 (Allocation) NIE załadowany: {e}")
     
@@ -0,0 +1,395 @@
+"""
+Specyfikacja cech wspólna dla treningu i serwowania
+
+Trener zapisuje specyfikację (kolejność kolumn, okna agregatów,
+kodowania, parametry) razem z modelem. Serwowanie kompiluje z niej
+funkcje budujące wejście modelu przy wczytywaniu modelu: każda kolumna
+dostaje swoją funkcję, a wiersz cech to jedno przejście po liście.
+Nieznana kolumna, inne okna agregatów albo niezgodność z kształtem
+modelu lub scalerów kończy się FeatureSpecError przy starcie aplikacji,
+a nie wyjątkiem przy każdym requeście.
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.ml.rolling_features import DEPARTMENTS, WINDOW_7D, WINDOW_30D, RollingAggregates
+
+FEATURE_SPEC_VERSION = 1
+
+# Specyfikacja modeli zapisanych przed wprowadzeniem specyfikacji
+# (odpowiada dotychczasowemu serwowaniu: 24h historii, 4 cechy czasowe)
+LEGACY_OCCUPANCY_SPEC = {
+    "spec_version": FEATURE_SPEC_VERSION,
+    "lookback_hours": 24,
+    "prediction_horizon": 1,
+    "sequence_columns": DEPARTMENTS,
+    "static_columns": ["hour", "day_of_week", "month", "is_weekend"],
+    "aggregate_windows": {"avg_7d": WINDOW_7D, "avg_30d": WINDOW_30D, "std_7d": WINDOW_7D},
+    "aggregate_min_periods": 1
+}
+
+AGGREGATE_WINDOWS = {"avg_7d": WINDOW_7D, "avg_30d": WINDOW_30D, "std_7d": WINDOW_7D}
+
+# Wyrównanie cech statycznych względem okna sekwencji. Trener
+# (utils/sequences.build_windows) łączy okno [i - lookback, i) z wierszem i,
+# czyli godziną po oknie: cechy czasowe tej godziny i agregaty kroczące
+# obejmujące ją włącznie ("next_hour"). Specyfikacje bez tego pola pochodzą
+# z tego samego trenera.
+STATIC_ALIGNMENTS = ("next_hour",)
+DEFAULT_STATIC_ALIGNMENT = "next_hour"
+
+Extractor = Callable[[Dict], float]
+
+
+class FeatureSpecError(ValueError):
+    """Specyfikacja cech niezgodna z modelem lub z serwowaniem"""
+
+
+def _time_extractor(name: str) -> Optional[Extractor]:
+    """Cechy czasowe liczone z ctx["time"] - jak w trenerach"""
+    time_features = {
+        "hour": lambda t: t.hour,
+        "day_of_week": lambda t: t.weekday(),
+        "month": lambda t: t.month,
+        "day_of_month": lambda t: t.day,
+        "is_weekend": lambda t: int(t.weekday() >= 5),
+        "is_night": lambda t: int(t.hour < 6 or t.hour >= 22),
+        "is_peak_hours": lambda t: int(8 <= t.hour <= 20),
+        "hour_sin": lambda t: math.sin(2 * math.pi * t.hour / 24),
+        "hour_cos": lambda t: math.cos(2 * math.pi * t.hour / 24),
+        "day_sin": lambda t: math.sin(2 * math.pi * t.weekday() / 7),
+        "day_cos": lambda t: math.cos(2 * math.pi * t.weekday() / 7),
+    }
+    
+    func = time_features.get(name)
+    if func is None:
+        return None
+    return lambda ctx: func(ctx["time"])
+
+
+def _split_department(name: str, departments: List[str]) -> Optional[Tuple[str, str]]:
+    """Rozdziela nazwę kolumny na (przedrostek/przyrostek, oddział)"""
+    for dept in departments:
+        if name.endswith(f"_{dept}"):
+            return name[:-len(dept) - 1], dept
+        if name.startswith(f"{dept}_"):
+            return name[len(dept) + 1:], dept
+    return None
+
+
+def _compile(columns: List[str], compile_column: Callable[[str], Optional[Extractor]]) -> List[Extractor]:
+    """Kompiluje kolumny; zbiera wszystkie nieznane w jeden błąd"""
+    extractors = []
+    unknown = []
+    
+    for column in columns:
+        extractor = compile_column(column)
+        if extractor is None:
+            unknown.append(column)
+        extractors.append(extractor)
+    
+    if unknown:
+        raise FeatureSpecError(f"Nieobsługiwane kolumny w specyfikacji: {', '.join(unknown)}")
+    
+    return extractors
+
+
+def _check_version(spec: Dict) -> None:
+    version = spec.get("spec_version")
+    if version != FEATURE_SPEC_VERSION:
+        raise FeatureSpecError(
+            f"Wersja specyfikacji {version}, serwowanie obsługuje {FEATURE_SPEC_VERSION}"
+        )
+
+
+def _check_features(name: str, scaler, expected: int) -> None:
+    """Porównuje liczbę cech scalera z liczbą kolumn specyfikacji"""
+    actual = getattr(scaler, "n_features_in_", None)
+    if actual is not None and actual != expected:
+        raise FeatureSpecError(f"{name}: scaler ma {actual} cech, specyfikacja {expected}")
+
+
+class OccupancyFeatureSpec:
+    """
+    Specyfikacja wejścia LSTM obłożenia
+    
+    Args:
+        spec: Słownik "feature_spec" z lstm_metadata_*.json
+    """
+    
+    def __init__(self, spec: Dict):
+        _check_version(spec)
+        
+        self.lookback_hours: int = spec["lookback_hours"]
+        self.prediction_horizon: int = spec["prediction_horizon"]
+        self.sequence_columns: List[str] = list(spec["sequence_columns"])
+        self.static_columns: List[str] = list(spec["static_columns"])
+        
+        self.static_alignment: str = spec.get("static_alignment", DEFAULT_STATIC_ALIGNMENT)
+        if self.static_alignment not in STATIC_ALIGNMENTS:
+            raise FeatureSpecError(
+                f"Wyrównanie cech statycznych '{self.static_alignment}', "
+                f"serwowanie obsługuje {', '.join(STATIC_ALIGNMENTS)}"
+            )
+        
+        windows = spec.get("aggregate_windows", AGGREGATE_WINDOWS)
+        if windows != AGGREGATE_WINDOWS or spec.get("aggregate_min_periods", 1) != 1:
+            raise FeatureSpecError(
+                f"Okna agregatów {windows} (min_periods={spec.get('aggregate_min_periods')}) "
+                f"różnią się od serwowanych {AGGREGATE_WINDOWS} (min_periods=1)"
+            )
+        
+        self._sequence = _compile(self.sequence_columns, self._compile_sequence_column)
+        self._static = _compile(self.static_columns, self._compile_static_column)
+    
+    def _compile_sequence_column(self, name: str) -> Optional[Extractor]:
+        dept = name[len("occ_"):] if name.startswith("occ_") else name
+        if dept not in DEPARTMENTS:
+            return None
+        return lambda counts: counts[dept]
+    
+    def _compile_static_column(self, name: str) -> Optional[Extractor]:
+        extractor = _time_extractor(name)
+        if extractor is not None:
+            return extractor
+        
+        parts = _split_department(name, DEPARTMENTS)
+        if parts is None:
+            return None
+        
+        aggregate, dept = parts
+        if aggregate not in ("avg_7d", "avg_30d", "std_7d", "trend_24h"):
+            return None
+        return lambda ctx: ctx["aggregates"][dept][aggregate]
+    
+    def validate(self, model, seq_scaler, static_scaler, target_scaler) -> None:
+        """
+        Sprawdza zgodność specyfikacji z modelem i scalerami
+        
+        Raises:
+            FeatureSpecError: Przy niezgodności kształtów
+        """
+        _check_features("seq_scaler", seq_scaler, len(self.sequence_columns))
+        _check_features("static_scaler", static_scaler, len(self.static_columns))
+        _check_features("target_scaler", target_scaler, len(self.sequence_columns))
+        
+        inputs = getattr(model, "inputs", None)
+        if not inputs or len(inputs) != 2:
+            raise FeatureSpecError("Model LSTM powinien mieć dwa wejścia (sekwencja, cechy statyczne)")
+        
+        seq_shape = tuple(inputs[0].shape[1:])
+        static_shape = tuple(inputs[1].shape[1:])
+        
+        if seq_shape != (self.lookback_hours, len(self.sequence_columns)):
+            raise FeatureSpecError(
+                f"Wejście sekwencji modelu {seq_shape}, specyfikacja "
+                f"({self.lookback_hours}, {len(self.sequence_columns)})"
+            )
+        if static_shape != (len(self.static_columns),):
+            raise FeatureSpecError(
+                f"Wejście statyczne modelu {static_shape}, specyfikacja ({len(self.static_columns)},)"
+            )
+    
+    def build_static_after(
+        self,
+        last_hour: datetime,
+        aggregates: RollingAggregates,
+        counts: Dict[str, int]
+    ) -> np.ndarray:
+        """
+        Cechy statyczne dla okna kończącego się na last_hour (static_alignment)
+        
+        Wiersz to godzina po oknie, jak wiersz i w trenerze. Jej obłożenie
+        nie jest jeszcze domknięte - do agregatów (kopii) trafia bieżące
+        obłożenie, czyli ostatnia znana wartość tej godziny.
+        
+        Args:
+            last_hour: Ostatnia godzina sekwencji
+            aggregates: Agregaty kroczące na last_hour
+            counts: Bieżące obłożenie {"SOR": 18, ...}
+        
+        Raises:
+            ValueError: Jeśli agregaty nie kończą się na last_hour
+        """
+        if aggregates.last_hour != last_hour:
+            raise ValueError(
+                f"Agregaty na {aggregates.last_hour}, okno kończy się na {last_hour}"
+            )
+        
+        hour = last_hour + timedelta(hours=1)
+        row = aggregates.copy()
+        row.push(hour, counts)
+        return self.build_static(hour, row)
+    
+    def build_sequence(self, history: List[Tuple[datetime, Dict[str, int]]]) -> np.ndarray:
+        """
+        Sekwencja (lookback_hours, n_seq) z godzinowej historii
+        
+        Args:
+            history: Lista (godzina, {"SOR": 18, ...}) rosnąco, min. lookback_hours
+        """
+        recent = history[-self.lookback_hours:]
+        return np.array(
+            [[f(counts) for f in self._sequence] for _, counts in recent],
+            dtype=np.float32
+        )
+    
+    def build_static(self, timestamp: datetime, aggregates: RollingAggregates) -> np.ndarray:
+        """
+        Wektor cech statycznych (n_static,)
+        
+        Args:
+            timestamp: Godzina wiersza cech statycznych
+            aggregates: Agregaty kroczące obejmujące tę godzinę
+        """
+        ctx = {"time": timestamp, "aggregates": aggregates.aggregates()}
+        return np.fromiter((f(ctx) for f in self._static), dtype=np.float32, count=len(self._static))
+
+
+class AllocationFeatureSpec:
+    """
+    Specyfikacja wejścia modelu alokacji
+    
+    Args:
+        spec: Słownik "feature_spec" z allocation_artifacts_*.pkl
+    """
+    
+    # Pola pacjenta: kolumna treningowa -> (klucz danych serwowania, domyślna wartość)
+    PATIENT_FIELDS = {
+        "wiek": ("wiek", None),
+        "tętno": ("tetno", None),
+        "ciśnienie_skurczowe": ("cisnienie_skurczowe", None),
+        "ciśnienie_rozkurczowe": ("cisnienie_rozkurczowe", None),
+        "temperatura": ("temperatura", None),
+        "saturacja": ("saturacja", None),
+        "GCS": ("gcs", 15),
+        "ból": ("bol", 0),
+        "częstotliwość_oddechów": ("czestotliwosc_oddechow", 18),
+        "czas_od_objawów_h": ("czas_od_objawow_h", 0),
+    }
+    
+    def __init__(self, spec: Dict):
+        _check_version(spec)
+        
+        self.columns: List[str] = list(spec["columns"])
+        self.departments: List[str] = list(spec["departments"])
+        self.capacity: Dict[str, int] = dict(spec["capacity"])
+        self.overcrowded_threshold: float = spec.get("overcrowded_threshold", 0.8)
+        self.compatibility: Dict[str, List[str]] = spec.get("compatibility", {})
+        self.future_horizon_hours: int = spec.get("future_horizon_hours", 1)
+        self.template_prefix: str = spec.get("template_prefix", "szablon_")
+        
+        self._extractors = _compile(self.columns, self._compile_column)
+    
+    @classmethod
+    def legacy(cls, feature_columns: List[str], departments: List[str], capacity: Dict[str, int]) -> "AllocationFeatureSpec":
+        """Specyfikacja dla artefaktów bez feature_spec (tylko lista kolumn)"""
+        return cls({
+            "spec_version": FEATURE_SPEC_VERSION,
+            "columns": feature_columns,
+            "departments": departments,
+            "capacity": capacity
+        })
+    
+    def _compile_column(self, name: str) -> Optional[Extractor]:
+        if name in self.PATIENT_FIELDS:
+            key, default = self.PATIENT_FIELDS[name]
+            return lambda ctx: ctx["patient"].get(key, default)
+        
+        if name == "płeć_encoded":
+            return lambda ctx: int(ctx["patient"].get("plec") == "M")
+        if name == "kategoria_triażu":
+            return lambda ctx: ctx["category"]
+        if name == "is_high_priority":
+            return lambda ctx: int(ctx["category"] <= 2)
+        
+        if name.startswith(self.template_prefix):
+            template = name[len(self.template_prefix):]
+            return lambda ctx: int(ctx["patient"].get("szablon_przypadku") == template)
+        
+        extractor = _time_extractor(name)
+        if extractor is not None:
+            return extractor
+        
+        summaries = {
+            "avg_occupancy": lambda ctx: float(np.mean(ctx["occ"])),
+            "max_occupancy_pct": lambda ctx: float(np.max(ctx["occ_pct"])),
+            "avg_future_occupancy": lambda ctx: float(np.mean(ctx["future"])),
+            "max_future_occ_pct": lambda ctx: float(np.max(ctx["future_pct"])),
+        }
+        if name in summaries:
+            return summaries[name]
+        
+        parts = _split_department(name, self.departments)
+        if parts is None:
+            return None
+        
+        prefix, dept = parts
+        i = self.departments.index(dept)
+        
+        per_department = {
+            "occ": lambda ctx: ctx["occ"][i],
+            "occ_pct": lambda ctx: ctx["occ_pct"][i],
+            "overcrowded": lambda ctx: int(ctx["occ_pct"][i] > self.overcrowded_threshold),
+            "future_occ": lambda ctx: ctx["future"][i],
+            "future_occ_pct": lambda ctx: ctx["future_pct"][i],
+            "delta_occ": lambda ctx: ctx["future"][i] - ctx["occ"][i],
+            "compat": lambda ctx: int(dept in ctx["compatible"]),
+        }
+        return per_department.get(prefix)
+    
+    def validate(self, model, scaler) -> None:
+        """
+        Sprawdza zgodność specyfikacji z modelem i scalerem
+        
+        Raises:
+            FeatureSpecError: Przy niezgodności liczby cech
+        """
+        _check_features("scaler", scaler, len(self.columns))
+        _check_features("model", model, len(self.columns))
+    
+    def build_row(
+        self,
+        patient_data: Dict,
+        triage_category: int,
+        current_occupancy: Dict[str, int],
+        future_occupancy: Dict[str, Dict[str, int]],
+        now: Optional[datetime] = None
+    ) -> np.ndarray:
+        """
+        Wiersz cech (1, n_features) w kolejności columns
+        
+        Prognoza dla oddziału to wartość "hour_{future_horizon_hours}"
+        (jak predykcja LSTM użyta w treningu), a bez prognozy - obecne
+        obłożenie.
+        """
+        capacity = np.array([self.capacity[d] for d in self.departments], dtype=np.float64)
+        occ = np.array([current_occupancy.get(d, 0) for d in self.departments], dtype=np.float64)
+        
+        horizon_key = f"hour_{self.future_horizon_hours}"
+        future = np.array([
+            future_occupancy.get(d, {}).get(horizon_key, current_occupancy.get(d, 0))
+            for d in self.departments
+        ], dtype=np.float64)
+        
+        ctx = {
+            "patient": patient_data,
+            "category": triage_category,
+            "time": now or datetime.now(),
+            "occ": occ,
+            "occ_pct": occ / capacity,
+            "future": future,
+            "future_pct": future / capacity,
+            "compatible": set(self.compatibility.get(patient_data.get("szablon_przypadku"), [])),
+        }
+        
+        row = np.fromiter(
+            (f(ctx) for f in self._extractors),
+            dtype=np.float64,
+            count=len(self._extractors)
+        )
+        return row.reshape(1, -1)
@@ -4,6 +4,7 @@ from fastapi import HTTPException, status
 
 from app.ml.model_loader import model_loader
 from app.ml.preprocessor import preprocessor
+from app.utils.response_cache import response_cache, SCOPE_MODEL
 
 class TriagePredictor:
     """Klasa do wykonywania predykcji triaży"""
@@ -25,6 +26,9 @@ class TriagePredictor:
             print(f"Błąd ładowania modelu: {e}")
             print("  Predictor będzie działał bez modelu (tylko dla testów)")
             self.model = None
+        
+        # Odpowiedzi /model-info, /feature-importance itp. zależą od modelu
+        response_cache.invalidate(SCOPE_MODEL)
     
     def predict(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
         """Wykonuje predykcję kategorii triaży"""
@@ -117,23 +121,56 @@ class TriagePredictor:
         """
         Wykonuje predykcję dla wielu pacjentów
         
+        Poprawne wiersze są przetwarzane jednym transform_batch i jednym
+        predict_proba na całej macierzy cech.
+        
         Args:
             patients_data: Lista danych pacjentów
             
         Returns:
-            Lista wyników predykcji
+            Lista wyników predykcji (w kolejności wejścia); dla błędnych
+            wierszy {"error": ..., "status_code": ...}
         """
-        results = []
-        
-        for patient_data in patients_data:
-            try:
-                result = self.predict(patient_data)
-                results.append(result)
-            except HTTPException as e:
-                results.append({
-                    "error": e.detail,
-                    "status_code": e.status_code
-                })
+        if self.model is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="ML model not loaded. Check server logs for details."
+            )
+        
+        results: list = [None] * len(patients_data)
+        valid = []
+        
+        for i, patient_data in enumerate(patients_data):
+            is_valid, error_message = preprocessor.validate_input(patient_data)
+            if is_valid:
+                valid.append(i)
+            else:
+                results[i] = {
+                    "error": f"Invalid patient data: {error_message}",
+                    "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY
+                }
+        
+        if not valid:
+            return results
+        
+        try:
+            X = preprocessor.transform_batch([patients_data[i] for i in valid])
+            probabilities = self.model.predict_proba(X)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Model prediction failed: {str(e)}"
+            )
+        
+        categories = self.model.classes_[np.argmax(probabilities, axis=1)]
+        
+        for i, category, row in zip(valid, categories, probabilities):
+            results[i] = {
+                "category": int(category),
+                "probabilities": {str(k): float(p) for k, p in enumerate(row[:5], 1)},
+                "confidence": float(row.max()),
+                "model_version": self.model_version
+            }
         
         return results
     
@@ -2,7 +2,7 @@ import sys
 from pathlib import Path
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
@@ -134,9 +134,9 @@ class TriagePreprocessor:
         print(f"    Model będzie decydował TYLKO na parametrach życiowych!")
         return None
     
-    def _create_numerical_dataframe(self, data: Dict[str, Any]) -> pd.DataFrame:
+    def _numerical_values(self, data: Dict[str, Any]) -> Dict[str, float]:
         """
-        Tworzy DataFrame z cechami numerycznymi (10 cech)
+        Wartości cech numerycznych (10 cech) dla jednego pacjenta
         """
         # Mapowanie nazw z bazy na nazwy preprocessingu
         field_mapping = {
@@ -170,8 +170,13 @@ class TriagePreprocessor:
             else:
                 numerical_data[feature] = 0.0
         
-        df = pd.DataFrame([numerical_data])
-        return df
+        return numerical_data
+    
+    def _create_numerical_dataframe(self, data: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Tworzy DataFrame z cechami numerycznymi (10 cech)
+        """
+        return pd.DataFrame([self._numerical_values(data)])
     
     def _one_hot_encode_gender(self, gender: str) -> pd.DataFrame:
         """
@@ -243,6 +248,32 @@ class TriagePreprocessor:
         
         return df_final
     
+    def transform_batch(self, patients_data: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Przetwarza wielu pacjentów naraz - jeden DataFrame (n, 26)
+        
+        Te same cechy i kolejność co transform(), ale wiersze są składane
+        jako listy i zamieniane na DataFrame raz, zamiast trzech małych
+        DataFrame'ów i concat na każdego pacjenta.
+        
+        Args:
+            patients_data: Lista słowników z danymi pacjentów
+            
+        Returns:
+            DataFrame gotowy do predykcji (wiersz na pacjenta)
+        """
+        rows = []
+        for patient_data in patients_data:
+            numerical = self._numerical_values(patient_data)
+            template = self._normalize_template_name(patient_data.get('szablon_przypadku', None))
+            
+            row = [numerical[feature] for feature in self.numerical_features]
+            row.append(1 if patient_data.get('plec', 'M') == 'M' else 0)
+            row.extend(1 if template == t else 0 for t in self.templates)
+            rows.append(row)
+        
+        return pd.DataFrame(rows, columns=self.get_feature_names())
+    
     def get_feature_names(self) -> list:
         """
         Zwraca listę wszystkich nazw cech po preprocessingu
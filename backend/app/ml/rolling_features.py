@@ -0,0 +1,203 @@
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Oddziały w kolejności używanej przez trenera LSTM
+DEPARTMENTS = ["SOR", "Interna", "Kardiologia", "Chirurgia",
+               "Ortopedia", "Neurologia", "Pediatria", "Ginekologia"]
+
+# Okna w godzinach - jak w create_aggregate_features
+WINDOW_7D = 168
+WINDOW_30D = 720
+TREND_LAG = 24
+
+TIME_COLUMNS = ['hour', 'day_of_week', 'month', 'day_of_month', 'is_weekend', 'is_night']
+
+# Kolumny statyczne w kolejności z create_sequences (train_occupancy_forecasting)
+STATIC_COLUMNS = TIME_COLUMNS + [
+    f'{dept}_{name}'
+    for dept in DEPARTMENTS
+    for name in ('avg_7d', 'avg_30d', 'std_7d')
+]
+
+
+class RollingWindow:
+    """
+    Okno kroczące wartości godzinowych jednego oddziału
+    
+    Trzyma ostatnie WINDOW_30D wartości w buforze cyklicznym oraz sumy
+    (i sumę kwadratów dla 7 dni) liczone na bieżąco, więc dodanie godziny
+    i odczyt agregatów to O(1). Wartości to liczby całkowite, a sumy to
+    int Pythona, więc nie ma błędu akumulacji przy długim działaniu.
+    """
+    
+    def __init__(self):
+        self.values: List[int] = [0] * WINDOW_30D
+        self.head = 0
+        self.count = 0
+        self.sum_7d = 0
+        self.sumsq_7d = 0
+        self.sum_30d = 0
+    
+    def back(self, steps: int) -> int:
+        """Wartość sprzed `steps` godzin (0 = ostatnia)"""
+        return self.values[(self.head - 1 - steps) % WINDOW_30D]
+    
+    def push(self, value: int) -> None:
+        """Dodaje wartość kolejnej godziny"""
+        value = int(value)
+        
+        if self.count >= WINDOW_7D:
+            leaving = self.back(WINDOW_7D - 1)
+            self.sum_7d -= leaving
+            self.sumsq_7d -= leaving * leaving
+        
+        if self.count >= WINDOW_30D:
+            self.sum_30d -= self.back(WINDOW_30D - 1)
+        
+        self.values[self.head] = value
+        self.head = (self.head + 1) % WINDOW_30D
+        self.count = min(self.count + 1, WINDOW_30D)
+        
+        self.sum_7d += value
+        self.sumsq_7d += value * value
+        self.sum_30d += value
+    
+    def aggregates(self) -> Dict[str, float]:
+        """
+        Agregaty jak w trenerze (rolling z min_periods=1)
+        
+        Returns:
+            {"avg_7d", "avg_30d", "std_7d", "trend_24h"}; std_7d to
+            odchylenie próbkowe (ddof=1), 0 dla jednej wartości; trend_24h
+            to różnica z wartością sprzed 24h, 0 przy krótszej historii
+        """
+        if self.count == 0:
+            return {"avg_7d": 0.0, "avg_30d": 0.0, "std_7d": 0.0, "trend_24h": 0.0}
+        
+        n_7d = min(self.count, WINDOW_7D)
+        mean_7d = self.sum_7d / n_7d
+        
+        std_7d = 0.0
+        if n_7d > 1:
+            variance = (self.sumsq_7d - self.sum_7d * self.sum_7d / n_7d) / (n_7d - 1)
+            std_7d = math.sqrt(max(variance, 0.0))
+        
+        trend = 0.0
+        if self.count > TREND_LAG:
+            trend = float(self.back(0) - self.back(TREND_LAG))
+        
+        return {
+            "avg_7d": mean_7d,
+            "avg_30d": self.sum_30d / self.count,
+            "std_7d": std_7d,
+            "trend_24h": trend
+        }
+    
+    def to_state(self) -> Dict:
+        """Stan do zapisu (JSON)"""
+        return {
+            "values": self.values,
+            "head": self.head,
+            "count": self.count,
+            "sum_7d": self.sum_7d,
+            "sumsq_7d": self.sumsq_7d,
+            "sum_30d": self.sum_30d
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> "RollingWindow":
+        """Odtwarza okno z to_state()"""
+        window = cls()
+        window.values = [int(v) for v in state["values"]]
+        window.head = state["head"]
+        window.count = state["count"]
+        window.sum_7d = state["sum_7d"]
+        window.sumsq_7d = state["sumsq_7d"]
+        window.sum_30d = state["sum_30d"]
+        return window
+
+
+class RollingAggregates:
+    """
+    Agregaty kroczące obłożenia wszystkich oddziałów
+    
+    Odpowiednik create_aggregate_features z trenera liczony przyrostowo:
+    każda pełna godzina obłożenia to jedno push(), a wektor cech
+    statycznych dla modelu jest składany bez czytania historii.
+    """
+    
+    def __init__(self):
+        self.windows: Dict[str, RollingWindow] = {dept: RollingWindow() for dept in DEPARTMENTS}
+        self.last_hour: Optional[datetime] = None
+    
+    def push(self, hour: datetime, counts: Dict[str, int]) -> None:
+        """
+        Dodaje obłożenie kolejnej pełnej godziny
+        
+        Args:
+            hour: Godzina (bucket)
+            counts: Obłożenie {"SOR": 18, ...}
+        """
+        for dept, window in self.windows.items():
+            window.push(counts.get(dept, 0))
+        self.last_hour = hour
+    
+    def last_counts(self) -> Dict[str, int]:
+        """Obłożenie ostatniej dodanej godziny (do wypełniania luk)"""
+        return {dept: window.back(0) for dept, window in self.windows.items()}
+    
+    def copy(self) -> "RollingAggregates":
+        """Niezależna kopia (bufory nie są współdzielone)"""
+        return RollingAggregates.from_state(self.to_state(), self.last_hour)
+    
+    def aggregates(self) -> Dict[str, Dict[str, float]]:
+        """Agregaty każdego oddziału: {"SOR": {"avg_7d": ..., ...}, ...}"""
+        return {dept: window.aggregates() for dept, window in self.windows.items()}
+    
+    def static_features(self, timestamp: datetime) -> Dict[str, float]:
+        """
+        Cechy statyczne w układzie STATIC_COLUMNS
+        
+        Args:
+            timestamp: Chwila, dla której budujemy cechy czasowe
+        
+        Returns:
+            {nazwa kolumny: wartość}
+        """
+        hour = timestamp.hour
+        day_of_week = timestamp.weekday()
+        
+        features = {
+            'hour': hour,
+            'day_of_week': day_of_week,
+            'month': timestamp.month,
+            'day_of_month': timestamp.day,
+            'is_weekend': int(day_of_week >= 5),
+            'is_night': int(hour < 6 or hour >= 22)
+        }
+        
+        for dept, aggregates in self.aggregates().items():
+            for name, value in aggregates.items():
+                features[f'{dept}_{name}'] = value
+        
+        return features
+    
+    def static_vector(self, timestamp: datetime) -> List[float]:
+        """Cechy statyczne jako lista w kolejności STATIC_COLUMNS"""
+        features = self.static_features(timestamp)
+        return [features[column] for column in STATIC_COLUMNS]
+    
+    def to_state(self) -> Dict:
+        """Stan do zapisu (JSON)"""
+        return {dept: window.to_state() for dept, window in self.windows.items()}
+    
+    @classmethod
+    def from_state(cls, state: Dict, last_hour: Optional[datetime]) -> "RollingAggregates":
+        """Odtwarza agregaty z to_state()"""
+        aggregates = cls()
+        for dept in DEPARTMENTS:
+            if dept in state:
+                aggregates.windows[dept] = RollingWindow.from_state(state[dept])
+        aggregates.last_hour = last_hour
+        return aggregates
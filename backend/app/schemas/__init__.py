@@ -16,6 +16,8 @@ from app.schemas.triage import (
     TriagePredictionResponse,
     TriagePredictRequest,
     TriagePredictResponse,
+    TriageBatchPredictRequest,
+    TriageBatchPredictResponse,
     TriageStatsResponse,
     DailyTriageStats,
     CategoryDistribution,
@@ -23,7 +25,8 @@ from app.schemas.triage import (
     TriagePreviewRequest,
     TriagePreviewResponse,
     TriageConfirmRequest,
-    TriageConfirmResponse
+    TriageConfirmResponse,
+    BulkIntakeRow
 )
 from app.schemas.department import (
     DepartmentOccupancyBase,
@@ -71,6 +74,8 @@ __all__ = [
     "TriagePredictionResponse",
     "TriagePredictRequest",
     "TriagePredictResponse",
+    "TriageBatchPredictRequest",
+    "TriageBatchPredictResponse",
     "TriageStatsResponse",
     "DailyTriageStats",
     "CategoryDistribution",
@@ -79,6 +84,7 @@ __all__ = [
     "TriagePreviewResponse",
     "TriageConfirmRequest",
     "TriageConfirmResponse",
+    "BulkIntakeRow",
     # Department
     "DepartmentOccupancyBase",
     "DepartmentOccupancyCreate",
@@ -39,3 +39,4 @@ class AuditLogFilter(BaseModel):
     date_to: Optional[datetime] = None
     limit: int = 100
     offset: int = 0
+    cursor: Optional[str] = None  # Kursor keyset - gdy podany, offset jest ignorowany
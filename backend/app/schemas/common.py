@@ -5,10 +5,11 @@ DataT = TypeVar('DataT')
 
 class PaginatedResponse(BaseModel, Generic[DataT]):
     items: List[DataT]
-    total: int
+    total: Optional[int] = None  # None gdy count=none
     page: int
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Kursor następnej strony (keyset)
 
 class MessageResponse(BaseModel):
     message: str
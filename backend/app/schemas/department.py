@@ -55,6 +55,7 @@ class OccupancyHistory(BaseModel):
     average_occupancy: float
     peak_occupancy: int
     peak_timestamp: datetime
+    resolution: Optional[str] = None  # raw, hour lub day
 
 class DepartmentStats(BaseModel):
     """Statystyki oddziału"""
@@ -65,3 +66,6 @@ class DepartmentStats(BaseModel):
     patients_last_24h: int
     avg_stay_duration_hours: Optional[float]
     peak_hours: list[int]  
+    typical_occupancy: Optional[float] = None  # średnia dla tej godziny tygodnia
+    typical_range: Optional[list[int]] = None  # [p10, p90] dla tej godziny tygodnia
+    is_anomaly: bool = False
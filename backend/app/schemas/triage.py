@@ -45,6 +45,21 @@ class TriagePredictResponse(BaseModel):
     confidence_score: Optional[float]
     model_version: Optional[str]
 
+class TriageBatchPredictRequest(BaseModel):
+    """Request predykcji dla istniejących pacjentów bez predykcji"""
+    patient_ids: Optional[List[int]] = Field(None, max_length=10000, description="Konkretni pacjenci (domyślnie wszyscy bez predykcji)")
+    after_id: int = Field(0, ge=0, description="Kursor - tylko pacjenci o ID większym")
+    limit: int = Field(1000, ge=1, le=10000, description="Maksymalna liczba pacjentów w wywołaniu")
+
+class TriageBatchPredictResponse(BaseModel):
+    """Wynik predykcji wsadowej"""
+    processed: int = Field(..., description="Przetworzeni pacjenci")
+    predicted: int = Field(..., description="Zapisane predykcje")
+    skipped: int = Field(..., description="Pominięci - predykcja zapisana w międzyczasie")
+    invalid_patient_ids: List[int] = Field(default_factory=list, description="Pacjenci z danymi odrzuconymi przez model")
+    last_patient_id: Optional[int] = Field(None, description="Kursor dla następnego wywołania (after_id)")
+    has_more: bool
+
 class TriageStatsResponse(BaseModel):
     """Statystyki triaży"""
     total_patients: int
@@ -150,3 +165,10 @@ class TriageConfirmResponse(BaseModel):
     was_modified: bool
     original_category: Optional[int] = None
     original_department: Optional[str] = None
+
+
+class BulkIntakeRow(TriagePreviewRequest):
+    """Wiersz masowej rejestracji (NDJSON/CSV) - dane pacjenta + opcjonalne nadpisania"""
+    # Gdy puste, używana jest predykcja modeli (triaż + alokacja)
+    kategoria_triazu: Optional[int] = Field(None, ge=1, le=5)
+    przypisany_oddzial: Optional[str] = None
@@ -1,11 +1,16 @@
 from app.services.auth_service import AuthService
 from app.services.patient_service import PatientService
 from app.services.triage_service import TriageService
-from app.services.department_service import DepartmentService
+from app.services.department_service import DepartmentService, occupancy_monitor
 from app.services.audit_service import AuditService, log_action
 from app.services.occupancy_service import OccupancyService, occupancy_predictor
 from app.services.allocation_service import AllocationService, allocation_predictor
 from app.services.orchestrator_service import TriageOrchestrator
+from app.services.search_service import SearchService
+from app.services.queue_service import WaitingQueue, waiting_queue
+from app.services.analytics_service import AnalyticsService
+from app.services.intake_service import BulkIntakeService
+from app.services.backfill_service import PredictionBackfillService
 
 __all__ = [
     "AuthService",
@@ -17,6 +22,13 @@ __all__ = [
     "OccupancyService",
     "AllocationService", 
     "TriageOrchestrator",
+    "SearchService",
+    "WaitingQueue",
+    "AnalyticsService",
+    "BulkIntakeService",
+    "PredictionBackfillService",
     "occupancy_predictor",
-    "allocation_predictor"
+    "allocation_predictor",
+    "occupancy_monitor",
+    "waiting_queue"
 ]
@@ -3,10 +3,9 @@ from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import pickle
 import numpy as np
-import pandas as pd
-from datetime import datetime
 
 from app.core.config import settings
+from app.ml.feature_spec import AllocationFeatureSpec
 
 DEPARTMENTS = ["SOR", "Interna", "Kardiologia", "Chirurgia", "Ortopedia", "Neurologia"]
 
@@ -27,6 +26,7 @@ class AllocationPredictor:
         self.scaler = None
         self.label_encoder = None
         self.feature_columns = None
+        self.spec: Optional[AllocationFeatureSpec] = None
         self.model_version = None
         self.model_path = Path(settings.MODEL_PATH)
     
@@ -68,18 +68,33 @@ class AllocationPredictor:
         self.feature_columns = artifacts['feature_columns']
         self.model_version = artifacts.get('model_version', '3.0.0')
         
+        if 'feature_spec' in artifacts:
+            self.spec = AllocationFeatureSpec(artifacts['feature_spec'])
+        else:
+            self.spec = AllocationFeatureSpec.legacy(
+                self.feature_columns,
+                artifacts.get('departments', DEPARTMENTS),
+                DEPARTMENT_CAPACITY
+            )
+        self.spec.validate(self.model, self.scaler)
+        
         print(f" Model v{self.model_version} gotowy do użycia")
         print(f" Liczba cech: {len(self.feature_columns)}")
     
+    @property
+    def future_horizon_hours(self) -> int:
+        """Za ile godzin prognoza obłożenia jest cechą modelu (jak w treningu)"""
+        return self.spec.future_horizon_hours if self.spec else 1
+    
     def prepare_features(
         self,
         patient_data: Dict,
         triage_category: int,
         current_occupancy: Dict[str, int],
         future_occupancy: Dict[str, Dict[str, int]]
-    ) -> pd.DataFrame:
+    ) -> np.ndarray:
         """
-        Przygotowuje cechy dla modelu alokacji
+        Przygotowuje cechy dla modelu alokacji wg specyfikacji cech
         
         Args:
             patient_data: Dane pacjenta (wiek, płeć, parametry vitalne, etc.)
@@ -88,79 +103,14 @@ class AllocationPredictor:
             future_occupancy: Prognozy obłożenia z Model 2
             
         Returns:
-            DataFrame z cechami gotowymi do predykcji
+            Wiersz cech (1, n_features) w kolejności feature_columns
         """
-        features = {}
-        
-        features['wiek'] = patient_data['wiek']
-        features['płeć_encoded'] = 1 if patient_data['plec'] == 'M' else 0
-        features['kategoria_triażu'] = triage_category
-        features['tętno'] = patient_data['tetno']
-        features['ciśnienie_skurczowe'] = patient_data['cisnienie_skurczowe']
-        features['ciśnienie_rozkurczowe'] = patient_data['cisnienie_rozkurczowe']
-        features['temperatura'] = patient_data['temperatura']
-        features['saturacja'] = patient_data['saturacja']
-        features['GCS'] = patient_data.get('gcs', 15)
-        features['ból'] = patient_data.get('bol', 0)
-        features['częstotliwość_oddechów'] = patient_data.get('czestotliwosc_oddechow', 18)
-        features['czas_od_objawów_h'] = patient_data.get('czas_od_objawow_h', 0)
-        
-        now = datetime.now()
-        features['godzina'] = now.hour
-        features['dzien_tygodnia'] = now.weekday()
-        features['miesiac'] = now.month
-        features['czy_weekend'] = 1 if now.weekday() >= 5 else 0
-        
-        for dept in DEPARTMENTS:
-            occ = current_occupancy.get(dept, 0)
-            capacity = DEPARTMENT_CAPACITY[dept]
-            
-            features[f'occ_{dept}'] = occ
-            features[f'occ_pct_{dept}'] = (occ / capacity) * 100
-            features[f'overcrowded_{dept}'] = 1 if (occ / capacity) > 0.8 else 0
-        
-        for dept in DEPARTMENTS:
-            dept_forecast = future_occupancy.get(dept, {})
-            capacity = DEPARTMENT_CAPACITY[dept]
-            
-            # Za 1h
-            future_1h = dept_forecast.get('hour_1', current_occupancy.get(dept, 0))
-            features[f'future_occ_1h_{dept}'] = future_1h
-            features[f'future_pct_1h_{dept}'] = (future_1h / capacity) * 100
-            
-            # Za 3h
-            future_3h = dept_forecast.get('hour_3', current_occupancy.get(dept, 0))
-            features[f'future_occ_3h_{dept}'] = future_3h
-            features[f'future_pct_3h_{dept}'] = (future_3h / capacity) * 100
-            
-            # Delta (zmiana obłożenia)
-            features[f'delta_occ_{dept}'] = future_3h - current_occupancy.get(dept, 0)
-        
-        for dept in DEPARTMENTS:
-            features[f'oddział_{dept}'] = 0  # Wypełnimy later w pętli predykcji
-        
-        szablon = patient_data.get('szablon_przypadku')
-        
-        all_templates = [
-            'ból_brzucha_łagodny', 'infekcja_moczu', 'kontrola', 'migrena',
-            'przeziębienie', 'receptura', 'silne_krwawienie', 'skręcenie_lekkie',
-            'udar_ciężki', 'uraz_wielonarządowy', 'zaostrzenie_astmy',
-            'zapalenie_płuc_ciężkie', 'zapalenie_wyrostka', 'zawał_STEMI',
-            'złamanie_proste'
-        ]
-        
-        for template in all_templates:
-            features[f'szablon_{template}'] = 1 if szablon == template else 0
-        
-        df = pd.DataFrame([features])
-        
-        for col in self.feature_columns:
-            if col not in df.columns:
-                df[col] = 0
-        
-        df = df[self.feature_columns]
-        
-        return df
+        return self.spec.build_row(
+            patient_data,
+            triage_category,
+            current_occupancy,
+            future_occupancy
+        )
     
     def predict_department(
         self,
@@ -189,51 +139,84 @@ class AllocationPredictor:
                 ]
             }
         """
-        if self.model is None:
-            raise RuntimeError("Model nie został wczytany! Wywołaj load_model() najpierw.")
-        
-        X = self.prepare_features(
-            patient_data,
-            triage_category,
+        return self.predict_departments(
+            [patient_data],
+            [triage_category],
             current_occupancy,
             future_occupancy
-        )
+        )[0]
+    
+    def predict_departments(
+        self,
+        patients_data: List[Dict],
+        triage_categories: List[int],
+        current_occupancy: Dict[str, int],
+        future_occupancy: Dict[str, Dict[str, int]]
+    ) -> List[Dict]:
+        """
+        Przewiduje oddziały dla wielu pacjentów jednym wywołaniem modelu
         
-        X_scaled = self.scaler.transform(X)
+        Wiersze cech są składane w jedną macierz, skalowane i przepuszczane
+        przez model raz. Obłożenie i prognozy są wspólne dla wszystkich
+        pacjentów (stan w chwili wywołania).
         
-        y_pred = self.model.predict(X_scaled)[0]
-        y_proba = self.model.predict_proba(X_scaled)[0]
+        Args:
+            patients_data: Dane pacjentów
+            triage_categories: Kategorie triażu (w tej samej kolejności)
+            current_occupancy: Obecne obłożenie
+            future_occupancy: Prognozy obłożenia
+            
+        Returns:
+            Lista wyników jak w predict_department (w kolejności wejścia)
+        """
+        if self.model is None:
+            raise RuntimeError("Model nie został wczytany! Wywołaj load_model() najpierw.")
         
-        department = self.label_encoder.inverse_transform([y_pred])[0]
-        confidence = float(y_proba.max())
+        if not patients_data:
+            return []
         
-        probabilities = {
-            self.label_encoder.inverse_transform([i])[0]: float(prob)
-            for i, prob in enumerate(y_proba)
-        }
+        X = np.vstack([
+            self.prepare_features(
+                patient_data,
+                triage_category,
+                current_occupancy,
+                future_occupancy
+            )
+            for patient_data, triage_category in zip(patients_data, triage_categories)
+        ])
         
-        alternatives = []
-        sorted_indices = np.argsort(y_proba)[::-1][1:4]  
+        X_scaled = self.scaler.transform(X)
         
-        for idx in sorted_indices:
-            alt_dept = self.label_encoder.inverse_transform([idx])[0]
-            alt_conf = float(y_proba[idx])
+        y_pred = self.model.predict(X_scaled)
+        y_proba = self.model.predict_proba(X_scaled)
+        
+        departments = self.label_encoder.inverse_transform(y_pred)
+        labels = self.label_encoder.inverse_transform(np.arange(y_proba.shape[1]))
+        
+        results = []
+        for department, row in zip(departments, y_proba):
+            alternatives = []
+            for idx in np.argsort(row)[::-1][1:4]:
+                alt_dept = labels[idx]
+                capacity = DEPARTMENT_CAPACITY.get(alt_dept, 30)
+                
+                alternatives.append({
+                    "name": alt_dept,
+                    "confidence": float(row[idx]),
+                    "current_occupancy": current_occupancy.get(alt_dept, 0),
+                    "capacity": capacity,
+                    "percentage": round((current_occupancy.get(alt_dept, 0) / capacity) * 100)
+                })
             
-            alternatives.append({
-                "name": alt_dept,
-                "confidence": alt_conf,
-                "current_occupancy": current_occupancy.get(alt_dept, 0),
-                "capacity": DEPARTMENT_CAPACITY.get(alt_dept, 30),
-                "percentage": round((current_occupancy.get(alt_dept, 0) / DEPARTMENT_CAPACITY.get(alt_dept, 30)) * 100)
+            results.append({
+                "department": department,
+                "confidence": float(row.max()),
+                "probabilities": {label: float(prob) for label, prob in zip(labels, row)},
+                "alternatives": alternatives,
+                "model_version": self.model_version
             })
         
-        return {
-            "department": department,
-            "confidence": confidence,
-            "probabilities": probabilities,
-            "alternatives": alternatives,
-            "model_version": self.model_version
-        }
+        return results
     
     def get_model_info(self) -> dict:
         """Zwraca informacje o modelu"""
@@ -0,0 +1,463 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Table, Column, Integer, String, DateTime, Float, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Optional, Dict, List
+from datetime import datetime, timedelta
+
+from app.core.database import Base
+from app.models import TriagePrediction
+from app.schemas import (
+    TriageStatsResponse,
+    DailyTriageStats,
+    CategoryDistribution,
+    TriageAnalytics
+)
+
+# Agregaty godzinowe predykcji - jeden wiersz na (godzina, kategoria, oddział, wersja modelu)
+triage_rollup_hourly = Table(
+    "triage_rollup_hourly",
+    Base.metadata,
+    Column("bucket", DateTime, primary_key=True),
+    Column("kategoria_triazu", Integer, primary_key=True),
+    Column("przypisany_oddzial", String(50), primary_key=True),
+    Column("model_version", String(50), primary_key=True),
+    Column("prediction_count", Integer, nullable=False, default=0),
+    Column("confidence_sum", Float, nullable=False, default=0),
+    Column("confidence_count", Integer, nullable=False, default=0),
+    Column("triage_seconds_sum", Float, nullable=False, default=0),
+    Column("triage_seconds_count", Integer, nullable=False, default=0),
+)
+
+# Liczba przyjętych pacjentów na godzinę (także tych bez predykcji)
+patient_rollup_hourly = Table(
+    "patient_rollup_hourly",
+    Base.metadata,
+    Column("bucket", DateTime, primary_key=True),
+    Column("patient_count", Integer, nullable=False, default=0),
+)
+
+CATEGORY_LABELS = {
+    1: "Natychmiastowy",
+    2: "Pilny",
+    3: "Stabilny",
+    4: "Niski priorytet",
+    5: "Bardzo niski"
+}
+
+
+def _hour(timestamp: datetime) -> datetime:
+    """Obcina timestamp do pełnej godziny"""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _empty_day() -> Dict:
+    """Puste sumy dla dnia bez predykcji"""
+    return {
+        "categories": {}, "confidence_sum": 0.0, "confidence_count": 0,
+        "triage_seconds_sum": 0.0, "triage_seconds_count": 0
+    }
+
+
+class AnalyticsService:
+    """
+    Analityka triaży liczona z agregatów godzinowych
+    
+    Agregaty są aktualizowane w tej samej transakcji co zapis pacjenta
+    lub predykcji (record_patient, record_prediction), więc statystyki
+    czytają kilka wierszy na godzinę zamiast skanować triage_predictions
+    i patients. Historię można przeliczyć przez backfill().
+    """
+    
+    @staticmethod
+    def record_patient(db: Session, admitted_at: Optional[datetime], delta: int = 1) -> None:
+        """
+        Dolicza (lub odejmuje) pacjenta w agregacie godzinowym
+        
+        Nie commituje - wywołujący zapisuje to razem z pacjentem.
+        
+        Args:
+            db: Sesja bazy danych
+            admitted_at: Data przyjęcia pacjenta
+            delta: 1 przy dodaniu, -1 przy usunięciu
+        """
+        stmt = pg_insert(patient_rollup_hourly).values(
+            bucket=_hour(admitted_at or datetime.now()),
+            patient_count=delta
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["bucket"],
+            set_={"patient_count": patient_rollup_hourly.c.patient_count + stmt.excluded.patient_count}
+        ))
+    
+    @staticmethod
+    def record_prediction(
+        db: Session,
+        prediction: TriagePrediction,
+        admitted_at: Optional[datetime],
+        delta: int = 1
+    ) -> None:
+        """
+        Dolicza (lub odejmuje) predykcję w agregacie godzinowym
+        
+        Nie commituje - wywołujący zapisuje to razem z predykcją.
+        
+        Args:
+            db: Sesja bazy danych
+            prediction: Predykcja (po flush, z predicted_at)
+            admitted_at: Data przyjęcia pacjenta (do czasu do triażu)
+            delta: 1 przy dodaniu, -1 przy usunięciu
+        """
+        predicted_at = prediction.predicted_at or datetime.now()
+        confidence = prediction.confidence_score
+        
+        triage_seconds = None
+        if admitted_at is not None:
+            triage_seconds = (predicted_at - admitted_at).total_seconds()
+        
+        stmt = pg_insert(triage_rollup_hourly).values(
+            bucket=_hour(predicted_at),
+            kategoria_triazu=prediction.kategoria_triazu,
+            przypisany_oddzial=prediction.przypisany_oddzial,
+            model_version=prediction.model_version,
+            prediction_count=delta,
+            confidence_sum=delta * float(confidence) if confidence is not None else 0,
+            confidence_count=delta if confidence is not None else 0,
+            triage_seconds_sum=delta * triage_seconds if triage_seconds is not None else 0,
+            triage_seconds_count=delta if triage_seconds is not None else 0
+        )
+        
+        counters = [
+            "prediction_count", "confidence_sum", "confidence_count",
+            "triage_seconds_sum", "triage_seconds_count"
+        ]
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["bucket", "kategoria_triazu", "przypisany_oddzial", "model_version"],
+            set_={c: triage_rollup_hourly.c[c] + stmt.excluded[c] for c in counters}
+        ))
+    
+    @staticmethod
+    def record_batch(
+        db: Session,
+        admitted: List[datetime],
+        predictions: List[Dict]
+    ) -> None:
+        """
+        Dolicza wielu pacjentów i predykcji (np. z masowej rejestracji)
+        
+        Liczniki są najpierw sumowane w pamięci per kubełek, a potem
+        zapisywane jednym wielowierszowym upsertem na tabelę, zamiast
+        osobnego upsertu na każdy wiersz. Nie commituje.
+        
+        Args:
+            db: Sesja bazy danych
+            admitted: Daty przyjęcia pacjentów
+            predictions: Słowniki z kluczami kategoria_triazu,
+                przypisany_oddzial, model_version, confidence_score,
+                predicted_at i admitted_at
+        """
+        patient_counts: Dict[datetime, int] = {}
+        for admitted_at in admitted:
+            bucket = _hour(admitted_at or datetime.now())
+            patient_counts[bucket] = patient_counts.get(bucket, 0) + 1
+        
+        if patient_counts:
+            stmt = pg_insert(patient_rollup_hourly).values([
+                {"bucket": bucket, "patient_count": count}
+                for bucket, count in patient_counts.items()
+            ])
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["bucket"],
+                set_={"patient_count": patient_rollup_hourly.c.patient_count + stmt.excluded.patient_count}
+            ))
+        
+        counters = [
+            "prediction_count", "confidence_sum", "confidence_count",
+            "triage_seconds_sum", "triage_seconds_count"
+        ]
+        groups: Dict[tuple, Dict] = {}
+        
+        for prediction in predictions:
+            predicted_at = prediction["predicted_at"] or datetime.now()
+            key = (
+                _hour(predicted_at),
+                prediction["kategoria_triazu"],
+                prediction["przypisany_oddzial"],
+                prediction["model_version"]
+            )
+            group = groups.setdefault(key, dict.fromkeys(counters, 0))
+            group["prediction_count"] += 1
+            
+            if prediction["confidence_score"] is not None:
+                group["confidence_sum"] += float(prediction["confidence_score"])
+                group["confidence_count"] += 1
+            
+            if prediction["admitted_at"] is not None:
+                group["triage_seconds_sum"] += (predicted_at - prediction["admitted_at"]).total_seconds()
+                group["triage_seconds_count"] += 1
+        
+        if groups:
+            stmt = pg_insert(triage_rollup_hourly).values([
+                {
+                    "bucket": bucket,
+                    "kategoria_triazu": kategoria,
+                    "przypisany_oddzial": oddzial,
+                    "model_version": model_version,
+                    **group
+                }
+                for (bucket, kategoria, oddzial, model_version), group in groups.items()
+            ])
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["bucket", "kategoria_triazu", "przypisany_oddzial", "model_version"],
+                set_={c: triage_rollup_hourly.c[c] + stmt.excluded[c] for c in counters}
+            ))
+    
+    @staticmethod
+    def get_stats(db: Session) -> TriageStatsResponse:
+        """
+        Statystyki triaży z agregatów
+        
+        Args:
+            db: Sesja bazy danych
+        
+        Returns:
+            Statystyki triaży
+        """
+        t = triage_rollup_hourly
+        
+        total_patients = db.query(
+            func.coalesce(func.sum(patient_rollup_hourly.c.patient_count), 0)
+        ).scalar()
+        
+        rows = db.query(
+            t.c.kategoria_triazu,
+            t.c.przypisany_oddzial,
+            func.sum(t.c.prediction_count).label("count"),
+            func.sum(t.c.confidence_sum).label("confidence_sum"),
+            func.sum(t.c.confidence_count).label("confidence_count")
+        ).group_by(
+            t.c.kategoria_triazu,
+            t.c.przypisany_oddzial
+        ).all()
+        
+        category_dict: Dict[str, int] = {}
+        department_dict: Dict[str, int] = {}
+        confidence_sum = 0.0
+        confidence_count = 0
+        
+        for row in rows:
+            if not row.count:
+                continue
+            category_dict[str(row.kategoria_triazu)] = category_dict.get(str(row.kategoria_triazu), 0) + row.count
+            department_dict[row.przypisany_oddzial] = department_dict.get(row.przypisany_oddzial, 0) + row.count
+            confidence_sum += row.confidence_sum or 0
+            confidence_count += row.confidence_count or 0
+        
+        return TriageStatsResponse(
+            total_patients=int(total_patients),
+            by_category=category_dict,
+            by_department=department_dict,
+            average_confidence=confidence_sum / confidence_count if confidence_count else 0.0,
+            last_updated=datetime.now()
+        )
+    
+    @staticmethod
+    def get_daily_stats(db: Session, days: int = 7, raw: bool = False) -> List[DailyTriageStats]:
+        """
+        Dzienne statystyki triaży z agregatów
+        
+        Args:
+            db: Sesja bazy danych
+            days: Liczba dni wstecz
+            raw: Zwróć słowniki zamiast schematów (do FastJSONResponse)
+        
+        Returns:
+            Lista dziennych statystyk (najnowsze pierwsze)
+        """
+        t = triage_rollup_hourly
+        date_from = _hour(datetime.now() - timedelta(days=days))
+        
+        patients_by_day = dict(db.query(
+            func.date(patient_rollup_hourly.c.bucket),
+            func.sum(patient_rollup_hourly.c.patient_count)
+        ).filter(
+            patient_rollup_hourly.c.bucket >= date_from
+        ).group_by(
+            func.date(patient_rollup_hourly.c.bucket)
+        ).all())
+        
+        rows = db.query(
+            func.date(t.c.bucket).label("data"),
+            t.c.kategoria_triazu,
+            func.sum(t.c.prediction_count).label("count"),
+            func.sum(t.c.confidence_sum).label("confidence_sum"),
+            func.sum(t.c.confidence_count).label("confidence_count"),
+            func.sum(t.c.triage_seconds_sum).label("triage_seconds_sum"),
+            func.sum(t.c.triage_seconds_count).label("triage_seconds_count")
+        ).filter(
+            t.c.bucket >= date_from
+        ).group_by(
+            func.date(t.c.bucket),
+            t.c.kategoria_triazu
+        ).all()
+        
+        days_data: Dict = {}
+        for row in rows:
+            day = days_data.setdefault(row.data, _empty_day())
+            day["categories"][row.kategoria_triazu] = int(row.count or 0)
+            day["confidence_sum"] += row.confidence_sum or 0
+            day["confidence_count"] += row.confidence_count or 0
+            day["triage_seconds_sum"] += row.triage_seconds_sum or 0
+            day["triage_seconds_count"] += row.triage_seconds_count or 0
+        
+        result = []
+        for data in sorted(set(patients_by_day) | set(days_data), reverse=True):
+            day = days_data.get(data) or _empty_day()
+            categories = day["categories"]
+            
+            result.append({
+                "data": datetime.combine(data, datetime.min.time()),
+                "liczba_pacjentow": int(patients_by_day.get(data) or 0),
+                "kat_1_natychmiastowy": categories.get(1, 0),
+                "kat_2_pilny": categories.get(2, 0),
+                "kat_3_stabilny": categories.get(3, 0),
+                "kat_4_niski": categories.get(4, 0),
+                "kat_5_bardzo_niski": categories.get(5, 0),
+                "avg_czas_do_triazu_min": (
+                    float(day["triage_seconds_sum"]) / day["triage_seconds_count"] / 60
+                    if day["triage_seconds_count"] else None
+                ),
+                "avg_confidence": (
+                    float(day["confidence_sum"]) / day["confidence_count"]
+                    if day["confidence_count"] else None
+                )
+            })
+        
+        if raw:
+            return result
+        
+        return [DailyTriageStats(**day_stats) for day_stats in result]
+    
+    @staticmethod
+    def get_analytics(
+        db: Session,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> TriageAnalytics:
+        """
+        Analityka triaży z agregatów (dokładność do godziny)
+        
+        Args:
+            db: Sesja bazy danych
+            date_from: Data od (domyślnie 30 dni temu)
+            date_to: Data do (domyślnie teraz)
+        
+        Returns:
+            Analityka triaży
+        """
+        t = triage_rollup_hourly
+        
+        if not date_from:
+            date_from = datetime.now() - timedelta(days=30)
+        if not date_to:
+            date_to = datetime.now()
+        
+        rows = db.query(
+            t.c.kategoria_triazu,
+            t.c.model_version,
+            func.sum(t.c.prediction_count).label("count"),
+            func.sum(t.c.confidence_sum).label("confidence_sum"),
+            func.sum(t.c.confidence_count).label("confidence_count")
+        ).filter(
+            t.c.bucket >= _hour(date_from),
+            t.c.bucket <= date_to
+        ).group_by(
+            t.c.kategoria_triazu,
+            t.c.model_version
+        ).all()
+        
+        category_counts: Dict[int, int] = {}
+        version_counts: Dict[str, int] = {}
+        confidence_sum = 0.0
+        confidence_count = 0
+        
+        for row in rows:
+            count = int(row.count or 0)
+            category_counts[row.kategoria_triazu] = category_counts.get(row.kategoria_triazu, 0) + count
+            version_counts[row.model_version] = version_counts.get(row.model_version, 0) + count
+            confidence_sum += row.confidence_sum or 0
+            confidence_count += row.confidence_count or 0
+        
+        total = sum(category_counts.values())
+        
+        distributions = [
+            CategoryDistribution(
+                category=cat,
+                count=count,
+                percentage=round(count / total * 100, 2) if total > 0 else 0,
+                label=CATEGORY_LABELS[cat]
+            )
+            for cat, count in sorted(category_counts.items())
+            if count > 0
+        ]
+        
+        model_version = max(version_counts, key=version_counts.get) if total > 0 else "unknown"
+        
+        return TriageAnalytics(
+            total_predictions=total,
+            category_distribution=distributions,
+            average_confidence=confidence_sum / confidence_count if confidence_count else 0.0,
+            model_version=model_version,
+            period_start=date_from,
+            period_end=date_to
+        )
+    
+    @staticmethod
+    def backfill(db: Session) -> Dict[str, int]:
+        """
+        Przelicza agregaty od zera z pełnej historii
+        
+        Args:
+            db: Sesja bazy danych
+        
+        Returns:
+            Liczba wierszy agregatów w każdej tabeli
+        """
+        db.execute(text("DELETE FROM triage_rollup_hourly"))
+        db.execute(text("DELETE FROM patient_rollup_hourly"))
+        
+        db.execute(text("""
+            INSERT INTO patient_rollup_hourly (bucket, patient_count)
+            SELECT date_trunc('hour', data_przyjecia), COUNT(*)
+            FROM patients
+            WHERE data_przyjecia IS NOT NULL
+            GROUP BY 1
+        """))
+        
+        db.execute(text("""
+            INSERT INTO triage_rollup_hourly (
+                bucket, kategoria_triazu, przypisany_oddzial, model_version,
+                prediction_count, confidence_sum, confidence_count,
+                triage_seconds_sum, triage_seconds_count
+            )
+            SELECT
+                date_trunc('hour', tp.predicted_at),
+                tp.kategoria_triazu,
+                tp.przypisany_oddzial,
+                tp.model_version,
+                COUNT(*),
+                COALESCE(SUM(tp.confidence_score), 0),
+                COUNT(tp.confidence_score),
+                COALESCE(SUM(EXTRACT(EPOCH FROM tp.predicted_at - p.data_przyjecia)), 0),
+                COUNT(p.data_przyjecia)
+            FROM triage_predictions tp
+            JOIN patients p ON p.id = tp.patient_id
+            WHERE tp.predicted_at IS NOT NULL
+            GROUP BY 1, 2, 3, 4
+        """))
+        
+        db.commit()
+        
+        return {
+            "triage_rollup_hourly": db.query(func.count()).select_from(triage_rollup_hourly).scalar(),
+            "patient_rollup_hourly": db.query(func.count()).select_from(patient_rollup_hourly).scalar()
+        }
@@ -4,6 +4,10 @@ from datetime import datetime
 from decimal import Decimal
 from app.models import AuditLog, User
 from app.schemas import AuditLogCreate, AuditLogResponse, AuditLogWithUser, AuditLogFilter
+from app.utils.pagination import apply_keyset
+
+# Kolejność pól odpowiedzi jak w schemacie (dla ścieżki bez Pydantic)
+LOG_WITH_USER_FIELDS = tuple(AuditLogWithUser.model_fields)
 
 def convert_decimals(obj: Any) -> Any:
     """Konwertuje Decimal na float dla JSON serializacji"""
@@ -67,22 +71,73 @@ def log_action(
 class AuditService:
     """Service do zarządzania logami audytowymi"""
     
+    @staticmethod
+    def _logs_with_user_query(db: Session):
+        """
+        Zapytanie o logi z danymi użytkownika w jednym SELECT
+        
+        Pobiera username i email przez LEFT JOIN zamiast leniwego
+        ładowania log.user dla każdego wiersza (N+1).
+        
+        Args:
+            db: Sesja bazy danych
+            
+        Returns:
+            Zapytanie zwracające wiersze zgodne z AuditLogWithUser
+        """
+        return db.query(
+            AuditLog.id,
+            AuditLog.user_id,
+            AuditLog.action,
+            AuditLog.table_name,
+            AuditLog.record_id,
+            AuditLog.old_values,
+            AuditLog.new_values,
+            AuditLog.ip_address,
+            AuditLog.user_agent,
+            AuditLog.timestamp,
+            User.username.label('username'),
+            User.email.label('user_email')
+        ).join(User, AuditLog.user_id == User.id, isouter=True)
+    
+    @staticmethod
+    def _rows_to_dicts(rows) -> List[Dict[str, Any]]:
+        """Konwertuje wiersze z _logs_with_user_query na słowniki w układzie AuditLogWithUser"""
+        result = []
+        for row in rows:
+            log_dict = row._asdict()
+            if log_dict['ip_address'] is not None:
+                log_dict['ip_address'] = str(log_dict['ip_address'])
+            result.append({field: log_dict[field] for field in LOG_WITH_USER_FIELDS})
+        
+        return result
+    
+    @staticmethod
+    def _rows_to_logs(rows) -> List[AuditLogWithUser]:
+        """Konwertuje wiersze z _logs_with_user_query na schematy"""
+        return [AuditLogWithUser(**log_dict) for log_dict in AuditService._rows_to_dicts(rows)]
+    
     @staticmethod
     def get_logs(
         db: Session,
-        filters: AuditLogFilter
+        filters: AuditLogFilter,
+        raw: bool = False
     ) -> List[AuditLogWithUser]:
         """
         Pobiera logi z filtrami
         
+        Z filters.cursor używa paginacji keyset po (timestamp, id),
+        w przeciwnym razie offsetu.
+        
         Args:
             db: Sesja bazy danych
             filters: Filtry wyszukiwania
+            raw: Zwróć słowniki zamiast schematów (do FastJSONResponse)
             
         Returns:
             Lista logów z informacjami o użytkownikach
         """
-        query = db.query(AuditLog).join(User, AuditLog.user_id == User.id, isouter=True)
+        query = AuditService._logs_with_user_query(db)
         
         if filters.user_id:
             query = query.filter(AuditLog.user_id == filters.user_id)
@@ -99,22 +154,17 @@ class AuditService:
         if filters.date_to:
             query = query.filter(AuditLog.timestamp <= filters.date_to)
         
-        query = query.order_by(AuditLog.timestamp.desc())
+        query = apply_keyset(query, AuditLog.timestamp, AuditLog.id, filters.cursor)
         
-        query = query.offset(filters.offset).limit(filters.limit)
+        if not filters.cursor:
+            query = query.offset(filters.offset)
         
-        logs = query.all()
+        rows = query.limit(filters.limit).all()
         
-        result = []
-        for log in logs:
-            log_dict = log.to_dict()
-            if log.user:
-                log_dict['username'] = log.user.username
-                log_dict['user_email'] = log.user.email
-            
-            result.append(AuditLogWithUser(**log_dict))
+        if raw:
+            return AuditService._rows_to_dicts(rows)
         
-        return result
+        return AuditService._rows_to_logs(rows)
     
     @staticmethod
     def get_user_activity(db: Session, user_id: int, limit: int = 50) -> List[AuditLogResponse]:
@@ -150,24 +200,13 @@ class AuditService:
         Returns:
             Lista logów
         """
-        logs = db.query(AuditLog).join(
-            User, AuditLog.user_id == User.id, isouter=True
-        ).filter(
+        rows = AuditService._logs_with_user_query(db).filter(
             AuditLog.action == action_type
         ).order_by(
             AuditLog.timestamp.desc()
         ).limit(limit).all()
         
-        result = []
-        for log in logs:
-            log_dict = log.to_dict()
-            if log.user:
-                log_dict['username'] = log.user.username
-                log_dict['user_email'] = log.user.email
-            
-            result.append(AuditLogWithUser(**log_dict))
-        
-        return result
+        return AuditService._rows_to_logs(rows)
     
     @staticmethod
     def get_record_history(db: Session, table_name: str, record_id: int) -> List[AuditLogWithUser]:
@@ -182,25 +221,14 @@ class AuditService:
         Returns:
             Lista wszystkich zmian rekordu
         """
-        logs = db.query(AuditLog).join(
-            User, AuditLog.user_id == User.id, isouter=True
-        ).filter(
+        rows = AuditService._logs_with_user_query(db).filter(
             AuditLog.table_name == table_name,
             AuditLog.record_id == record_id
         ).order_by(
             AuditLog.timestamp.asc()  # Od najstarszej do najnowszej
         ).all()
         
-        result = []
-        for log in logs:
-            log_dict = log.to_dict()
-            if log.user:
-                log_dict['username'] = log.user.username
-                log_dict['user_email'] = log.user.email
-            
-            result.append(AuditLogWithUser(**log_dict))
-        
-        return result
+        return AuditService._rows_to_logs(rows)
     
     @staticmethod
     def get_stats(db: Session, date_from: Optional[datetime] = None) -> Dict[str, Any]:
@@ -0,0 +1,244 @@
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.ml.predictor import predictor
+from app.models import Patient, TriagePrediction
+from app.schemas import TriageBatchPredictResponse, TriagePreviewRequest
+from app.services.analytics_service import AnalyticsService
+from app.services.audit_service import log_action
+from app.services.department_service import DepartmentService
+from app.services.occupancy_ledger import ACTIVE_STATUSES, OccupancyLedger
+from app.services.queue_service import waiting_queue
+from app.services.triage_service import CATEGORY_TO_DEPARTMENT, TEMPLATE_TO_DEPARTMENT
+
+# Ilu pacjentów w jednej transakcji (jedno predict_proba + jeden INSERT)
+CHUNK_SIZE = 1000
+
+# Kolumny pacjenta potrzebne modelowi triażu
+FEATURE_COLUMNS = [getattr(Patient, field) for field in TriagePreviewRequest.model_fields]
+
+
+def _patient_data(row) -> Dict:
+    """Dane wejściowe modelu z wiersza zapytania (Decimal -> float)"""
+    return {
+        field: float(value) if isinstance(value, Decimal) else value
+        for field, value in row._mapping.items()
+        if field in TriagePreviewRequest.model_fields
+    }
+
+
+def _department(category: int, template: Optional[str]) -> str:
+    """Oddział z reguł (szablon, potem kategoria) - jak w predict_triage"""
+    if template and template in TEMPLATE_TO_DEPARTMENT:
+        return TEMPLATE_TO_DEPARTMENT[template]
+    return CATEGORY_TO_DEPARTMENT.get(category, "SOR")
+
+
+class PredictionBackfillService:
+    """
+    Predykcje triażu dla istniejących pacjentów bez predykcji
+    
+    Pacjenci są wybierani paczkami po kluczu (id > kursor, anti-join
+    z triage_predictions), przewidywani jednym wywołaniem modelu na
+    paczkę i zapisywani jednym INSERT ... ON CONFLICT (patient_id)
+    DO NOTHING. Predykcja zapisana w międzyczasie przez /triage/predict
+    nie powoduje błędu - pacjent jest liczony jako pominięty. Każda
+    paczka to osobna transakcja, więc przerwane zadanie można wznowić
+    od ostatniego kursora (albo od zera - anti-join pomija już gotowych).
+    
+    Predykcja przypisuje oddział, więc aktywni pacjenci zajmują od niej
+    miejsce - zdarzenia admission trafiają do dziennika obłożenia w tej
+    samej transakcji co predykcje. W procesie API kolejka oczekujących
+    jest aktualizowana od razu; zadanie CLI działa w osobnym procesie,
+    więc kolejkę API uzgadnia WaitingQueue przy odczycie.
+    """
+    
+    @staticmethod
+    def _pending_query(db: Session, after_id: int, patient_ids: Optional[List[int]] = None):
+        """Pacjenci bez predykcji po kursorze, rosnąco po ID"""
+        query = db.query(
+            Patient.id, Patient.data_przyjecia, Patient.status, *FEATURE_COLUMNS
+        ).filter(
+            Patient.id > after_id,
+            ~exists().where(TriagePrediction.patient_id == Patient.id)
+        )
+        
+        if patient_ids is not None:
+            query = query.filter(Patient.id.in_(patient_ids))
+        
+        return query.order_by(Patient.id)
+    
+    @staticmethod
+    def count_pending(db: Session, after_id: int = 0) -> int:
+        """
+        Liczba pacjentów bez predykcji (do raportowania postępu)
+        
+        Args:
+            db: Sesja bazy danych
+            after_id: Kursor - liczeni tylko pacjenci o ID większym
+        """
+        return db.query(Patient.id).filter(
+            Patient.id > after_id,
+            ~exists().where(TriagePrediction.patient_id == Patient.id)
+        ).count()
+    
+    @staticmethod
+    def predict_chunk(
+        db: Session,
+        after_id: int = 0,
+        limit: int = CHUNK_SIZE,
+        patient_ids: Optional[List[int]] = None,
+        user_id: Optional[int] = None,
+        ip_address: Optional[str] = None
+    ) -> TriageBatchPredictResponse:
+        """
+        Przewiduje i zapisuje jedną paczkę pacjentów w jednej transakcji
+        
+        Args:
+            db: Sesja bazy danych
+            after_id: Kursor - tylko pacjenci o ID większym
+            limit: Maksymalna liczba pacjentów w paczce
+            patient_ids: Zawężenie do konkretnych pacjentów (opcjonalne)
+            user_id: ID użytkownika (None dla zadania CLI)
+            ip_address: Adres IP
+        
+        Returns:
+            Liczniki paczki i kursor dla następnej (last_patient_id)
+        
+        Raises:
+            HTTPException: 503 gdy model nie jest załadowany, 500 gdy
+                predykcja paczki się nie powiedzie
+        """
+        rows = PredictionBackfillService._pending_query(db, after_id, patient_ids).limit(limit).all()
+        
+        if not rows:
+            return TriageBatchPredictResponse(
+                processed=0, predicted=0, skipped=0, last_patient_id=None, has_more=False
+            )
+        
+        results = predictor.predict_batch([_patient_data(row) for row in rows])
+        
+        values = []
+        invalid = []
+        admitted = {}
+        active = set()
+        for row, result in zip(rows, results):
+            if "error" in result:
+                invalid.append(row.id)
+                continue
+            
+            department = _department(result["category"], row.szablon_przypadku)
+            admitted[row.id] = row.data_przyjecia
+            if row.status in ACTIVE_STATUSES:
+                active.add(row.id)
+            values.append({
+                "patient_id": row.id,
+                "kategoria_triazu": result["category"],
+                **{
+                    f"prob_kat_{k}": Decimal(str(result["probabilities"][str(k)]))
+                    for k in range(1, 6)
+                },
+                "przypisany_oddzial": department,
+                "oddzial_docelowy": department,
+                "model_version": result["model_version"],
+                "confidence_score": Decimal(str(result["confidence"]))
+            })
+        
+        inserted = []
+        if values:
+            inserted = db.execute(
+                pg_insert(TriagePrediction).values(values).on_conflict_do_nothing(
+                    index_elements=["patient_id"]
+                ).returning(TriagePrediction.patient_id, TriagePrediction.predicted_at)
+            ).all()
+        
+        predicted_at = dict(inserted)
+        if predicted_at:
+            # Agregaty tylko dla faktycznie zapisanych (pacjenci są już policzeni)
+            AnalyticsService.record_batch(db, [], [
+                {**row, "predicted_at": predicted_at[row["patient_id"]], "admitted_at": admitted[row["patient_id"]]}
+                for row in values
+                if row["patient_id"] in predicted_at
+            ])
+        
+        occupancy_changed = OccupancyLedger.record_events(db, [
+            {
+                "department": row["przypisany_oddzial"],
+                "delta": 1,
+                "event_type": "admission",
+                "patient_id": row["patient_id"]
+            }
+            for row in values
+            if row["patient_id"] in predicted_at and row["patient_id"] in active
+        ])
+        
+        db.commit()
+        
+        if occupancy_changed:
+            DepartmentService.publish_occupancy(db)
+        
+        if predicted_at:
+            waiting_queue.sync_patients(db, list(predicted_at))
+            log_action(
+                db=db,
+                user_id=user_id,
+                action="PREDICT_TRIAGE_BATCH",
+                table_name="triage_predictions",
+                new_values={
+                    "patient_ids": list(predicted_at),
+                    "count": len(predicted_at),
+                    "model_version": predictor.model_version
+                },
+                ip_address=ip_address
+            )
+        
+        return TriageBatchPredictResponse(
+            processed=len(rows),
+            predicted=len(predicted_at),
+            skipped=len(values) - len(predicted_at),
+            invalid_patient_ids=invalid,
+            last_patient_id=rows[-1].id,
+            has_more=len(rows) == limit
+        )
+    
+    @staticmethod
+    def iter_chunks(
+        db: Session,
+        after_id: int = 0,
+        chunk_size: int = CHUNK_SIZE,
+        max_patients: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> Iterator[TriageBatchPredictResponse]:
+        """
+        Przetwarza kolejne paczki aż do wyczerpania pacjentów bez predykcji
+        
+        Args:
+            db: Sesja bazy danych
+            after_id: Kursor startowy (wznowienie przerwanego zadania)
+            chunk_size: Liczba pacjentów w paczce
+            max_patients: Limit przetworzonych pacjentów (opcjonalny)
+            user_id: ID użytkownika (None dla zadania CLI)
+        
+        Yields:
+            Wynik każdej paczki (last_patient_id = kursor do wznowienia)
+        """
+        processed = 0
+        
+        while max_patients is None or processed < max_patients:
+            limit = chunk_size if max_patients is None else min(chunk_size, max_patients - processed)
+            result = PredictionBackfillService.predict_chunk(
+                db, after_id=after_id, limit=limit, user_id=user_id
+            )
+            if result.processed == 0:
+                return
+            
+            processed += result.processed
+            after_id = result.last_patient_id
+            yield result
+            
+            if not result.has_more:
+                return
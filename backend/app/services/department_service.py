@@ -1,5 +1,8 @@
+import threading
+from itertools import islice
 from sqlalchemy.orm import Session
-from typing import Dict, List, Optional
+from sqlalchemy import func
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
 
@@ -13,6 +16,13 @@ from app.schemas import (
     DepartmentStats
 )
 from app.services.audit_service import log_action
+from app.services.occupancy_ledger import OccupancyLedger, occupancy_events
+from app.services.occupancy_profile import OccupancyProfile, occupancy_profile
+from app.services.occupancy_timeseries import DEPARTMENT_COLUMNS, OccupancyTimeSeries
+from app.utils.broadcast import Broadcaster
+from app.utils.downsampling import downsample
+from app.utils import fast_json
+from app.utils.response_cache import response_cache, SCOPE_OCCUPANCY
 
 DEPARTMENT_CAPACITY = {
     "SOR": 25,
@@ -25,6 +35,123 @@ DEPARTMENT_CAPACITY = {
     "Ginekologia": 20
 }
 
+# Historia dłuższa niż tyle punktów (więcej niż jeden kawałek) jest
+# wysyłana strumieniowo - próg musi być poniżej limitu points (5000),
+# inaczej ograniczone zapytanie nigdy nie trafiłoby na strumień
+HISTORY_CHUNK_SIZE = 1000
+HISTORY_STREAM_THRESHOLD = HISTORY_CHUNK_SIZE
+
+
+def occupancy_status(percentage: float) -> str:
+    """Status obłożenia dla procentu zajętych łóżek"""
+    if percentage >= 90:
+        return "CRITICAL"
+    elif percentage >= 70:
+        return "HIGH"
+    elif percentage >= 50:
+        return "MEDIUM"
+    return "LOW"
+
+
+class OccupancyMonitor:
+    """
+    Ostatni stan obłożenia w pamięci + rozsyłanie zmian przez SSE
+    
+    Serwisy wywołują publish() po każdym commicie zmieniającym obłożenie.
+    Subskrybenci dostają zwięzły snapshot tylko gdy liczby faktycznie się
+    zmieniły, a dodatkowo zdarzenie "alert" przy każdej zmianie statusu
+    oddziału (np. HIGH -> CRITICAL).
+    
+    Snapshot jest publikowany pod blokadą i tylko gdy nie jest starszy od
+    poprzedniego, więc równolegli publikujący nie dostarczą starszego stanu
+    jako ostatniego. Subskrybent, który nie nadąża, zamiast zaległych
+    zdarzeń dostaje bieżący snapshot.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict] = None
+        self.broadcaster = Broadcaster(
+            maxsize=100,
+            on_overflow=lambda event: {"type": "snapshot", **self._snapshot}
+        )
+    
+    @staticmethod
+    def build_snapshot(timestamp: datetime, counts: Dict[str, int]) -> Dict:
+        """
+        Buduje zwięzły snapshot z obłożenia oddziałów
+        
+        Args:
+            timestamp: Chwila, której dotyczy obłożenie
+            counts: Obłożenie {"SOR": 18, ...}
+            
+        Returns:
+            {"timestamp": ..., "departments": {nazwa: {occupancy, percentage, status}}}
+        """
+        departments = {}
+        for dept_name, capacity in DEPARTMENT_CAPACITY.items():
+            current_occ = counts.get(dept_name, 0)
+            percentage = (current_occ / capacity * 100) if capacity > 0 else 0
+            departments[dept_name] = {
+                "occupancy": current_occ,
+                "percentage": round(percentage, 2),
+                "status": occupancy_status(percentage)
+            }
+        
+        return {"timestamp": timestamp.isoformat(), "departments": departments}
+    
+    def current(self, db: Session) -> Dict:
+        """
+        Zwraca ostatni snapshot (przy pierwszym wywołaniu czyta bazę)
+        
+        Args:
+            db: Sesja bazy danych
+        """
+        if self._snapshot is None:
+            timestamp, counts = OccupancyLedger.occupancy_at(db)
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self.build_snapshot(timestamp, counts)
+        
+        return self._snapshot
+    
+    def publish(self, timestamp: datetime, counts: Dict[str, int]) -> None:
+        """
+        Publikuje nowy stan obłożenia, jeśli różni się od poprzedniego
+        
+        Args:
+            timestamp: Chwila, której dotyczy obłożenie
+            counts: Obłożenie {"SOR": 18, ...} (po commicie)
+        """
+        snapshot = self.build_snapshot(timestamp, counts)
+        
+        with self._lock:
+            previous = self._snapshot
+            if previous is not None and (
+                previous["timestamp"] > snapshot["timestamp"] or
+                previous["departments"] == snapshot["departments"]
+            ):
+                return
+            self._snapshot = snapshot
+            
+            self.broadcaster.publish({"type": "snapshot", **snapshot})
+            
+            if previous is None:
+                return
+            
+            for dept_name, info in snapshot["departments"].items():
+                old_status = previous["departments"][dept_name]["status"]
+                if info["status"] != old_status:
+                    self.broadcaster.publish({
+                        "type": "alert",
+                        "timestamp": snapshot["timestamp"],
+                        "department": dept_name,
+                        "from": old_status,
+                        "to": info["status"],
+                        "percentage": info["percentage"]
+                    })
+
+
 class DepartmentService:
     """Service do zarządzania obłożeniem oddziałów"""
     
@@ -63,9 +190,20 @@ class DepartmentService:
         occupancy = DepartmentOccupancy(**occupancy_data.model_dump())
         
         db.add(occupancy)
+        db.flush()
+        
+        OccupancyTimeSeries.refresh(db, since=occupancy.timestamp)
+        
         db.commit()
         db.refresh(occupancy)
         
+        occupancy_profile.add_sample(occupancy.timestamp, {
+            dept: getattr(occupancy, column) or 0
+            for dept, column in DEPARTMENT_COLUMNS.items()
+        })
+        
+        DepartmentService.publish_occupancy(db)
+        
         if user_id:
             log_action(
                 db=db,
@@ -79,46 +217,67 @@ class DepartmentService:
         
         return occupancy
     
+    @staticmethod
+    def publish_occupancy(db: Session) -> None:
+        """
+        Przelicza aktualne obłożenie i rozsyła je subskrybentom SSE
+        
+        Wywoływane po każdym commicie zmieniającym obłożenie. Przy okazji
+        zapisuje okresowy snapshot dziennika, jeśli poprzedni jest za stary,
+        i unieważnia cachowane odpowiedzi zależne od obłożenia.
+        
+        Args:
+            db: Sesja bazy danych
+        """
+        OccupancyLedger.maybe_snapshot(db)
+        timestamp, counts = OccupancyLedger.occupancy_at(db)
+        occupancy_monitor.publish(timestamp, counts)
+        response_cache.invalidate(SCOPE_OCCUPANCY)
+    
+    @staticmethod
+    def occupancy_version(db: Session) -> Tuple:
+        """
+        Znacznik stanu obłożenia w bazie (do synchronizacji cache odpowiedzi)
+        
+        Zmienia się przy każdym zdarzeniu dziennika i każdym snapshocie,
+        także zapisanych przez inne procesy.
+        
+        Args:
+            db: Sesja bazy danych
+        
+        Returns:
+            (ostatnie ID zdarzenia, ostatni timestamp snapshotu)
+        """
+        return (
+            db.query(func.max(occupancy_events.c.id)).scalar(),
+            db.query(func.max(DepartmentOccupancy.timestamp)).scalar()
+        )
+    
     @staticmethod
     def get_current_occupancy(db: Session) -> CurrentOccupancyResponse:
         """
         Pobiera aktualne obłożenie oddziałów
         
+        Obłożenie = ostatni snapshot + zdarzenia z dziennika (OccupancyLedger).
+        
         Args:
             db: Sesja bazy danych
             
         Returns:
             Aktualne obłożenie wszystkich oddziałów
         """
-        latest = db.query(DepartmentOccupancy).order_by(
-            DepartmentOccupancy.timestamp.desc()
-        ).first()
-        
-        if not latest:
-            latest = DepartmentOccupancy(
-                timestamp=datetime.now(),
-                sor=0, interna=0, kardiologia=0, chirurgia=0,
-                ortopedia=0, neurologia=0, pediatria=0, ginekologia=0
-            )
+        timestamp, counts = OccupancyLedger.occupancy_at(db)
         
         departments = {}
         total_occupancy = 0
         total_capacity = 0
         
         for dept_name, capacity in DEPARTMENT_CAPACITY.items():
-            dept_key = dept_name.lower()
-            current_occ = getattr(latest, dept_key, 0) or 0
+            current_occ = counts.get(dept_name, 0)
             
             percentage = (current_occ / capacity * 100) if capacity > 0 else 0
             
-            if percentage >= 90:
-                status_text = "CRITICAL"
-            elif percentage >= 70:
-                status_text = "HIGH"
-            elif percentage >= 50:
-                status_text = "MEDIUM"
-            else:
-                status_text = "LOW"
+            status_text = occupancy_status(percentage)
             
             departments[dept_name] = DepartmentInfo(
                 name=dept_name,
@@ -135,7 +294,7 @@ class DepartmentService:
         overall_percentage = (total_occupancy / total_capacity * 100) if total_capacity > 0 else 0
         
         return CurrentOccupancyResponse(
-            timestamp=latest.timestamp,
+            timestamp=timestamp,
             departments=departments,
             total_occupancy=total_occupancy,
             total_capacity=total_capacity,
@@ -143,21 +302,30 @@ class DepartmentService:
         )
     
     @staticmethod
-    def get_occupancy_history(
+    def get_history_series(
         db: Session,
         department: str,
-        hours: int = 24
-    ) -> OccupancyHistory:
+        hours: int = 24,
+        points: Optional[int] = None,
+        method: str = "lttb"
+    ) -> Tuple[List[Tuple[datetime, float]], Dict]:
         """
-        Pobiera historię obłożenia oddziału
+        Pobiera szereg obłożenia oddziału wraz z podsumowaniem okna
+        
+        Okno do 24h czyta surowe pomiary, dłuższe - średnie godzinowe
+        lub dzienne. Podsumowanie (średnia, szczyt) liczone jest z pełnego
+        szeregu, a dopiero potem szereg jest zmniejszany do `points`.
         
         Args:
             db: Sesja bazy danych
             department: Nazwa oddziału
             hours: Liczba godzin wstecz
+            points: Maksymalna liczba punktów (domyślnie bez downsamplingu)
+            method: Metoda downsamplingu (lttb lub minmax)
             
         Returns:
-            Historia obłożenia
+            (szereg, podsumowanie) - podsumowanie to pola OccupancyHistory
+            poza history
             
         Raises:
             HTTPException: Jeśli oddział nie istnieje
@@ -169,43 +337,129 @@ class DepartmentService:
             )
         
         date_from = datetime.now() - timedelta(hours=hours)
+        resolution = OccupancyTimeSeries.resolution_for(timedelta(hours=hours))
         
-        records = db.query(DepartmentOccupancy).filter(
-            DepartmentOccupancy.timestamp >= date_from
-        ).order_by(
-            DepartmentOccupancy.timestamp.asc()
-        ).all()
+        series = OccupancyTimeSeries.get_series(db, department, date_from, resolution=resolution)
         
-        dept_key = department.lower()
-        capacity = DEPARTMENT_CAPACITY[department]
+        occupancies = [occ for _, occ in series]
+        
+        avg_occ = sum(occupancies) / len(occupancies) if occupancies else 0
+        peak_occ = max(occupancies) if occupancies else 0
+        peak_idx = occupancies.index(peak_occ) if occupancies else 0
+        peak_time = series[peak_idx][0] if series else datetime.now()
         
-        history = []
-        occupancies = []
+        summary = {
+            "department": department,
+            "average_occupancy": round(avg_occ, 2),
+            "peak_occupancy": int(round(peak_occ)),
+            "peak_timestamp": peak_time,
+            "resolution": resolution
+        }
+        
+        if points:
+            series = downsample(series, points, method)
+        
+        return series, summary
+    
+    @staticmethod
+    def history_entries(
+        department: str,
+        series: List[Tuple[datetime, float]]
+    ) -> Iterator[Dict]:
+        """Punkty historii {timestamp, occupancy, percentage} dla szeregu"""
+        capacity = DEPARTMENT_CAPACITY[department]
         
-        for record in records:
-            occ = getattr(record, dept_key, 0) or 0
+        for timestamp, occ in series:
             percentage = (occ / capacity * 100) if capacity > 0 else 0
             
-            history.append({
-                "timestamp": record.timestamp.isoformat(),
-                "occupancy": occ,
+            yield {
+                "timestamp": timestamp.isoformat(),
+                "occupancy": round(occ, 2),
                 "percentage": round(percentage, 2)
-            })
-            
-            occupancies.append(occ)
+            }
+    
+    @staticmethod
+    def history_dict(
+        series: List[Tuple[datetime, float]],
+        summary: Dict
+    ) -> Dict:
+        """Historia w układzie OccupancyHistory jako słownik (do FastJSONResponse)"""
+        return {
+            "department": summary["department"],
+            "history": list(DepartmentService.history_entries(summary["department"], series)),
+            "average_occupancy": summary["average_occupancy"],
+            "peak_occupancy": summary["peak_occupancy"],
+            "peak_timestamp": summary["peak_timestamp"],
+            "resolution": summary["resolution"]
+        }
+    
+    @staticmethod
+    def build_history(
+        series: List[Tuple[datetime, float]],
+        summary: Dict
+    ) -> OccupancyHistory:
+        """Składa OccupancyHistory z wyniku get_history_series"""
+        return OccupancyHistory(**DepartmentService.history_dict(series, summary))
+    
+    @staticmethod
+    def iter_history_json(
+        series: List[Tuple[datetime, float]],
+        summary: Dict
+    ) -> Iterator[bytes]:
+        """
+        Serializuje historię obłożenia do JSON kawałkami
         
-        avg_occ = sum(occupancies) / len(occupancies) if occupancies else 0
-        peak_occ = max(occupancies) if occupancies else 0
-        peak_idx = occupancies.index(peak_occ) if occupancies else 0
-        peak_time = records[peak_idx].timestamp if records else datetime.now()
+        Wynik ma ten sam kształt co OccupancyHistory, ale nie jest
+        budowany w pamięci w całości - do StreamingResponse. Każdy
+        kawałek HISTORY_CHUNK_SIZE punktów to jedno wywołanie orjson.
         
-        return OccupancyHistory(
-            department=department,
-            history=history,
-            average_occupancy=round(avg_occ, 2),
-            peak_occupancy=peak_occ,
-            peak_timestamp=peak_time
+        Args:
+            series: Szereg z get_history_series
+            summary: Podsumowanie z get_history_series
+        """
+        yield fast_json.dumps(summary)[:-1] + b',"history":['
+        
+        entries = DepartmentService.history_entries(summary["department"], series)
+        first = True
+        while True:
+            chunk = list(islice(entries, HISTORY_CHUNK_SIZE))
+            if not chunk:
+                break
+            body = fast_json.dumps(chunk)[1:-1]
+            yield body if first else b"," + body
+            first = False
+        
+        yield b"]}"
+    
+    @staticmethod
+    def get_occupancy_history(
+        db: Session,
+        department: str,
+        hours: int = 24,
+        points: Optional[int] = None,
+        method: str = "lttb"
+    ) -> OccupancyHistory:
+        """
+        Pobiera historię obłożenia oddziału
+        
+        Args:
+            db: Sesja bazy danych
+            department: Nazwa oddziału
+            hours: Liczba godzin wstecz
+            points: Maksymalna liczba punktów (domyślnie bez downsamplingu)
+            method: Metoda downsamplingu (lttb lub minmax)
+            
+        Returns:
+            Historia obłożenia
+            
+        Raises:
+            HTTPException: Jeśli oddział nie istnieje
+        """
+        series, summary = DepartmentService.get_history_series(
+            db, department, hours, points, method
         )
+        
+        return DepartmentService.build_history(series, summary)
     
     @staticmethod
     def get_department_stats(db: Session, department: str) -> DepartmentStats:
@@ -228,18 +482,15 @@ class DepartmentService:
                 detail=f"Invalid department. Must be one of: {', '.join(DEPARTMENT_CAPACITY.keys())}"
             )
         
-        from sqlalchemy import func, extract
+        from sqlalchemy import func
         
-        latest = db.query(DepartmentOccupancy).order_by(
-            DepartmentOccupancy.timestamp.desc()
-        ).first()
+        now, counts = OccupancyLedger.occupancy_at(db)
         
-        dept_key = department.lower()
-        current_occ = getattr(latest, dept_key, 0) if latest else 0
+        current_occ = counts.get(department, 0)
         capacity = DEPARTMENT_CAPACITY[department]
         percentage = (current_occ / capacity * 100) if capacity > 0 else 0
         
-        date_24h_ago = datetime.now() - timedelta(hours=24)
+        date_24h_ago = now - timedelta(hours=24)
         
         patients_24h = db.query(func.count(Patient.id)).join(
             TriagePrediction
@@ -248,20 +499,7 @@ class DepartmentService:
             Patient.data_przyjecia >= date_24h_ago
         ).scalar() or 0
         
-        date_7d_ago = datetime.now() - timedelta(days=7)
-        
-        peak_hours_data = db.query(
-            extract('hour', DepartmentOccupancy.timestamp).label('hour'),
-            func.avg(getattr(DepartmentOccupancy, dept_key)).label('avg_occ')
-        ).filter(
-            DepartmentOccupancy.timestamp >= date_7d_ago
-        ).group_by(
-            extract('hour', DepartmentOccupancy.timestamp)
-        ).order_by(
-            func.avg(getattr(DepartmentOccupancy, dept_key)).desc()
-        ).limit(3).all()
-        
-        peak_hours = [int(hour) for hour, _ in peak_hours_data]
+        profile = occupancy_profile.bucket(db, department, now)
         
         return DepartmentStats(
             department=department,
@@ -270,7 +508,10 @@ class DepartmentService:
             occupancy_percentage=round(percentage, 2),
             patients_last_24h=patients_24h,
             avg_stay_duration_hours=None,  # TODO: Implementacja gdy będą dane o czasie pobytu
-            peak_hours=peak_hours
+            peak_hours=occupancy_profile.peak_hours(db, department),
+            typical_occupancy=profile["mean"] if profile else None,
+            typical_range=[profile["p10"], profile["p90"]] if profile else None,
+            is_anomaly=OccupancyProfile.is_anomaly(profile, current_occ)
         )
     
     @staticmethod
@@ -299,21 +540,15 @@ class DepartmentService:
                 detail=f"Invalid department. Must be one of: {', '.join(DEPARTMENT_CAPACITY.keys())}"
             )
         
-        date_from = datetime.now() - timedelta(hours=24)
-        
-        records = db.query(DepartmentOccupancy).filter(
-            DepartmentOccupancy.timestamp >= date_from
-        ).order_by(
-            DepartmentOccupancy.timestamp.desc()
-        ).all()
+        recent = OccupancyTimeSeries.get_series(
+            db, department, datetime.now() - timedelta(hours=6), resolution="hour"
+        )
         
-        if not records:
+        if not recent:
             return []
         
-        dept_key = department.lower()
-        
-        recent_values = [getattr(r, dept_key, 0) or 0 for r in records[:6]]
-        avg = sum(recent_values) / len(recent_values) if recent_values else 0
+        recent_values = [value for _, value in recent]
+        avg = sum(recent_values) / len(recent_values)
         
         predictions = []
         for i in range(1, hours_ahead + 1):
@@ -358,3 +593,7 @@ class DepartmentService:
             }
         
         return summary
+
+
+# Globalna instancja monitora obłożenia
+occupancy_monitor = OccupancyMonitor()
@@ -0,0 +1,324 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, DateTime, Integer, Numeric, Table, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models import AuditLog, Patient, TriagePrediction
+from app.services.audit_service import log_action
+from app.utils import fast_json
+
+# Wierszy pobieranych z kursora serwerowego naraz (i zapisywanych jako
+# jedna porcja odpowiedzi / jedna grupa wierszy Parquet)
+BATCH_SIZE = 5000
+
+# Margines górnej granicy eksportu przyrostowego. Znaczniki (DEFAULT
+# CURRENT_TIMESTAMP, now()) to czas startu transakcji piszącej, więc wiersz
+# z transakcji zatwierdzonej po odczycie tabeli może mieć znacznik sprzed
+# granicy - granica jest cofana o margines i przed start najstarszej
+# trwającej transakcji (pg_stat_activity)
+WATERMARK_LAG = timedelta(minutes=5)
+
+WATERMARK_SQL = text("""
+    SELECT LEAST(
+        LOCALTIMESTAMP - make_interval(secs => :lag),
+        (
+            SELECT min(xact_start)::timestamp
+            FROM pg_stat_activity
+            WHERE datname = current_database()
+              AND pid <> pg_backend_pid()
+              AND xact_start IS NOT NULL
+        )
+    )
+""")
+
+# Zbiór -> (tabela, kolumna znacznika czasu dla eksportu przyrostowego)
+DATASETS: Dict[str, Tuple[Table, str]] = {
+    "patients": (Patient.__table__, "updated_at"),
+    "predictions": (TriagePrediction.__table__, "predicted_at"),
+    "audit_log": (AuditLog.__table__, "timestamp"),
+}
+
+# Format -> (typ MIME, rozszerzenie pliku)
+FORMATS: Dict[str, Tuple[str, str]] = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportStats:
+    """Liczniki eksportu (aktualizowane w trakcie strumieniowania)"""
+    
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+    
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+    
+    def as_dict(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1)
+        }
+
+
+class _StreamSink(io.RawIOBase):
+    """
+    Plik tylko do zapisu dla ParquetWriter, opróżniany po każdej porcji
+    
+    Pozycja (tell) rośnie mimo opróżniania, więc offsety w stopce
+    Parquet są poprawne dla całego strumienia.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _plain(value):
+    """Wartość dla CSV/Parquet (Decimal -> float, JSONB -> tekst JSON)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _csv_value(value):
+    """Komórka CSV (brak wartości -> pusta komórka, daty w ISO 8601)"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return _plain(value)
+
+
+def _arrow_type(column_type):
+    """Typ kolumny Parquet dla typu kolumny SQLAlchemy"""
+    import pyarrow as pa
+    
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Numeric):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _ndjson_chunks(columns: Sequence[str], batches: Iterable[List]) -> Iterator[bytes]:
+    for rows in batches:
+        yield b"".join(fast_json.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def _csv_chunks(columns: Sequence[str], batches: Iterable[List]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    
+    for rows in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _parquet_chunks(table: Table, batches: Iterable[List]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = pa.schema([(column.name, _arrow_type(column.type)) for column in table.columns])
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    
+    try:
+        for rows in batches:
+            arrays = [
+                pa.array([_plain(value) for value in values], type=field.type)
+                for values, field in zip(zip(*rows), schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    
+    yield sink.drain()
+
+
+class ExportService:
+    """
+    Strumieniowy eksport pełnych tabel dla hurtowni danych
+    
+    Wiersze są czytane kursorem serwerowym (yield_per -> nazwany kursor
+    psycopg2) porcjami po BATCH_SIZE, w kolejności (znacznik czasu, id),
+    i od razu zapisywane jako NDJSON, CSV albo Parquet (grupa wierszy na
+    porcję) - pamięć nie zależy od wielkości tabeli. Eksport przyrostowy:
+    wiersze ze znacznikiem w (since, until], gdzie until to granica
+    z snapshot() - kolejny eksport używa jej jako since.
+    
+    Eksport przyrostowy obejmuje wiersze dodane i zmienione (nowy
+    znacznik). Usunięte wiersze do niego nie trafiają - hurtownia musi je
+    uzgadniać pełnym eksportem (since=None).
+    """
+    
+    @staticmethod
+    def snapshot(db: Session) -> datetime:
+        """
+        Górna granica eksportu (czas bazy, ten sam zegar co znaczniki wierszy)
+        
+        Czas bazy minus WATERMARK_LAG, a jeśli w bazie trwa starsza
+        transakcja - jej start. Wiersz, którego transakcja zatwierdzi się
+        po eksporcie, ma znacznik nie wcześniejszy niż jej start, więc
+        trafi do kolejnego eksportu zamiast przepaść między granicami.
+        Transakcje innych ról mogą nie być widoczne w pg_stat_activity
+        (bez pg_read_all_stats) - dla nich zostaje margines.
+        """
+        return db.execute(WATERMARK_SQL, {"lag": WATERMARK_LAG.total_seconds()}).scalar()
+    
+    @staticmethod
+    def _query(dataset: str, since: Optional[datetime], until: datetime):
+        table, watermark_name = DATASETS[dataset]
+        watermark = table.c[watermark_name]
+        
+        if since is None:
+            # Pełny eksport obejmuje też wiersze bez znacznika
+            window = or_(watermark <= until, watermark.is_(None))
+        else:
+            window = (watermark > since) & (watermark <= until)
+        
+        return select(table).where(window).order_by(watermark, table.c.id)
+    
+    @staticmethod
+    def iter_export(
+        db: Session,
+        dataset: str,
+        fmt: str,
+        since: Optional[datetime],
+        until: datetime,
+        stats: Optional[ExportStats] = None,
+        batch_size: int = BATCH_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Eksportuje zbiór jako strumień bajtów
+        
+        Args:
+            db: Sesja bazy danych (kursor serwerowy żyje do końca iteracji)
+            dataset: Klucz z DATASETS
+            fmt: Klucz z FORMATS
+            since: Dolna granica znacznika (wyłącznie); None = pełny eksport
+            until: Górna granica znacznika (włącznie), z snapshot()
+            stats: Liczniki do aktualizacji (wiersze, bajty, czas)
+            batch_size: Wierszy na porcję
+        
+        Yields:
+            Kolejne porcje pliku
+        """
+        stats = stats or ExportStats()
+        table, _ = DATASETS[dataset]
+        columns = [column.name for column in table.columns]
+        
+        result = db.execute(
+            ExportService._query(dataset, since, until).execution_options(yield_per=batch_size)
+        )
+        
+        def batches() -> Iterator[List]:
+            for rows in result.partitions():
+                stats.rows += len(rows)
+                yield rows
+        
+        if fmt == "parquet":
+            chunks = _parquet_chunks(table, batches())
+        elif fmt == "csv":
+            chunks = _csv_chunks(columns, batches())
+        else:
+            chunks = _ndjson_chunks(columns, batches())
+        
+        try:
+            for chunk in chunks:
+                if chunk:
+                    stats.bytes += len(chunk)
+                    yield chunk
+        finally:
+            result.close()
+    
+    @staticmethod
+    def stream_export(
+        dataset: str,
+        fmt: str,
+        since: Optional[datetime],
+        until: datetime,
+        user_id: int,
+        ip_address: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        iter_export dla StreamingResponse - z własną sesją i raportem
+        
+        Generator działa już po wysłaniu nagłówków odpowiedzi, więc otwiera
+        własną sesję. Po zakończeniu zapisuje w audit logu akcję EXPORT_DATA
+        z liczbą wierszy, bajtów i przepustowością.
+        """
+        stats = ExportStats()
+        db = SessionLocal()
+        
+        try:
+            yield from ExportService.iter_export(db, dataset, fmt, since, until, stats)
+            db.rollback()
+            
+            print(
+                f" Export {dataset} ({fmt}): {stats.rows:,} wierszy, {stats.bytes / 1e6:.1f} MB "
+                f"w {stats.seconds:.1f}s ({stats.rows_per_second:,.0f} wierszy/s)"
+            )
+            log_action(
+                db=db,
+                user_id=user_id,
+                action="EXPORT_DATA",
+                table_name=DATASETS[dataset][0].name,
+                new_values={
+                    "format": fmt,
+                    "since": since.isoformat() if since else None,
+                    "until": until.isoformat(),
+                    **stats.as_dict()
+                },
+                ip_address=ip_address
+            )
+        finally:
+            db.close()
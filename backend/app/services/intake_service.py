@@ -0,0 +1,407 @@
+import codecs
+import csv
+import json
+import logging
+from decimal import Decimal
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.ml.predictor import predictor
+from app.models import Patient, TriagePrediction
+from app.schemas import BulkIntakeRow, TriagePreviewRequest
+from app.services.allocation_service import allocation_predictor
+from app.services.analytics_service import AnalyticsService
+from app.services.audit_service import log_action
+from app.services.department_service import DepartmentService
+from app.services.occupancy_ledger import OccupancyLedger
+from app.services.occupancy_service import OccupancyService
+from app.services.queue_service import waiting_queue
+from app.services.triage_service import CATEGORY_TO_DEPARTMENT, TEMPLATE_TO_DEPARTMENT
+from app.utils import fast_json
+
+logger = logging.getLogger(__name__)
+
+# Komunikaty błędów zwracane klientowi - szczegóły (SQL, ograniczenia,
+# wyjątki modelu) trafiają tylko do logu serwera
+PREDICTION_FAILED = "Triage prediction failed"
+MODEL_UNAVAILABLE = "Triage model not available"
+WRITE_CONFLICT = "Row conflicts with existing data or violates a constraint"
+WRITE_INVALID = "Row contains a value the database cannot store"
+WRITE_FAILED = "Database write failed"
+
+# Ile wierszy w jednej transakcji (inferencja + INSERT + commit)
+CHUNK_SIZE = 500
+
+# Maksymalna liczba wierszy w jednym uploadzie
+MAX_ROWS = 50_000
+
+# Pola danych pacjenta (wejście modelu triażu)
+PATIENT_FIELDS = set(TriagePreviewRequest.model_fields)
+
+DECIMAL_FIELDS = (
+    "tetno", "cisnienie_skurczowe", "cisnienie_rozkurczowe", "temperatura",
+    "saturacja", "czestotliwosc_oddechow", "czas_od_objawow_h"
+)
+
+def _write_error(error: Exception) -> str:
+    """Stały komunikat dla błędu zapisu paczki (bez treści wyjątku)"""
+    if isinstance(error, IntegrityError):
+        return WRITE_CONFLICT
+    if isinstance(error, DataError):
+        return WRITE_INVALID
+    return WRITE_FAILED
+
+
+# (numer linii, poprawny wiersz albo opis błędu walidacji)
+ParsedRow = Tuple[int, Union[BulkIntakeRow, str]]
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Dzieli strumień bajtów na linie (UTF-8, z pominięciem BOM)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Błędy walidacji Pydantic w jednej linii"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def _fallback_department(category: int, template: Optional[str]) -> str:
+    """Oddział z reguł (szablon, potem kategoria) - jak w preview_triage"""
+    if template and template in TEMPLATE_TO_DEPARTMENT:
+        return TEMPLATE_TO_DEPARTMENT[template]
+    return CATEGORY_TO_DEPARTMENT.get(category, "SOR")
+
+
+class BulkIntakeService:
+    """
+    Masowa rejestracja pacjentów (NDJSON/CSV)
+    
+    Wiersze są czytane ze strumienia uploadu linia po linii i walidowane
+    od razu. Potem przetwarzane są paczkami po CHUNK_SIZE: jedna predykcja
+    triażu i jedna alokacji na paczkę (macierz cech zamiast wywołania na
+    pacjenta), wielowierszowe INSERT pacjentów, predykcji i zdarzeń
+    obłożenia, zbiorczy upsert agregatów i jeden commit. Wyniki per wiersz
+    są odsyłane jako NDJSON po każdej paczce.
+    """
+    
+    @staticmethod
+    async def read_rows(stream: AsyncIterator[bytes], fmt: str) -> List[ParsedRow]:
+        """
+        Czyta i waliduje wiersze uploadu
+        
+        Args:
+            stream: Strumień treści requestu (request.stream())
+            fmt: "ndjson" (obiekt JSON w linii) lub "csv" (pierwsza linia
+                to nagłówek z nazwami pól; puste komórki = brak wartości)
+        
+        Returns:
+            Lista (numer linii, BulkIntakeRow lub opis błędu)
+        
+        Raises:
+            HTTPException: 413 po przekroczeniu MAX_ROWS
+        """
+        rows: List[ParsedRow] = []
+        header: Optional[List[str]] = None
+        line_no = 0
+        
+        async for line in _iter_lines(stream):
+            line_no += 1
+            if not line.strip():
+                continue
+            
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = [name.strip() for name in values]
+                    continue
+                if len(values) != len(header):
+                    rows.append((line_no, f"Expected {len(header)} columns, got {len(values)}"))
+                    continue
+                data = {name: (value.strip() or None) for name, value in zip(header, values)}
+            else:
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    rows.append((line_no, f"Invalid JSON: {e}"))
+                    continue
+            
+            try:
+                rows.append((line_no, BulkIntakeRow.model_validate(data)))
+            except ValidationError as e:
+                rows.append((line_no, _format_validation_error(e)))
+            
+            if len(rows) > MAX_ROWS:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Too many rows (max {MAX_ROWS})"
+                )
+        
+        return rows
+    
+    @staticmethod
+    def _occupancy(db: Session) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]]]:
+        """Obecne obłożenie i prognoza dla modelu alokacji (wspólne dla paczki)"""
+        try:
+            forecast = OccupancyService.get_forecast(
+                db,
+                hours_ahead=max(3, allocation_predictor.future_horizon_hours)
+            )
+            return forecast["current"], forecast.get("forecast", {})
+        except Exception as e:
+            logger.warning("Bulk intake: prognoza obłożenia niedostępna: %s", e)
+            _, counts = OccupancyLedger.occupancy_at(db)
+            return counts, {}
+    
+    @staticmethod
+    def _allocate(
+        db: Session,
+        patients_data: List[Dict],
+        categories: List[int]
+    ) -> List[str]:
+        """Oddziały z modelu alokacji (jedno wywołanie), bez modelu - z reguł"""
+        if allocation_predictor.model is not None and patients_data:
+            try:
+                current, future = BulkIntakeService._occupancy(db)
+                results = allocation_predictor.predict_departments(
+                    patients_data, categories, current, future
+                )
+                return [result["department"] for result in results]
+            except Exception as e:
+                logger.warning(
+                    "Bulk intake: model alokacji nie zadziałał dla %d wierszy, reguły: %s",
+                    len(patients_data), e
+                )
+        
+        return [
+            _fallback_department(category, patient_data.get("szablon_przypadku"))
+            for patient_data, category in zip(patients_data, categories)
+        ]
+    
+    @staticmethod
+    def process_chunk(
+        db: Session,
+        chunk: List[ParsedRow],
+        user_id: int,
+        ip_address: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Przetwarza paczkę wierszy w jednej transakcji
+        
+        Args:
+            db: Sesja bazy danych
+            chunk: Wiersze z read_rows
+            user_id: ID użytkownika rejestrującego
+            ip_address: Adres IP
+        
+        Returns:
+            Wyniki per wiersz (w kolejności linii): status created,
+            invalid (błąd walidacji/predykcji) lub failed (błąd zapisu)
+        """
+        results: Dict[int, Dict] = {}
+        valid: List[Tuple[int, BulkIntakeRow, Dict]] = []
+        
+        for line_no, row in chunk:
+            if isinstance(row, str):
+                results[line_no] = {"line": line_no, "status": "invalid", "error": row}
+            else:
+                valid.append((line_no, row, row.model_dump(include=PATIENT_FIELDS)))
+        
+        if valid:
+            try:
+                triage = predictor.predict_batch([patient_data for _, _, patient_data in valid])
+            except HTTPException as e:
+                logger.error("Bulk intake: predykcja paczki %d wierszy: %s", len(valid), e.detail)
+                error = MODEL_UNAVAILABLE if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE else PREDICTION_FAILED
+                for line_no, _, _ in valid:
+                    results[line_no] = {"line": line_no, "status": "failed", "error": error}
+                return [results[line_no] for line_no, _ in chunk]
+            
+            accepted = []
+            for (line_no, row, patient_data), prediction in zip(valid, triage):
+                if "error" in prediction:
+                    results[line_no] = {"line": line_no, "status": "invalid", "error": prediction["error"]}
+                else:
+                    accepted.append((line_no, row, patient_data, prediction))
+            
+            created: List[int] = []
+            try:
+                created = BulkIntakeService._insert(db, accepted, user_id, results)
+            except Exception as e:
+                db.rollback()
+                logger.exception("Bulk intake: zapis paczki %d wierszy nie powiódł się", len(accepted))
+                error = _write_error(e)
+                for line_no, _, _, _ in accepted:
+                    results[line_no] = {"line": line_no, "status": "failed", "error": error}
+            
+            if created:
+                waiting_queue.sync_patients(db, created)
+                DepartmentService.publish_occupancy(db)
+                log_action(
+                    db=db,
+                    user_id=user_id,
+                    action="BULK_INTAKE",
+                    table_name="patients",
+                    new_values={"patient_ids": created, "count": len(created)},
+                    ip_address=ip_address
+                )
+        
+        return [results[line_no] for line_no, _ in chunk]
+    
+    @staticmethod
+    def _insert(
+        db: Session,
+        accepted: List[Tuple[int, BulkIntakeRow, Dict, Dict]],
+        user_id: int,
+        results: Dict[int, Dict]
+    ) -> List[int]:
+        """Alokacja + wielowierszowe INSERT + commit; uzupełnia results"""
+        if not accepted:
+            return []
+        
+        categories = [
+            row.kategoria_triazu or prediction["category"]
+            for _, row, _, prediction in accepted
+        ]
+        
+        to_allocate = [i for i, (_, row, _, _) in enumerate(accepted) if not row.przypisany_oddzial]
+        allocated = BulkIntakeService._allocate(
+            db,
+            [accepted[i][2] for i in to_allocate],
+            [categories[i] for i in to_allocate]
+        )
+        departments = [row.przypisany_oddzial for _, row, _, _ in accepted]
+        for i, department in zip(to_allocate, allocated):
+            departments[i] = department
+        
+        patients = db.execute(
+            insert(Patient).returning(
+                Patient.id, Patient.data_przyjecia, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    **{
+                        field: Decimal(str(value)) if field in DECIMAL_FIELDS else value
+                        for field, value in patient_data.items()
+                    },
+                    "status": 'oczekujący',
+                    "wprowadzony_przez": user_id
+                }
+                for _, _, patient_data, _ in accepted
+            ]
+        ).all()
+        
+        prediction_rows = []
+        for (_, _, _, prediction), (patient_id, _), category, department in zip(
+            accepted, patients, categories, departments
+        ):
+            prediction_rows.append({
+                "patient_id": patient_id,
+                "kategoria_triazu": category,
+                **{
+                    f"prob_kat_{k}": Decimal(str(prediction["probabilities"][str(k)]))
+                    for k in range(1, 6)
+                },
+                "przypisany_oddzial": department,
+                "oddzial_docelowy": department,
+                "model_version": prediction["model_version"],
+                "confidence_score": Decimal(str(prediction["confidence"]))
+            })
+        
+        predicted_at = db.execute(
+            insert(TriagePrediction).returning(
+                TriagePrediction.predicted_at, sort_by_parameter_order=True
+            ),
+            prediction_rows
+        ).scalars().all()
+        
+        AnalyticsService.record_batch(
+            db,
+            [admitted_at for _, admitted_at in patients],
+            [
+                {**row, "predicted_at": at, "admitted_at": admitted_at}
+                for row, at, (_, admitted_at) in zip(prediction_rows, predicted_at, patients)
+            ]
+        )
+        
+        OccupancyLedger.record_events(db, [
+            {"department": department, "delta": 1, "event_type": "admission", "patient_id": patient_id}
+            for (patient_id, _), department in zip(patients, departments)
+        ])
+        
+        db.commit()
+        
+        for (line_no, row, _, prediction), (patient_id, admitted_at), category, department in zip(
+            accepted, patients, categories, departments
+        ):
+            results[line_no] = {
+                "line": line_no,
+                "status": "created",
+                "patient_id": patient_id,
+                "kategoria_triazu": category,
+                "przypisany_oddzial": department,
+                "confidence_score": prediction["confidence"],
+                "model_version": prediction["model_version"],
+                "created_at": admitted_at,
+                "was_modified": bool(
+                    (row.kategoria_triazu and row.kategoria_triazu != prediction["category"]) or
+                    row.przypisany_oddzial
+                )
+            }
+        
+        return [patient_id for patient_id, _ in patients]
+    
+    @staticmethod
+    def iter_results(
+        rows: List[ParsedRow],
+        user_id: int,
+        ip_address: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        Przetwarza wiersze paczkami i zwraca wyniki jako NDJSON
+        
+        Generator ma własną sesję bazy danych, bo działa już po wysłaniu
+        nagłówków odpowiedzi (StreamingResponse). Ostatnia linia to
+        {"summary": {"created": ..., "invalid": ..., "failed": ...}}.
+        
+        Args:
+            rows: Wiersze z read_rows
+            user_id: ID użytkownika rejestrującego
+            ip_address: Adres IP
+        """
+        counts = {"created": 0, "invalid": 0, "failed": 0}
+        db = SessionLocal()
+        
+        try:
+            for start in range(0, len(rows), CHUNK_SIZE):
+                results = BulkIntakeService.process_chunk(
+                    db, rows[start:start + CHUNK_SIZE], user_id, ip_address
+                )
+                for result in results:
+                    counts[result["status"]] += 1
+                
+                yield b"".join(fast_json.dumps(result) + b"\n" for result in results)
+            
+            yield fast_json.dumps({"summary": counts}) + b"\n"
+        finally:
+            db.close()
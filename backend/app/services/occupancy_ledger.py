@@ -0,0 +1,305 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Table, Column, Integer, BigInteger, String, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from app.core.database import Base
+from app.models import DepartmentOccupancy, Patient
+from app.services.occupancy_profile import occupancy_profile
+from app.services.occupancy_timeseries import (
+    DEPARTMENT_COLUMNS,
+    RAW_RETENTION,
+    OccupancyTimeSeries
+)
+
+# Statusy, w których pacjent zajmuje miejsce na oddziale
+ACTIVE_STATUSES = ('oczekujący', 'w_leczeniu')
+
+# Co ile zapisywać snapshot obłożenia do department_occupancy
+SNAPSHOT_INTERVAL = timedelta(hours=1)
+
+# Snapshot jest robiony na chwilę sprzed SNAPSHOT_LAG, żeby zdarzenia
+# z transakcji, które jeszcze trwają, nie wypadły przed snapshot
+SNAPSHOT_LAG = timedelta(minutes=1)
+
+# Dziennik zmian obłożenia - tylko INSERT, nigdy UPDATE
+occupancy_events = Table(
+    "occupancy_events",
+    Base.metadata,
+    Column("id", BigInteger, primary_key=True),
+    Column("timestamp", DateTime, nullable=False, server_default=func.now()),
+    Column("department", String(50), nullable=False),
+    Column("delta", Integer, nullable=False),
+    Column("event_type", String(20), nullable=False),
+    Column("patient_id", Integer, ForeignKey("patients.id", ondelete="SET NULL")),
+)
+
+
+class OccupancyLedger:
+    """
+    Obłożenie oddziałów jako dziennik zdarzeń + snapshoty
+    
+    Każde przyjęcie, wypis i przeniesienie to osobny wiersz w
+    occupancy_events z deltą +1/-1, więc równoległe zapisy nie gubią
+    zmian (nie ma read-modify-write). Snapshoty to wiersze
+    department_occupancy: pomiary z record_occupancy oraz okresowe
+    podsumowania dziennika. Obłożenie w chwili T = ostatni snapshot
+    przed T + suma delt od snapshotu do T.
+    
+    Pacjent zajmuje miejsce, gdy ma predykcję (oddział) i status aktywny.
+    Każda ścieżka, która to zmienia, dopisuje zdarzenie: predykcja
+    aktywnego pacjenta (record_admission), potwierdzenie triażu i przyjęcie
+    wsadowe (admission), zmiana statusu (record_status_change) i usunięcie
+    pacjenta (correction) - inaczej wypis zdejmowałby miejsce, którego
+    pacjent nigdy nie zajął.
+    """
+    
+    @staticmethod
+    def record_event(
+        db: Session,
+        department: str,
+        delta: int,
+        event_type: str,
+        patient_id: Optional[int] = None
+    ) -> bool:
+        """
+        Dopisuje zdarzenie do dziennika
+        
+        Nie commituje - zdarzenie zapisuje się razem ze zmianą pacjenta.
+        
+        Args:
+            db: Sesja bazy danych
+            department: Nazwa oddziału (np. "SOR")
+            delta: Zmiana obłożenia (+1 / -1)
+            event_type: admission, discharge, transfer lub correction
+            patient_id: ID pacjenta
+        
+        Returns:
+            True jeśli zdarzenie zostało zapisane (znany oddział)
+        """
+        if department not in DEPARTMENT_COLUMNS:
+            return False
+        
+        db.execute(occupancy_events.insert().values(
+            department=department,
+            delta=delta,
+            event_type=event_type,
+            patient_id=patient_id
+        ))
+        return True
+    
+    @staticmethod
+    def record_events(db: Session, events: List[Dict]) -> int:
+        """
+        Dopisuje wiele zdarzeń jednym wielowierszowym INSERT
+        
+        Nie commituje. Zdarzenia dla nieznanych oddziałów są pomijane.
+        
+        Args:
+            db: Sesja bazy danych
+            events: Słowniki z kluczami department, delta, event_type, patient_id
+        
+        Returns:
+            Liczba zapisanych zdarzeń
+        """
+        events = [event for event in events if event["department"] in DEPARTMENT_COLUMNS]
+        
+        if events:
+            db.execute(occupancy_events.insert(), events)
+        
+        return len(events)
+    
+    @staticmethod
+    def record_transfer(
+        db: Session,
+        patient_id: int,
+        from_department: str,
+        to_department: str
+    ) -> None:
+        """
+        Zapisuje przeniesienie pacjenta między oddziałami (-1 / +1)
+        
+        Args:
+            db: Sesja bazy danych
+            patient_id: ID pacjenta
+            from_department: Oddział źródłowy
+            to_department: Oddział docelowy
+        """
+        OccupancyLedger.record_event(db, from_department, -1, "transfer", patient_id)
+        OccupancyLedger.record_event(db, to_department, 1, "transfer", patient_id)
+    
+    @staticmethod
+    def record_admission(db: Session, patient: Patient, department: str) -> bool:
+        """
+        Zapisuje przyjęcie (+1) po nadaniu pacjentowi predykcji
+        
+        Pacjent bez predykcji nie zajmuje miejsca, więc zmiany jego statusu
+        nie trafiają do dziennika - miejsce zajmuje dopiero predykcja, jeśli
+        pacjent ma wtedy status aktywny. Nie commituje.
+        
+        Args:
+            db: Sesja bazy danych
+            patient: Pacjent, któremu nadano predykcję
+            department: Przypisany oddział
+        
+        Returns:
+            True jeśli obłożenie się zmieniło
+        """
+        if patient.status not in ACTIVE_STATUSES:
+            return False
+        return OccupancyLedger.record_event(db, department, 1, "admission", patient.id)
+    
+    @staticmethod
+    def record_status_change(
+        db: Session,
+        patient: Patient,
+        old_status: str,
+        new_status: str
+    ) -> bool:
+        """
+        Zapisuje zdarzenie wynikające ze zmiany statusu pacjenta
+        
+        Wypis ('wypisany') zwalnia miejsce jako discharge, przekazanie
+        ('przekazany') jako transfer. Powrót do statusu aktywnego
+        zajmuje miejsce ponownie (admission).
+        
+        Args:
+            db: Sesja bazy danych
+            patient: Pacjent (z predykcją określającą oddział)
+            old_status: Poprzedni status
+            new_status: Nowy status
+        
+        Returns:
+            True jeśli obłożenie się zmieniło
+        """
+        if patient.prediction is None:
+            return False
+        
+        was_active = old_status in ACTIVE_STATUSES
+        is_active = new_status in ACTIVE_STATUSES
+        department = patient.prediction.przypisany_oddzial
+        
+        if was_active and not is_active:
+            event_type = "discharge" if new_status == 'wypisany' else "transfer"
+            return OccupancyLedger.record_event(db, department, -1, event_type, patient.id)
+        
+        if is_active and not was_active:
+            return OccupancyLedger.record_event(db, department, 1, "admission", patient.id)
+        
+        return False
+    
+    @staticmethod
+    def occupancy_at(
+        db: Session,
+        at: Optional[datetime] = None
+    ) -> Tuple[datetime, Dict[str, int]]:
+        """
+        Oblicza obłożenie oddziałów w danej chwili
+        
+        Args:
+            db: Sesja bazy danych
+            at: Chwila (domyślnie teraz)
+        
+        Returns:
+            (chwila, {"SOR": 18, "Interna": 42, ...})
+        """
+        at = at or datetime.now()
+        
+        snapshot = db.query(DepartmentOccupancy).filter(
+            DepartmentOccupancy.timestamp <= at
+        ).order_by(
+            DepartmentOccupancy.timestamp.desc()
+        ).first()
+        
+        counts = {
+            dept: (getattr(snapshot, column) or 0) if snapshot else 0
+            for dept, column in DEPARTMENT_COLUMNS.items()
+        }
+        
+        deltas = db.query(
+            occupancy_events.c.department,
+            func.sum(occupancy_events.c.delta)
+        ).filter(
+            occupancy_events.c.timestamp <= at
+        )
+        if snapshot:
+            deltas = deltas.filter(occupancy_events.c.timestamp > snapshot.timestamp)
+        
+        for department, delta in deltas.group_by(occupancy_events.c.department).all():
+            if department in counts:
+                counts[department] = max(counts[department] + int(delta or 0), 0)
+        
+        return at, counts
+    
+    @staticmethod
+    def take_snapshot(db: Session, at: Optional[datetime] = None) -> None:
+        """
+        Zapisuje snapshot obłożenia (podsumowanie dziennika) i commituje
+        
+        Istniejący wiersz o tym samym timestampie wygrywa
+        (ON CONFLICT DO NOTHING), więc równoległe snapshoty są bezpieczne.
+        
+        Args:
+            db: Sesja bazy danych
+            at: Chwila snapshotu (domyślnie teraz - SNAPSHOT_LAG)
+        """
+        at = at or (datetime.now() - SNAPSHOT_LAG).replace(microsecond=0)
+        _, counts = OccupancyLedger.occupancy_at(db, at)
+        
+        db.execute(pg_insert(DepartmentOccupancy.__table__).values(
+            timestamp=at,
+            **{DEPARTMENT_COLUMNS[dept]: count for dept, count in counts.items()}
+        ).on_conflict_do_nothing(index_elements=["timestamp"]))
+        OccupancyTimeSeries.refresh(db, since=at)
+        db.commit()
+        
+        occupancy_profile.add_sample(at, counts)
+    
+    @staticmethod
+    def maybe_snapshot(db: Session) -> None:
+        """
+        Zapisuje snapshot, jeśli ostatni jest starszy niż SNAPSHOT_INTERVAL
+        
+        Args:
+            db: Sesja bazy danych
+        """
+        last = db.query(func.max(DepartmentOccupancy.timestamp)).scalar()
+        
+        if last is None or datetime.now() - last >= SNAPSHOT_INTERVAL:
+            OccupancyLedger.take_snapshot(db)
+            OccupancyLedger.apply_retention(db)
+    
+    @staticmethod
+    def apply_retention(db: Session, keep: timedelta = RAW_RETENTION) -> int:
+        """
+        Usuwa surowe wiersze obłożenia starsze niż okres retencji i commituje
+        
+        Zostaje najnowszy snapshot sprzed granicy (baza dla późniejszych
+        zdarzeń), a zdarzenia, które już są w nim zawarte, są usuwane.
+        Agregaty godzinowe i dzienne (OccupancyTimeSeries) zostają.
+        
+        Args:
+            db: Sesja bazy danych
+            keep: Okres retencji surowych wierszy
+        
+        Returns:
+            Liczba usuniętych wierszy department_occupancy
+        """
+        cutoff = datetime.now() - keep
+        
+        base = db.query(func.max(DepartmentOccupancy.timestamp)).filter(
+            DepartmentOccupancy.timestamp <= cutoff
+        ).scalar()
+        
+        if base is None:
+            return 0
+        
+        deleted = db.query(DepartmentOccupancy).filter(
+            DepartmentOccupancy.timestamp < base
+        ).delete(synchronize_session=False)
+        
+        db.execute(occupancy_events.delete().where(occupancy_events.c.timestamp <= base))
+        db.commit()
+        
+        return deleted
@@ -0,0 +1,223 @@
+import math
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.occupancy_timeseries import OccupancyTimeSeries
+
+# Z ilu ostatnich tygodni budować profil
+PROFILE_WEEKS = 8
+
+# Co ile przebudować profil z bazy (żeby stare tygodnie wypadały z okna)
+PROFILE_RELOAD = timedelta(days=1)
+
+# Minimalna liczba obserwacji w kubełku, żeby oceniać anomalię
+MIN_SAMPLES = 4
+
+HOURS_PER_WEEK = 168
+
+
+def hour_of_week(timestamp: datetime) -> int:
+    """Numer godziny w tygodniu: 0 = poniedziałek 0:00, 167 = niedziela 23:00"""
+    return timestamp.weekday() * 24 + timestamp.hour
+
+
+def _truncate_hour(timestamp: datetime) -> datetime:
+    """Obcina timestamp do pełnej godziny"""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _percentile(histogram: Counter, total: int, q: float) -> int:
+    """Percentyl (najbliższa wartość) z histogramu wartości całkowitych"""
+    rank = max(math.ceil(q * total), 1)
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= rank:
+            return value
+    return 0
+
+
+class OccupancyProfile:
+    """
+    Profil obłożenia oddziałów w rozbiciu na godziny tygodnia
+    
+    Dla każdego oddziału i każdej ze 168 godzin tygodnia trzyma histogram
+    obłożenia na koniec godziny z ostatnich PROFILE_WEEKS tygodni. Obłożenie
+    to liczby całkowite, więc histogram daje dokładną średnią i percentyle
+    w pamięci. Profil jest budowany z occupancy_hourly przy pierwszym
+    odczycie, a potem aktualizowany przez add_sample: bieżąca godzina jest
+    "otwarta" i trafia do histogramu, gdy przyjdzie pomiar z kolejnej.
+    
+    Snapshoty powstają tylko przy zapisach, więc w spokojnych godzinach
+    (noce, weekendy) pomiarów brak. Taka godzina dostaje obłożenie
+    poprzedniej (obłożenie trwa do następnej zmiany) - inaczej profil
+    byłby przesunięty w stronę godzin z ruchem.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, int], Counter] = {}
+        self._open_hour: Optional[datetime] = None
+        self._open_counts: Dict[str, int] = {}
+        self._loaded_at: Optional[datetime] = None
+    
+    def load(self, db: Session) -> None:
+        """
+        Buduje profil z agregatów godzinowych
+        
+        Args:
+            db: Sesja bazy danych
+        """
+        now = datetime.now()
+        current_hour = _truncate_hour(now)
+        
+        # Godziny bez pomiaru są już wypełnione poprzednią wartością
+        matrix = OccupancyTimeSeries.get_hourly_matrix(
+            db, PROFILE_WEEKS * HOURS_PER_WEEK + 1, end=current_hour
+        )
+        
+        histograms: Dict[Tuple[str, int], Counter] = {}
+        open_counts: Dict[str, int] = {}
+        
+        for bucket, counts in matrix:
+            if bucket >= current_hour:
+                open_counts = dict(counts)
+                continue
+            slot = hour_of_week(bucket)
+            for department, value in counts.items():
+                histograms.setdefault((department, slot), Counter())[value] += 1
+        
+        with self._lock:
+            self._histograms = histograms
+            self._open_hour = current_hour
+            self._open_counts = open_counts
+            self._loaded_at = now
+    
+    def _ensure_loaded(self, db: Session) -> None:
+        """Wczytuje profil przy pierwszym odczycie i raz na PROFILE_RELOAD"""
+        if self._loaded_at is None or datetime.now() - self._loaded_at >= PROFILE_RELOAD:
+            self.load(db)
+    
+    def add_sample(self, timestamp: datetime, counts: Dict[str, int]) -> None:
+        """
+        Dolicza pomiar obłożenia do profilu
+        
+        Pomiar nadpisuje obłożenie otwartej godziny. Pomiar z nowszej
+        godziny zamyka poprzednią (jej ostatnia wartość trafia do
+        histogramu), a godziny bez pomiarów pomiędzy nimi dostają tę samą
+        wartość. Pomiary starsze niż otwarta godzina są pomijane -
+        uwzględni je najbliższa przebudowa profilu.
+        
+        Args:
+            timestamp: Chwila pomiaru
+            counts: Obłożenie {"SOR": 18, ...}
+        """
+        if self._loaded_at is None:
+            return
+        
+        hour = _truncate_hour(timestamp)
+        
+        with self._lock:
+            if self._open_hour is not None and hour < self._open_hour:
+                return
+            
+            if self._open_hour is not None and hour > self._open_hour:
+                # Dłuższej przerwy niż okno profilu nie ma sensu wypełniać
+                closed = self._open_hour
+                if hour - closed > timedelta(weeks=PROFILE_WEEKS):
+                    closed = hour - timedelta(weeks=PROFILE_WEEKS)
+                
+                while closed < hour:
+                    slot = hour_of_week(closed)
+                    for department, value in self._open_counts.items():
+                        self._histograms.setdefault((department, slot), Counter())[value] += 1
+                    closed += timedelta(hours=1)
+            
+            self._open_hour = hour
+            self._open_counts = {**self._open_counts, **counts}
+    
+    def bucket(self, db: Session, department: str, at: datetime) -> Optional[Dict]:
+        """
+        Typowe obłożenie oddziału w danej godzinie tygodnia
+        
+        Args:
+            db: Sesja bazy danych (używana tylko przy wczytywaniu profilu)
+            department: Nazwa oddziału
+            at: Chwila, dla której szukamy godziny tygodnia
+        
+        Returns:
+            {"mean", "p10", "p50", "p90", "samples"} lub None bez danych
+        """
+        self._ensure_loaded(db)
+        
+        with self._lock:
+            histogram = self._histograms.get((department, hour_of_week(at)))
+            histogram = Counter(histogram) if histogram else None
+        
+        if not histogram:
+            return None
+        
+        total = sum(histogram.values())
+        return {
+            "mean": round(sum(v * c for v, c in histogram.items()) / total, 2),
+            "p10": _percentile(histogram, total, 0.1),
+            "p50": _percentile(histogram, total, 0.5),
+            "p90": _percentile(histogram, total, 0.9),
+            "samples": total
+        }
+    
+    def peak_hours(self, db: Session, department: str, top: int = 3) -> List[int]:
+        """
+        Godziny doby z najwyższym średnim obłożeniem (po wszystkich dniach tygodnia)
+        
+        Args:
+            db: Sesja bazy danych (używana tylko przy wczytywaniu profilu)
+            department: Nazwa oddziału
+            top: Ile godzin zwrócić
+        
+        Returns:
+            Lista godzin (0-23), od najbardziej obłożonej
+        """
+        self._ensure_loaded(db)
+        
+        sums = [0] * 24
+        totals = [0] * 24
+        
+        with self._lock:
+            for slot in range(HOURS_PER_WEEK):
+                histogram = self._histograms.get((department, slot))
+                if not histogram:
+                    continue
+                sums[slot % 24] += sum(v * c for v, c in histogram.items())
+                totals[slot % 24] += sum(histogram.values())
+        
+        means = {hour: sums[hour] / totals[hour] for hour in range(24) if totals[hour]}
+        return sorted(means, key=means.get, reverse=True)[:top]
+    
+    @staticmethod
+    def is_anomaly(profile: Optional[Dict], occupancy: int) -> bool:
+        """
+        Czy obłożenie odbiega od typowego dla godziny tygodnia
+        
+        Anomalia to wartość poza przedziałem p10-p90 kubełka, oceniana
+        tylko gdy kubełek ma co najmniej MIN_SAMPLES obserwacji.
+        
+        Args:
+            profile: Kubełek z bucket()
+            occupancy: Bieżące obłożenie
+        
+        Returns:
+            True jeśli obłożenie jest nietypowe
+        """
+        if profile is None or profile["samples"] < MIN_SAMPLES:
+            return False
+        
+        return occupancy < profile["p10"] or occupancy > profile["p90"]
+
+
+# Globalna instancja profilu
+occupancy_profile = OccupancyProfile()
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
 from pathlib import Path
 import pickle
 import numpy as np
@@ -9,11 +9,15 @@ from tensorflow import keras
 
 from app.models import DepartmentOccupancy
 from app.core.config import settings
+from app.services.occupancy_ledger import OccupancyLedger
+from app.services.occupancy_timeseries import OccupancyTimeSeries
+from app.services.rolling_features_service import rolling_feature_store
+from app.ml.feature_spec import LEGACY_OCCUPANCY_SPEC, OccupancyFeatureSpec
+from app.ml.rolling_features import RollingAggregates
 
 DEPARTMENTS = ["SOR", "Interna", "Kardiologia", "Chirurgia", 
                "Ortopedia", "Neurologia", "Pediatria", "Ginekologia"]
 
-SEQUENCE_LENGTH = 24  # 24 godziny historii
 N_DEPARTMENTS = len(DEPARTMENTS)
 
 class OccupancyPredictor:
@@ -26,6 +30,7 @@ class OccupancyPredictor:
         self.target_scaler = None
         self.model_version = None
         self.model_path = Path(settings.MODEL_PATH)
+        self.spec = OccupancyFeatureSpec(LEGACY_OCCUPANCY_SPEC)
         
     def load_model(self):
         """Wczytuje najnowszy model LSTM z dysku"""
@@ -100,55 +105,78 @@ class OccupancyPredictor:
         self.target_scaler = scalers['target_scaler']
         
         print(f" Scalers wczytane: {scalers_filename}")
+        
+        self.spec = self._load_spec(latest_info)
+        self.spec.validate(self.model, self.seq_scaler, self.static_scaler, self.target_scaler)
+        print(f" Specyfikacja cech: {self.spec.lookback_hours}h historii, "
+              f"{len(self.spec.static_columns)} cech statycznych")
+        
         print(f" Model v{self.model_version} gotowy do użycia")
         print(f" MAE: {latest_info.get('mae', 'N/A')}")
     
+    def _load_spec(self, latest_info: dict) -> OccupancyFeatureSpec:
+        """
+        Wczytuje specyfikację cech z metadanych modelu
+        
+        Modele bez "feature_spec" w metadanych dostają specyfikację
+        dotychczasowego serwowania (LEGACY_OCCUPANCY_SPEC).
+        
+        Raises:
+            FeatureSpecError: Jeśli specyfikacja jest nieobsługiwana
+        """
+        import json
+        
+        metadata_filename = (
+            latest_info.get('metadata_file') or
+            latest_info.get('metadata_filename') or
+            latest_info.get('metadata_path')
+        )
+        
+        if not metadata_filename:
+            return OccupancyFeatureSpec(LEGACY_OCCUPANCY_SPEC)
+        
+        metadata_file = self.model_path / Path(metadata_filename).name
+        if not metadata_file.exists():
+            return OccupancyFeatureSpec(LEGACY_OCCUPANCY_SPEC)
+        
+        with open(metadata_file, 'r') as f:
+            metadata = json.load(f)
+        
+        return OccupancyFeatureSpec(metadata.get('feature_spec', LEGACY_OCCUPANCY_SPEC))
+    
     def prepare_sequences(
         self, 
-        occupancy_history: List[DepartmentOccupancy]
+        occupancy_history: List[Tuple[datetime, Dict[str, int]]],
+        aggregates: RollingAggregates,
+        current_occupancy: Dict[str, int]
     ) -> tuple:
         """
-        Przygotowuje sekwencje dla LSTM
+        Przygotowuje sekwencje dla LSTM wg specyfikacji cech
         
         Args:
-            occupancy_history: Historia obłożenia (24h)
+            occupancy_history: Godzinowa historia pełnych godzin obłożenia
+                jako lista (godzina, {"SOR": 18, ...})
+            aggregates: Agregaty kroczące na ostatnią godzinę historii
+            current_occupancy: Bieżące obłożenie (godzina po historii)
             
         Returns:
             (X_seq, X_static) gotowe do predykcji
         """
-        if len(occupancy_history) < SEQUENCE_LENGTH:
+        lookback = self.spec.lookback_hours
+        
+        if len(occupancy_history) < lookback:
             raise ValueError(
-                f"Potrzeba {SEQUENCE_LENGTH}h historii, mamy tylko {len(occupancy_history)}"
+                f"Potrzeba {lookback}h historii, mamy tylko {len(occupancy_history)}"
             )
         
-        recent_history = occupancy_history[-SEQUENCE_LENGTH:]
+        X_seq = self.spec.build_sequence(occupancy_history)[np.newaxis]  # (1, lookback, n_seq)
         
-        sequence = []
-        for record in recent_history:
-            values = [
-                record.sor,
-                record.interna,
-                record.kardiologia,
-                record.chirurgia,
-                record.ortopedia,
-                record.neurologia,
-                record.pediatria,
-                record.ginekologia
-            ]
-            sequence.append(values)
-        
-        X_seq = np.array([sequence], dtype=np.float32)  # (1, 24, 8)
-        
-        last_timestamp = recent_history[-1].timestamp
-        hour = last_timestamp.hour
-        day_of_week = last_timestamp.weekday()
-        month = last_timestamp.month
-        is_weekend = 1 if day_of_week >= 5 else 0
-        
-        X_static = np.array([[hour, day_of_week, month, is_weekend]], dtype=np.float32)
+        # Jak w trenerze: okno [i - lookback, i) + cechy statyczne wiersza i
+        last_timestamp = occupancy_history[-1][0]
+        X_static = self.spec.build_static_after(last_timestamp, aggregates, current_occupancy)[np.newaxis]
         
         X_seq_scaled = self.seq_scaler.transform(
-            X_seq.reshape(-1, N_DEPARTMENTS)
+            X_seq.reshape(-1, X_seq.shape[-1])
         ).reshape(X_seq.shape)
         
         X_static_scaled = self.static_scaler.transform(X_static)
@@ -157,14 +185,18 @@ class OccupancyPredictor:
     
     def predict_future_occupancy(
         self, 
-        occupancy_history: List[DepartmentOccupancy],
+        occupancy_history: List[Tuple[datetime, Dict[str, int]]],
+        aggregates: RollingAggregates,
+        current_occupancy: Dict[str, int],
         hours_ahead: int = 3
     ) -> Dict[str, Dict[str, int]]:
         """
         Prognozuje obłożenie na kolejne godziny
         
         Args:
-            occupancy_history: Historia obłożenia (minimum 24h)
+            occupancy_history: Godzinowa historia pełnych godzin obłożenia (minimum lookback_hours)
+            aggregates: Agregaty kroczące na ostatnią godzinę historii
+            current_occupancy: Bieżące obłożenie (godzina po historii)
             hours_ahead: Ile godzin w przód (domyślnie 3)
             
         Returns:
@@ -177,7 +209,7 @@ class OccupancyPredictor:
         if self.model is None:
             raise RuntimeError("Model nie został wczytany! Wywołaj load_model() najpierw.")
         
-        X_seq, X_static = self.prepare_sequences(occupancy_history)
+        X_seq, X_static = self.prepare_sequences(occupancy_history, aggregates, current_occupancy)
         
         predictions = []
         current_seq = X_seq.copy()
@@ -197,7 +229,7 @@ class OccupancyPredictor:
             predictions.append(y_pred_int)
             
             new_seq = np.concatenate([current_seq[0, 1:, :], y_pred_scaled], axis=0)
-            current_seq = new_seq.reshape(1, SEQUENCE_LENGTH, N_DEPARTMENTS)
+            current_seq = new_seq.reshape(1, self.spec.lookback_hours, N_DEPARTMENTS)
         
         result = {}
         for i, pred in enumerate(predictions):
@@ -221,7 +253,8 @@ class OccupancyPredictor:
             "version": self.model_version,
             "type": "LSTM",
             "departments": DEPARTMENTS,
-            "sequence_length": SEQUENCE_LENGTH,
+            "sequence_length": self.spec.lookback_hours,
+            "static_features": len(self.spec.static_columns),
             "prediction_horizon": "1-6 hours"
         }
 
@@ -262,35 +295,30 @@ class OccupancyService:
         if not latest:
             raise ValueError("Brak danych o obłożeniu w bazie")
         
-        current_occupancy = {
-            "SOR": latest.sor,
-            "Interna": latest.interna,
-            "Kardiologia": latest.kardiologia,
-            "Chirurgia": latest.chirurgia,
-            "Ortopedia": latest.ortopedia,
-            "Neurologia": latest.neurologia,
-            "Pediatria": latest.pediatria,
-            "Ginekologia": latest.ginekologia
-        }
+        _, current_occupancy = OccupancyLedger.occupancy_at(db)
         
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        history = db.query(DepartmentOccupancy)\
-            .filter(DepartmentOccupancy.timestamp >= cutoff_time)\
-            .order_by(DepartmentOccupancy.timestamp.asc())\
-            .all()
+        # Okno to pełne godziny do ostatniej godziny agregatów, a bieżąca
+        # (niepełna) godzina jest wierszem cech statycznych
+        lookback = occupancy_predictor.spec.lookback_hours
+        aggregates = rolling_feature_store.current(db)
+        history = []
+        if aggregates.last_hour is not None:
+            history = OccupancyTimeSeries.get_hourly_matrix(db, lookback, end=aggregates.last_hour)
         
-        if len(history) < SEQUENCE_LENGTH:
+        if len(history) < lookback:
             return {
                 "current": current_occupancy,
                 "forecast": {},
                 "timestamp": latest.timestamp.isoformat(),
                 "model_version": "N/A",
-                "warning": f"Insufficient history data (need {SEQUENCE_LENGTH}h, have {len(history)}h)"
+                "warning": f"Insufficient history data (need {lookback}h, have {len(history)}h)"
             }
         
         try:
             forecast_raw = occupancy_predictor.predict_future_occupancy(
-                history, 
+                history,
+                aggregates,
+                current_occupancy,
                 hours_ahead=hours_ahead
             )
             
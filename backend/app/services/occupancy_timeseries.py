@@ -0,0 +1,247 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Table, Column, Integer, String, DateTime, Float, text
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from app.core.database import Base
+from app.models import DepartmentOccupancy
+
+# Nazwy oddziałów i kolumn department_occupancy (ta sama kolejność co w modelu LSTM)
+DEPARTMENT_COLUMNS = {
+    "SOR": "sor",
+    "Interna": "interna",
+    "Kardiologia": "kardiologia",
+    "Chirurgia": "chirurgia",
+    "Ortopedia": "ortopedia",
+    "Neurologia": "neurologia",
+    "Pediatria": "pediatria",
+    "Ginekologia": "ginekologia"
+}
+
+# Jak długo trzymać surowe wiersze department_occupancy
+RAW_RETENTION = timedelta(days=30)
+
+# Do jakiej długości okna czytać surowe wiersze / agregaty godzinowe
+RAW_MAX_SPAN = timedelta(hours=24)
+HOURLY_MAX_SPAN = timedelta(days=31)
+
+# Agregaty godzinowe i dzienne - jeden wiersz na (oddział, okres)
+occupancy_hourly = Table(
+    "occupancy_hourly",
+    Base.metadata,
+    Column("department", String(50), primary_key=True),
+    Column("bucket", DateTime, primary_key=True),
+    Column("last_value", Integer, nullable=False),
+    Column("mean_value", Float, nullable=False),
+    Column("min_value", Integer, nullable=False),
+    Column("max_value", Integer, nullable=False),
+    Column("samples", Integer, nullable=False),
+)
+
+occupancy_daily = Table(
+    "occupancy_daily",
+    Base.metadata,
+    Column("department", String(50), primary_key=True),
+    Column("bucket", DateTime, primary_key=True),
+    Column("last_value", Integer, nullable=False),
+    Column("mean_value", Float, nullable=False),
+    Column("min_value", Integer, nullable=False),
+    Column("max_value", Integer, nullable=False),
+    Column("samples", Integer, nullable=False),
+)
+
+# Rozpakowanie szerokiego wiersza na (oddział, wartość)
+_UNPIVOT = ", ".join(
+    f"('{dept}', o.{column})" for dept, column in DEPARTMENT_COLUMNS.items()
+)
+
+_REFRESH_HOURLY = f"""
+    INSERT INTO occupancy_hourly (department, bucket, last_value, mean_value, min_value, max_value, samples)
+    SELECT
+        d.department,
+        date_trunc('hour', o.timestamp),
+        (array_agg(d.value ORDER BY o.timestamp DESC))[1],
+        AVG(d.value),
+        MIN(d.value),
+        MAX(d.value),
+        COUNT(*)
+    FROM department_occupancy o
+    CROSS JOIN LATERAL (VALUES {_UNPIVOT}) AS d(department, value)
+    WHERE o.timestamp >= date_trunc('hour', CAST(:since AS timestamp))
+    GROUP BY 1, 2
+    ON CONFLICT (department, bucket) DO UPDATE SET
+        last_value = EXCLUDED.last_value,
+        mean_value = EXCLUDED.mean_value,
+        min_value = EXCLUDED.min_value,
+        max_value = EXCLUDED.max_value,
+        samples = EXCLUDED.samples
+"""
+
+_REFRESH_DAILY = """
+    INSERT INTO occupancy_daily (department, bucket, last_value, mean_value, min_value, max_value, samples)
+    SELECT
+        department,
+        date_trunc('day', bucket),
+        (array_agg(last_value ORDER BY bucket DESC))[1],
+        SUM(mean_value * samples) / SUM(samples),
+        MIN(min_value),
+        MAX(max_value),
+        SUM(samples)
+    FROM occupancy_hourly
+    WHERE bucket >= date_trunc('day', CAST(:since AS timestamp))
+    GROUP BY 1, 2
+    ON CONFLICT (department, bucket) DO UPDATE SET
+        last_value = EXCLUDED.last_value,
+        mean_value = EXCLUDED.mean_value,
+        min_value = EXCLUDED.min_value,
+        max_value = EXCLUDED.max_value,
+        samples = EXCLUDED.samples
+"""
+
+
+class OccupancyTimeSeries:
+    """
+    Szeregi czasowe obłożenia w trzech rozdzielczościach
+    
+    - raw: wiersze department_occupancy (przez RAW_RETENTION)
+    - hour: occupancy_hourly (ostatnia wartość, średnia, min, max w godzinie)
+    - day: occupancy_daily (agregat z godzinowych)
+    
+    Agregaty są odświeżane po każdym zapisie do department_occupancy
+    (refresh), a czytanie wybiera rozdzielczość po długości okna.
+    Retencję surowych wierszy obsługuje OccupancyLedger.apply_retention.
+    """
+    
+    @staticmethod
+    def refresh(db: Session, since: datetime) -> None:
+        """
+        Przelicza agregaty godzinowe i dzienne od podanej chwili
+        
+        Nie commituje - wywołujący zapisuje to razem z pomiarem.
+        
+        Args:
+            db: Sesja bazy danych
+            since: Najstarszy zmieniony timestamp
+        """
+        db.execute(text(_REFRESH_HOURLY), {"since": since})
+        db.execute(text(_REFRESH_DAILY), {"since": since})
+    
+    @staticmethod
+    def resolution_for(span: timedelta) -> str:
+        """Rozdzielczość odpowiednia dla długości okna: raw, hour lub day"""
+        if span <= RAW_MAX_SPAN:
+            return "raw"
+        if span <= HOURLY_MAX_SPAN:
+            return "hour"
+        return "day"
+    
+    @staticmethod
+    def get_series(
+        db: Session,
+        department: str,
+        date_from: datetime,
+        date_to: Optional[datetime] = None,
+        resolution: Optional[str] = None
+    ) -> List[Tuple[datetime, float]]:
+        """
+        Szereg obłożenia jednego oddziału
+        
+        Jedno zapytanie po indeksie (timestamp lub department, bucket),
+        pobierające tylko kolumnę danego oddziału.
+        
+        Args:
+            db: Sesja bazy danych
+            department: Nazwa oddziału
+            date_from: Początek okna
+            date_to: Koniec okna (domyślnie teraz)
+            resolution: raw, hour lub day (domyślnie wg długości okna)
+        
+        Returns:
+            Lista (timestamp, wartość) rosnąco po czasie; dla agregatów
+            wartość to średnia w okresie
+        """
+        date_to = date_to or datetime.now()
+        resolution = resolution or OccupancyTimeSeries.resolution_for(date_to - date_from)
+        
+        if resolution == "raw":
+            column = getattr(DepartmentOccupancy, DEPARTMENT_COLUMNS[department])
+            rows = db.query(
+                DepartmentOccupancy.timestamp,
+                column
+            ).filter(
+                DepartmentOccupancy.timestamp >= date_from,
+                DepartmentOccupancy.timestamp <= date_to
+            ).order_by(
+                DepartmentOccupancy.timestamp.asc()
+            ).all()
+            return [(ts, float(value or 0)) for ts, value in rows]
+        
+        table = occupancy_hourly if resolution == "hour" else occupancy_daily
+        rows = db.query(
+            table.c.bucket,
+            table.c.mean_value
+        ).filter(
+            table.c.department == department,
+            table.c.bucket >= date_from,
+            table.c.bucket <= date_to
+        ).order_by(
+            table.c.bucket.asc()
+        ).all()
+        
+        return [(bucket, float(value)) for bucket, value in rows]
+    
+    @staticmethod
+    def get_hourly_matrix(
+        db: Session,
+        hours: int,
+        end: Optional[datetime] = None
+    ) -> List[Tuple[datetime, Dict[str, int]]]:
+        """
+        Ostatnie `hours` pełnych godzin obłożenia wszystkich oddziałów
+        
+        Każda godzina to ostatnia wartość w godzinie. Godziny bez pomiaru
+        dziedziczą poprzednią wartość (obłożenie trwa do następnej zmiany).
+        Jedno zapytanie po indeksie bucket.
+        
+        Args:
+            db: Sesja bazy danych
+            hours: Liczba godzin
+            end: Ostatnia godzina (domyślnie bieżąca)
+        
+        Returns:
+            Lista (godzina, {"SOR": 18, ...}) rosnąco; krótsza niż `hours`,
+            jeśli na początku okna brak danych
+        """
+        end = (end or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        start = end - timedelta(hours=hours - 1)
+        
+        # Zapas jednej doby wstecz, żeby wypełnić godziny na początku okna
+        rows = db.query(
+            occupancy_hourly.c.bucket,
+            occupancy_hourly.c.department,
+            occupancy_hourly.c.last_value
+        ).filter(
+            occupancy_hourly.c.bucket >= start - timedelta(hours=24),
+            occupancy_hourly.c.bucket <= end
+        ).order_by(
+            occupancy_hourly.c.bucket.asc()
+        ).all()
+        
+        by_bucket: Dict[datetime, Dict[str, int]] = {}
+        for bucket, department, value in rows:
+            by_bucket.setdefault(bucket, {})[department] = value
+        
+        current: Dict[str, int] = {}
+        hour = start - timedelta(hours=24)
+        while hour < start:
+            current.update(by_bucket.get(hour, {}))
+            hour += timedelta(hours=1)
+        
+        matrix = []
+        for i in range(hours):
+            hour = start + timedelta(hours=i)
+            current = {**current, **by_bucket.get(hour, {})}
+            if len(current) == len(DEPARTMENT_COLUMNS):
+                matrix.append((hour, current))
+        
+        return matrix
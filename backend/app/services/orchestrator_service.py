@@ -66,7 +66,10 @@ class TriageOrchestrator:
         triage_confidence = triage_result["confidence"]
         
         try:
-            occupancy_data = OccupancyService.get_forecast(db, hours_ahead=3)
+            occupancy_data = OccupancyService.get_forecast(
+                db,
+                hours_ahead=max(3, allocation_predictor.future_horizon_hours)
+            )
             current_occupancy = occupancy_data["current"]
             future_occupancy = occupancy_data.get("forecast", {})
         except Exception as e:
@@ -13,6 +13,20 @@ from app.schemas import (
     PaginatedResponse
 )
 from app.services.audit_service import log_action
+from app.services.queue_service import waiting_queue
+from app.services.analytics_service import AnalyticsService
+from app.services.department_service import DepartmentService
+from app.services.occupancy_ledger import OccupancyLedger, ACTIVE_STATUSES
+from app.utils.pagination import apply_keyset, count_rows, encode_cursor
+
+LIST_ITEM_COLUMNS = (
+    Patient.id,
+    Patient.wiek,
+    Patient.plec,
+    Patient.status,
+    Patient.data_przyjecia,
+    Patient.szablon_przypadku
+)
 
 class PatientService:
     """Service do zarządzania pacjentami"""
@@ -43,6 +57,10 @@ class PatientService:
         )
         
         db.add(patient)
+        db.flush()
+        
+        AnalyticsService.record_patient(db, patient.data_przyjecia)
+        
         db.commit()
         db.refresh(patient)
         
@@ -110,46 +128,71 @@ class PatientService:
         page: int = 1,
         size: int = 20,
         status: Optional[str] = None,
-        triage_category: Optional[int] = None
+        triage_category: Optional[int] = None,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        raw: bool = False
     ) -> PaginatedResponse[PatientListItem]:
         """
         Lista pacjentów z paginacją i filtrami
         
+        Pobiera tylko kolumny potrzebne w PatientListItem. Z kursorem
+        używa paginacji keyset po (data_przyjecia, id), bez kursora -
+        klasycznego offsetu po numerze strony.
+        
         Args:
             db: Sesja bazy danych
-            page: Numer strony
+            page: Numer strony (ignorowany gdy podano cursor)
             size: Rozmiar strony
             status: Filtr po statusie
             triage_category: Filtr po kategorii triaży
+            cursor: Kursor z next_cursor poprzedniej strony
+            count: Tryb liczenia total: exact, estimated lub none
+            raw: Zwróć słownik prosto z wierszy zapytania, bez schematów
+                Pydantic (do FastJSONResponse)
             
         Returns:
             Paginowana lista pacjentów
         """
-        query = db.query(Patient)
+        query = db.query(*LIST_ITEM_COLUMNS)
         
         if status:
             query = query.filter(Patient.status == status)
         
         if triage_category:
-            query = query.join(TriagePrediction).filter(
+            query = query.join(
+                TriagePrediction, TriagePrediction.patient_id == Patient.id
+            ).filter(
                 TriagePrediction.kategoria_triazu == triage_category
             )
         
-        query = query.order_by(Patient.data_przyjecia.desc())
+        total = count_rows(db, query, count)
+        
+        query = apply_keyset(query, Patient.data_przyjecia, Patient.id, cursor)
+        
+        if not cursor:
+            query = query.offset((page - 1) * size)
         
-        total = query.count()
+        rows = query.limit(size).all()
         
-        offset = (page - 1) * size
-        patients = query.offset(offset).limit(size).all()
+        next_cursor = None
+        if len(rows) == size:
+            next_cursor = encode_cursor(rows[-1].data_przyjecia, rows[-1].id)
         
-        items = [PatientListItem.model_validate(p) for p in patients]
+        page_info = {
+            "total": total,
+            "page": page,
+            "size": size,
+            "pages": (total + size - 1) // size if total is not None else None,
+            "next_cursor": next_cursor
+        }
+        
+        if raw:
+            return {"items": [row._asdict() for row in rows], **page_info}
         
         return PaginatedResponse(
-            items=items,
-            total=total,
-            page=page,
-            size=size,
-            pages=(total + size - 1) // size
+            items=[PatientListItem(**row._asdict()) for row in rows],
+            **page_info
         )
     
     @staticmethod
@@ -191,9 +234,18 @@ class PatientService:
         for field, value in update_data.items():
             setattr(patient, field, value)
         
+        occupancy_changed = OccupancyLedger.record_status_change(
+            db, patient, old_values['status'], patient.status
+        )
+        
         db.commit()
         db.refresh(patient)
         
+        waiting_queue.sync_patient(patient)
+        
+        if occupancy_changed:
+            DepartmentService.publish_occupancy(db)
+        
         log_action(
             db=db,
             user_id=user_id,
@@ -236,9 +288,27 @@ class PatientService:
         
         patient_data = patient.to_dict()
         
+        AnalyticsService.record_patient(db, patient.data_przyjecia, delta=-1)
+        
+        # Usunięty pacjent zwalnia zajmowane miejsce (korekta obłożenia)
+        occupancy_changed = False
+        if patient.prediction:
+            AnalyticsService.record_prediction(
+                db, patient.prediction, patient.data_przyjecia, delta=-1
+            )
+            if patient.status in ACTIVE_STATUSES:
+                occupancy_changed = OccupancyLedger.record_event(
+                    db, patient.prediction.przypisany_oddzial, -1, "correction"
+                )
+        
         db.delete(patient)
         db.commit()
         
+        if occupancy_changed:
+            DepartmentService.publish_occupancy(db)
+        
+        waiting_queue.remove(patient_id)
+        
         log_action(
             db=db,
             user_id=user_id,
@@ -254,22 +324,16 @@ class PatientService:
         """
         Pobiera listę oczekujących pacjentów
         
+        Lista pochodzi z kolejki w pamięci (waiting_queue), budowanej
+        z bazy tylko przy pierwszym odczycie.
+        
         Args:
             db: Sesja bazy danych
             
         Returns:
             Lista oczekujących pacjentów sortowana po kategorii triaży
         """
-        patients = db.query(Patient).join(
-            TriagePrediction
-        ).filter(
-            Patient.status == 'oczekujący'
-        ).order_by(
-            TriagePrediction.kategoria_triazu.asc(),  # 1 (najwyższy priorytet) jako pierwszy
-            Patient.data_przyjecia.asc()  # Starsi pacjenci pierwsi
-        ).all()
-        
-        return [PatientWithPrediction.model_validate(p) for p in patients]
+        return waiting_queue.snapshot(db)[0]
     
     @staticmethod
     def change_patient_status(
@@ -313,9 +377,19 @@ class PatientService:
         
         old_status = patient.status
         patient.status = new_status
+        
+        occupancy_changed = OccupancyLedger.record_status_change(
+            db, patient, old_status, new_status
+        )
+        
         db.commit()
         db.refresh(patient)
         
+        waiting_queue.sync_patient(patient)
+        
+        if occupancy_changed:
+            DepartmentService.publish_occupancy(db)
+        
         log_action(
             db=db,
             user_id=user_id,
@@ -346,11 +420,6 @@ class PatientService:
         Returns:
             Lista znalezionych pacjentów
         """
-        patients = db.query(Patient).filter(
-            (Patient.id.cast(str).like(f"%{query}%")) |
-            (Patient.szablon_przypadku.like(f"%{query}%"))
-        ).order_by(
-            Patient.data_przyjecia.desc()
-        ).limit(limit).all()
-        
-        return [PatientListItem.model_validate(p) for p in patients]
+        from app.services.search_service import SearchService
+        
+        return SearchService.search_patients(db, query, limit)
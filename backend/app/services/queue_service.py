@@ -0,0 +1,294 @@
+import bisect
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Patient, TriagePrediction
+from app.schemas import PatientWithPrediction
+from app.utils.broadcast import Broadcaster
+
+# Ile razy load() ponawia odczyt, jeśli w trakcie zapytania kolejka się zmieniła
+LOAD_ATTEMPTS = 3
+
+# Co ile sekund (najczęściej) snapshot porównuje kolejkę z bazą
+RECONCILE_INTERVAL = 30.0
+
+
+class WaitingQueue:
+    """
+    Kolejka oczekujących pacjentów trzymana w pamięci procesu
+    
+    Kolejność: kategoria triaży (1 = najwyższy priorytet), potem czas
+    przyjęcia (starsi pacjenci pierwsi), potem ID. Kolejka jest budowana
+    z bazy raz, przy pierwszym odczycie, a później aktualizowana przez
+    serwisy po każdej zmianie pacjenta. Każda zmiana jest rozsyłana
+    subskrybentom (endpoint SSE) jako delta.
+    
+    Zmian z innych procesów (np. scripts/backfill_predictions.py) serwisy
+    nie widzą - snapshot co RECONCILE_INTERVAL porównuje liczbę i sumę ID
+    oczekujących w bazie z kolejką i przy różnicy przeładowuje ją z bazy.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[int, PatientWithPrediction] = {}
+        self._keys: Dict[int, Tuple] = {}
+        self._order: List[Tuple] = []
+        self._loaded = False
+        self._version = 0
+        self._checked_at = 0.0
+        # Subskrybent, który nie nadąża, dostaje "reset" zamiast zaległych delt
+        self.broadcaster = Broadcaster(
+            on_overflow=lambda event: {"type": "reset", "version": event["version"]}
+        )
+    
+    @staticmethod
+    def _sort_key(patient: PatientWithPrediction) -> Tuple:
+        """Klucz sortowania (kategoria, data przyjęcia, id)"""
+        return (
+            patient.prediction.kategoria_triazu,
+            patient.data_przyjecia or datetime.min,
+            patient.id
+        )
+    
+    def load(self, db: Session) -> None:
+        """
+        Buduje kolejkę z bazy danych
+        
+        Zapytanie idzie bez blokady, więc zmiana zgłoszona przez sync_*
+        w jego trakcie mogłaby zostać nadpisana starszym odczytem. Każda
+        zmiana podbija wersję (także przed pierwszym załadowaniem), a load
+        podmienia kolejkę tylko, jeśli wersja się nie zmieniła - inaczej
+        czyta bazę ponownie. Ostatnia z LOAD_ATTEMPTS prób czyta bazę pod
+        blokadą (sync_* czekają na jej koniec), więc żadna zmiana nie
+        zostaje nadpisana.
+        
+        Args:
+            db: Sesja bazy danych
+        """
+        for _ in range(LOAD_ATTEMPTS - 1):
+            with self._lock:
+                start_version = self._version
+            
+            items = self._query(db)
+            
+            with self._lock:
+                if self._version == start_version:
+                    version = self._install(items)
+                    break
+        else:
+            with self._lock:
+                version = self._install(self._query(db))
+        
+        self._publish({"type": "reset", "version": version})
+    
+    @staticmethod
+    def _query(db: Session) -> List[PatientWithPrediction]:
+        """Oczekujący pacjenci z predykcją (świeżo z bazy)"""
+        patients = db.query(Patient).join(
+            TriagePrediction
+        ).filter(
+            Patient.status == 'oczekujący'
+        ).populate_existing().all()
+        return [PatientWithPrediction.model_validate(patient) for patient in patients]
+    
+    def _install(self, items: List[PatientWithPrediction]) -> int:
+        """Podmienia zawartość kolejki (wywoływane pod blokadą); zwraca nową wersję"""
+        self._entries = {}
+        self._keys = {}
+        self._order = []
+        
+        for item in items:
+            key = self._sort_key(item)
+            self._entries[item.id] = item
+            self._keys[item.id] = key
+            self._order.append(key)
+        
+        self._order.sort()
+        self._loaded = True
+        self._checked_at = time.monotonic()
+        self._version += 1
+        return self._version
+    
+    def snapshot(self, db: Session) -> Tuple[List[PatientWithPrediction], int]:
+        """
+        Zwraca posortowaną listę oczekujących pacjentów i jej wersję
+        
+        Lista i wersja są czytane pod tą samą blokadą - delty o wyższej
+        wersji są późniejsze niż lista (endpoint SSE pomija pozostałe).
+        
+        Args:
+            db: Sesja bazy danych (używana tylko przy pierwszym odczycie)
+        
+        Returns:
+            (lista oczekujących pacjentów, wersja kolejki)
+        """
+        if not self._loaded:
+            self.load(db)
+        else:
+            self._reconcile(db)
+        
+        with self._lock:
+            return [self._entries[key[-1]] for key in self._order], self._version
+    
+    def _reconcile(self, db: Session) -> None:
+        """
+        Przeładowuje kolejkę, jeśli różni się od bazy (najwyżej co RECONCILE_INTERVAL)
+        
+        Porównywane są liczba i suma ID oczekujących z predykcją - jedno
+        zapytanie agregujące. Wykrywa pacjentów dodanych lub usuniętych
+        poza procesem; zmiana kolejności bez zmiany składu nie jest wykrywana.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < RECONCILE_INTERVAL:
+            return
+        self._checked_at = now
+        
+        count, id_sum = db.query(
+            func.count(Patient.id),
+            func.coalesce(func.sum(Patient.id), 0)
+        ).join(
+            TriagePrediction
+        ).filter(
+            Patient.status == 'oczekujący'
+        ).one()
+        
+        with self._lock:
+            in_sync = count == len(self._entries) and id_sum == sum(self._entries)
+        
+        if not in_sync:
+            self.load(db)
+    
+    def sync_patient(self, patient: Patient) -> None:
+        """
+        Aktualizuje pozycję pacjenta po zmianie w bazie
+        
+        Pacjent jest w kolejce tylko jeśli ma status 'oczekujący'
+        i predykcję triaży. W przeciwnym razie jest usuwany.
+        
+        Args:
+            patient: Pacjent po commicie
+        """
+        if patient.status == 'oczekujący' and patient.prediction is not None:
+            self._upsert(PatientWithPrediction.model_validate(patient))
+        else:
+            self.remove(patient.id)
+    
+    def sync_patients(self, db: Session, patient_ids: List[int]) -> None:
+        """
+        Dodaje wielu nowych pacjentów naraz (np. po masowej rejestracji)
+        
+        Pacjenci są czytani jednym zapytaniem z predykcjami, a subskrybenci
+        dostają jedno zdarzenie "reset" zamiast delty na każdego pacjenta.
+        
+        Args:
+            db: Sesja bazy danych
+            patient_ids: ID pacjentów po commicie
+        """
+        if not patient_ids:
+            return
+        if not self._loaded:
+            self._touch()
+            return
+        
+        patients = db.query(Patient).options(
+            joinedload(Patient.prediction)
+        ).filter(
+            Patient.id.in_(patient_ids)
+        ).all()
+        
+        with self._lock:
+            for patient in patients:
+                old_key = self._keys.pop(patient.id, None)
+                if old_key is not None:
+                    del self._entries[patient.id]
+                    self._order.pop(bisect.bisect_left(self._order, old_key))
+                
+                if patient.status != 'oczekujący' or patient.prediction is None:
+                    continue
+                
+                item = PatientWithPrediction.model_validate(patient)
+                key = self._sort_key(item)
+                self._entries[item.id] = item
+                self._keys[item.id] = key
+                bisect.insort(self._order, key)
+            
+            self._version += 1
+            version = self._version
+        
+        self._publish({"type": "reset", "version": version})
+    
+    def remove(self, patient_id: int) -> None:
+        """
+        Usuwa pacjenta z kolejki
+        
+        Args:
+            patient_id: ID pacjenta
+        """
+        if not self._loaded:
+            self._touch()
+            return
+        
+        with self._lock:
+            key = self._keys.pop(patient_id, None)
+            if key is None:
+                # Bez delty, ale trwający load() musi przeczytać bazę ponownie
+                self._version += 1
+                return
+            
+            del self._entries[patient_id]
+            self._order.pop(bisect.bisect_left(self._order, key))
+            self._version += 1
+            version = self._version
+        
+        self._publish({"type": "remove", "version": version, "patient_id": patient_id})
+    
+    def _upsert(self, item: PatientWithPrediction) -> None:
+        """Wstawia lub przesuwa pacjenta w kolejce"""
+        if not self._loaded:
+            self._touch()
+            return
+        
+        key = self._sort_key(item)
+        
+        with self._lock:
+            old_key = self._keys.get(item.id)
+            if old_key is not None:
+                self._order.pop(bisect.bisect_left(self._order, old_key))
+            
+            bisect.insort(self._order, key)
+            self._entries[item.id] = item
+            self._keys[item.id] = key
+            self._version += 1
+            version = self._version
+            position = bisect.bisect_left(self._order, key)
+        
+        self._publish({
+            "type": "upsert",
+            "version": version,
+            "position": position,
+            "patient": json.loads(item.model_dump_json())
+        })
+    
+    def _touch(self) -> None:
+        """Zmiana przed załadowaniem kolejki - tylko podbija wersję (dla load)"""
+        with self._lock:
+            self._version += 1
+    
+    @property
+    def version(self) -> int:
+        """Numer wersji kolejki (rośnie przy każdej zmianie)"""
+        return self._version
+    
+    def _publish(self, event: Dict) -> None:
+        """Rozsyła deltę do subskrybentów"""
+        self.broadcaster.publish(event)
+
+
+# Globalna instancja kolejki
+waiting_queue = WaitingQueue()
@@ -0,0 +1,186 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Table, Column, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.database import Base, SessionLocal
+from app.ml.rolling_features import RollingAggregates, WINDOW_30D
+from app.services.occupancy_timeseries import OccupancyTimeSeries
+
+STATE_NAME = "occupancy"
+
+# Zapisany stan agregatów kroczących (jeden wiersz na zestaw agregatów)
+rolling_feature_state = Table(
+    "rolling_feature_state",
+    Base.metadata,
+    Column("name", String(50), primary_key=True),
+    Column("last_hour", DateTime),
+    Column("state", JSONB, nullable=False),
+    Column("updated_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+class RollingFeatureStore:
+    """
+    Agregaty kroczące obłożenia (7d, 30d, std, trend) gotowe do serwowania
+    
+    Stan (bufor 720 godzin i sumy per oddział) jest trzymany w pamięci
+    i zapisywany w rolling_feature_state. Przy odczycie dopisywane są
+    tylko pełne godziny od ostatniej zapisanej, więc zwykle jest to
+    zero albo jedna godzina z occupancy_hourly. Bez zapisanego stanu
+    (albo po przerwie dłuższej niż okno) stan jest budowany od nowa
+    z ostatnich 720 godzin.
+    
+    Aktualizacja liczy nowy obiekt (kopię) pod blokadą i dopiero potem
+    go publikuje, więc zwrócone wcześniej agregaty się nie zmieniają.
+    Stan jest zapisywany we własnej sesji - odczyt prognozy nie commituje
+    transakcji wywołującego.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aggregates: Optional[RollingAggregates] = None
+    
+    def _load(self, db: Session) -> RollingAggregates:
+        """Wczytuje zapisany stan (lub pusty)"""
+        row = db.query(
+            rolling_feature_state.c.state,
+            rolling_feature_state.c.last_hour
+        ).filter(
+            rolling_feature_state.c.name == STATE_NAME
+        ).first()
+        
+        if row is None:
+            return RollingAggregates()
+        
+        return RollingAggregates.from_state(row.state, row.last_hour)
+    
+    def _save(self, aggregates: RollingAggregates) -> None:
+        """
+        Zapisuje stan we własnej sesji i transakcji
+        
+        Wiersz jest nadpisywany tylko nowszym stanem, więc procesy
+        aktualizujące stan równolegle nie cofają go do starszej godziny.
+        """
+        stmt = pg_insert(rolling_feature_state).values(
+            name=STATE_NAME,
+            last_hour=aggregates.last_hour,
+            state=aggregates.to_state(),
+            updated_at=datetime.now()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={
+                "last_hour": stmt.excluded.last_hour,
+                "state": stmt.excluded.state,
+                "updated_at": stmt.excluded.updated_at
+            },
+            where=(
+                rolling_feature_state.c.last_hour.is_(None) |
+                (rolling_feature_state.c.last_hour < stmt.excluded.last_hour)
+            )
+        )
+        
+        db = SessionLocal()
+        try:
+            db.execute(stmt)
+            db.commit()
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _advance(db: Session, aggregates: RollingAggregates, last_complete: datetime) -> RollingAggregates:
+        """
+        Kopia agregatów z dopisanymi godzinami do last_complete włącznie
+        
+        Każda godzina jest dopisywana dokładnie raz - godzina bez wiersza
+        w macierzy dziedziczy obłożenie poprzedniej (jak godzinowa ramka
+        trenera), żeby okna 168/720 obejmowały właściwy okres.
+        """
+        if aggregates.last_hour is None:
+            missing = WINDOW_30D
+        else:
+            missing = int((last_complete - aggregates.last_hour) / timedelta(hours=1))
+        
+        if missing >= WINDOW_30D:
+            aggregates = RollingAggregates()
+            missing = WINDOW_30D
+        else:
+            aggregates = aggregates.copy()
+        
+        matrix = dict(OccupancyTimeSeries.get_hourly_matrix(db, missing, end=last_complete))
+        
+        if aggregates.last_hour is not None:
+            hour = aggregates.last_hour + timedelta(hours=1)
+        elif matrix:
+            # Nowy stan zaczyna się od pierwszej godziny z danymi
+            hour = min(matrix)
+        else:
+            return aggregates
+        
+        while hour <= last_complete:
+            aggregates.push(hour, matrix.get(hour) or aggregates.last_counts())
+            hour += timedelta(hours=1)
+        
+        return aggregates
+    
+    def current(self, db: Session) -> RollingAggregates:
+        """
+        Agregaty aktualne na ostatnią pełną godzinę
+        
+        Nie commituje i nie zmienia transakcji sesji db (używana tylko
+        do odczytu).
+        
+        Args:
+            db: Sesja bazy danych
+        
+        Returns:
+            RollingAggregates (nie modyfikować - współdzielone)
+        """
+        last_complete = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+        
+        with self._lock:
+            aggregates = self._aggregates or self._load(db)
+            
+            if aggregates.last_hour is not None and aggregates.last_hour >= last_complete:
+                self._aggregates = aggregates
+                return aggregates
+            
+            updated = self._advance(db, aggregates, last_complete)
+            
+            if updated.last_hour is not None and updated.last_hour != aggregates.last_hour:
+                self._save(updated)
+            
+            self._aggregates = updated
+            return updated
+    
+    def reset(self, db: Session) -> RollingAggregates:
+        """
+        Przebudowuje stan od zera z ostatnich 720 godzin
+        
+        Args:
+            db: Sesja bazy danych
+        
+        Returns:
+            Nowe agregaty
+        """
+        with self._lock:
+            self._aggregates = RollingAggregates()
+            
+            state_db = SessionLocal()
+            try:
+                state_db.execute(rolling_feature_state.delete().where(
+                    rolling_feature_state.c.name == STATE_NAME
+                ))
+                state_db.commit()
+            finally:
+                state_db.close()
+        
+        return self.current(db)
+
+
+# Globalna instancja agregatów
+rolling_feature_store = RollingFeatureStore()
@@ -0,0 +1,127 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List
+
+from app.models import Patient, User
+from app.schemas import PatientListItem, UserResponse
+from app.services.patient_service import LIST_ITEM_COLUMNS
+
+# Zakres kolumny INTEGER (patients.id) w PostgreSQL
+MAX_PATIENT_ID = 2**31 - 1
+
+
+def _escape_like(query: str) -> str:
+    """Escapuje znaki specjalne LIKE (%, _, \\) w zapytaniu użytkownika"""
+    return query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _patient_id(query: str):
+    """
+    ID pacjenta z zapytania albo None
+    
+    str.isdigit() przepuszcza cyfry spoza ASCII (np. "²"), na których int()
+    rzuca ValueError, a liczby poza zakresem INTEGER kończą się DataError
+    z bazy - takie zapytania trafiają do wyszukiwania tekstowego.
+    """
+    if query.isascii() and query.isdigit() and int(query) <= MAX_PATIENT_ID:
+        return int(query)
+    return None
+
+
+def _supports_trigram(db: Session) -> bool:
+    """pg_trgm (similarity, indeksy GIN) jest dostępny tylko w PostgreSQL"""
+    return db.bind.dialect.name == "postgresql"
+
+
+class SearchService:
+    """
+    Service do wyszukiwania pacjentów i użytkowników
+    
+    Zapytania tekstowe używają ILIKE, które w PostgreSQL obsługują indeksy
+    GIN z gin_trgm_ops (migracja 0002), a wyniki są sortowane po
+    similarity() z pg_trgm. Zapytania numeryczne trafiają najpierw
+    w klucz główny.
+    """
+    
+    @staticmethod
+    def search_patients(
+        db: Session,
+        query: str,
+        limit: int = 20
+    ) -> List[PatientListItem]:
+        """
+        Wyszukuje pacjentów po ID lub szablonie przypadku
+        
+        Args:
+            db: Sesja bazy danych
+            query: Zapytanie wyszukiwania
+            limit: Limit wyników
+        
+        Returns:
+            Pacjent o podanym ID (zapytanie numeryczne) albo pacjenci
+            z najlepiej dopasowanym szablonem
+        """
+        query = query.strip()
+        
+        patient_id = _patient_id(query)
+        if patient_id is not None:
+            row = db.query(*LIST_ITEM_COLUMNS).filter(
+                Patient.id == patient_id
+            ).first()
+            return [PatientListItem(**row._asdict())] if row else []
+        
+        template_query = db.query(*LIST_ITEM_COLUMNS).filter(
+            Patient.szablon_przypadku.ilike(f"%{_escape_like(query)}%", escape="\\")
+        )
+        
+        if _supports_trigram(db):
+            template_query = template_query.order_by(
+                func.similarity(Patient.szablon_przypadku, query).desc(),
+                Patient.data_przyjecia.desc()
+            )
+        else:
+            template_query = template_query.order_by(Patient.data_przyjecia.desc())
+        
+        rows = template_query.limit(limit).all()
+        
+        return [PatientListItem(**row._asdict()) for row in rows]
+    
+    @staticmethod
+    def search_users(
+        db: Session,
+        query: str,
+        limit: int = 20
+    ) -> List[UserResponse]:
+        """
+        Wyszukuje użytkowników po emailu lub username
+        
+        Args:
+            db: Sesja bazy danych
+            query: Zapytanie wyszukiwania
+            limit: Limit wyników
+        
+        Returns:
+            Lista użytkowników posortowana po trafności
+        """
+        query = query.strip()
+        pattern = f"%{_escape_like(query)}%"
+        
+        users_query = db.query(User).filter(
+            User.email.ilike(pattern, escape="\\") |
+            User.username.ilike(pattern, escape="\\")
+        )
+        
+        if _supports_trigram(db):
+            users_query = users_query.order_by(
+                func.greatest(
+                    func.similarity(User.username, query),
+                    func.similarity(User.email, query)
+                ).desc(),
+                User.username.asc()
+            )
+        else:
+            users_query = users_query.order_by(User.username.asc())
+        
+        users = users_query.limit(limit).all()
+        
+        return [UserResponse.model_validate(user) for user in users]
@@ -1,17 +1,17 @@
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, List
-from datetime import datetime, timedelta
+from datetime import datetime
 from fastapi import HTTPException, status
 from decimal import Decimal
 
-from app.models import Patient, TriagePrediction, User, DepartmentOccupancy
+from app.models import Patient, TriagePrediction, User
 from app.schemas import (
     TriagePredictionCreate,
     TriagePredictionResponse,
     TriagePredictResponse,
     TriageStatsResponse,
     DailyTriageStats,
-    CategoryDistribution,
     TriageAnalytics,
     TriagePreviewRequest,
     TriagePreviewResponse,
@@ -19,6 +19,10 @@ from app.schemas import (
     TriageConfirmResponse
 )
 from app.services.audit_service import log_action
+from app.services.queue_service import waiting_queue
+from app.services.analytics_service import AnalyticsService
+from app.services.department_service import DepartmentService
+from app.services.occupancy_ledger import OccupancyLedger
 from app.ml.predictor import predictor
 
 CATEGORY_TO_DEPARTMENT = {
@@ -149,9 +153,30 @@ class TriageService:
         )
         
         db.add(prediction)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Predykcja zapisana w międzyczasie (np. przez predykcję wsadową)
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Patient already has a triage prediction"
+            )
+        
+        AnalyticsService.record_prediction(db, prediction, patient.data_przyjecia)
+        
+        # Predykcja przypisuje oddział - od teraz aktywny pacjent zajmuje
+        # miejsce (późniejszy wypis zapisze -1 w record_status_change)
+        occupancy_changed = OccupancyLedger.record_admission(db, patient, assigned_department)
+        
         db.commit()
         db.refresh(prediction)
         
+        waiting_queue.sync_patient(patient)
+        
+        if occupancy_changed:
+            DepartmentService.publish_occupancy(db)
+        
         log_action(
             db=db,
             user_id=user_id,
@@ -206,91 +231,24 @@ class TriageService:
             db: Sesja bazy danych
             
         Returns:
-            Statystyki triaży
+            Statystyki triaży (z agregatów godzinowych)
         """
-        from sqlalchemy import func
-        
-        total_patients = db.query(Patient).count()
-        
-        by_category = db.query(
-            TriagePrediction.kategoria_triazu,
-            func.count(TriagePrediction.id)
-        ).group_by(TriagePrediction.kategoria_triazu).all()
-        
-        category_dict = {str(cat): count for cat, count in by_category}
-        
-        by_department = db.query(
-            TriagePrediction.przypisany_oddzial,
-            func.count(TriagePrediction.id)
-        ).group_by(TriagePrediction.przypisany_oddzial).all()
-        
-        department_dict = {dept: count for dept, count in by_department}
-        
-        avg_confidence = db.query(
-            func.avg(TriagePrediction.confidence_score)
-        ).scalar()
-        
-        return TriageStatsResponse(
-            total_patients=total_patients,
-            by_category=category_dict,
-            by_department=department_dict,
-            average_confidence=float(avg_confidence or 0),
-            last_updated=datetime.now()
-        )
+        return AnalyticsService.get_stats(db)
     
     @staticmethod
-    def get_daily_stats(db: Session, days: int = 7) -> List[DailyTriageStats]:
+    def get_daily_stats(db: Session, days: int = 7, raw: bool = False) -> List[DailyTriageStats]:
         """
         Pobiera dzienne statystyki triaży
         
         Args:
             db: Sesja bazy danych
             days: Liczba dni wstecz
+            raw: Zwróć słowniki zamiast schematów (do FastJSONResponse)
             
         Returns:
-            Lista dziennych statystyk
+            Lista dziennych statystyk (z agregatów godzinowych)
         """
-        from sqlalchemy import func, extract, case
-        
-        date_from = datetime.now() - timedelta(days=days)
-        
-        stats = db.query(
-            func.date(Patient.data_przyjecia).label('data'),
-            func.count(Patient.id).label('liczba_pacjentow'),
-            func.sum(case((TriagePrediction.kategoria_triazu == 1, 1), else_=0)).label('kat_1'),
-            func.sum(case((TriagePrediction.kategoria_triazu == 2, 1), else_=0)).label('kat_2'),
-            func.sum(case((TriagePrediction.kategoria_triazu == 3, 1), else_=0)).label('kat_3'),
-            func.sum(case((TriagePrediction.kategoria_triazu == 4, 1), else_=0)).label('kat_4'),
-            func.sum(case((TriagePrediction.kategoria_triazu == 5, 1), else_=0)).label('kat_5'),
-            func.avg(
-                extract('epoch', TriagePrediction.predicted_at - Patient.data_przyjecia) / 60
-            ).label('avg_czas_min'),
-            func.avg(TriagePrediction.confidence_score).label('avg_confidence')
-        ).join(
-            TriagePrediction, Patient.id == TriagePrediction.patient_id, isouter=True
-        ).filter(
-            Patient.data_przyjecia >= date_from
-        ).group_by(
-            func.date(Patient.data_przyjecia)
-        ).order_by(
-            func.date(Patient.data_przyjecia).desc()
-        ).all()
-        
-        result = []
-        for stat in stats:
-            result.append(DailyTriageStats(
-                data=stat.data,
-                liczba_pacjentow=stat.liczba_pacjentow,
-                kat_1_natychmiastowy=stat.kat_1 or 0,
-                kat_2_pilny=stat.kat_2 or 0,
-                kat_3_stabilny=stat.kat_3 or 0,
-                kat_4_niski=stat.kat_4 or 0,
-                kat_5_bardzo_niski=stat.kat_5 or 0,
-                avg_czas_do_triazu_min=float(stat.avg_czas_min) if stat.avg_czas_min else None,
-                avg_confidence=float(stat.avg_confidence) if stat.avg_confidence else None
-            ))
-        
-        return result
+        return AnalyticsService.get_daily_stats(db, days, raw)
     
     @staticmethod
     def get_analytics(
@@ -307,78 +265,9 @@ class TriageService:
             date_to: Data do
             
         Returns:
-            Analityka triaży
+            Analityka triaży (z agregatów godzinowych)
         """
-        from sqlalchemy import func
-        
-        query = db.query(TriagePrediction)
-        
-        if date_from:
-            query = query.filter(TriagePrediction.predicted_at >= date_from)
-        else:
-            date_from = datetime.now() - timedelta(days=30)
-        
-        if date_to:
-            query = query.filter(TriagePrediction.predicted_at <= date_to)
-        else:
-            date_to = datetime.now()
-        
-        total = query.count()
-        
-        category_counts = db.query(
-            TriagePrediction.kategoria_triazu,
-            func.count(TriagePrediction.id)
-        ).filter(
-            TriagePrediction.predicted_at >= date_from,
-            TriagePrediction.predicted_at <= date_to
-        ).group_by(TriagePrediction.kategoria_triazu).all()
-        
-        category_labels = {
-            1: "Natychmiastowy",
-            2: "Pilny",
-            3: "Stabilny",
-            4: "Niski priorytet",
-            5: "Bardzo niski"
-        }
-        
-        distributions = []
-        for cat, count in category_counts:
-            percentage = (count / total * 100) if total > 0 else 0
-            distributions.append(CategoryDistribution(
-                category=cat,
-                count=count,
-                percentage=round(percentage, 2),
-                label=category_labels[cat]
-            ))
-        
-        distributions.sort(key=lambda x: x.category)
-        
-        avg_confidence = db.query(
-            func.avg(TriagePrediction.confidence_score)
-        ).filter(
-            TriagePrediction.predicted_at >= date_from,
-            TriagePrediction.predicted_at <= date_to
-        ).scalar()
-        
-        model_version = db.query(
-            TriagePrediction.model_version
-        ).filter(
-            TriagePrediction.predicted_at >= date_from,
-            TriagePrediction.predicted_at <= date_to
-        ).group_by(
-            TriagePrediction.model_version
-        ).order_by(
-            func.count(TriagePrediction.id).desc()
-        ).first()
-        
-        return TriageAnalytics(
-            total_predictions=total,
-            category_distribution=distributions,
-            average_confidence=float(avg_confidence or 0),
-            model_version=model_version[0] if model_version else "unknown",
-            period_start=date_from,
-            period_end=date_to
-        )
+        return AnalyticsService.get_analytics(db, date_from, date_to)
     
     @staticmethod
     def preview_triage(preview_request: TriagePreviewRequest) -> TriagePreviewResponse:
@@ -522,16 +411,23 @@ class TriageService:
         )
         
         db.add(prediction)
+        db.flush()
+        
+        AnalyticsService.record_patient(db, patient.data_przyjecia)
+        AnalyticsService.record_prediction(db, prediction, patient.data_przyjecia)
         
         TriageService._increment_department_occupancy(
             db=db,
-            department=confirm_request.przypisany_oddzial
+            department=confirm_request.przypisany_oddzial,
+            patient_id=patient.id
         )
         
         db.commit()
         db.refresh(patient)
         db.refresh(prediction)
         
+        waiting_queue.sync_patient(patient)
+        
         # Loguj akcję
         log_action(
             db=db,
@@ -563,56 +459,20 @@ class TriageService:
         )
     
     @staticmethod
-    def _increment_department_occupancy(db: Session, department: str):
+    def _increment_department_occupancy(db: Session, department: str, patient_id: Optional[int] = None):
         """
-        Inkrementuje obłożenie oddziału w najnowszym rekordzie
+        Zapisuje przyjęcie na oddział w dzienniku obłożenia
+        
+        Zdarzenie (+1) jest dopisywane, a nie nadpisuje wiersza obłożenia,
+        więc równoległe potwierdzenia nie gubią inkrementów.
         
         Args:
             db: Sesja bazy danych
             department: Nazwa oddziału
+            patient_id: ID przyjętego pacjenta
         """
-        # Pobierz najnowszy rekord obłożenia
-        latest = db.query(DepartmentOccupancy).order_by(
-            DepartmentOccupancy.timestamp.desc()
-        ).first()
-        
-        if not latest:
-            # Jeśli nie ma żadnych rekordów, utwórz nowy z wartościami zerowymi
-            occupancy_data = {
-                "timestamp": datetime.now(),
-                "sor": 0,
-                "interna": 0,
-                "kardiologia": 0,
-                "chirurgia": 0,
-                "ortopedia": 0,
-                "neurologia": 0,
-                "pediatria": 0,
-                "ginekologia": 0
-            }
-            latest = DepartmentOccupancy(**occupancy_data)
-            db.add(latest)
-        
-        time_diff = datetime.now() - latest.timestamp
-        if time_diff.total_seconds() > 300:  # 5 minut
-            # Utwórz nowy rekord z aktualnym timestamp
-            occupancy_data = {
-                "timestamp": datetime.now(),
-                "sor": latest.sor,
-                "interna": latest.interna,
-                "kardiologia": latest.kardiologia,
-                "chirurgia": latest.chirurgia,
-                "ortopedia": latest.ortopedia,
-                "neurologia": latest.neurologia,
-                "pediatria": latest.pediatria,
-                "ginekologia": latest.ginekologia
-            }
-            latest = DepartmentOccupancy(**occupancy_data)
-            db.add(latest)
-        
-        # Inkrementuj odpowiedni oddział
-        dept_key = department.lower()
-        if hasattr(latest, dept_key):
-            current_value = getattr(latest, dept_key) or 0
-            setattr(latest, dept_key, current_value + 1)
+        OccupancyLedger.record_event(db, department, 1, "admission", patient_id)
         
         db.commit()
+        
+        DepartmentService.publish_occupancy(db)
@@ -0,0 +1,128 @@
+"""
+Rozsyłanie zdarzeń do klientów Server-Sent Events
+
+Broadcaster trzyma listę subskrybentów (kolejki asyncio) i wkłada do nich
+zdarzenia publikowane przez serwisy. Publikacja jest bezpieczna z dowolnego
+wątku - zdarzenie trafia do pętli zdarzeń subskrybenta przez
+call_soon_threadsafe. Bezczynny subskrybent to tylko kolejka i korutyna
+czekająca na nią, więc jeden worker utrzyma wiele otwartych połączeń.
+"""
+
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+
+HEARTBEAT_SECONDS = 15
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+class Broadcaster:
+    """
+    Rozsyła zdarzenia (słowniki z kluczem "type") do subskrybentów
+    
+    Args:
+        maxsize: Rozmiar bufora jednego subskrybenta
+        on_overflow: Zamienia ostatnie zdarzenie na to, które dostaje
+            subskrybent po przepełnieniu bufora (domyślnie bez zmian)
+    """
+    
+    def __init__(self, maxsize: int = 1000, on_overflow: Optional[Callable[[Dict], Dict]] = None):
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._maxsize = maxsize
+        self._on_overflow = on_overflow or (lambda event: event)
+    
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Rejestruje subskrybenta
+        
+        Musi być wywołane z pętli zdarzeń, w której subskrybent czyta kolejkę.
+        
+        Returns:
+            Kolejka asyncio, do której trafiają zdarzenia
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._maxsize)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Wyrejestrowuje subskrybenta"""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not queue]
+    
+    @property
+    def subscriber_count(self) -> int:
+        """Liczba podłączonych subskrybentów"""
+        return len(self._subscribers)
+    
+    def publish(self, event: Dict) -> None:
+        """Rozsyła zdarzenie do wszystkich subskrybentów"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Pętla subskrybenta została zamknięta
+                self.unsubscribe(queue)
+    
+    def _deliver(self, queue: asyncio.Queue, event: Dict) -> None:
+        """Wkłada zdarzenie do kolejki, przy przepełnieniu czyści zaległe"""
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self._on_overflow(event))
+
+
+def format_sse(event_type: str, data: Dict) -> str:
+    """Formatuje zdarzenie w formacie text/event-stream"""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def sse_events(
+    request: Request,
+    broadcaster: Broadcaster,
+    queue: asyncio.Queue,
+    initial: List[Tuple[str, Dict]],
+    skip: Optional[Callable[[Dict], bool]] = None
+) -> AsyncIterator[str]:
+    """
+    Generator strumienia SSE
+    
+    Wysyła zdarzenia początkowe, potem zdarzenia z kolejki subskrybenta.
+    Gdy przez HEARTBEAT_SECONDS nic się nie dzieje, wysyła komentarz
+    heartbeat, żeby proxy nie zamykały połączenia. Po rozłączeniu
+    klienta wyrejestrowuje subskrybenta.
+    
+    Args:
+        request: Request klienta (do wykrycia rozłączenia)
+        broadcaster: Broadcaster, z którego pochodzi kolejka
+        queue: Kolejka z Broadcaster.subscribe()
+        initial: Lista (typ, dane) wysyłana na początku
+        skip: Funkcja pomijająca zdarzenia (np. starsze niż snapshot)
+    """
+    try:
+        for event_type, data in initial:
+            yield format_sse(event_type, data)
+        
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            
+            if skip and skip(event):
+                continue
+            
+            yield format_sse(event["type"], event)
+    finally:
+        broadcaster.unsubscribe(queue)
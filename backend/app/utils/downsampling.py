@@ -0,0 +1,119 @@
+"""
+Zmniejszanie liczby punktów szeregu czasowego do wykresu
+
+- lttb: Largest-Triangle-Three-Buckets - zachowuje kształt wykresu,
+  wybierając z każdego kubełka punkt tworzący największy trójkąt
+  z sąsiednimi kubełkami
+- minmax: z każdego kubełka minimum i maksimum - zachowuje wszystkie
+  szczyty i dołki
+
+Obie metody zwracają podzbiór punktów wejściowych (bez interpolacji),
+zawsze z pierwszym i ostatnim punktem szeregu.
+"""
+
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+
+Series = List[Tuple[datetime, float]]
+
+METHODS = ("lttb", "minmax")
+
+
+def _as_arrays(series: Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Rozdziela szereg na tablice x (sekundy epoki) i y"""
+    x = np.fromiter((ts.timestamp() for ts, _ in series), dtype=np.float64, count=len(series))
+    y = np.fromiter((value for _, value in series), dtype=np.float64, count=len(series))
+    return x, y
+
+
+def lttb(series: Series, points: int) -> Series:
+    """
+    Downsampling metodą Largest-Triangle-Three-Buckets
+    
+    Args:
+        series: Szereg (timestamp, wartość) rosnąco po czasie
+        points: Docelowa liczba punktów (minimum 3)
+    
+    Returns:
+        Co najwyżej `points` punktów z wejścia
+    """
+    n = len(series)
+    if points >= n or points < 3:
+        return list(series)
+    
+    x, y = _as_arrays(series)
+    every = (n - 2) / (points - 2)
+    
+    selected = [0]
+    a = 0
+    
+    for i in range(points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        selected.append(a)
+    
+    selected.append(n - 1)
+    
+    return [series[i] for i in selected]
+
+
+def min_max(series: Series, points: int) -> Series:
+    """
+    Downsampling przez minimum i maksimum w kubełkach
+    
+    Args:
+        series: Szereg (timestamp, wartość) rosnąco po czasie
+        points: Docelowa liczba punktów (minimum 4)
+    
+    Returns:
+        Co najwyżej `points` punktów z wejścia, w kolejności czasu
+    """
+    n = len(series)
+    if points >= n or points < 4:
+        return list(series)
+    
+    _, y = _as_arrays(series)
+    
+    # Pierwszy i ostatni punkt zawsze zostają, reszta po 2 na kubełek
+    buckets = (points - 2) // 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(int)
+    
+    selected = {0, n - 1}
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        chunk = y[start:end]
+        selected.add(start + int(chunk.argmin()))
+        selected.add(start + int(chunk.argmax()))
+    
+    return [series[i] for i in sorted(selected)]
+
+
+def downsample(series: Series, points: int, method: str = "lttb") -> Series:
+    """
+    Zmniejsza szereg do `points` punktów wybraną metodą
+    
+    Args:
+        series: Szereg (timestamp, wartość) rosnąco po czasie
+        points: Docelowa liczba punktów
+        method: lttb lub minmax
+    
+    Returns:
+        Szereg po downsamplingu (lub wejście, jeśli jest krótsze)
+    """
+    if method == "minmax":
+        return min_max(series, points)
+    return lttb(series, points)
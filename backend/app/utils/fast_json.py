@@ -0,0 +1,52 @@
+"""
+Szybka ścieżka serializacji JSON dla dużych list
+
+Domyślnie FastAPI waliduje zwróconą wartość względem response_model
+(druga walidacja po model_validate w serwisie), a potem serializuje ją
+modułem json. Dla list liczonych w tysiącach wierszy to główny koszt
+odpowiedzi. Endpointy, które zwracają zaufane dane z własnych zapytań,
+mogą zamiast tego zbudować słowniki prosto z krotek zapytania i zwrócić
+FastJSONResponse - jedna serializacja orjson, bez walidacji.
+
+Typy nieobsługiwane przez orjson (Decimal, adresy IP, Enum, modele
+Pydantic) są kodowane jak w jsonable_encoder, a datetime tak jak robi
+to Pydantic (ISO 8601, UTC jako "Z"), więc wynik jest zgodny z dotychczasowym.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _default(obj: Any) -> Any:
+    """Typy spoza orjson - tak jak w jsonable_encoder (Decimal -> int/float)"""
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializuje treść do JSON (bajty UTF-8)
+    
+    Args:
+        content: Słowniki, listy, krotki i typy proste z zapytań
+    
+    Returns:
+        JSON jako bytes
+    """
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Odpowiedź JSON serializowana przez orjson, bez walidacji response_model
+    
+    Tylko dla danych budowanych przez serwisy z własnych zapytań -
+    kształt odpowiedzi musi zgadzać się z response_model endpointu.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
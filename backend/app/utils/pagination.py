@@ -0,0 +1,103 @@
+"""
+Paginacja kursorowa (keyset)
+
+Kursor koduje parę (timestamp, id) ostatniego zwróconego wiersza.
+Następna strona to wiersze "mniejsze" od tej pary w porządku malejącym,
+więc zapytanie korzysta z indeksu (timestamp DESC, id DESC) niezależnie
+od tego, jak głęboko klient przewinął listę.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+
+def encode_cursor(timestamp: datetime, record_id: int) -> str:
+    """
+    Koduje kursor dla pary (timestamp, id)
+    
+    Args:
+        timestamp: Timestamp ostatniego wiersza strony
+        record_id: ID ostatniego wiersza strony
+    
+    Returns:
+        Kursor w postaci base64 (URL-safe)
+    """
+    payload = json.dumps([timestamp.isoformat(), record_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Dekoduje kursor do pary (timestamp, id)
+    
+    Args:
+        cursor: Kursor zwrócony przez encode_cursor
+    
+    Returns:
+        Krotka (timestamp, id)
+    
+    Raises:
+        HTTPException: 400 jeśli kursor jest nieprawidłowy
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp_str, record_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp_str), int(record_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def apply_keyset(query: Query, timestamp_column, id_column, cursor: Optional[str]) -> Query:
+    """
+    Dodaje warunek keyset i sortowanie malejące po (timestamp, id)
+    
+    Args:
+        query: Zapytanie SQLAlchemy
+        timestamp_column: Kolumna czasu (np. Patient.data_przyjecia)
+        id_column: Kolumna ID (rozstrzyga remisy timestampów)
+        cursor: Kursor poprzedniej strony lub None dla pierwszej strony
+    
+    Returns:
+        Zapytanie z filtrem i sortowaniem
+    """
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(timestamp_column, id_column) < tuple_(last_timestamp, last_id)
+        )
+    
+    return query.order_by(timestamp_column.desc(), id_column.desc())
+
+
+def count_rows(db: Session, query: Query, mode: str = "exact") -> Optional[int]:
+    """
+    Liczy wiersze zapytania w wybranym trybie
+    
+    Args:
+        db: Sesja bazy danych
+        query: Zapytanie bez limitu i sortowania
+        mode: "exact" (COUNT), "estimated" (estymata planera) lub "none"
+    
+    Returns:
+        Liczba wierszy lub None dla trybu "none"
+    """
+    if mode == "none":
+        return None
+    
+    if mode == "estimated" and db.bind.dialect.name == "postgresql":
+        sql = str(query.statement.compile(
+            dialect=db.bind.dialect,
+            compile_kwargs={"literal_binds": True}
+        ))
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+    
+    return query.order_by(None).count()
@@ -0,0 +1,205 @@
+"""
+Cache zserializowanych odpowiedzi z ETag / 304
+
+Dla endpointów, których treść zmienia się tylko po przeładowaniu modelu
+albo zapisie obłożenia. Odpowiedź jest serializowana raz i trzymana jako
+bajty razem z silnym ETagiem (skrót treści). Klucz to ścieżka + query,
+a wpis pamięta wersje zakresów danych ("model", "occupancy"), z których
+powstał. Serwisy podbijają wersję zakresu przy zmianie danych (invalidate),
+więc następny odczyt buduje odpowiedź od nowa. Klient z aktualnym
+If-None-Match dostaje 304 bez budowania i serializacji treści.
+
+Stan jest w pamięci procesu. Zapisy z innych procesów (skrypty, inne
+workery uvicorna) nie wywołują invalidate tutaj - dla takich zakresów
+endpoint wywołuje sync ze znacznikiem stanu w bazie, sprawdzanym
+najwyżej co SYNC_INTERVAL sekund.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Zakresy danych, od których zależą cachowane odpowiedzi
+SCOPE_MODEL = "model"
+SCOPE_OCCUPANCY = "occupancy"
+
+# Co ile sekund najwyżej sprawdzać znacznik zakresu w bazie (sync)
+SYNC_INTERVAL = 10.0
+
+# Klient ma zawsze pytać serwer (If-None-Match), ale może trzymać kopię
+CACHE_HEADERS = {"Cache-Control": "private, no-cache"}
+
+
+class CachedResponse(NamedTuple):
+    """Zserializowana odpowiedź i wersje zakresów, z których powstała"""
+    versions: Tuple[int, ...]
+    body: bytes
+    etag: str
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Czy nagłówek If-None-Match pasuje do ETagu
+    
+    Porównanie słabe (RFC 9110 13.1.2): prefiks W/ jest ignorowany,
+    "*" pasuje do każdego ETagu.
+    
+    Args:
+        if_none_match: Wartość nagłówka (może być listą po przecinku)
+        etag: ETag odpowiedzi (w cudzysłowie)
+    """
+    if not if_none_match:
+        return False
+    
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    
+    return False
+
+
+def render_json(content: Any) -> bytes:
+    """Serializuje treść tak samo jak JSONResponse FastAPI"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class ResponseCache:
+    """
+    Cache odpowiedzi JSON z wersjonowaniem zakresów danych
+    
+    Args:
+        max_entries: Maksymalna liczba wpisów (najdawniej używane wypadają)
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._tokens: Dict[str, Any] = {}
+        self._synced_at: Dict[str, float] = {}
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._max_entries = max_entries
+    
+    def version(self, scope: str) -> int:
+        """Aktualna wersja zakresu danych"""
+        return self._versions.get(scope, 0)
+    
+    def invalidate(self, scope: str) -> None:
+        """
+        Unieważnia odpowiedzi zależne od zakresu (podbija jego wersję)
+        
+        Args:
+            scope: Zakres danych (SCOPE_MODEL, SCOPE_OCCUPANCY)
+        """
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+    
+    def sync(self, scope: str, token: Callable[[], Any], interval: float = SYNC_INTERVAL) -> None:
+        """
+        Unieważnia zakres, jeśli zmienił się jego znacznik w bazie
+        
+        Znacznik (np. ostatnie ID dziennika) jest pobierany najwyżej co
+        interval sekund, więc zmiana spoza procesu jest widoczna najpóźniej
+        po tym czasie.
+        
+        Args:
+            scope: Zakres danych
+            token: Funkcja zwracająca znacznik stanu zakresu
+            interval: Minimalny odstęp między sprawdzeniami (sekundy)
+        """
+        now = time.monotonic()
+        with self._lock:
+            if scope in self._synced_at and now - self._synced_at[scope] < interval:
+                return
+            self._synced_at[scope] = now
+        
+        value = token()
+        
+        with self._lock:
+            if scope in self._tokens and self._tokens[scope] != value:
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+            self._tokens[scope] = value
+    
+    def clear(self) -> None:
+        """Usuwa wszystkie wpisy"""
+        with self._lock:
+            self._entries.clear()
+    
+    @staticmethod
+    def cache_key(request: Request) -> str:
+        """Klucz wpisu: ścieżka + parametry query w stałej kolejności"""
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return f"{request.url.path}?{query}"
+    
+    def _lookup(self, key: str, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        """Aktualny wpis dla klucza (None jeśli brak lub nieaktualny)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.versions != versions:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+    
+    def _store(self, key: str, entry: CachedResponse) -> None:
+        """Zapisuje wpis, usuwając najdawniej używane ponad limit"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+    
+    def respond(
+        self,
+        request: Request,
+        scopes: Iterable[str],
+        build: Callable[[], Any]
+    ) -> Response:
+        """
+        Odpowiedź z cache, 304 albo nowo zbudowana
+        
+        Args:
+            request: Request klienta (ścieżka, query, If-None-Match)
+            scopes: Zakresy danych, od których zależy treść (puste =
+                treść stała przez cały czas życia procesu)
+            build: Funkcja budująca treść (wywoływana tylko przy braku
+                aktualnego wpisu; wyjątek nie jest cachowany)
+        
+        Returns:
+            Response 200 z treścią JSON albo 304 bez treści
+        """
+        key = self.cache_key(request)
+        versions = tuple(self.version(scope) for scope in scopes)
+        
+        entry = self._lookup(key, versions)
+        if entry is None:
+            body = render_json(build())
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            entry = CachedResponse(versions, body, etag)
+            self._store(key, entry)
+        
+        headers = {"ETag": entry.etag, **CACHE_HEADERS}
+        
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+# Globalna instancja cache odpowiedzi
+response_cache = ResponseCache()
@@ -0,0 +1,91 @@
+"""
+Predykcje triażu dla pacjentów bez predykcji (np. po imporcie danych
+albo po awarii modelu).
+
+Pacjenci są przetwarzani paczkami po ID (jedna predykcja modelu i jeden
+INSERT ... ON CONFLICT DO NOTHING na paczkę, commit po każdej paczce).
+Po przerwaniu wystarczy uruchomić skrypt ponownie - pacjenci z zapisaną
+predykcją są pomijani. --after-id pozwala pominąć już przejrzany zakres
+(np. pacjentów z danymi odrzuconymi przez model).
+
+Zdarzenia przyjęcia (dziennik obłożenia) zapisują się razem z predykcjami.
+Kolejka oczekujących działającego API nie jest aktualizowana z tego
+procesu - API uzgadnia ją z bazą przy odczycie (najwyżej co
+RECONCILE_INTERVAL, queue_service.py).
+
+Użycie:
+    python scripts/backfill_predictions.py [--chunk-size 1000] [--after-id 0] [--max-patients N]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.database import SessionLocal
+from app.ml.predictor import predictor
+from app.services.backfill_service import CHUNK_SIZE, PredictionBackfillService
+
+
+def backfill_predictions(chunk_size: int, after_id: int, max_patients: int = None) -> int:
+    if predictor.model is None:
+        print(" ✗ Model triażu nie jest załadowany")
+        return 1
+    
+    db = SessionLocal()
+    
+    try:
+        pending = PredictionBackfillService.count_pending(db, after_id)
+        if max_patients is not None:
+            pending = min(pending, max_patients)
+        
+        print(f"\n Pacjenci bez predykcji: {pending:,} (model {predictor.model_version})")
+        if not pending:
+            return 0
+        
+        totals = {"processed": 0, "predicted": 0, "skipped": 0, "invalid": 0}
+        start = time.perf_counter()
+        
+        for result in PredictionBackfillService.iter_chunks(
+            db, after_id=after_id, chunk_size=chunk_size, max_patients=max_patients
+        ):
+            totals["processed"] += result.processed
+            totals["predicted"] += result.predicted
+            totals["skipped"] += result.skipped
+            totals["invalid"] += len(result.invalid_patient_ids)
+            
+            elapsed = time.perf_counter() - start
+            rate = totals["processed"] / elapsed if elapsed else 0
+            print(
+                f"   {totals['processed']:,}/{pending:,} "
+                f"({100 * totals['processed'] / max(pending, 1):.0f}%) | "
+                f"{rate:,.0f} pacj./s | ostatnie ID: {result.last_patient_id}"
+            )
+        
+        print(
+            f"\n ✓ Zapisane: {totals['predicted']:,}, pominięte: {totals['skipped']:,}, "
+            f"odrzucone: {totals['invalid']:,} w {time.perf_counter() - start:.1f}s"
+        )
+        return 0
+    except KeyboardInterrupt:
+        print("\n Przerwano - zapisane paczki zostają, uruchom ponownie aby dokończyć")
+        return 130
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predykcje triażu dla pacjentów bez predykcji")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Pacjentów w paczce")
+    parser.add_argument("--after-id", type=int, default=0, help="Wznów od pacjentów o ID większym")
+    parser.add_argument("--max-patients", type=int, default=None, help="Limit przetworzonych pacjentów")
+    args = parser.parse_args()
+    
+    sys.exit(backfill_predictions(args.chunk_size, args.after_id, args.max_patients))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Przelicza agregaty godzinowe triaży (triage_rollup_hourly,
+patient_rollup_hourly) z pełnej historii pacjentów i predykcji.
+
+Użycie:
+    python scripts/backfill_rollups.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.database import SessionLocal
+from app.services.analytics_service import AnalyticsService
+
+
+def backfill_rollups():
+    db = SessionLocal()
+    
+    try:
+        print("\n Przeliczanie agregatów triaży...")
+        start = time.perf_counter()
+        counts = AnalyticsService.backfill(db)
+        
+        for table, count in counts.items():
+            print(f"   ✓ {table}: {count:,} wierszy")
+        print(f" Gotowe w {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill_rollups()
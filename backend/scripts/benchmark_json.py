@@ -0,0 +1,153 @@
+"""
+Benchmark serializacji dużych list (standardowa ścieżka vs FastJSONResponse)
+
+Dla syntetycznych wierszy w układzie zapytań z PatientService.list_patients
+i AuditService.get_logs porównuje:
+  - ścieżkę standardową: schemat Pydantic per wiersz w serwisie, a potem
+    to, co robi FastAPI z response_model (model_dump, ponowna walidacja,
+    serializacja do JSON modułem json),
+  - ścieżkę szybką: słowniki z krotek zapytania + jedno orjson.dumps.
+Sprawdza też, że obie ścieżki dają ten sam JSON po zdekodowaniu.
+
+Użycie:
+    python scripts/benchmark_json.py --rows 1000 10000
+"""
+
+import sys
+import json
+import time
+import argparse
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from pydantic import TypeAdapter
+
+from app.schemas import AuditLogWithUser, PaginatedResponse, PatientListItem
+from app.services.audit_service import LOG_WITH_USER_FIELDS
+from app.utils import fast_json
+
+PatientRow = namedtuple("PatientRow", ["id", "wiek", "plec", "status", "data_przyjecia", "szablon_przypadku"])
+AuditRow = namedtuple("AuditRow", [
+    "id", "user_id", "action", "table_name", "record_id", "old_values", "new_values",
+    "ip_address", "user_agent", "timestamp", "username", "user_email"
+])
+
+
+def patient_rows(n: int):
+    """Wiersze jak z db.query(*LIST_ITEM_COLUMNS)"""
+    start = datetime(2025, 1, 1, 8, 0, 0)
+    return [
+        PatientRow(i, 20 + i % 70, "M" if i % 2 else "K", "oczekujący",
+                   start + timedelta(minutes=i, microseconds=i % 7), "migrena" if i % 3 else None)
+        for i in range(n)
+    ]
+
+
+def audit_rows(n: int):
+    """Wiersze jak z AuditService._logs_with_user_query"""
+    start = datetime(2025, 1, 1, 8, 0, 0)
+    return [
+        AuditRow(i, i % 10, "UPDATE_PATIENT", "patients", i,
+                 {"status": "oczekujący", "wiek": 40}, {"status": "w_leczeniu", "wiek": 40},
+                 "10.0.0.1", "Mozilla/5.0", start + timedelta(seconds=i), f"user{i % 10}", f"user{i % 10}@example.com")
+        for i in range(n)
+    ]
+
+
+def standard_path(adapter: TypeAdapter, build_content):
+    """Serwis buduje schematy, FastAPI dumpuje, waliduje ponownie i serializuje"""
+    content = build_content()
+    dumped = _prepare(content)
+    value = adapter.validate_python(dumped)
+    return json.dumps(
+        adapter.dump_python(value, mode="json"),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _prepare(content):
+    """Odpowiednik _prepare_response_content z FastAPI (model_dump modeli)"""
+    if isinstance(content, list):
+        return [_prepare(item) for item in content]
+    if hasattr(content, "model_dump"):
+        return content.model_dump(by_alias=True)
+    return content
+
+
+def time_call(fn, repeats: int) -> float:
+    """Zwraca medianę czasu wywołania w milisekundach"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def run_benchmark(sizes, repeats: int) -> bool:
+    patients_adapter = TypeAdapter(PaginatedResponse[PatientListItem])
+    audit_adapter = TypeAdapter(list[AuditLogWithUser])
+    
+    results = []
+    all_equal = True
+    
+    for n in sizes:
+        patients = patient_rows(n)
+        audits = audit_rows(n)
+        page_info = {"total": n, "page": 1, "size": n, "pages": 1, "next_cursor": None}
+        
+        cases = {
+            "patients": (
+                lambda: standard_path(patients_adapter, lambda: PaginatedResponse(
+                    items=[PatientListItem(**row._asdict()) for row in patients], **page_info
+                )),
+                lambda: fast_json.dumps({"items": [row._asdict() for row in patients], **page_info})
+            ),
+            "audit/logs": (
+                lambda: standard_path(audit_adapter, lambda: [
+                    AuditLogWithUser(**row._asdict()) for row in audits
+                ]),
+                lambda: fast_json.dumps([
+                    {field: getattr(row, field) for field in LOG_WITH_USER_FIELDS} for row in audits
+                ])
+            ),
+        }
+        
+        for name, (standard, fast) in cases.items():
+            equal = json.loads(standard()) == json.loads(fast())
+            all_equal = all_equal and equal
+            
+            standard_ms = time_call(standard, repeats)
+            fast_ms = time_call(fast, repeats)
+            results.append((name, n, standard_ms, fast_ms, equal))
+    
+    print("\n" + "=" * 74)
+    print(f"{'Endpoint':<14}{'Wiersze':>9}{'Standard [ms]':>15}{'orjson [ms]':>13}{'Przysp.':>10}{'Zgodne':>10}")
+    print("-" * 74)
+    for name, n, standard_ms, fast_ms, equal in results:
+        speedup = standard_ms / fast_ms if fast_ms else float("inf")
+        print(f"{name:<14}{n:>9,}{standard_ms:>15.2f}{fast_ms:>13.2f}{speedup:>9.1f}x{'tak' if equal else 'NIE':>10}")
+    print("=" * 74)
+    
+    return all_equal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serializacji dużych list")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000], help="Liczby wierszy")
+    parser.add_argument("--repeats", type=int, default=5, help="Liczba powtórzeń pomiaru")
+    args = parser.parse_args()
+    
+    sys.exit(0 if run_benchmark(args.rows, args.repeats) else 1)
+
+
+if __name__ == "__main__":
+    main()
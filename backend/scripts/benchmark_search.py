@@ -0,0 +1,154 @@
+"""
+Benchmark wyszukiwania pacjentów
+
+Seeduje tabelę patients wierszami testowymi (domyślnie 1 000 000), a następnie
+porównuje stare zapytanie (CAST(id AS TEXT) LIKE + LIKE bez indeksu) z
+zapytaniami SearchService (klucz główny dla ID, ILIKE + indeks trigramowy
+z rankingiem similarity). Wiersze testowe są oznaczone w kolumnie notatki
+i usuwane po pomiarze (chyba że podano --keep).
+
+Użycie:
+    python scripts/benchmark_search.py --rows 1000000 --query bol
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.services.search_service import SearchService
+
+BENCHMARK_MARKER = "benchmark_search"
+
+TEMPLATES = [
+    'bol_brzucha', 'bol_w_klatce', 'infekcja_ukladu_moczowego',
+    'krwawienie_z_przewodu_pokarmowego', 'migrena', 'napad_padaczkowy',
+    'omdlenie', 'reakcja_alergiczna', 'silne_krwawienie', 'udar',
+    'uraz_glowy', 'uraz_wielonarzadowy', 'zaburzenia_rytmu_serca',
+    'zaostrzenie_astmy', 'zaostrzenie_pochp', 'zapalenie_opon_mozgowych',
+    'zapalenie_pluc', 'zapalenie_wyrostka', 'zatrucie_pokarmowe',
+    'zlamanie_konczyny'
+]
+
+LEGACY_QUERY = """
+    SELECT id, wiek, plec, status, data_przyjecia, szablon_przypadku
+    FROM patients
+    WHERE CAST(id AS TEXT) LIKE :pattern OR szablon_przypadku LIKE :pattern
+    LIMIT :limit
+"""
+
+
+def seed_patients(db, rows: int):
+    """Wstawia wiersze testowe jednym INSERT ... SELECT po stronie serwera"""
+    templates = "ARRAY[" + ", ".join(f"'{t}'" for t in TEMPLATES) + "]"
+    
+    db.execute(text(f"""
+        INSERT INTO patients (wiek, plec, szablon_przypadku, data_przyjecia, status, notatki)
+        SELECT
+            (random() * 100)::int,
+            CASE WHEN random() < 0.5 THEN 'M' ELSE 'K' END,
+            ({templates})[1 + (g % {len(TEMPLATES)})],
+            NOW() - (g || ' minutes')::interval,
+            'oczekujący',
+            :marker
+        FROM generate_series(1, :rows) AS g
+    """), {"marker": BENCHMARK_MARKER, "rows": rows})
+    db.commit()
+    db.execute(text("ANALYZE patients"))
+    db.commit()
+
+
+def cleanup(db):
+    """Usuwa wiersze testowe"""
+    deleted = db.execute(
+        text("DELETE FROM patients WHERE notatki = :marker"),
+        {"marker": BENCHMARK_MARKER}
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def time_call(fn, repeats: int) -> float:
+    """Zwraca medianę czasu wywołania w milisekundach"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def explain(db, sql: str, params: dict) -> str:
+    """Zwraca pierwszą linię planu EXPLAIN ANALYZE"""
+    plan = db.execute(text(f"EXPLAIN ANALYZE {sql}"), params).fetchall()
+    return plan[0][0]
+
+
+def run_benchmark(rows: int, query: str, limit: int, repeats: int, keep: bool):
+    db = SessionLocal()
+    
+    try:
+        print(f"\n Seedowanie {rows:,} pacjentów...")
+        start = time.perf_counter()
+        seed_patients(db, rows)
+        print(f" ✓ Gotowe w {time.perf_counter() - start:.1f}s")
+        
+        sample_id = db.execute(
+            text("SELECT id FROM patients WHERE notatki = :marker ORDER BY id DESC LIMIT 1"),
+            {"marker": BENCHMARK_MARKER}
+        ).scalar()
+        
+        results = []
+        
+        for label, term in (("tekst", query), ("ID", str(sample_id))):
+            legacy_params = {"pattern": f"%{term}%", "limit": limit}
+            
+            legacy_ms = time_call(
+                lambda: db.execute(text(LEGACY_QUERY), legacy_params).fetchall(),
+                repeats
+            )
+            indexed_ms = time_call(
+                lambda: SearchService.search_patients(db, term, limit),
+                repeats
+            )
+            results.append((label, term, legacy_ms, indexed_ms))
+            
+            print(f"\n Zapytanie ({label}): {term!r}")
+            print(f"   Plan starego zapytania: {explain(db, LEGACY_QUERY, legacy_params)}")
+        
+        print("\n" + "=" * 70)
+        print(f"{'Zapytanie':<12}{'Fraza':<20}{'Stare [ms]':>12}{'Nowe [ms]':>12}{'Przysp.':>10}")
+        print("-" * 70)
+        for label, term, legacy_ms, indexed_ms in results:
+            speedup = legacy_ms / indexed_ms if indexed_ms else float("inf")
+            print(f"{label:<12}{term:<20}{legacy_ms:>12.2f}{indexed_ms:>12.2f}{speedup:>9.1f}x")
+        print("=" * 70)
+    
+    finally:
+        if not keep:
+            deleted = cleanup(db)
+            print(f"\n Usunięto {deleted:,} wierszy testowych")
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wyszukiwania pacjentów")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Liczba wierszy testowych")
+    parser.add_argument("--query", default="krwawienie", help="Fraza wyszukiwania tekstowego")
+    parser.add_argument("--limit", type=int, default=20, help="Limit wyników")
+    parser.add_argument("--repeats", type=int, default=5, help="Liczba powtórzeń pomiaru")
+    parser.add_argument("--keep", action="store_true", help="Nie usuwaj wierszy testowych")
+    args = parser.parse_args()
+    
+    run_benchmark(args.rows, args.query, args.limit, args.repeats, args.keep)
+
+
+if __name__ == "__main__":
+    main()
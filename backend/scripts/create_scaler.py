@@ -1,8 +1,12 @@
+import sys
 import pandas as pd
 import pickle
 from pathlib import Path
 from sklearn.preprocessing import StandardScaler
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+from utils.datasets import load_dataset
+
 # Ścieżki
 DATA_PATH = Path('/home/dolfik/Projects/Clinic-data/data/processed/')
 MODEL_PATH = Path('/home/dolfik/Projects/Clinic-data/models/')
@@ -12,7 +16,7 @@ print("=" * 70)
 
 # 1. Wczytaj dane treningowe
 print("\n1. Wczytywanie danych treningowych...")
-X_train = pd.read_csv(DATA_PATH / 'X_train.csv')
+X_train = load_dataset(DATA_PATH / 'X_train.csv')
 print(f"   ✓ Wczytano {X_train.shape[0]} próbek, {X_train.shape[1]} cech")
 
 # 2. Wybierz dokładnie te kolumny których oczekuje model
@@ -47,7 +51,7 @@ print(f"   Wybrano {X_train_selected.shape[1]} cech")
 # 3. Stwórz i wytrenuj scaler
 print("\n3. Trenowanie StandardScaler...")
 scaler = StandardScaler()
-scaler.fit(X_train_selected)
+scaler.fit(X_train_selected.astype(float))
 print("   ✓ Scaler wytrenowany")
 
 # 4. Zapisz scaler
@@ -60,7 +64,7 @@ print(f"   ✓ Zapisano: {scaler_path}")
 
 # 5. Test scalera
 print("\n5. Test scalera...")
-X_scaled = scaler.transform(X_train_selected[:5])
+X_scaled = scaler.transform(X_train_selected[:5].astype(float))
 print(f"   Przed skalowaniem (pierwsze 5 wierszy, pierwsze 3 cechy):")
 print(X_train_selected.iloc[:5, :3])
 print(f"\n   Po skalowaniu:")
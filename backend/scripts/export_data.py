@@ -0,0 +1,95 @@
+"""
+Eksport tabel dla hurtowni danych (pacjenci, predykcje, audit log)
+
+Wiersze są czytane kursorem serwerowym i zapisywane porcjami do pliku
+NDJSON, CSV lub Parquet - pamięć nie zależy od wielkości tabeli. Eksport
+przyrostowy: --since albo --watermark-file (plik z górną granicą
+poprzedniego eksportu, nadpisywany po udanym eksporcie). Granica jest
+cofnięta o WATERMARK_LAG i przed najstarszą trwającą transakcję, a usunięte
+wiersze nie trafiają do eksportu przyrostowego (tylko do pełnego).
+
+Użycie:
+    python scripts/export_data.py patients --format parquet
+    python scripts/export_data.py audit_log --format ndjson --watermark-file exports/audit_log.watermark
+"""
+
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.database import SessionLocal
+from app.services.export_service import BATCH_SIZE, DATASETS, FORMATS, ExportService, ExportStats
+
+
+def export_data(
+    dataset: str,
+    fmt: str,
+    since: datetime = None,
+    output: Path = None,
+    watermark_file: Path = None,
+    batch_size: int = BATCH_SIZE
+) -> int:
+    if since is None and watermark_file is not None and watermark_file.exists():
+        since = datetime.fromisoformat(watermark_file.read_text().strip())
+    
+    db = SessionLocal()
+    
+    try:
+        until = ExportService.snapshot(db)
+        output = output or Path(f"{dataset}_{until:%Y%m%dT%H%M%S}.{FORMATS[fmt][1]}")
+        tmp_output = output.with_name(output.name + ".part")
+        
+        print(f"\n Eksport {dataset} ({fmt}) -> {output}")
+        print(f"   Zakres: {since.isoformat() if since else 'pełny'} .. {until.isoformat()}")
+        
+        stats = ExportStats()
+        last_report = 0.0
+        
+        with open(tmp_output, "wb") as f:
+            for chunk in ExportService.iter_export(db, dataset, fmt, since, until, stats, batch_size):
+                f.write(chunk)
+                
+                if stats.seconds - last_report >= 1:
+                    last_report = stats.seconds
+                    print(
+                        f"   {stats.rows:,} wierszy | {stats.bytes / 1e6:,.1f} MB | "
+                        f"{stats.rows_per_second:,.0f} wierszy/s"
+                    )
+        
+        tmp_output.replace(output)
+        
+        if watermark_file is not None:
+            watermark_file.parent.mkdir(parents=True, exist_ok=True)
+            watermark_file.write_text(until.isoformat())
+        
+        print(
+            f"\n ✓ {stats.rows:,} wierszy, {stats.bytes / 1e6:,.1f} MB w {stats.seconds:.1f}s "
+            f"({stats.rows_per_second:,.0f} wierszy/s, {stats.bytes / 1e6 / max(stats.seconds, 1e-9):,.1f} MB/s)"
+        )
+        print(f"   Następny eksport przyrostowy: --since {until.isoformat()}")
+        return 0
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strumieniowy eksport tabel")
+    parser.add_argument("dataset", choices=sorted(DATASETS), help="Eksportowany zbiór")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson", help="Format pliku")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Tylko wiersze zmienione po tym czasie (ISO 8601)")
+    parser.add_argument("--output", type=Path, default=None, help="Plik wynikowy (domyślnie <zbiór>_<czas>.<format>)")
+    parser.add_argument("--watermark-file", type=Path, default=None, help="Plik ze znacznikiem poprzedniego eksportu")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Wierszy na porcję kursora")
+    args = parser.parse_args()
+    
+    sys.exit(export_data(
+        args.dataset, args.format, args.since, args.output, args.watermark_file, args.batch_size
+    ))
+
+
+if __name__ == "__main__":
+    main()
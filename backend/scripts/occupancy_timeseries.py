@@ -0,0 +1,73 @@
+"""
+Utrzymanie szeregów czasowych obłożenia
+
+Użycie:
+    python scripts/occupancy_timeseries.py backfill    # przelicza agregaty z surowych wierszy
+    python scripts/occupancy_timeseries.py retention   # usuwa surowe wiersze starsze niż retencja
+    python scripts/occupancy_timeseries.py rolling     # przebudowuje agregaty kroczące (7d, 30d)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import func
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.database import SessionLocal
+from app.models import DepartmentOccupancy
+from app.services.occupancy_ledger import OccupancyLedger
+from app.services.occupancy_timeseries import OccupancyTimeSeries, RAW_RETENTION
+from app.services.rolling_features_service import rolling_feature_store
+
+
+def backfill():
+    db = SessionLocal()
+    
+    try:
+        since = db.query(func.min(DepartmentOccupancy.timestamp)).scalar()
+        if since is None:
+            print(" Brak danych w department_occupancy")
+            return
+        
+        print(f"\n Przeliczanie agregatów obłożenia od {since}...")
+        start = time.perf_counter()
+        OccupancyTimeSeries.refresh(db, since=since)
+        db.commit()
+        print(f" Gotowe w {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+
+
+def retention():
+    db = SessionLocal()
+    
+    try:
+        print(f"\n Usuwanie surowych wierszy starszych niż {RAW_RETENTION.days} dni...")
+        deleted = OccupancyLedger.apply_retention(db)
+        print(f"   ✓ Usunięto {deleted:,} wierszy")
+    finally:
+        db.close()
+
+
+def rolling():
+    db = SessionLocal()
+    
+    try:
+        print("\n Przebudowa agregatów kroczących z ostatnich 720h...")
+        aggregates = rolling_feature_store.reset(db)
+        print(f"   ✓ Ostatnia godzina: {aggregates.last_hour}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    commands = {"backfill": backfill, "retention": retention, "rolling": rolling}
+    
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        print(__doc__)
+        sys.exit(1)
+    
+    commands[sys.argv[1]]()
@@ -1,9 +1,13 @@
+import sys
 import pandas as pd
 import pickle
 from pathlib import Path
 from sklearn.preprocessing import StandardScaler
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+from utils.datasets import dataset_columns, load_dataset
+
 print("🔧 ODTWARZANIE SCALERA Z SUROWYCH DANYCH")
 print("=" * 70)
 
@@ -14,15 +18,16 @@ MODEL_PATH = Path('/home/dolfik/Projects/Clinic-data/models/')
 
 # 1. Wczytaj surowe dane
 print("\n1. Wczytywanie surowych danych...")
-df_raw = pd.read_csv(RAW_DATA)
+df_raw = load_dataset(RAW_DATA)
 print(f"   ✓ Wczytano {len(df_raw)} rekordów")
 print(f"   Kolumny: {list(df_raw.columns)}")
 
 # 2. Wczytaj przetworzone dane żeby zobaczyć strukturę
 print("\n2. Sprawdzanie struktury przetworzonych danych...")
-X_train = pd.read_csv(PROCESSED_TRAIN)
-print(f"   ✓ Cechy w X_train: {X_train.shape[1]}")
-print(f"   Kolumny: {list(X_train.columns)[:10]}...")
+# Tylko schemat Parquet - dane X_train nie są tu potrzebne
+train_columns = dataset_columns(PROCESSED_TRAIN)
+print(f"   ✓ Cechy w X_train: {len(train_columns)}")
+print(f"   Kolumny: {train_columns[:10]}...")
 
 # 3. Preprocessing surowych danych
 print("\n3. Preprocessing surowych danych...")
@@ -50,7 +55,7 @@ for dept in departments:
     df_processed[f'oddział_{dept}'] = (df_raw['oddział_docelowy'] == dept).astype(int)
 
 # One-hot encoding szablonów (użyj DOKŁADNIE tych z X_train)
-template_cols = [col for col in X_train.columns if col.startswith('szablon_')]
+template_cols = [col for col in train_columns if col.startswith('szablon_')]
 print(f"\n   Szablony w X_train: {len(template_cols)}")
 for template_col in template_cols:
     df_processed[template_col] = 0  # Wszystkie na 0 domyślnie
@@ -65,8 +70,8 @@ print(f"   ✓ Preprocessed shape: {df_processed.shape}")
 
 # 4. Upewnij się że kolejność kolumn jest taka sama jak w X_train
 print("\n4. Dopasowanie kolejności kolumn...")
-missing_in_processed = set(X_train.columns) - set(df_processed.columns)
-extra_in_processed = set(df_processed.columns) - set(X_train.columns)
+missing_in_processed = set(train_columns) - set(df_processed.columns)
+extra_in_processed = set(df_processed.columns) - set(train_columns)
 
 if missing_in_processed:
     print(f"   ⚠ Brakujące kolumny: {missing_in_processed}")
@@ -78,18 +83,18 @@ if extra_in_processed:
     df_processed = df_processed.drop(columns=list(extra_in_processed))
 
 # Ustaw tę samą kolejność co X_train
-df_processed = df_processed[X_train.columns]
+df_processed = df_processed[train_columns]
 print(f"   ✓ Dopasowano kolejność - shape: {df_processed.shape}")
 
 # 5. Trenuj scaler
 print("\n5. Trenowanie StandardScaler...")
 scaler = StandardScaler()
-scaler.fit(df_processed)
+scaler.fit(df_processed.astype(float))
 print("   ✓ Scaler wytrenowany")
 
 # 6. Sprawdź czy scaler działa poprawnie
 print("\n6. Weryfikacja scalera...")
-X_scaled = scaler.transform(df_processed[:5])
+X_scaled = scaler.transform(df_processed[:5].astype(float))
 print(f"   Przed skalowaniem (pierwsze 3 cechy):")
 print(df_processed[['wiek', 'tętno', 'ciśnienie_skurczowe']].head())
 print(f"\n   Po skalowaniu:")
@@ -97,7 +102,7 @@ print(pd.DataFrame(X_scaled[:, :3], columns=['wiek', 'tętno', 'ciśnienie_skurc
 
 # Porównaj z X_train
 print(f"\n   X_train (pierwsze 3 cechy, pierwsze 5 wierszy):")
-print(X_train[['wiek', 'tętno', 'ciśnienie_skurczowe']].head())
+print(load_dataset(PROCESSED_TRAIN, columns=['wiek', 'tętno', 'ciśnienie_skurczowe']).head())
 
 # 7. Zapisz scaler
 print("\n7. Zapisywanie scalera...")
@@ -0,0 +1,504 @@
+"""
+Masowe zasilanie bazy danymi syntetycznymi (COPY FROM STDIN)
+
+Pacjenci, predykcje (z przyjęciami w dzienniku obłożenia), historia
+obłożenia i audit log są generowane
+wektorowo (generatory z src/generators) chunkami w wielu procesach,
+a każdy chunk trafia do Postgresa jako CSV przez COPY - bez INSERT
+per wiersz. Indeksy pomocnicze (poza kluczami i ograniczeniami
+UNIQUE) są usuwane przed ładowaniem i budowane raz po nim, potem
+ANALYZE i przeliczenie agregatów (rollupy triaży, obłożenie godzinowe
+i dzienne, agregaty kroczące cech LSTM). Przeznaczone do baz testowych
+i benchmarków zapytań.
+
+Użycie:
+    python scripts/seed_bulk.py [--patients 1000000] [--hours 8760] [--audit 2000000] [--truncate]
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'src'))
+
+from app.core.database import SessionLocal, engine
+from app.models import DepartmentOccupancy
+from app.services.analytics_service import AnalyticsService
+from app.services.occupancy_ledger import ACTIVE_STATUSES
+from app.services.occupancy_timeseries import OccupancyTimeSeries
+from app.services.rolling_features_service import rolling_feature_store
+
+from config.constants import DEPARTMENTS
+from generators.arrangement_engine import ALTERNATIVES, START_DATE, occupancy_range
+from generators.triage_generator import CATEGORIES, generate_cases, templates_by_dominant_category
+from utils.parallel import chunk_ranges, chunk_rng, default_workers, run_chunks
+
+TABLES = ["patients", "triage_predictions", "occupancy_events", "department_occupancy", "audit_log"]
+# Stan wyliczany z historii - czyszczony razem z nią, a rolling_feature_state
+# budowany od nowa w refresh_aggregates
+ROLLUP_TABLES = [
+    "triage_rollup_hourly", "patient_rollup_hourly", "occupancy_hourly", "occupancy_daily",
+    "rolling_feature_state"
+]
+
+CHUNK_SIZE = 100_000
+OCCUPANCY_CHUNK_HOURS = 65_536
+
+# Gotowych chunków (CSV w pamięci) na proces - COPY jest zwykle wolniejsze
+# niż generowanie, więc bez limitu w pamięci czekałby cały zbiór
+PENDING_PER_WORKER = 2
+WEEK_HOURS = 7 * 24
+
+# Osobne strumienie losowe tabel (chunk_rng(seed + strumień, index))
+PATIENT_STREAM = 0
+OCCUPANCY_STREAM = 1
+AUDIT_STREAM = 2
+
+STATUSES = ['oczekujący', 'w_leczeniu', 'wypisany', 'przekazany']
+STATUS_P = [0.05, 0.15, 0.70, 0.10]
+ACTIVE_CODES = [STATUSES.index(status) for status in ACTIVE_STATUSES]
+
+# Przypisany oddział przy realokacji: pierwsza alternatywa docelowego
+ALTERNATIVE_CODES = np.array([DEPARTMENTS.index(ALTERNATIVES[dept][0]) for dept in DEPARTMENTS])
+REALLOCATION_RATE = 0.10
+
+PATIENT_COLUMNS = [
+    'id', 'wiek', 'plec', 'tetno', 'cisnienie_skurczowe', 'cisnienie_rozkurczowe',
+    'temperatura', 'saturacja', 'gcs', 'bol', 'czestotliwosc_oddechow', 'czas_od_objawow_h',
+    'szablon_przypadku', 'data_przyjecia', 'wprowadzony_przez', 'status', 'created_at', 'updated_at'
+]
+PREDICTION_COLUMNS = [
+    'patient_id', 'kategoria_triazu', 'prob_kat_1', 'prob_kat_2', 'prob_kat_3', 'prob_kat_4',
+    'prob_kat_5', 'przypisany_oddzial', 'oddzial_docelowy', 'model_version', 'confidence_score',
+    'predicted_at'
+]
+EVENT_COLUMNS = ['timestamp', 'department', 'delta', 'event_type', 'patient_id']
+OCCUPANCY_COLUMNS = ['timestamp'] + [dept.lower() for dept in DEPARTMENTS] + ['created_at']
+AUDIT_COLUMNS = [
+    'user_id', 'action', 'table_name', 'record_id', 'new_values', 'ip_address', 'user_agent', 'timestamp'
+]
+
+# (akcja, tabela, udział) - rozkład zbliżony do ruchu aplikacji
+AUDIT_ACTIONS = [
+    ("CREATE_PATIENT_WITH_TRIAGE", "patients", 0.35),
+    ("PREDICT_TRIAGE", "triage_predictions", 0.15),
+    ("CHANGE_PATIENT_STATUS", "patients", 0.20),
+    ("UPDATE_PATIENT", "patients", 0.10),
+    ("LOGIN", "users", 0.15),
+    ("EXPORT_DATA", None, 0.05),
+]
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 Safari/605.1.15",
+    "python-requests/2.31.0",
+]
+STATUS_VALUES = np.array([json.dumps({"status": status}, ensure_ascii=False) for status in STATUSES], dtype=object)
+CATEGORY_VALUES = np.array([json.dumps({"kategoria_triazu": cat}) for cat in CATEGORIES], dtype=object)
+
+SECONDARY_INDEXES = """
+    SELECT i.indexname, i.indexdef
+    FROM pg_indexes i
+    WHERE i.schemaname = current_schema()
+      AND i.tablename = ANY(%s)
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_constraint c
+          WHERE c.conindid = (quote_ident(i.schemaname) || '.' || quote_ident(i.indexname))::regclass
+      )
+"""
+
+
+def to_csv(df: pd.DataFrame, float_format: str) -> str:
+    """Chunk jako CSV bez nagłówka (NULL = puste pole)"""
+    return df.to_csv(index=False, header=False, float_format=float_format)
+
+
+def seconds(values: np.ndarray) -> np.ndarray:
+    return values.astype('timedelta64[s]')
+
+
+def patient_chunk(
+    index: int,
+    start: int,
+    stop: int,
+    per_category: int,
+    rows_per_case: int,
+    total: int,
+    first_id: int,
+    seed: int,
+    admitted_before: np.datetime64,
+    user_ids: np.ndarray,
+    prediction_rate: float,
+    model_version: str,
+    ledger_until: np.datetime64
+) -> Tuple[str, str, str, int]:
+    """
+    Chunk pacjentów, ich predykcji i przyjęć w dzienniku obłożenia
+    
+    Przypadki o numerach [start, stop) w każdej kategorii dominującej
+    (generate_cases) dostają kolejne id od first_id + rows_per_case * start,
+    więc id nie zależą od kolejności zakończenia chunków.
+    
+    Aktywny pacjent z predykcją zajmuje miejsce, więc dostaje zdarzenie
+    admission (jak record_admission) - inaczej późniejszy wypis przez API
+    zdejmowałby miejsce, którego nie zajął. Zdarzenie ma czas predykcji,
+    ale nie późniejszy niż ledger_until (ostatni snapshot historii), więc
+    przyjęcia liczą się jako zawarte w snapshocie i nie zawyżają
+    bieżącego obłożenia.
+    
+    Returns:
+        (CSV pacjentów, CSV predykcji, CSV zdarzeń, liczba pacjentów)
+    """
+    rng = chunk_rng(seed + PATIENT_STREAM, index)
+    offset = rows_per_case * start
+    cases = generate_cases(rng, start, stop, per_category, admitted_before)
+    cases = cases.iloc[:max(total - offset, 0)]
+    cases = cases.iloc[rng.permutation(len(cases))].reset_index(drop=True)
+    n = len(cases)
+    
+    ids = first_id + offset + np.arange(n)
+    admitted = cases['data_przyjęcia'].to_numpy() - seconds(rng.integers(0, 86_400, n))
+    status_codes = rng.choice(len(STATUSES), n, p=STATUS_P)
+    updated = admitted + seconds(rng.integers(0, 48 * 3600, n) * (status_codes != 0))
+    
+    patients = pd.DataFrame({
+        'id': ids,
+        'wiek': cases['wiek'],
+        'plec': cases['płeć'],
+        'tetno': cases['tętno'],
+        'cisnienie_skurczowe': cases['ciśnienie_skurczowe'],
+        'cisnienie_rozkurczowe': cases['ciśnienie_rozkurczowe'],
+        'temperatura': cases['temperatura'],
+        'saturacja': cases['saturacja'],
+        'gcs': cases['GCS'].round().clip(3, 15).astype(np.int16),
+        'bol': cases['ból'].round().clip(0, 10).astype(np.int16),
+        'czestotliwosc_oddechow': cases['częstotliwość_oddechów'],
+        'czas_od_objawow_h': cases['czas_od_objawów_h'],
+        'szablon_przypadku': cases['szablon_przypadku'],
+        'data_przyjecia': admitted,
+        'wprowadzony_przez': user_ids[rng.integers(0, len(user_ids), n)] if len(user_ids) else None,
+        'status': pd.Categorical.from_codes(status_codes, STATUSES),
+        'created_at': admitted,
+        'updated_at': updated,
+    })
+    
+    # Predykcje: rozkład Dirichleta skupiony na kategorii z szablonu
+    predicted = rng.random(n) < prediction_rate
+    m = int(predicted.sum())
+    alpha = 1.0 + 12.0 * (cases['kategoria_triażu'].to_numpy()[predicted, None] == np.array(CATEGORIES))
+    gamma = rng.gamma(alpha)
+    probs = (gamma / gamma.sum(axis=1, keepdims=True)).round(4)
+    
+    target = cases['oddział_docelowy'].cat.codes.to_numpy()[predicted]
+    assigned = np.where(rng.random(m) < REALLOCATION_RATE, ALTERNATIVE_CODES[target], target)
+    
+    predicted_at = admitted[predicted] + seconds(rng.integers(30, 900, m))
+    
+    predictions = pd.DataFrame({
+        'patient_id': ids[predicted],
+        'kategoria_triazu': probs.argmax(axis=1) + 1,
+        **{f'prob_kat_{cat}': probs[:, cat - 1] for cat in CATEGORIES},
+        'przypisany_oddzial': pd.Categorical.from_codes(assigned, DEPARTMENTS),
+        'oddzial_docelowy': pd.Categorical.from_codes(target, DEPARTMENTS),
+        'model_version': model_version,
+        'confidence_score': probs.max(axis=1),
+        'predicted_at': predicted_at,
+    })
+    
+    active = np.isin(status_codes[predicted], ACTIVE_CODES)
+    events = pd.DataFrame({
+        'timestamp': np.minimum(predicted_at[active], ledger_until),
+        'department': pd.Categorical.from_codes(assigned[active], DEPARTMENTS),
+        'delta': 1,
+        'event_type': 'admission',
+        'patient_id': ids[predicted][active],
+    })
+    
+    return to_csv(patients, '%.1f'), to_csv(predictions, '%.4f'), to_csv(events, '%.1f'), n
+
+
+def occupancy_chunk(start: int, stop: int, first_hour: int, shift: int, seed: int) -> Tuple[str, int]:
+    """
+    Chunk historii obłożenia: godziny [start, stop) historii
+    
+    Godziny silnika (first_hour + i, licząc od START_DATE) są przesunięte
+    o shift - wielokrotność tygodnia, więc profil dnia tygodnia i godziny
+    zgadza się z datami w bazie.
+    """
+    occupancy = occupancy_range(seed + OCCUPANCY_STREAM, first_hour + start, stop - start)
+    timestamps = np.datetime64(START_DATE, 'h') + shift + first_hour + np.arange(start, stop)
+    
+    df = pd.DataFrame(occupancy, columns=OCCUPANCY_COLUMNS[1:-1])
+    df.insert(0, 'timestamp', timestamps.astype('datetime64[ns]'))
+    df['created_at'] = df['timestamp']
+    return to_csv(df, '%.1f'), len(df)
+
+
+def audit_chunk(
+    index: int,
+    start: int,
+    stop: int,
+    seed: int,
+    first_id: int,
+    n_patients: int,
+    user_ids: np.ndarray,
+    logged_before: np.datetime64
+) -> Tuple[str, int]:
+    """Chunk wpisów audit logu (akcje wg AUDIT_ACTIONS, rekordy wśród wygenerowanych)"""
+    rng = chunk_rng(seed + AUDIT_STREAM, index)
+    n = stop - start
+    
+    actions = np.array([action for action, _, _ in AUDIT_ACTIONS], dtype=object)
+    tables = np.array([table for _, table, _ in AUDIT_ACTIONS], dtype=object)
+    codes = rng.choice(len(AUDIT_ACTIONS), n, p=[share for _, _, share in AUDIT_ACTIONS])
+    table = tables[codes]
+    
+    users = user_ids[rng.integers(0, len(user_ids), n)] if len(user_ids) else np.full(n, np.nan)
+    patients = first_id + rng.integers(0, n_patients, n) if n_patients else np.full(n, np.nan)
+    record = np.where(table == "users", users, np.where(pd.isna(table), np.nan, patients))
+    
+    values = np.where(
+        actions[codes] == "CHANGE_PATIENT_STATUS",
+        STATUS_VALUES[rng.integers(0, len(STATUSES), n)],
+        np.where(table == "patients", CATEGORY_VALUES[rng.integers(0, len(CATEGORIES), n)], None)
+    )
+    ip_pool = np.array([f'10.{a}.{b}.{c}' for a, b, c in rng.integers(0, 256, (256, 3))], dtype=object)
+    
+    df = pd.DataFrame({
+        'user_id': pd.array(users, dtype='Int64'),
+        'action': actions[codes],
+        'table_name': table,
+        'record_id': pd.array(record, dtype='Int64'),
+        'new_values': values,
+        'ip_address': ip_pool[rng.integers(0, len(ip_pool), n)],
+        'user_agent': np.array(USER_AGENTS, dtype=object)[rng.integers(0, len(USER_AGENTS), n)],
+        'timestamp': logged_before - seconds(rng.integers(0, 365 * 86_400, n)),
+    })
+    return to_csv(df, '%.1f'), n
+
+
+def copy_rows(cursor, table: str, columns: List[str], data: str) -> None:
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", io.StringIO(data)
+    )
+
+
+def drop_indexes(cursor, tables: List[str]) -> List[Tuple[str, str]]:
+    """Usuwa indeksy pomocnicze tabel; zwraca (nazwa, definicja) do odtworzenia"""
+    cursor.execute(SECONDARY_INDEXES, (tables,))
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+    return indexes
+
+
+def create_indexes(cursor, indexes: List[Tuple[str, str]]) -> None:
+    cursor.execute("SET maintenance_work_mem TO '512MB'")
+    for name, definition in indexes:
+        start = time.perf_counter()
+        cursor.execute(definition)
+        print(f"   ✓ {name} ({time.perf_counter() - start:.1f}s)")
+
+
+def report(label: str, rows: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    print(f"   {label}: {rows:,} wierszy | {rows / max(elapsed, 1e-9):,.0f} wierszy/s")
+
+
+def seed_bulk(
+    n_patients: int,
+    hours: int,
+    n_audit: int,
+    seed: int = 42,
+    chunk_size: int = CHUNK_SIZE,
+    workers: int = 1,
+    truncate: bool = False,
+    prediction_rate: float = 0.95,
+    model_version: str = "seed-bulk"
+) -> Dict[str, int]:
+    """
+    Generuje i ładuje dane przez COPY
+    
+    Args:
+        n_patients: Liczba pacjentów
+        hours: Godzin historii obłożenia (kończy się bieżącą godziną)
+        n_audit: Liczba wpisów audit logu
+        seed: Ziarno (wynik zależy od ziarna i chunk_size, nie od workers)
+        chunk_size: Wierszy w chunku
+        workers: Liczba procesów generujących
+        truncate: Czyści tabele (TRUNCATE ... RESTART IDENTITY CASCADE) przed ładowaniem
+        prediction_rate: Odsetek pacjentów z predykcją
+        model_version: model_version predykcji
+    
+    Returns:
+        Liczba załadowanych wierszy per tabela
+    """
+    now = datetime.now()
+    admitted_before = np.datetime64(now, 's')
+    counts = {table: 0 for table in TABLES}
+    
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SET synchronous_commit TO off")
+        
+        if truncate:
+            print("\n Czyszczenie tabel...")
+            cursor.execute(f"TRUNCATE {', '.join(TABLES + ROLLUP_TABLES)} RESTART IDENTITY CASCADE")
+        elif hours:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM department_occupancy)")
+            if cursor.fetchone()[0]:
+                raise SystemExit(" department_occupancy nie jest puste (unikalne timestampy) - użyj --truncate albo --hours 0")
+        
+        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM patients")
+        first_id = cursor.fetchone()[0]
+        cursor.execute("SELECT id FROM users ORDER BY id")
+        user_ids = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+        
+        pending = PENDING_PER_WORKER * workers
+        # Ostatni snapshot historii (bez historii - chwila ładowania)
+        ledger_until = np.datetime64(now, 'h') if hours else admitted_before
+        indexes = drop_indexes(cursor, TABLES)
+        conn.commit()
+        print(f"\n Usunięto {len(indexes)} indeksów pomocniczych na czas ładowania")
+        
+        try:
+            if n_patients:
+                print(f"\n Pacjenci i predykcje ({n_patients:,})...")
+                rows_per_case = sum(1 for names in templates_by_dominant_category().values() if names)
+                per_category = -(-n_patients // rows_per_case)
+                tasks = [
+                    (index, start, stop, per_category, rows_per_case, n_patients, first_id, seed,
+                     admitted_before, user_ids, prediction_rate, model_version, ledger_until)
+                    for index, start, stop in chunk_ranges(per_category, max(chunk_size // rows_per_case, 1))
+                ]
+                started = time.perf_counter()
+                for patients, predictions, events, n in run_chunks(patient_chunk, tasks, workers, max_pending=pending):
+                    copy_rows(cursor, "patients", PATIENT_COLUMNS, patients)
+                    copy_rows(cursor, "triage_predictions", PREDICTION_COLUMNS, predictions)
+                    copy_rows(cursor, "occupancy_events", EVENT_COLUMNS, events)
+                    conn.commit()
+                    counts["patients"] += n
+                report("patients", counts["patients"], started)
+                
+                cursor.execute("SELECT setval(pg_get_serial_sequence('patients', 'id'), MAX(id)) FROM patients")
+                cursor.execute("SELECT COUNT(*) FROM triage_predictions WHERE patient_id >= %s", (first_id,))
+                counts["triage_predictions"] = cursor.fetchone()[0]
+                cursor.execute("SELECT COUNT(*) FROM occupancy_events WHERE patient_id >= %s", (first_id,))
+                counts["occupancy_events"] = cursor.fetchone()[0]
+                conn.commit()
+            
+            if hours:
+                print(f"\n Historia obłożenia ({hours:,} godzin)...")
+                first = np.datetime64(now, 'h') - (hours - 1)
+                offset = int((first - np.datetime64(START_DATE, 'h')).astype(np.int64))
+                first_hour = offset % WEEK_HOURS
+                tasks = [
+                    (start, stop, first_hour, offset - first_hour, seed)
+                    for _, start, stop in chunk_ranges(hours, OCCUPANCY_CHUNK_HOURS)
+                ]
+                started = time.perf_counter()
+                for data, n in run_chunks(occupancy_chunk, tasks, workers, max_pending=pending):
+                    copy_rows(cursor, "department_occupancy", OCCUPANCY_COLUMNS, data)
+                    conn.commit()
+                    counts["department_occupancy"] += n
+                report("department_occupancy", counts["department_occupancy"], started)
+            
+            if n_audit:
+                print(f"\n Audit log ({n_audit:,})...")
+                tasks = [
+                    (index, start, stop, seed, first_id, counts["patients"], user_ids, admitted_before)
+                    for index, start, stop in chunk_ranges(n_audit, chunk_size)
+                ]
+                started = time.perf_counter()
+                for data, n in run_chunks(audit_chunk, tasks, workers, max_pending=pending):
+                    copy_rows(cursor, "audit_log", AUDIT_COLUMNS, data)
+                    conn.commit()
+                    counts["audit_log"] += n
+                report("audit_log", counts["audit_log"], started)
+        finally:
+            conn.rollback()
+            print(f"\n Budowanie indeksów ({len(indexes)})...")
+            create_indexes(cursor, indexes)
+            conn.commit()
+        
+        print("\n ANALYZE...")
+        for table in TABLES:
+            cursor.execute(f"ANALYZE {table}")
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return counts
+
+
+def refresh_aggregates() -> None:
+    """Agregaty liczone w transakcjach zapisu - po COPY przeliczane od zera"""
+    db = SessionLocal()
+    
+    try:
+        print("\n Przeliczanie agregatów...")
+        for table, count in AnalyticsService.backfill(db).items():
+            print(f"   ✓ {table}: {count:,} wierszy")
+        
+        since = db.query(func.min(DepartmentOccupancy.timestamp)).scalar()
+        if since is not None:
+            OccupancyTimeSeries.refresh(db, since=since)
+            db.commit()
+            print("   ✓ occupancy_hourly, occupancy_daily")
+            
+            # Agregaty kroczące (bufor 720 godzin) z nowej historii
+            rolling_feature_store.reset(db)
+            print("   ✓ rolling_feature_state")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Masowe zasilanie bazy przez COPY")
+    parser.add_argument("--patients", type=int, default=1_000_000, help="Liczba pacjentów")
+    parser.add_argument("--hours", type=int, default=24 * 365, help="Godzin historii obłożenia")
+    parser.add_argument("--audit", type=int, default=2_000_000, help="Wpisów audit logu")
+    parser.add_argument("--prediction-rate", type=float, default=0.95, help="Odsetek pacjentów z predykcją")
+    parser.add_argument("--model-version", default="seed-bulk", help="model_version predykcji")
+    parser.add_argument("--seed", type=int, default=42, help="Ziarno generatora")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Wierszy w chunku")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Liczba procesów")
+    parser.add_argument("--truncate", action="store_true", help="Wyczyść tabele przed ładowaniem")
+    parser.add_argument("--skip-aggregates", action="store_true", help="Nie przeliczaj agregatów")
+    args = parser.parse_args()
+    
+    print(f"\n{'='*70}")
+    print(f"MASOWE ZASILANIE BAZY (COPY)")
+    print(f"{'='*70}")
+    
+    started = time.perf_counter()
+    counts = seed_bulk(
+        args.patients, args.hours, args.audit, args.seed, args.chunk_size,
+        args.workers, args.truncate, args.prediction_rate, args.model_version
+    )
+    
+    if not args.skip_aggregates:
+        refresh_aggregates()
+    
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - started
+    print(f"\n{'='*70}")
+    for table, count in counts.items():
+        print(f"  {table:<24}{count:>14,}")
+    print(f"  {'razem':<24}{total:>14,} | {elapsed:.1f}s | {total / max(elapsed, 1e-9):,.0f} wierszy/s")
+    print(f"{'='*70}")
+
+
+if __name__ == "__main__":
+    main()
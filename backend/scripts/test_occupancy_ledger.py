@@ -0,0 +1,109 @@
+"""
+Spójność dziennika obłożenia: predykcja → wypis
+
+Tworzy pacjenta, wykonuje predykcję (TriageService.predict_triage)
+i wypisuje go (PatientService.change_patient_status). Po predykcji
+pacjent musi mieć w occupancy_events saldo +1, a oddział obłożenie
+większe o 1; po wypisie saldo 0 i obłożenie jak przed predykcją.
+Pacjent testowy jest na końcu usuwany.
+
+Wymaga bazy (init_db.py), użytkownika i modelu triażu. Przy innym
+ruchu na tym samym oddziale liczniki oddziału mogą się rozjechać -
+saldo pacjenta jest sprawdzane zawsze.
+
+Użycie:
+    python scripts/test_occupancy_ledger.py
+"""
+
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func
+
+from app.core.database import SessionLocal
+from app.models import User
+from app.schemas import PatientCreate
+from app.services import PatientService, TriageService
+from app.services.occupancy_ledger import OccupancyLedger, occupancy_events
+
+PATIENT = PatientCreate(
+    wiek=54,
+    plec="K",
+    tetno=Decimal("96"),
+    cisnienie_skurczowe=Decimal("150"),
+    cisnienie_rozkurczowe=Decimal("90"),
+    temperatura=Decimal("37.1"),
+    saturacja=Decimal("95"),
+    gcs=15,
+    bol=6,
+    czestotliwosc_oddechow=Decimal("18"),
+    czas_od_objawow_h=Decimal("3"),
+    szablon_przypadku="ból_brzucha_łagodny",
+    notatki="test_occupancy_ledger"
+)
+
+
+def patient_balance(db, patient_id: int) -> int:
+    """Suma delt dziennika dla pacjenta"""
+    return int(db.query(
+        func.coalesce(func.sum(occupancy_events.c.delta), 0)
+    ).filter(
+        occupancy_events.c.patient_id == patient_id
+    ).scalar())
+
+
+def department_count(db, department: str) -> int:
+    return OccupancyLedger.occupancy_at(db)[1][department]
+
+
+def check(label: str, actual: int, expected: int) -> bool:
+    ok = actual == expected
+    print(f"  {label}: {actual} (oczekiwano {expected}) - {'OK' if ok else 'BŁĄD'}")
+    return ok
+
+
+def test_predict_discharge():
+    print("TEST: DZIENNIK OBŁOŻENIA - PREDYKCJA → WYPIS")
+    print("="*70)
+    
+    db = SessionLocal()
+    patient_id = None
+    try:
+        user = db.query(User).first()
+        if user is None:
+            print("\nBrak użytkownika w bazie (create_admin.py / seed_db.py)")
+            return False
+        
+        patient_id = PatientService.create_patient(db, PATIENT, user.id).id
+        prediction = TriageService.predict_triage(db, patient_id, user.id)
+        department = prediction.przypisany_oddzial
+        
+        # Obłożenie "przed" = po predykcji minus przyjęcie tego pacjenta
+        admitted = department_count(db, department)
+        
+        print(f"\n  Pacjent: {patient_id}, oddział: {department}")
+        results = [check("Saldo po predykcji", patient_balance(db, patient_id), 1)]
+        
+        PatientService.change_patient_status(db, patient_id, 'wypisany', user.id)
+        
+        results.append(check("Saldo po wypisie", patient_balance(db, patient_id), 0))
+        results.append(check("Obłożenie oddziału po wypisie", department_count(db, department), admitted - 1))
+    finally:
+        if patient_id is not None:
+            db.rollback()
+            PatientService.delete_patient(db, patient_id, user.id)
+        db.close()
+    
+    if all(results):
+        print("\nDziennik: PASSED")
+        return True
+    
+    print("\nDziennik: FAILED")
+    return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_predict_discharge() else 1)
@@ -0,0 +1,93 @@
+"""
+Zgodność przyrostowych agregatów kroczących z implementacją pandas
+
+Porównuje RollingAggregates (push godzina po godzinie, z zapisem
+i odtworzeniem stanu w połowie) z create_aggregate_features z trenera
+LSTM (rolling 168/720, std z min_periods=1) oraz diff(24) z trenera
+alokacji.
+
+Użycie:
+    python scripts/test_rolling_features.py
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ml.rolling_features import DEPARTMENTS, STATIC_COLUMNS, RollingAggregates
+
+N_HOURS = 2000
+TOLERANCE = 1e-9
+
+
+def pandas_features(df):
+    """Agregaty jak w train_occupancy_forecasting.create_aggregate_features"""
+    df_feat = df.copy()
+    
+    for dept in DEPARTMENTS:
+        df_feat[f'{dept}_avg_7d'] = df[dept].rolling(window=168, min_periods=1).mean()
+        df_feat[f'{dept}_avg_30d'] = df[dept].rolling(window=720, min_periods=1).mean()
+        df_feat[f'{dept}_std_7d'] = df[dept].rolling(window=168, min_periods=1).std().fillna(0)
+        df_feat[f'{dept}_trend_24h'] = df[dept].diff(24).fillna(0)
+    
+    df_feat['hour'] = df['timestamp'].dt.hour
+    df_feat['day_of_week'] = df['timestamp'].dt.dayofweek
+    df_feat['month'] = df['timestamp'].dt.month
+    df_feat['day_of_month'] = df['timestamp'].dt.day
+    df_feat['is_weekend'] = (df_feat['day_of_week'] >= 5).astype(int)
+    df_feat['is_night'] = ((df_feat['hour'] < 6) | (df_feat['hour'] >= 22)).astype(int)
+    
+    return df_feat
+
+
+def test_parity():
+    print("TEST: PARYTET AGREGATÓW KROCZĄCYCH")
+    print("="*70)
+    
+    rng = np.random.default_rng(42)
+    start = datetime(2025, 1, 1)
+    
+    df = pd.DataFrame({
+        dept: rng.integers(0, 50, N_HOURS) for dept in DEPARTMENTS
+    })
+    df['timestamp'] = pd.date_range(start, periods=N_HOURS, freq='h')
+    
+    expected = pandas_features(df)
+    trend_columns = [f'{dept}_trend_24h' for dept in DEPARTMENTS]
+    
+    aggregates = RollingAggregates()
+    max_error = 0.0
+    
+    for i in range(N_HOURS):
+        hour = start + timedelta(hours=i)
+        aggregates.push(hour, {dept: int(df[dept].iloc[i]) for dept in DEPARTMENTS})
+        
+        # Zapis i odtworzenie stanu w trakcie (jak po restarcie serwera)
+        if i == N_HOURS // 2:
+            aggregates = RollingAggregates.from_state(aggregates.to_state(), aggregates.last_hour)
+        
+        features = aggregates.static_features(hour)
+        actual = np.array([features[c] for c in STATIC_COLUMNS + trend_columns], dtype=float)
+        reference = expected[STATIC_COLUMNS + trend_columns].iloc[i].to_numpy(dtype=float)
+        
+        max_error = max(max_error, float(np.abs(actual - reference).max()))
+    
+    print(f"\n  Godzin: {N_HOURS}")
+    print(f"  Kolumn: {len(STATIC_COLUMNS) + len(trend_columns)}")
+    print(f"  Maksymalny błąd: {max_error:.2e}")
+    
+    if max_error <= TOLERANCE:
+        print("\nParytet: PASSED")
+        return True
+    
+    print(f"\nParytet: FAILED (tolerancja {TOLERANCE})")
+    return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_parity() else 1)
@@ -7,6 +7,11 @@ import warnings
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'src'))
+from utils.datasets import load_dataset, save_dataset
 
 warnings.filterwarnings('ignore')
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -20,7 +25,7 @@ print("="*70)
 
 TRIAGE_DATA_PATH = '../../raw/triage_data.csv'
 
-df_triage = pd.read_csv(TRIAGE_DATA_PATH)
+df_triage = load_dataset(Path(TRIAGE_DATA_PATH))
 print(f"\n✓ Wczytano dane: {df_triage.shape[0]} wierszy × {df_triage.shape[1]} kolumn")
 print(f"  Początkowa liczba rekordów: {len(df_triage)}")
 
@@ -65,7 +70,7 @@ for col in categorical_cols:
             print(f"  {col}: wypełniono {missing_count} wartości wartością '{mode_val}'")
 
 
-df_model['płeć_encoded'] = df_model['płeć'].map({'M': 1, 'K': 0})
+df_model['płeć_encoded'] = df_model['płeć'].map({'M': 1, 'K': 0}).astype(float)
 
 # One-hot encoding dla oddziałów
 dept_dummies = pd.get_dummies(df_model['oddział_docelowy'], prefix='oddział')
@@ -127,12 +132,13 @@ for name, y_split in [("Treningowy", y_train), ("Walidacyjny", y_val), ("Testowy
 output_dir = '/home/dolfik/Projects/Clinic-data/data/processed/'
 os.makedirs(output_dir, exist_ok=True)
 
-df_model_features.to_csv(f'{output_dir}prepared_data.csv', index=False)
-X_train.to_csv(f'{output_dir}X_train.csv', index=False)
-X_val.to_csv(f'{output_dir}X_val.csv', index=False)
-X_test.to_csv(f'{output_dir}X_test.csv', index=False)
-y_train.to_csv(f'{output_dir}y_train.csv', index=False)
-y_val.to_csv(f'{output_dir}y_val.csv', index=False)
-y_test.to_csv(f'{output_dir}y_test.csv', index=False)
+# CSV (format wymiany) + typowany Parquet w data/cache/ dla skryptów treningowych
+save_dataset(df_model_features, Path(f'{output_dir}prepared_data.csv'))
+save_dataset(X_train, Path(f'{output_dir}X_train.csv'))
+save_dataset(X_val, Path(f'{output_dir}X_val.csv'))
+save_dataset(X_test, Path(f'{output_dir}X_test.csv'))
+save_dataset(y_train, Path(f'{output_dir}y_train.csv'))
+save_dataset(y_val, Path(f'{output_dir}y_val.csv'))
+save_dataset(y_test, Path(f'{output_dir}y_test.csv'))
 
 
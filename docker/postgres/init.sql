@@ -6,6 +6,9 @@ DROP TABLE IF EXISTS users CASCADE;
 
 DROP FUNCTION IF EXISTS update_updated_at_column() CASCADE;
 
+-- Wyszukiwanie trigramowe (ILIKE '%q%' z użyciem indeksu, similarity)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 CREATE TABLE users (
     id SERIAL PRIMARY KEY,
     email VARCHAR(255) UNIQUE NOT NULL,
@@ -24,6 +27,8 @@ CREATE TABLE users (
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_oauth ON users(oauth_provider, oauth_id);
 CREATE INDEX idx_users_role ON users(role);
+CREATE INDEX idx_users_username_trgm ON users USING gin (username gin_trgm_ops);
+CREATE INDEX idx_users_email_trgm ON users USING gin (email gin_trgm_ops);
 
 COMMENT ON TABLE users IS 'Użytkownicy systemu - personel medyczny';
 COMMENT ON COLUMN users.password_hash IS 'Zahashowane hasło (bcrypt) - NULL dla użytkowników OAuth';
@@ -60,9 +65,12 @@ CREATE TABLE patients (
 
 -- Indeksy
 CREATE INDEX idx_patients_data_przyjecia ON patients(data_przyjecia DESC);
+CREATE INDEX idx_patients_przyjecie_id ON patients(data_przyjecia DESC, id DESC);
 CREATE INDEX idx_patients_status ON patients(status);
 CREATE INDEX idx_patients_wprowadzony ON patients(wprowadzony_przez);
 CREATE INDEX idx_patients_szablon ON patients(szablon_przypadku);
+CREATE INDEX idx_patients_szablon_trgm ON patients USING gin (szablon_przypadku gin_trgm_ops);
+CREATE INDEX idx_patients_updated_id ON patients(updated_at, id);
 
 CREATE TABLE triage_predictions (
     id SERIAL PRIMARY KEY,
@@ -96,12 +104,37 @@ CREATE TABLE triage_predictions (
 CREATE INDEX idx_predictions_patient ON triage_predictions(patient_id);
 CREATE INDEX idx_predictions_kategoria ON triage_predictions(kategoria_triazu);
 CREATE INDEX idx_predictions_date ON triage_predictions(predicted_at DESC);
+CREATE INDEX idx_predictions_date_id ON triage_predictions(predicted_at, id);
 CREATE INDEX idx_predictions_oddzial ON triage_predictions(przypisany_oddzial);
 
 COMMENT ON TABLE triage_predictions IS 'Wyniki predykcji modelu ML dla pacjentów';
 COMMENT ON COLUMN triage_predictions.kategoria_triazu IS '1=Natychmiastowy, 2=Pilny, 3=Stabilny, 4=Niski priorytet, 5=Bardzo niski';
 COMMENT ON COLUMN triage_predictions.confidence_score IS 'Pewność predykcji (max prawdopodobieństwo)';
 
+-- Agregaty godzinowe triaży (aktualizowane w transakcji zapisu predykcji)
+CREATE TABLE triage_rollup_hourly (
+    bucket TIMESTAMP NOT NULL,
+    kategoria_triazu INTEGER NOT NULL,
+    przypisany_oddzial VARCHAR(50) NOT NULL,
+    model_version VARCHAR(50) NOT NULL,
+    
+    prediction_count INTEGER NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    confidence_count INTEGER NOT NULL DEFAULT 0,
+    triage_seconds_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    triage_seconds_count INTEGER NOT NULL DEFAULT 0,
+    
+    PRIMARY KEY (bucket, kategoria_triazu, przypisany_oddzial, model_version)
+);
+
+CREATE TABLE patient_rollup_hourly (
+    bucket TIMESTAMP PRIMARY KEY,
+    patient_count INTEGER NOT NULL DEFAULT 0
+);
+
+COMMENT ON TABLE triage_rollup_hourly IS 'Godzinowe sumy predykcji (kategoria, oddział, wersja modelu) dla statystyk triaży';
+COMMENT ON TABLE patient_rollup_hourly IS 'Liczba przyjętych pacjentów na godzinę';
+
 CREATE TABLE department_occupancy (
     id SERIAL PRIMARY KEY,
     timestamp TIMESTAMP NOT NULL,
@@ -126,6 +159,56 @@ CREATE INDEX idx_occupancy_timestamp ON department_occupancy(timestamp DESC);
 
 COMMENT ON TABLE department_occupancy IS 'Historia obłożenia oddziałów (do treningu modelu LSTM)';
 
+-- Dziennik zmian obłożenia (przyjęcia, wypisy, przeniesienia); department_occupancy służy jako snapshoty
+CREATE TABLE occupancy_events (
+    id BIGSERIAL PRIMARY KEY,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    department VARCHAR(50) NOT NULL,
+    delta INTEGER NOT NULL,
+    event_type VARCHAR(20) NOT NULL CHECK (event_type IN ('admission', 'discharge', 'transfer', 'correction')),
+    patient_id INTEGER REFERENCES patients(id) ON DELETE SET NULL
+);
+
+CREATE INDEX idx_occupancy_events_timestamp ON occupancy_events(timestamp);
+
+COMMENT ON TABLE occupancy_events IS 'Zdarzenia zmiany obłożenia; obłożenie = ostatni snapshot + suma delt';
+
+CREATE TABLE occupancy_hourly (
+    department VARCHAR(50) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    last_value INTEGER NOT NULL,
+    mean_value DOUBLE PRECISION NOT NULL,
+    min_value INTEGER NOT NULL,
+    max_value INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (department, bucket)
+);
+
+CREATE INDEX idx_occupancy_hourly_bucket ON occupancy_hourly(bucket);
+
+CREATE TABLE occupancy_daily (
+    department VARCHAR(50) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    last_value INTEGER NOT NULL,
+    mean_value DOUBLE PRECISION NOT NULL,
+    min_value INTEGER NOT NULL,
+    max_value INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (department, bucket)
+);
+
+COMMENT ON TABLE occupancy_hourly IS 'Obłożenie per oddział i godzina (agregat department_occupancy)';
+COMMENT ON TABLE occupancy_daily IS 'Obłożenie per oddział i dzień (agregat occupancy_hourly)';
+
+CREATE TABLE rolling_feature_state (
+    name VARCHAR(50) PRIMARY KEY,
+    last_hour TIMESTAMP,
+    state JSONB NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE rolling_feature_state IS 'Stan agregatów kroczących (bufor 720h i sumy per oddział) dla cech LSTM';
+
 CREATE TABLE audit_log (
     id SERIAL PRIMARY KEY,
     user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
@@ -142,6 +225,7 @@ CREATE TABLE audit_log (
 CREATE INDEX idx_audit_user ON audit_log(user_id, timestamp DESC);
 CREATE INDEX idx_audit_action ON audit_log(action, timestamp DESC);
 CREATE INDEX idx_audit_timestamp ON audit_log(timestamp DESC);
+CREATE INDEX idx_audit_timestamp_id ON audit_log(timestamp DESC, id DESC);
 
 
 -- Funkcja do automatycznej aktualizacji updated_at
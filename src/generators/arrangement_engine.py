@@ -0,0 +1,481 @@
+"""
+Wektorowy silnik generatorów danych arrangement (v2, v3)
+
+Zamiast pętli po godzinach (słowniki obłożenia, triage_data.iloc,
+json.dumps na rekord) dane są generowane blokami BLOCK_HOURS godzin:
+
+    - obłożenie: docelowy wskaźnik z tabeli (dzień tygodnia × godzina ×
+      oddział), szum i skoki losowane dla całego bloku naraz, a rekurencja
+      z persistence (x_t = p * x_{t-1} + u_t) liczona filtrem lfilter
+      - w C, dla wszystkich oddziałów jednocześnie
+    - pacjenci: indeksy losowane dla całego bloku, kolumny brane
+      z tablic triage (kody kategorii zamiast tekstu)
+    - decyzje (optymalny oddział, faktyczna decyzja, wynik): operacje
+      na macierzach (n_godzin, n_oddziałów)
+
+Każdy blok ma własny generator (chunk_rng(seed, blok + 1)), a stan
+obłożenia na początku bloku jest odtwarzany rozbiegiem przez poprzedni
+blok (0.9^1024 ≈ 1e-47 - wpływ wcześniejszego stanu znika), więc bloki
+można generować niezależnie, w dowolnych procesach, z tym samym wynikiem.
+
+W odróżnieniu od pętli stan rekurencji nie jest zaokrąglany co godzinę
+- zaokrąglenie i obcięcie do [0, 1.1 × pojemność] dotyczy wartości
+zapisywanej. Rozkład i autokorelacja obłożenia są zachowane.
+"""
+
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from config.constants import DEPARTMENTS, DEPARTMENT_CAPACITY
+from utils.datasets import (
+    OCCUPANCY_PREFIX, iter_batches, load_dataset, parquet_path, parts_directory, publish_parts, write_part
+)
+from utils.parallel import chunk_ranges, chunk_rng, run_chunks
+
+RAW_PATH = Path(__file__).parent.parent.parent / 'data' / 'raw'
+TRIAGE_CSV = RAW_PATH / 'triage_data.csv'
+OUTPUT = RAW_PATH / 'department_arrangement_data.csv'
+
+BLOCK_HOURS = 1024
+CHUNK_BLOCKS = 256
+PERSISTENCE = 0.90
+START_DATE = datetime(2024, 1, 1, 0, 0, 0)
+
+CAPACITY = np.array([DEPARTMENT_CAPACITY[dept] for dept in DEPARTMENTS], dtype=np.float64)
+N_DEPARTMENTS = len(DEPARTMENTS)
+
+OUTCOMES = [
+    "Optymalna decyzja",
+    "Suboptymalne umieszczenie pacjenta wysokiego ryzyka",
+    "Przeciążenie oddziału",
+    "Akceptowalne rozwiązanie alternatywne",
+]
+
+# Prawdopodobieństwo trzymania się optymalnej decyzji wg kategorii triażu (indeks = kategoria)
+FOLLOW_OPTIMAL = {
+    'v2': np.array([0.0, 0.95, 0.90, 0.85, 0.80, 0.75]),
+    'v3': np.array([0.0, 0.98, 0.95, 0.90, 0.85, 0.80]),
+}
+
+# Alternatywy dla przepełnionego oddziału docelowego (v2)
+ALTERNATIVES = {
+    "SOR": ["Interna", "Chirurgia"],
+    "Interna": ["SOR", "Kardiologia"],
+    "Kardiologia": ["Interna", "SOR"],
+    "Chirurgia": ["SOR", "Ortopedia"],
+    "Ortopedia": ["Chirurgia", "SOR"],
+    "Neurologia": ["Interna", "SOR"],
+    "Pediatria": ["SOR", "Interna"],
+    "Ginekologia": ["Chirurgia", "SOR"]
+}
+
+# Zgodność medyczna szablonu z oddziałem (v3); szablony spoza słownika - tylko SOR
+SZABLON_TO_DEPTS = {
+    'ból w klatce piersiowej': ['Kardiologia', 'SOR', 'Interna'],
+    'zaostrzenie astmy': ['Interna', 'SOR'],
+    'uraz głowy': ['Neurologia', 'SOR', 'Chirurgia'],
+    'złamanie kończyny': ['Ortopedia', 'SOR', 'Chirurgia'],
+    'udar': ['Neurologia', 'SOR'],
+    'zaburzenia rytmu serca': ['Kardiologia', 'SOR', 'Interna'],
+    'zapalenie płuc': ['Interna', 'SOR'],
+    'zapalenie wyrostka': ['Chirurgia', 'SOR'],
+    'silne krwawienie': ['Chirurgia', 'SOR'],
+    'krwawienie z przewodu pokarmowego': ['Chirurgia', 'Interna', 'SOR'],
+    'napad padaczkowy': ['Neurologia', 'SOR'],
+    'omdlenie': ['Kardiologia', 'Neurologia', 'SOR', 'Interna'],
+    'ból brzucha': ['Chirurgia', 'Interna', 'Ginekologia', 'SOR'],
+    'reakcja alergiczna': ['Interna', 'SOR'],
+    'migrena': ['Neurologia', 'SOR'],
+    'zatrucie pokarmowe': ['Interna', 'SOR'],
+    'infekcja układu moczowego': ['Interna', 'SOR', 'Ginekologia'],
+    'zapalenie opon mózgowych': ['Neurologia', 'SOR'],
+    'zaostrzenie POChP': ['Interna', 'SOR'],
+    'uraz wielonarządowy': ['Chirurgia', 'SOR']
+}
+
+PATIENT_COLUMNS = [
+    'id_przypadku', 'wiek', 'płeć', 'kategoria_triażu', 'szablon_przypadku', 'oddział_docelowy'
+]
+
+# Pacjenci wczytani w procesie (load_patients - initializer puli)
+_PATIENTS: Optional[Dict[str, object]] = None
+
+
+def target_rate_table() -> np.ndarray:
+    """
+    Docelowy wskaźnik obłożenia (0-1) dla każdej kombinacji czasu
+    
+    Returns:
+        Tablica (7 dni tygodnia, 24 godziny, n_oddziałów)
+    """
+    day_of_week = np.arange(7)[:, None, None]
+    hour = np.arange(24)[None, :, None]
+    is_sor = (np.array(DEPARTMENTS) == "SOR")[None, None, :]
+    dept = np.array(DEPARTMENTS)[None, None, :]
+    
+    is_weekend = day_of_week >= 5
+    is_night = (hour < 6) | (hour >= 22)
+    is_peak_hours = (hour >= 8) & (hour <= 20)
+    
+    sor_rate = np.select(
+        [(hour >= 18) & (hour <= 23), hour < 6, (hour >= 6) & (hour < 10)],
+        [0.85, 0.55, 0.60],
+        0.65
+    )
+    other_rate = np.where(is_night, 0.35, np.where(is_peak_hours, 0.65, 0.50))
+    rate = np.where(is_sor, sor_rate, other_rate) * np.ones((7, 24, N_DEPARTMENTS))
+    
+    weekend_factor = np.where(
+        np.isin(dept, ["Chirurgia", "Ortopedia", "Ginekologia"]), 0.60,
+        np.where(is_sor, 1.0, 0.80)
+    )
+    rate = np.where(is_weekend, rate * weekend_factor, rate)
+    rate = np.where((day_of_week == 0) & ~is_sor, np.minimum(0.90, rate + 0.15), rate)
+    rate = np.where((day_of_week == 4) & (hour >= 14), rate * 0.85, rate)
+    
+    return np.clip(rate, 0.2, 0.95)
+
+
+TARGET_RATE = target_rate_table()
+
+
+def block_times(block: int, n_hours: int = BLOCK_HOURS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Znaczniki czasu bloku oraz (dzień tygodnia, godzina) dla każdej godziny"""
+    start = np.datetime64(START_DATE, 'h') + block * BLOCK_HOURS
+    timestamps = start + np.arange(n_hours)
+    hours = (timestamps - timestamps.astype('datetime64[D]')).astype(np.int64)
+    # 1970-01-01 był czwartkiem (weekday 3)
+    day_of_week = (timestamps.astype('datetime64[D]').astype(np.int64) + 3) % 7
+    return timestamps.astype('datetime64[ns]'), day_of_week, hours
+
+
+def occupancy_drive(rng: np.random.Generator, block: int) -> np.ndarray:
+    """
+    Wymuszenie rekurencji obłożenia u_t dla wszystkich godzin bloku
+    
+    u_t = (1 - p) * 0.8 * pojemność * wskaźnik_docelowy + szum + skok
+    (szum N(0, 2% pojemności), skok ±1-2 z prawdopodobieństwem 1%).
+    Losowane jako pierwsze z generatora bloku - rozbieg następnego
+    bloku odtwarza je bez losowania reszty.
+    """
+    _, day_of_week, hours = block_times(block)
+    target = CAPACITY * TARGET_RATE[day_of_week, hours]
+    noise = rng.normal(0.0, CAPACITY * 0.02, (BLOCK_HOURS, N_DEPARTMENTS))
+    
+    spike_mask = rng.random((BLOCK_HOURS, N_DEPARTMENTS)) < 0.01
+    spike = rng.choice([-1, 1], (BLOCK_HOURS, N_DEPARTMENTS)) * rng.integers(1, 3, (BLOCK_HOURS, N_DEPARTMENTS))
+    
+    return (1 - PERSISTENCE) * 0.80 * target + noise + spike * spike_mask
+
+
+def initial_occupancy(seed: int) -> np.ndarray:
+    """Obłożenie startowe wokół wskaźnika docelowego (środa 14:00)"""
+    rng = chunk_rng(seed, 0)
+    initial = np.floor(CAPACITY * TARGET_RATE[2, 14] + rng.normal(0.0, CAPACITY * 0.1))
+    return np.clip(initial, 0, CAPACITY)
+
+
+def simulate_occupancy(seed: int, block: int) -> Tuple[np.random.Generator, np.ndarray]:
+    """
+    Obłożenie bloku (BLOCK_HOURS, n_oddziałów) jako int16
+    
+    Returns:
+        rng: Generator bloku (po losowaniu wymuszenia - do dalszych losowań)
+        occupancy: Obłożenie zapisywane w danych
+    """
+    if block == 0:
+        state = initial_occupancy(seed)
+    else:
+        # Rozbieg przez poprzedni blok: stan startowy rozbiegu to średnia
+        # stacjonarna (albo prawdziwy stan początkowy dla bloku 0)
+        previous = block - 1
+        if previous == 0:
+            start = initial_occupancy(seed)
+        else:
+            _, day_of_week, hours = block_times(previous)
+            start = 0.80 * CAPACITY * TARGET_RATE[day_of_week[0], hours[0]]
+        warmup = occupancy_drive(chunk_rng(seed, previous + 1), previous)
+        _, zf = lfilter([1.0], [1.0, -PERSISTENCE], warmup, axis=0, zi=(PERSISTENCE * start)[None, :])
+        state = zf[0] / PERSISTENCE
+    
+    rng = chunk_rng(seed, block + 1)
+    drive = occupancy_drive(rng, block)
+    level, _ = lfilter([1.0], [1.0, -PERSISTENCE], drive, axis=0, zi=(PERSISTENCE * state)[None, :])
+    
+    occupancy = np.clip(np.rint(level), 0, CAPACITY * 1.1).astype(np.int16)
+    return rng, occupancy
+
+
+def occupancy_range(seed: int, first_hour: int, n_hours: int) -> np.ndarray:
+    """
+    Obłożenie godzin [first_hour, first_hour + n_hours) licząc od START_DATE
+    
+    Sklejane z bloków simulate_occupancy - ten sam wynik co w zbiorach
+    arrangement o tym samym ziarnie.
+    
+    Returns:
+        Tablica (n_hours, n_oddziałów) int16
+    """
+    first_block = first_hour // BLOCK_HOURS
+    last_block = (first_hour + n_hours - 1) // BLOCK_HOURS
+    blocks = [simulate_occupancy(seed, block)[1] for block in range(first_block, last_block + 1)]
+    offset = first_hour - first_block * BLOCK_HOURS
+    return np.concatenate(blocks)[offset:offset + n_hours]
+
+
+def load_patients(triage_csv: Path) -> None:
+    """
+    Wczytuje pacjentów (tylko potrzebne kolumny) do pamięci procesu
+    
+    Tekstowe kolumny są trzymane jako kody kategorii; oddział docelowy
+    jako indeks w DEPARTMENTS.
+    """
+    global _PATIENTS
+    
+    df = load_dataset(triage_csv, columns=PATIENT_COLUMNS)
+    templates = df['szablon_przypadku'].astype('category')
+    sexes = df['płeć'].astype('category')
+    compat = np.array([
+        [dept in SZABLON_TO_DEPTS.get(name, ['SOR']) for dept in DEPARTMENTS]
+        for name in templates.cat.categories
+    ], dtype=bool).reshape(-1, N_DEPARTMENTS)
+    
+    _PATIENTS = {
+        'id': df['id_przypadku'].to_numpy(dtype=object),
+        'age': df['wiek'].to_numpy(),
+        'sex': sexes.cat.codes.to_numpy(),
+        'sexes': list(sexes.cat.categories),
+        'category': df['kategoria_triażu'].to_numpy().astype(np.int8),
+        'template': templates.cat.codes.to_numpy(),
+        'templates': list(templates.cat.categories),
+        'target': pd.Index(DEPARTMENTS).get_indexer(df['oddział_docelowy'].astype(str)),
+        'compat': compat,
+    }
+
+
+def optimal_department_v2(rng, occupancy, target, category, template) -> np.ndarray:
+    """v2: przepełniony oddział docelowy (>= 80%) -> pierwsza wolna alternatywa"""
+    rows = np.arange(len(target))
+    threshold = (0.8 * CAPACITY).astype(np.int64)
+    alternatives = np.array([[DEPARTMENTS.index(alt) for alt in ALTERNATIVES[dept]] for dept in DEPARTMENTS])
+    
+    crowded = occupancy[rows, target] >= threshold[target]
+    first, second = alternatives[target, 0], alternatives[target, 1]
+    first_free = occupancy[rows, first] < threshold[first]
+    second_free = occupancy[rows, second] < threshold[second]
+    
+    optimal = np.select(
+        [crowded & first_free, crowded & second_free],
+        [first, second],
+        target
+    )
+    return np.where(category <= 2, target, optimal)
+
+
+def optimal_department_v3(rng, occupancy, target, category, template) -> np.ndarray:
+    """v3: scoring oddziałów (zgodność medyczna, obłożenie, bonus dla docelowego)"""
+    rows = np.arange(len(target))
+    rate = occupancy / CAPACITY
+    compat = _PATIENTS['compat'][template]
+    
+    scores = (
+        100.0
+        - 80.0 * ~compat
+        - rate * 50
+        - np.maximum(rate - 0.75, 0) * 150
+        - 70.0 * (rate > 0.90)
+    )
+    scores[rows, target] += 10
+    
+    best = scores.argmax(axis=1)
+    best_score = scores[rows, best]
+    target_score = scores[rows, target]
+    
+    stay = (target_score > -40) & (rng.random(len(target)) < 0.35)
+    optimal = np.where(stay | (best_score <= target_score + 12), target, best)
+    return np.where(category <= 2, target, optimal)
+
+
+POLICIES = {
+    'v2': optimal_department_v2,
+    'v3': optimal_department_v3,
+}
+
+
+def generate_block(seed: int, block: int, n_hours: int, policy: str) -> pd.DataFrame:
+    """
+    Rekordy arrangement dla jednego bloku godzin (jeden rekord na godzinę)
+    
+    Args:
+        seed: Ziarno zbioru
+        block: Numer bloku (godziny block * BLOCK_HOURS ...)
+        n_hours: Liczba godzin do zapisania (ostatni blok może być krótszy)
+        policy: Wersja reguł decyzji ('v2' albo 'v3')
+    
+    Returns:
+        DataFrame w układzie department_arrangement_data (obłożenie jako occ_*)
+    """
+    rng, occupancy = simulate_occupancy(seed, block)
+    occupancy = occupancy[:n_hours]
+    timestamps, _, _ = block_times(block, n_hours)
+    rows = np.arange(n_hours)
+    
+    patients = rng.integers(0, len(_PATIENTS['id']), n_hours)
+    target = _PATIENTS['target'][patients]
+    category = _PATIENTS['category'][patients]
+    template = _PATIENTS['template'][patients]
+    
+    optimal = POLICIES[policy](rng, occupancy, target, category, template)
+    
+    follow = rng.random(n_hours) < FOLLOW_OPTIMAL[policy][category]
+    other = (optimal + rng.integers(1, N_DEPARTMENTS, n_hours)) % N_DEPARTMENTS
+    actual = np.where(follow, optimal, other)
+    
+    outcome = np.select(
+        [
+            actual == optimal,
+            category <= 2,
+            occupancy[rows, actual] > 0.9 * CAPACITY[actual],
+        ],
+        [0, 1, 2],
+        3
+    )
+    
+    scenario_numbers = block * BLOCK_HOURS + rows
+    df = pd.DataFrame({
+        'id_scenariusza': np.char.mod('%08x', scenario_numbers).astype(object),
+        'timestamp': timestamps,
+    })
+    for k, dept in enumerate(DEPARTMENTS):
+        df[f'{OCCUPANCY_PREFIX}{dept}'] = occupancy[:, k]
+    
+    df['id_pacjenta'] = _PATIENTS['id'][patients]
+    df['wiek_pacjenta'] = _PATIENTS['age'][patients].astype(np.int16)
+    df['płeć_pacjenta'] = pd.Categorical.from_codes(_PATIENTS['sex'][patients], _PATIENTS['sexes'])
+    df['kategoria_triażu'] = category
+    df['szablon_przypadku'] = pd.Categorical.from_codes(template, _PATIENTS['templates'])
+    df['oddział_docelowy'] = pd.Categorical.from_codes(target, DEPARTMENTS)
+    df['optymalne_przypisanie'] = pd.Categorical.from_codes(optimal, DEPARTMENTS)
+    df['faktyczne_przypisanie'] = pd.Categorical.from_codes(actual, DEPARTMENTS)
+    df['wynik'] = pd.Categorical.from_codes(outcome, OUTCOMES)
+    
+    return df
+
+
+def generate_chunk(
+    index: int,
+    first_block: int,
+    last_block: int,
+    num_records: int,
+    seed: int,
+    policy: str,
+    directory: Path
+) -> int:
+    """
+    Chunk bloków [first_block, last_block) zapisany jako jedna część Parquet
+    
+    Returns:
+        Liczba wygenerowanych rekordów
+    """
+    frames = []
+    for block in range(first_block, last_block):
+        n_hours = min(BLOCK_HOURS, num_records - block * BLOCK_HOURS)
+        frames.append(generate_block(seed, block, n_hours, policy))
+    
+    df = pd.concat(frames, ignore_index=True)
+    write_part(df, directory, index)
+    return len(df)
+
+
+def generate_arrangement_data(
+    num_records: int,
+    policy: str,
+    triage_csv: Path = TRIAGE_CSV,
+    output: Path = OUTPUT,
+    seed: int = 42,
+    chunk_blocks: int = CHUNK_BLOCKS,
+    workers: int = 1
+) -> Path:
+    """
+    Generuje zbiór arrangement jako części Parquet
+    
+    Args:
+        num_records: Liczba rekordów (godzin)
+        policy: Wersja reguł decyzji ('v2' albo 'v3')
+        triage_csv: Zbiór pacjentów
+        output: Plik CSV zbioru (Parquet trafia do parquet_path(output))
+        seed: Ziarno (wynik nie zależy od chunk_blocks ani workers)
+        chunk_blocks: Bloków po BLOCK_HOURS godzin w jednym chunku
+        workers: Liczba procesów
+    
+    Returns:
+        Ścieżka zbioru Parquet
+    """
+    path = parquet_path(output)
+    directory = parts_directory(path)
+    n_blocks = -(-num_records // BLOCK_HOURS)
+    
+    tasks = [
+        (index, start, stop, num_records, seed, policy, directory)
+        for index, start, stop in chunk_ranges(n_blocks, chunk_blocks)
+    ]
+    
+    started = time.perf_counter()
+    rows = 0
+    for done, chunk_rows in enumerate(
+        run_chunks(generate_chunk, tasks, workers, initializer=load_patients, initargs=(triage_csv,)),
+        start=1
+    ):
+        rows += chunk_rows
+        seconds = time.perf_counter() - started
+        print(f"  Chunk {done}/{len(tasks)} | {rows:,} rekordów | {rows / seconds:,.0f} rekordów/s")
+    
+    return publish_parts(directory, path)
+
+
+def summarize(output: Path = OUTPUT) -> Dict[str, object]:
+    """
+    Statystyki walidacyjne zbioru liczone porcjami (bez wczytywania całości)
+    
+    Returns:
+        Słownik: rows, reallocations (optymalne != docelowe), occupancy_mean
+        i occupancy_std (Series po oddziałach), outcomes i optimal (value_counts)
+    """
+    occ_columns = [f'{OCCUPANCY_PREFIX}{dept}' for dept in DEPARTMENTS]
+    rows = 0
+    reallocations = 0
+    occ_sum = np.zeros(N_DEPARTMENTS)
+    occ_sumsq = np.zeros(N_DEPARTMENTS)
+    outcomes = pd.Series(dtype=np.int64)
+    optimal = pd.Series(dtype=np.int64)
+    
+    for batch in iter_batches(
+        output, columns=occ_columns + ['oddział_docelowy', 'optymalne_przypisanie', 'wynik']
+    ):
+        occupancy = batch[occ_columns].to_numpy(dtype=np.float64)
+        rows += len(batch)
+        occ_sum += occupancy.sum(axis=0)
+        occ_sumsq += (occupancy ** 2).sum(axis=0)
+        reallocations += int((
+            batch['optymalne_przypisanie'].astype(str) != batch['oddział_docelowy'].astype(str)
+        ).sum())
+        outcomes = outcomes.add(batch['wynik'].value_counts(), fill_value=0)
+        optimal = optimal.add(batch['optymalne_przypisanie'].value_counts(), fill_value=0)
+    
+    mean = occ_sum / max(rows, 1)
+    std = np.sqrt(np.maximum(occ_sumsq / max(rows, 1) - mean ** 2, 0))
+    
+    return {
+        'rows': rows,
+        'reallocations': reallocations,
+        'occupancy_mean': pd.Series(mean, index=DEPARTMENTS),
+        'occupancy_std': pd.Series(std, index=DEPARTMENTS),
+        'outcomes': outcomes.astype(np.int64).sort_values(ascending=False),
+        'optimal': optimal.astype(np.int64).sort_values(ascending=False),
+    }
@@ -1,11 +1,17 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import pandas as pd
 import random
 from datetime import datetime, timedelta
 import uuid
 import json
 
+from utils.datasets import load_dataset
+
 try:
-    triage_data = pd.read_csv('data/raw/triage_data.csv')
+    triage_data = load_dataset(Path('data/raw/triage_data.csv'))
 except Exception as e:
     print(f"Error loading triage data: {e}")
     triage_data = None
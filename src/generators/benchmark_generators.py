@@ -0,0 +1,101 @@
+"""
+Benchmark generatorów: pętle per rekord vs silniki wektorowe
+
+Porównuje przepustowość (rekordów/s) dotychczasowego generate_case
+(słownik na przypadek) z generate_template_cases oraz pętli obłożenia
+godzina po godzinie (update_occupancy_with_persistence) z
+simulate_occupancy, w jednym procesie. Skalowanie na procesy daje
+dodatkowo ~liczbę rdzeni (chunki są niezależne).
+
+Użycie:
+    python src/generators/benchmark_generators.py [--cases 200000] [--hours 100000]
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from config.constants import DEPARTMENT_CAPACITY, DEPARTMENTS, MEDICAL_CASE_TEMPLATES
+from generators.arrangement_engine import BLOCK_HOURS, TARGET_RATE, simulate_occupancy
+from generators.triage_generator import generate_template_cases
+from utils.parallel import chunk_rng
+
+
+def legacy_case(template_name, template):
+    """Dotychczasowy generate_case (triage_generator.py)"""
+    case = {
+        'id_przypadku': f'{random.getrandbits(32):08x}',
+        'szablon_przypadku': template_name,
+        'data_przyjęcia': datetime.now() - timedelta(days=np.random.randint(0, 365))
+    }
+    case['wiek'] = np.random.randint(*template['demografia']['wiek'])
+    case['płeć'] = 'M' if np.random.random() < template['demografia']['płeć_M'] else 'K'
+    for param, (min_val, max_val) in template['parametry'].items():
+        case[param] = round(np.random.uniform(min_val, max_val), 1)
+    case['kategoria_triażu'] = np.random.choice([1, 2, 3, 4, 5], p=template['prawdopodobieństwa_triażu'])
+    case['oddział_docelowy'] = np.random.choice(template['oddział_docelowy'])
+    return case
+
+
+def legacy_occupancy(hours):
+    """Dotychczasowa pętla update_occupancy_with_persistence (v2/v3)"""
+    current = {dept: int(capacity * 0.6) for dept, capacity in DEPARTMENT_CAPACITY.items()}
+    start = datetime(2024, 1, 1)
+    for i in range(hours):
+        now = start + timedelta(hours=i)
+        new = {}
+        for dept, capacity in DEPARTMENT_CAPACITY.items():
+            target = capacity * TARGET_RATE[now.weekday(), now.hour, DEPARTMENTS.index(dept)]
+            value = 0.9 * current[dept] + 0.1 * 0.8 * target + np.random.normal(0, capacity * 0.02)
+            if random.random() < 0.01:
+                value += random.choice([-1, 1]) * random.randint(1, 2)
+            new[dept] = int(max(0, min(capacity * 1.1, round(value))))
+        current = new
+
+
+def throughput(fn, rows):
+    start = time.perf_counter()
+    fn()
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generatorów danych")
+    parser.add_argument("--cases", type=int, default=200_000, help="Przypadków triażu (wektorowo)")
+    parser.add_argument("--hours", type=int, default=100_000, help="Godzin obłożenia (wektorowo)")
+    args = parser.parse_args()
+    
+    name, template = next(iter(MEDICAL_CASE_TEMPLATES.items()))
+    legacy_cases = max(args.cases // 100, 1)
+    legacy_hours = max(args.hours // 100, 1)
+    n_blocks = -(-args.hours // BLOCK_HOURS)
+    
+    rows = [
+        ("triaż: generate_case", throughput(lambda: [legacy_case(name, template) for _ in range(legacy_cases)], legacy_cases)),
+        ("triaż: wektorowo", throughput(
+            lambda: generate_template_cases(chunk_rng(42, 0), name, np.arange(args.cases), np.datetime64('2025-01-01')),
+            args.cases
+        )),
+        ("obłożenie: pętla", throughput(lambda: legacy_occupancy(legacy_hours), legacy_hours)),
+        ("obłożenie: lfilter", throughput(
+            lambda: [simulate_occupancy(42, block) for block in range(n_blocks)], n_blocks * BLOCK_HOURS
+        )),
+    ]
+    
+    print("\n" + "=" * 52)
+    print(f"{'Generator':<30}{'Rekordów/s':>22}")
+    print("-" * 52)
+    for label, per_second in rows:
+        print(f"{label:<30}{per_second:>22,.0f}")
+    print("=" * 52)
+
+
+if __name__ == "__main__":
+    main()
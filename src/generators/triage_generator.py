@@ -1,69 +1,227 @@
+"""
+Generator syntetycznych przypadków triażu (wektorowy, równoległy)
+
+Przypadki są losowane blokami per szablon - każdy parametr to jedno
+wywołanie generatora NumPy dla wszystkich przypadków szablonu w chunku,
+bez słownika na przypadek. Chunki (zakresy indeksów przypadków w każdej
+kategorii) są generowane równolegle w procesach, z ziarnem per chunk,
+i zapisywane bezpośrednio jako części Parquet zbioru triage_data
+(data/cache/triage_data.parquet/). --csv dodatkowo eksportuje CSV.
+
+Użycie:
+    python src/generators/triage_generator.py [--per-category 4000] [--workers 8] [--csv]
+"""
+
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import time
+import argparse
+from datetime import datetime
+from typing import Dict, List
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import uuid
-from config.constants import MEDICAL_CASE_TEMPLATES
+from config.constants import DEPARTMENTS, MEDICAL_CASE_TEMPLATES
+
+from utils.datasets import (
+    VITALS, export_csv, load_dataset, parquet_path, parts_directory, publish_parts, write_part
+)
+from utils.parallel import chunk_ranges, chunk_rng, default_workers, run_chunks
 
-def generate_case(template_name, template):
-    """Generuje jeden przypadek medyczny"""
+OUTPUT = Path(__file__).parent.parent.parent / 'data' / 'raw' / 'triage_data.csv'
+
+TEMPLATE_NAMES = list(MEDICAL_CASE_TEMPLATES)
+SEXES = ['K', 'M']
+CATEGORIES = [1, 2, 3, 4, 5]
+
+CHUNK_SIZE = 250_000
+
+
+def templates_by_dominant_category() -> Dict[int, List[str]]:
+    """Szablony pogrupowane po kategorii triażu o największym prawdopodobieństwie"""
+    by_category = {cat: [] for cat in CATEGORIES}
+    for name, template in MEDICAL_CASE_TEMPLATES.items():
+        probs = template['prawdopodobieństwa_triażu']
+        by_category[probs.index(max(probs)) + 1].append(name)
+    return by_category
+
+
+def generate_template_cases(
+    rng: np.random.Generator,
+    name: str,
+    case_numbers: np.ndarray,
+    admitted_before: np.datetime64
+) -> pd.DataFrame:
+    """
+    Przypadki jednego szablonu - każda kolumna losowana jednym wywołaniem
+    
+    Args:
+        rng: Generator chunku
+        name: Nazwa szablonu
+        case_numbers: Globalne numery przypadków (z nich id_przypadku)
+        admitted_before: Najpóźniejsza data przyjęcia
+    
+    Returns:
+        DataFrame w układzie triage_data (typy jak TRIAGE_SCHEMA)
+    """
+    template = MEDICAL_CASE_TEMPLATES[name]
+    n = len(case_numbers)
+    
+    days = rng.integers(0, 365, n).astype('timedelta64[D]')
+    sex_codes = (rng.random(n) < template['demografia']['płeć_M']).astype(np.int8)
+    
     case = {
-        'id_przypadku': str(uuid.uuid4())[:8],
-        'szablon_przypadku': template_name,
-        'data_przyjęcia': datetime.now() - timedelta(days=np.random.randint(0, 365))
+        'id_przypadku': np.char.mod('%08x', case_numbers).astype(object),
+        'szablon_przypadku': pd.Categorical.from_codes(
+            np.full(n, TEMPLATE_NAMES.index(name), dtype=np.int16), TEMPLATE_NAMES
+        ),
+        'data_przyjęcia': (admitted_before - days).astype('datetime64[ns]'),
+        'wiek': rng.integers(*template['demografia']['wiek'], n).astype(np.int16),
+        'płeć': pd.Categorical.from_codes(sex_codes, SEXES),
     }
     
-    case['wiek'] = np.random.randint(*template['demografia']['wiek'])
-    case['płeć'] = 'M' if np.random.random() < template['demografia']['płeć_M'] else 'K'
+    for param in VITALS:
+        min_val, max_val = template['parametry'][param]
+        case[param] = rng.uniform(min_val, max_val, n).round(1).astype(np.float32)
+    
+    case['kategoria_triażu'] = (
+        rng.choice(len(CATEGORIES), n, p=template['prawdopodobieństwa_triażu']) + 1
+    ).astype(np.int8)
+    
+    department_codes = np.array([DEPARTMENTS.index(dept) for dept in template['oddział_docelowy']])
+    case['oddział_docelowy'] = pd.Categorical.from_codes(
+        department_codes[rng.integers(0, len(department_codes), n)], DEPARTMENTS
+    )
     
-    for param, (min_val, max_val) in template['parametry'].items():
-        case[param] = round(np.random.uniform(min_val, max_val), 1)
+    return pd.DataFrame(case)
+
+
+def generate_cases(
+    rng: np.random.Generator,
+    start: int,
+    stop: int,
+    per_category: int,
+    admitted_before: np.datetime64
+) -> pd.DataFrame:
+    """
+    Przypadki o numerach [start, stop) w każdej kategorii dominującej
+    
+    W kategorii z k szablonami przypadek i ma szablon i % k (jak
+    dotychczasowa pętla), więc szablon j dostaje numery j, j + k, ...
     
-    probs = template['prawdopodobieństwa_triażu']
-    case['kategoria_triażu'] = np.random.choice([1,2,3,4,5], p=probs)
+    Returns:
+        DataFrame w układzie triage_data, kolejno kategoriami i szablonami
+    """
+    frames = []
     
-    case['oddział_docelowy'] = np.random.choice(template['oddział_docelowy'])
+    for cat, names in templates_by_dominant_category().items():
+        for j, name in enumerate(names):
+            first = start + (j - start) % len(names)
+            numbers = np.arange(first, stop, len(names))
+            if len(numbers):
+                frames.append(generate_template_cases(
+                    rng, name, (cat - 1) * per_category + numbers, admitted_before
+                ))
     
-    return case
+    return pd.concat(frames, ignore_index=True)
 
-if __name__ == '__main__':
+
+def generate_chunk(
+    index: int,
+    start: int,
+    stop: int,
+    per_category: int,
+    seed: int,
+    admitted_before: np.datetime64,
+    directory: Path
+) -> int:
+    """
+    Chunk: generate_cases zapisane jako część Parquet
     
-    templates_by_dominant = {1: [], 2: [], 3: [], 4: [], 5: []}
+    Returns:
+        Liczba wygenerowanych przypadków
+    """
+    df = generate_cases(chunk_rng(seed, index), start, stop, per_category, admitted_before)
+    write_part(df, directory, index)
+    return len(df)
+
+
+def generate_triage_data(
+    per_category: int,
+    output: Path = OUTPUT,
+    seed: int = 42,
+    chunk_size: int = CHUNK_SIZE,
+    workers: int = 1
+) -> Path:
+    """
+    Generuje zbiór triage_data jako części Parquet
     
-    for name, template in MEDICAL_CASE_TEMPLATES.items():
-        probs = template['prawdopodobieństwa_triażu']
-        dominant_cat = probs.index(max(probs)) + 1  
-        templates_by_dominant[dominant_cat].append((name, template))
+    Args:
+        per_category: Przypadków na kategorię dominującą
+        output: Plik CSV zbioru (Parquet trafia do parquet_path(output))
+        seed: Ziarno (wynik zależy od ziarna i chunk_size, nie od workers)
+        chunk_size: Przypadków na kategorię w jednym chunku
+        workers: Liczba procesów
     
-    print("\nSzablony według dominującej kategorii:")
-    for cat, templates in templates_by_dominant.items():
-        print(f"  Kategoria {cat}: {len(templates)} szablonów")
-        for name, _ in templates:
-            print(f"    - {name}")
+    Returns:
+        Ścieżka zbioru Parquet
+    """
+    path = parquet_path(output)
+    directory = parts_directory(path)
+    admitted_before = np.datetime64(datetime.now(), 'us')
     
-    cases = []
-    target_per_category = 4000
+    tasks = [
+        (index, start, stop, per_category, seed, admitted_before, directory)
+        for index, start, stop in chunk_ranges(per_category, chunk_size)
+    ]
     
-    for cat in range(1, 6):
-        templates = templates_by_dominant[cat]
-        if not templates:
+    started = time.perf_counter()
+    rows = 0
+    for done, chunk_rows in enumerate(run_chunks(generate_chunk, tasks, workers), start=1):
+        rows += chunk_rows
+        seconds = time.perf_counter() - started
+        print(f"  Chunk {done}/{len(tasks)} | {rows:,} przypadków | {rows / seconds:,.0f} przypadków/s")
+    
+    return publish_parts(directory, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator przypadków triażu")
+    parser.add_argument("--per-category", type=int, default=4000, help="Przypadków na kategorię dominującą")
+    parser.add_argument("--seed", type=int, default=42, help="Ziarno generatora")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Przypadków na kategorię w chunku")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Liczba procesów")
+    parser.add_argument("--output", type=Path, default=OUTPUT, help="Plik CSV zbioru")
+    parser.add_argument("--csv", action="store_true", help="Eksportuj też CSV")
+    args = parser.parse_args()
+    
+    by_category = templates_by_dominant_category()
+    print("\nSzablony według dominującej kategorii:")
+    for cat, names in by_category.items():
+        print(f"  Kategoria {cat}: {len(names)} szablonów")
+        for name in names:
+            print(f"    - {name}")
+        if not names:
             print(f"\n Brak szablonów dla kategorii {cat}")
-            continue
-            
-        for i in range(target_per_category):
-            name, template = templates[i % len(templates)]
-            cases.append(generate_case(name, template))
     
-    df = pd.DataFrame(cases)
-    output = Path(__file__).parent.parent.parent / 'data' / 'raw' / 'triage_data.csv'
-    df.to_csv(output, index=False)
+    path = generate_triage_data(
+        args.per_category, args.output, args.seed, args.chunk_size, args.workers
+    )
+    print(f"\n ✓ Zbiór zapisany: {path}")
+    
+    if args.csv:
+        print(f" ✓ CSV: {export_csv(args.output)}")
     
-    for cat in range(1, 6):
-        count = (df['kategoria_triażu'] == cat).sum()
-        pct = count / len(df) * 100
-        print(f"  Kategoria {cat}: {count:>4} ({pct:>5.1f}%)")
+    counts = load_dataset(args.output, columns=['kategoria_triażu'])['kategoria_triażu'].value_counts()
+    total = counts.sum()
+    for cat in CATEGORIES:
+        count = counts.get(cat, 0)
+        print(f"  Kategoria {cat}: {count:>4} ({count / total * 100:>5.1f}%)")
     
     print(f"{'='*70}")
+
+
+if __name__ == "__main__":
+    main()
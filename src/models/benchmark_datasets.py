@@ -0,0 +1,106 @@
+"""
+Benchmark wczytywania zbiorów: CSV (pd.read_csv) vs typowany Parquet
+
+Dla zbiorów surowych (triage, arrangement) i przetworzonych (X_*/y_*)
+porównuje czas wczytania (najlepszy z --repeat prób), pamięć DataFrame
+(memory_usage(deep=True)) i rozmiar pliku: CSV, pełny Parquet i Parquet
+z projekcją kolumn używanych przez trenowanie. --scale N powiela wiersze
+N razy (w katalogu tymczasowym), żeby zobaczyć zachowanie na większych danych.
+
+Użycie:
+    python src/models/benchmark_datasets.py [--scale 10] [--repeat 3]
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+import shutil
+import argparse
+import tempfile
+
+import pandas as pd
+
+from utils.datasets import VITALS, build_parquet, load_dataset
+
+DATA_PATH = Path(__file__).parent.parent.parent / 'data'
+
+# Zbiór -> kolumny wczytywane przez trenowanie (projekcja)
+DATASETS = {
+    'raw/triage_data.csv': ['szablon_przypadku', 'wiek', 'płeć'] + VITALS + ['kategoria_triażu'],
+    'raw/department_arrangement_data.csv': ['timestamp', 'occ_SOR', 'occ_Interna', 'occ_Kardiologia'],
+    'processed/X_test.csv': None,
+    'processed/y_test.csv': None,
+}
+
+
+def scaled_copy(source: Path, target: Path, scale: int) -> None:
+    """Kopia CSV z wierszami powielonymi scale razy"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if scale == 1:
+        shutil.copyfile(source, target)
+        return
+    df = pd.read_csv(source)
+    pd.concat([df] * scale, ignore_index=True).to_csv(target, index=False)
+
+
+def best_time(fn, repeat: int):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def megabytes(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs Parquet")
+    parser.add_argument("--scale", type=int, default=1, help="Krotność powielenia wierszy")
+    parser.add_argument("--repeat", type=int, default=3, help="Liczba prób (liczy się najlepsza)")
+    args = parser.parse_args()
+    
+    work_dir = Path(tempfile.mkdtemp(prefix='datasets_benchmark_'))
+    
+    try:
+        print("\n" + "=" * 86)
+        print(f"{'Zbiór / metoda':<44}{'Wiersze':>10}{'Czas [s]':>10}{'Pamięć [MB]':>12}{'Plik [MB]':>10}")
+        print("-" * 86)
+        
+        for name, columns in DATASETS.items():
+            source = DATA_PATH / name
+            if not source.exists():
+                print(f"{name:<44}{'brak pliku':>42}")
+                continue
+            
+            csv_path = work_dir / name
+            scaled_copy(source, csv_path, args.scale)
+            
+            start = time.perf_counter()
+            parquet = build_parquet(csv_path, force=True)
+            build_s = time.perf_counter() - start
+            
+            runs = [('CSV', lambda: pd.read_csv(csv_path), csv_path)]
+            runs.append(('Parquet', lambda: load_dataset(csv_path), parquet))
+            if columns is not None:
+                runs.append((f'Parquet, {len(columns)} kolumn', lambda: load_dataset(csv_path, columns=columns), parquet))
+            
+            print(f"{name}  (budowa Parquet: {build_s:.2f}s)")
+            for label, fn, path in runs:
+                df, seconds = best_time(fn, args.repeat)
+                print(
+                    f"  {label:<42}{len(df):>10,}{seconds:>10.3f}"
+                    f"{megabytes(df):>12.1f}{path.stat().st_size / 1e6:>10.1f}"
+                )
+        
+        print("=" * 86)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark balansowania klas: SMOTETomek vs StratifiedRebalancer
+
+Na cechach triażu (jak w train_triage_classification.py), powielonych
+losowaniem ze zwracaniem do kolejnych rozmiarów --rows, mierzy czas
+(z --workers procesami) i szczyt pamięci oraz wypisuje rozkład klas
+wyniku - powinien być taki sam (każda klasa ≈ liczność klasy
+większościowej, minus usunięte linki Tomka). SMOTETomek (dokładne kNN) uruchamiany jest
+tylko do --exact-limit wierszy.
+
+Pamięć jest mierzona tracemalloc w osobnym przebiegu z n_jobs=1 -
+tracemalloc widzi tylko bieżący proces, a z workers > 1 warstwy liczą
+się w procesach potomnych. To szczyt obliczeń, nie suma procesów
+równoległych (te trzymają naraz do workers warstw).
+
+Użycie:
+    python src/models/benchmark_rebalancing.py [--rows 14000 100000 1000000] [--workers 8]
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from imblearn.combine import SMOTETomek
+
+from utils.datasets import VITALS, load_dataset
+from utils.parallel import default_workers
+from utils.rebalancing import StratifiedRebalancer
+
+TRIAGE_CSV = Path(__file__).parent.parent.parent / 'data' / 'raw' / 'triage_data.csv'
+RANDOM_STATE = 42
+
+
+def load_features():
+    """Cechy jak w train_triage_classification.py (płeć_M, one-hot szablonu)"""
+    df = load_dataset(TRIAGE_CSV, columns=['szablon_przypadku', 'wiek', 'płeć'] + VITALS + ['kategoria_triażu'])
+    y = df['kategoria_triażu'].values
+    X = df.drop(['kategoria_triażu'], axis=1)
+    X['płeć_M'] = (X['płeć'] == 'M').astype(int)
+    X = X.drop('płeć', axis=1)
+    X = pd.concat([X.drop('szablon_przypadku', axis=1), pd.get_dummies(X['szablon_przypadku'], prefix='szablon')], axis=1)
+    return X, y
+
+
+def measure(resampler, X, y):
+    """(sekundy, liczności klas wyniku)"""
+    start = time.perf_counter()
+    _, y_res = resampler.fit_resample(X, y)
+    seconds = time.perf_counter() - start
+    return seconds, dict(zip(*np.unique(y_res, return_counts=True)))
+
+
+def peak_memory(resampler, X, y) -> float:
+    """Szczyt pamięci fit_resample w MB (tracemalloc - resampler w jednym procesie)"""
+    tracemalloc.start()
+    try:
+        resampler.fit_resample(X, y)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark balansowania klas")
+    parser.add_argument("--rows", type=int, nargs='+', default=[14_000, 100_000, 1_000_000], help="Rozmiary zbioru")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Procesów (warstwy)")
+    parser.add_argument("--exact-limit", type=int, default=100_000, help="Maks. wierszy dla SMOTETomek")
+    args = parser.parse_args()
+
+    X_all, y_all = load_features()
+    rng = np.random.default_rng(RANDOM_STATE)
+
+    rows = []
+    for n in args.rows:
+        sample = rng.integers(0, len(X_all), n)
+        X = X_all.iloc[sample].reset_index(drop=True)
+        y = y_all[sample]
+
+        # (resampler do pomiaru czasu, ten sam w jednym procesie do pomiaru pamięci)
+        resamplers = {'stratified': (
+            StratifiedRebalancer(n_jobs=args.workers, random_state=RANDOM_STATE),
+            StratifiedRebalancer(n_jobs=1, random_state=RANDOM_STATE)
+        )}
+        if n <= args.exact_limit:
+            smotetomek = SMOTETomek(random_state=RANDOM_STATE)
+            resamplers['smotetomek'] = (smotetomek, smotetomek)
+
+        for label, (resampler, sequential) in resamplers.items():
+            seconds, counts = measure(resampler, X, y)
+            peak = peak_memory(sequential, X, y)
+            rows.append((n, label, seconds, peak, counts))
+            print(f"  {n:,} | {label}: {seconds:.1f}s | klasy: {counts}")
+
+    print("\n" + "=" * 64)
+    print(f"{'Wierszy':>10}  {'Metoda':<12}{'Czas [s]':>12}{'Pamięć [MB]':>14}{'Po balansie':>14}")
+    print("-" * 64)
+    for n, label, seconds, peak, counts in rows:
+        print(f"{n:>10,}  {label:<12}{seconds:>12.1f}{peak:>14.0f}{sum(counts.values()):>14,}")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark wyszukiwania hiperparametrów RF: GridSearchCV vs successive halving
+
+Na tych samych danych triażu (opcjonalnie próbce --sample wierszy) i tej
+samej siatce co train_triage_classification.py porównuje:
+
+    - grid: dotychczasowy GridSearchCV, balansowanie klas raz przed CV
+      (wszystkie konfiguracje × foldy przy pełnej liczbie drzew)
+    - halving: HalvingGridSearchCV po liczbie drzew, balansowanie w foldach
+      z cache na dysku (drugie uruchomienie pomija resampling)
+
+Raportuje czas, liczbę dopasowań, wynik CV i balanced accuracy najlepszej
+konfiguracji na odłożonym zbiorze (bez resamplingu) - wynik CV grid jest
+zawyżony przeciekiem między foldami, porównywalny jest wynik odłożony.
+
+Użycie:
+    python src/models/benchmark_search.py [--sample 20000] [--jobs 8] [--skip-grid]
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+import argparse
+
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import balanced_accuracy_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+from utils.datasets import VITALS, load_dataset
+from utils.model_search import best_params, fitted_candidates, grid_search, halving_search, resample_cached
+from utils.parallel import default_workers
+from utils.rebalancing import StratifiedRebalancer
+
+TRIAGE_CSV = Path(__file__).parent.parent.parent / 'data' / 'raw' / 'triage_data.csv'
+RANDOM_STATE = 42
+
+PARAM_GRID = {
+    'n_estimators': [200, 300, 400],
+    'max_depth': [20, 25, 30],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'class_weight': ['balanced', 'balanced_subsample']
+}
+
+
+def load_features(sample: int):
+    """Cechy jak w train_triage_classification.py (płeć_M, one-hot szablonu)"""
+    df = load_dataset(TRIAGE_CSV, columns=['szablon_przypadku', 'wiek', 'płeć'] + VITALS + ['kategoria_triażu'])
+    if sample and sample < len(df):
+        df = df.sample(sample, random_state=RANDOM_STATE)
+    
+    y = df['kategoria_triażu'].values
+    X = df.drop(['kategoria_triażu'], axis=1)
+    X['płeć_M'] = (X['płeć'] == 'M').astype(int)
+    X = X.drop('płeć', axis=1)
+    X = pd.concat([X.drop('szablon_przypadku', axis=1), pd.get_dummies(X['szablon_przypadku'], prefix='szablon')], axis=1)
+    return X, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wyszukiwania hiperparametrów")
+    parser.add_argument("--sample", type=int, default=20_000, help="Wierszy danych (0 = wszystkie)")
+    parser.add_argument("--jobs", type=int, default=default_workers(), help="Procesów wyszukiwania")
+    parser.add_argument("--folds", type=int, default=5, help="Liczba foldów CV")
+    parser.add_argument("--skip-grid", action="store_true", help="Pomiń pełny GridSearchCV")
+    args = parser.parse_args()
+    
+    X, y = load_features(args.sample)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.15, random_state=RANDOM_STATE, stratify=y
+    )
+    resampler = StratifiedRebalancer(random_state=RANDOM_STATE)
+    rf_base = RandomForestClassifier(random_state=RANDOM_STATE, n_jobs=1, max_features='sqrt')
+    cv = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=RANDOM_STATE)
+    
+    start = time.perf_counter()
+    X_balanced, y_balanced = resample_cached(resampler, X_train, y_train)
+    print(f"\nBalansowanie pełnego zbioru: {time.perf_counter() - start:.1f}s (cache)")
+    
+    searches = {
+        'halving': lambda: halving_search(
+            rf_base, PARAM_GRID, X_train, y_train, resampler, cv, args.jobs, random_state=RANDOM_STATE
+        ),
+    }
+    if not args.skip_grid:
+        searches['grid'] = lambda: grid_search(rf_base, PARAM_GRID, X_balanced, y_balanced, cv, args.jobs)
+    
+    rows = []
+    for label, run in searches.items():
+        print(f"\n--- {label} ---")
+        start = time.perf_counter()
+        search = run()
+        seconds = time.perf_counter() - start
+        
+        params = best_params(search)
+        model = clone(rf_base).set_params(**params, n_jobs=args.jobs).fit(X_balanced, y_balanced)
+        holdout = balanced_accuracy_score(y_test, model.predict(X_test))
+        rows.append((label, seconds, fitted_candidates(search), search.best_score_, holdout))
+        print(f"  Parametry: {params}")
+    
+    print("\n" + "=" * 70)
+    print(f"{'Wyszukiwanie':<14}{'Czas [s]':>12}{'Dopasowań':>12}{'CV':>10}{'Odłożony':>12}")
+    print("-" * 70)
+    for label, seconds, fits, cv_score, holdout in rows:
+        print(f"{label:<14}{seconds:>12.1f}{fits:>12}{cv_score:>10.4f}{holdout:>12.4f}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark budowy sekwencji LSTM: pętla z iloc vs okna z sliding_window_view
+
+Na syntetycznych danych godzinowych (domyślnie 5 lat) porównuje czas
+i pamięć dotychczasowej pętli po godzinach (kopia okna na próbkę
++ np.array z listy) z build_windows (widok na jedną tablicę float32
++ indeksowanie tablicą indeksów) i sprawdza, że wyniki są zgodne.
+
+Użycie:
+    python src/models/benchmark_sequences.py [--years 5] [--lookback 48] [--horizon 4]
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from utils.sequences import as_float32, build_windows
+
+DEPARTMENTS = ["SOR", "Interna", "Kardiologia", "Chirurgia",
+               "Ortopedia", "Neurologia", "Pediatria", "Ginekologia"]
+
+TIME_COLUMNS = ['hour', 'day_of_week', 'month', 'day_of_month',
+                'is_weekend', 'is_night']
+
+
+def synthetic_hourly(years: int) -> pd.DataFrame:
+    """Dane w układzie df_feat z treningu obłożenia (obłożenie + cechy czasowe + agregaty)"""
+    rng = np.random.default_rng(42)
+    timestamps = pd.date_range("2020-01-01", periods=years * 365 * 24, freq="h")
+    df = pd.DataFrame({"timestamp": timestamps})
+    
+    df['hour'] = timestamps.hour
+    df['day_of_week'] = timestamps.dayofweek
+    df['month'] = timestamps.month
+    df['day_of_month'] = timestamps.day
+    df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
+    df['is_night'] = ((df['hour'] < 6) | (df['hour'] >= 22)).astype(int)
+    
+    daily = np.sin(2 * np.pi * df['hour'].to_numpy() / 24)
+    for k, dept in enumerate(DEPARTMENTS):
+        df[dept] = np.clip(20 + 5 * k + 8 * daily + rng.normal(0, 3, len(df)), 0, None).round()
+        df[f'{dept}_avg_7d'] = df[dept].rolling(168, min_periods=1).mean()
+        df[f'{dept}_avg_30d'] = df[dept].rolling(720, min_periods=1).mean()
+        df[f'{dept}_std_7d'] = df[dept].rolling(168, min_periods=1).std().fillna(0)
+    
+    return df
+
+
+def static_columns():
+    columns = list(TIME_COLUMNS)
+    for dept in DEPARTMENTS:
+        columns.extend([f'{dept}_avg_7d', f'{dept}_avg_30d', f'{dept}_std_7d'])
+    return columns
+
+
+def legacy_sequences(df, lookback, horizon):
+    """Dotychczasowa pętla z create_sequences (train_occupancy_forecasting.py)"""
+    X_seq_list, X_static_list, y_list = [], [], []
+    static = static_columns()
+    
+    for i in range(lookback, len(df) - horizon):
+        X_seq_list.append(df[DEPARTMENTS].iloc[i-lookback:i].values)
+        X_static_list.append(df[static].iloc[i].values)
+        y_list.append(df[DEPARTMENTS].iloc[i + horizon].values)
+    
+    return np.array(X_seq_list), np.array(X_static_list), np.array(y_list)
+
+
+def windowed_sequences(df, lookback, horizon):
+    """create_sequences po zmianie (utils/sequences.py)"""
+    seq_values = as_float32(df, DEPARTMENTS)
+    X_seq, X_static, y, _ = build_windows(
+        seq_values, lookback, horizon,
+        static_values=as_float32(df, static_columns()),
+        target_values=seq_values
+    )
+    return X_seq, X_static, y
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def owned_bytes(array: np.ndarray) -> int:
+    """Pamięć zajmowana przez tablicę (dla widoku - przez tablicę bazową)"""
+    while array.base is not None and isinstance(array.base, np.ndarray):
+        array = array.base
+    return array.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark budowy sekwencji LSTM")
+    parser.add_argument("--years", type=int, default=5, help="Lata danych godzinowych")
+    parser.add_argument("--lookback", type=int, default=48, help="Długość okna [h]")
+    parser.add_argument("--horizon", type=int, default=4, help="Horyzont targetu [h]")
+    args = parser.parse_args()
+    
+    df = synthetic_hourly(args.years)
+    print(f"\n Dane: {len(df):,} godzin ({args.years} lat), lookback={args.lookback}h, horizon={args.horizon}h")
+    
+    (seq_new, static_new, y_new), new_s = timed(windowed_sequences, df, args.lookback, args.horizon)
+    (seq_old, static_old, y_old), old_s = timed(legacy_sequences, df, args.lookback, args.horizon)
+    
+    equal = (
+        seq_old.shape == seq_new.shape
+        and np.allclose(seq_old, seq_new)
+        and np.allclose(static_old, static_new)
+        and np.allclose(y_old, y_new)
+    )
+    
+    print("\n" + "=" * 62)
+    print(f"{'Metoda':<22}{'Czas [s]':>12}{'X_seq [MB]':>14}{'Razem [MB]':>14}")
+    print("-" * 62)
+    for name, seconds, arrays in [
+        ("pętla iloc", old_s, (seq_old, static_old, y_old)),
+        ("sliding_window_view", new_s, (seq_new, static_new, y_new)),
+    ]:
+        seq_mb = owned_bytes(arrays[0]) / 1e6
+        total_mb = sum(owned_bytes(a) for a in arrays) / 1e6
+        print(f"{name:<22}{seconds:>12.3f}{seq_mb:>14.1f}{total_mb:>14.1f}")
+    print("=" * 62)
+    print(f" Przyspieszenie: {old_s / new_s:,.0f}x | wyniki zgodne: {'tak' if equal else 'NIE'}")
+    
+    sys.exit(0 if equal else 1)
+
+
+if __name__ == "__main__":
+    main()
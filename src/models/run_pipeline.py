@@ -0,0 +1,240 @@
+"""
+Potok trenowania: triaż → obłożenie (LSTM) → alokacja, z cache etapów
+
+Etapy i ich wyniki (cache w data/cache/pipeline, utils/pipeline.py):
+
+    triage_model         model klasyfikacji triażu (train_triage_classification)
+    occupancy_data       obłożenie z cechami czasowymi i agregatami
+    occupancy_windows    tablice okien (znormalizowane), podział, scalery
+    occupancy_model      wytrenowany LSTM (ścieżki modelu, scalerów, metadata)
+    allocation_data      dane arrangement + triage dla alokacji
+    lstm_predictions     sekwencje i predykcje LSTM dla całej historii
+    allocation_features  cechy i target modelu alokacji
+    allocation_model     najlepszy model alokacji (ścieżki modelu i artefaktów)
+
+Alokacja używa LSTM z etapu occupancy_model (nie latest_model.json), więc
+nowy LSTM unieważnia predykcje i wszystko za nimi, a niezmienione dane
+i model pozwalają pominąć predict_future_occupancy_batch.
+
+Użycie (z katalogu głównego repozytorium):
+    python src/models/run_pipeline.py                          # wszystkie etapy
+    python src/models/run_pipeline.py allocation_model         # etap z zależnościami
+    python src/models/run_pipeline.py --force occupancy_model  # przelicz LSTM i zależne
+    python src/models/run_pipeline.py --status
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+
+import train_department_allocation as allocation
+import train_occupancy_forecasting as occupancy
+import train_triage_classification as triage
+from utils import model_search, rebalancing, window_dataset
+from utils.datasets import parquet_path
+from utils.occupancy_loader import load_arrangement_data
+from utils.pipeline import Pipeline, Stage
+from utils.sequences import build_windows, sample_anchors
+
+TRIAGE_CSV = Path('data/raw/triage_data.csv')
+ARRANGEMENT_CSV = Path('data/raw/department_arrangement_data.csv')
+
+
+def dataset_files(csv_path: Path) -> list:
+    """
+    Pliki wyznaczające zawartość zbioru: CSV i Parquet (części)
+    
+    Generatory zapisują Parquet, a CSV tylko z --csv, więc nowszy Parquet
+    może stać obok starego CSV - load_dataset czyta wtedy Parquet.
+    """
+    return [csv_path, parquet_path(csv_path)]
+
+
+def paths_exist(result) -> bool:
+    return bool(result) and all(Path(path).exists() for path in result['paths'].values())
+
+
+# ============================================================================
+# ETAPY
+# ============================================================================
+
+def triage_model():
+    model_path = triage.main()
+    return {'paths': {'model_path': model_path}} if model_path else None
+
+
+def occupancy_data():
+    return occupancy.create_aggregate_features(occupancy.load_and_preprocess_data())
+
+
+def occupancy_windows(df_feat):
+    seq_values, static_values, anchors = occupancy.create_sequences(df_feat)
+    splits = occupancy.train_val_test_split(anchors)
+    scaled, scalers = occupancy.normalize_data(seq_values, static_values, splits[0])
+    return {'scaled': scaled, 'scalers': scalers, 'splits': splits}
+
+
+def occupancy_model(windows):
+    scaled, scalers, splits = windows['scaled'], windows['scalers'], windows['splits']
+    train_ds, val_ds, test_ds = occupancy.make_datasets(scaled, splits)
+    
+    model = occupancy.build_lstm_model(
+        (occupancy.LOOKBACK_HOURS, occupancy.N_DEPARTMENTS), scaled[1].shape[1]
+    )
+    history, timestamp = occupancy.train_model(model, train_ds, val_ds)
+    results = occupancy.evaluate_model(
+        model, test_ds, scaled[2][splits[2] + occupancy.PREDICTION_HORIZON], scalers[2]
+    )
+    occupancy.plot_training_history(history)
+    occupancy.plot_predictions(results)
+    
+    return {'paths': occupancy.save_artifacts(model, scalers, timestamp), 'mae': results['mae']}
+
+
+def allocation_data():
+    return allocation.load_data()
+
+
+def lstm_predictions(data, lstm):
+    df_arr, _ = data
+    lstm_model, lstm_scalers, lstm_metadata = allocation.load_lstm_model(**lstm['paths'])
+    
+    # Kopia - prepare_lstm_sequences dopisuje kolumny, a data trafia też do cech
+    X_seq, X_static, df_valid = allocation.prepare_lstm_sequences(df_arr.copy(), lstm_metadata)
+    future_occupancy = allocation.predict_future_occupancy_batch(
+        X_seq, X_static, lstm_model, lstm_scalers, batch_size=256
+    )
+    return {'df_valid': df_valid, 'future_occupancy': future_occupancy, 'lstm_metadata': lstm_metadata}
+
+
+def allocation_features(data, predictions):
+    _, df_triage = data
+    X, y, feature_columns = allocation.create_features(
+        predictions['df_valid'], df_triage, predictions['future_occupancy']
+    )
+    return {'X': X, 'y': y, 'feature_columns': feature_columns}
+
+
+def allocation_model(features, predictions):
+    X_train, X_val, X_test, y_train, y_val, y_test, scaler, label_encoder = allocation.prepare_train_test(
+        features['X'], features['y']
+    )
+    models = allocation.train_models((X_train, y_train), (X_val, y_val))
+    results = allocation.evaluate_models(models, (X_test, y_test), label_encoder)
+    allocation.plot_confusion_matrices(results, (X_test, y_test), label_encoder)
+    
+    paths = allocation.save_best_model(
+        models, results, scaler, label_encoder, features['feature_columns'], predictions['lstm_metadata']
+    )
+    return {
+        'paths': paths,
+        'balanced_accuracy': {name: res['balanced_accuracy'] for name, res in results.items()}
+    }
+
+
+def build_pipeline() -> Pipeline:
+    occupancy_params = {
+        'departments': occupancy.DEPARTMENTS,
+        'lookback': occupancy.LOOKBACK_HOURS,
+        'horizon': occupancy.PREDICTION_HORIZON,
+        'aggregate_windows': occupancy.AGGREGATE_WINDOWS,
+    }
+    allocation_params = {
+        'departments': allocation.DEPARTMENTS,
+        'capacity': allocation.DEPARTMENT_CAPACITY_FULL,
+        'overcrowded_threshold': allocation.OVERCROWDED_THRESHOLD,
+        'compatibility': allocation.SZABLON_TO_DEPTS,
+        'feature_spec_version': allocation.FEATURE_SPEC_VERSION,
+    }
+    
+    return Pipeline([
+        Stage(
+            'triage_model', triage_model,
+            files=dataset_files(TRIAGE_CSV),
+            params={'search': triage.SEARCH, 'random_state': triage.RANDOM_STATE},
+            code=[triage, model_search, rebalancing],
+            check=paths_exist
+        ),
+        Stage(
+            'occupancy_data', occupancy_data,
+            files=dataset_files(ARRANGEMENT_CSV),
+            params=occupancy_params,
+            code=[occupancy.load_and_preprocess_data, occupancy.create_aggregate_features, load_arrangement_data]
+        ),
+        Stage(
+            'occupancy_windows', occupancy_windows, deps=['occupancy_data'],
+            params=occupancy_params,
+            code=[occupancy.create_sequences, occupancy.train_val_test_split, occupancy.normalize_data, sample_anchors]
+        ),
+        Stage(
+            'occupancy_model', occupancy_model, deps=['occupancy_windows'],
+            params={**occupancy_params, 'batch_size': occupancy.BATCH_SIZE, 'epochs': occupancy.EPOCHS,
+                    'random_state': occupancy.RANDOM_STATE},
+            code=[occupancy.make_datasets, occupancy.build_lstm_model, occupancy.train_model,
+                  occupancy.evaluate_model, occupancy.save_artifacts, window_dataset],
+            check=paths_exist
+        ),
+        Stage(
+            'allocation_data', allocation_data,
+            files=dataset_files(ARRANGEMENT_CSV) + dataset_files(TRIAGE_CSV),
+            params={'departments': allocation.DEPARTMENTS_FULL},
+            code=[allocation.load_data, load_arrangement_data]
+        ),
+        Stage(
+            'lstm_predictions', lstm_predictions, deps=['allocation_data', 'occupancy_model'],
+            params=allocation_params,
+            code=[allocation.load_lstm_model, allocation.prepare_lstm_sequences,
+                  allocation.predict_future_occupancy_batch, build_windows]
+        ),
+        Stage(
+            'allocation_features', allocation_features, deps=['allocation_data', 'lstm_predictions'],
+            params=allocation_params,
+            code=[allocation.create_features]
+        ),
+        Stage(
+            'allocation_model', allocation_model, deps=['allocation_features', 'lstm_predictions'],
+            params={**allocation_params, 'model_version': allocation.MODEL_VERSION,
+                    'random_state': allocation.RANDOM_STATE},
+            code=[allocation.prepare_train_test, allocation.train_models,
+                  allocation.evaluate_models, allocation.save_best_model],
+            check=paths_exist
+        ),
+    ])
+
+
+def main():
+    pipeline = build_pipeline()
+    
+    parser = argparse.ArgumentParser(description="Potok trenowania z cache etapów")
+    parser.add_argument("targets", nargs='*', help=f"Etapy docelowe: {', '.join(pipeline.stages)}")
+    parser.add_argument("--force", nargs='+', default=[], choices=list(pipeline.stages), help="Przelicz etapy (i zależne)")
+    parser.add_argument("--status", action="store_true", help="Pokaż klucze i stan cache")
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.targets if name not in pipeline.stages]
+    if unknown:
+        parser.error(f"Nieznane etapy: {', '.join(unknown)}")
+    
+    if args.status:
+        for name, key, cached in pipeline.status():
+            print(f"  {name:<22}{key}  {'cache' if cached else '-'}")
+        return
+    
+    print(f"\n{'='*70}")
+    print(f"POTOK TRENOWANIA")
+    print(f"{'='*70}")
+    
+    results = pipeline.run(args.targets or None, force=args.force)
+    
+    print(f"\n{'='*70}")
+    for name, result in results.items():
+        if isinstance(result, dict) and 'paths' in result:
+            for label, path in result['paths'].items():
+                print(f"  {name}.{label}: {path}")
+    print(f"{'='*70}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import pandas as pd
 import numpy as np
 import json
 import pickle
 import warnings
 import logging
-from pathlib import Path
 from datetime import datetime
 from typing import Dict, Tuple, Optional
 
@@ -25,6 +28,10 @@ from sklearn.neural_network import MLPClassifier
 import tensorflow as tf
 from tensorflow import keras
 
+from utils.sequences import as_float32, build_windows
+from utils.occupancy_loader import load_arrangement_data
+from utils.datasets import VITALS, load_dataset
+
 warnings.filterwarnings('ignore')
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
@@ -68,6 +75,36 @@ DEPARTMENT_CAPACITY = {
     "Ortopedia": 25, "Neurologia": 20
 }
 
+# Próg przepełnienia (occ_pct jako ułamek pojemności)
+OVERCROWDED_THRESHOLD = 0.8
+
+# Wersja formatu specyfikacji cech (backend/app/ml/feature_spec.py)
+FEATURE_SPEC_VERSION = 1
+
+# Mapowanie szablon → oddziały (cechy compat_*; zapisywane w specyfikacji cech)
+SZABLON_TO_DEPTS = {
+    'ból w klatce piersiowej': ['Kardiologia', 'SOR'],
+    'zaostrzenie astmy': ['Interna', 'SOR'],
+    'uraz głowy': ['Neurologia', 'SOR', 'Chirurgia'],
+    'złamanie kończyny': ['Ortopedia', 'SOR'],
+    'udar': ['Neurologia', 'SOR'],
+    'zaburzenia rytmu serca': ['Kardiologia', 'SOR'],
+    'zapalenie płuc': ['Interna', 'SOR'],
+    'zapalenie wyrostka': ['Chirurgia', 'SOR'],
+    'silne krwawienie': ['Chirurgia', 'SOR'],
+    'krwawienie z przewodu pokarmowego': ['Chirurgia', 'Interna'],
+    'napad padaczkowy': ['Neurologia', 'SOR'],
+    'omdlenie': ['Kardiologia', 'Neurologia', 'SOR'],
+    'ból brzucha': ['Chirurgia', 'Interna', 'Ginekologia'],
+    'reakcja alergiczna': ['Interna', 'SOR'],
+    'migrena': ['Neurologia', 'SOR'],
+    'zatrucie pokarmowe': ['Interna', 'SOR'],
+    'infekcja układu moczowego': ['Interna', 'SOR'],
+    'zapalenie opon mózgowych': ['Neurologia', 'SOR'],
+    'zaostrzenie POChP': ['Interna', 'SOR'],
+    'uraz wielonarządowy': ['Chirurgia', 'SOR']
+}
+
 # ============================================================================
 # FUNKCJE POMOCNICZE
 # ============================================================================
@@ -99,13 +136,23 @@ def load_latest_lstm_model():
     with open(latest_info_path, 'r') as f:
         latest_info = json.load(f)
     
-    model_path = Path(latest_info['model_path'])
-    scalers_path = Path(latest_info['scalers_path'])
-    metadata_path = Path(latest_info['metadata_path'])
-    
     logger.info(f"  Model version: {latest_info['version']}")
     logger.info(f"  MAE: {latest_info['mae']:.2f}")
     
+    return load_lstm_model(latest_info['model_path'], latest_info['scalers_path'], latest_info['metadata_path'])
+
+
+def load_lstm_model(model_path, scalers_path, metadata_path):
+    """
+    Wczytuje model LSTM, scalery i metadata z podanych plików
+    
+    Returns:
+        Tuple: (model, scalers, metadata)
+    """
+    model_path = Path(model_path)
+    scalers_path = Path(scalers_path)
+    metadata_path = Path(metadata_path)
+    
     # Load model
     lstm_model = keras.models.load_model(model_path)
     logger.info(f"  ✓ Model: {model_path.name}")
@@ -133,29 +180,20 @@ def load_data():
     print_header("Wczytywanie danych")
     
     # Arrangement data
-    df_arr = pd.read_csv(DATA_PATH / 'department_arrangement_data.csv')
+    # Obłożenie WSZYSTKICH 8 oddziałów (potrzebne dla LSTM) jako kolumny occ_* (int16)
+    df_arr = load_arrangement_data(
+        DATA_PATH / 'department_arrangement_data.csv', DEPARTMENTS_FULL, prefix='occ_'
+    )
     logger.info(f"✓ Arrangement data: {len(df_arr)} rekordów")
     
-    # Triage data
-    df_triage = pd.read_csv(DATA_PATH / 'triage_data.csv')
+    # Triage data - tylko kolumny używane w cechach pacjenta (projekcja z Parquet)
+    df_triage = load_dataset(
+        DATA_PATH / 'triage_data.csv', columns=['id_przypadku', 'wiek', 'płeć'] + VITALS
+    )
     logger.info(f"✓ Triage data: {len(df_triage)} rekordów")
     
-    # Parse timestamp
-    df_arr['timestamp'] = pd.to_datetime(df_arr['timestamp'])
-    df_arr = df_arr.sort_values('timestamp').reset_index(drop=True)
-    
-    # Parse JSON obłożenia
-    occupancy_data = []
-    for idx, row in df_arr.iterrows():
-        occ_dict = json.loads(row['obłożenie_oddziałów'])
-        occupancy_data.append(occ_dict)
-    
-    df_occ = pd.DataFrame(occupancy_data)
-    
-    # Dodaj obłożenie do df_arr - WSZYSTKIE 8 oddziałów (potrzebne dla LSTM)
     for dept in DEPARTMENTS_FULL:
-        df_arr[f'occ_{dept}'] = df_occ[dept]
-        df_arr[f'occ_pct_{dept}'] = df_occ[dept] / DEPARTMENT_CAPACITY_FULL[dept]
+        df_arr[f'occ_pct_{dept}'] = df_arr[f'occ_{dept}'] / DEPARTMENT_CAPACITY_FULL[dept]
     
     logger.info(f"\n✓ Dane przetworzone: {df_arr.shape}")
     logger.info(f"  Używamy wszystkich {len(DEPARTMENTS_FULL)} oddziałów dla LSTM compatibility")
@@ -242,29 +280,13 @@ def prepare_lstm_sequences(
             f'{dept}_std_7d', f'{dept}_trend_24h'
         ])
     
-    X_seq_list = []
-    X_static_list = []
-    valid_indices = []
-    
     logger.info(f"  Tworzenie {len(df_arr) - lookback} sekwencji...")
     
-    for i in range(lookback, len(df_arr)):
-        # Sekwencja (lookback hours)
-        seq = df_arr[seq_columns].iloc[i-lookback:i].values
-        X_seq_list.append(seq)
-        
-        # Static features (current timestamp)
-        static = df_arr[static_columns].iloc[i].values
-        X_static_list.append(static)
-        
-        valid_indices.append(i)
-        
-        if (i - lookback) % 500 == 0:
-            progress = (i - lookback) / (len(df_arr) - lookback) * 100
-            print(f"  Postęp: {progress:.1f}%", end='\r')
-    
-    X_seq = np.array(X_seq_list)
-    X_static = np.array(X_static_list)
+    # Okna jako widok na jedną tablicę float32, static z bieżącego timestampu
+    X_seq, X_static, _, valid_indices = build_windows(
+        as_float32(df_arr, seq_columns), lookback,
+        static_values=as_float32(df_arr, static_columns)
+    )
     df_valid = df_arr.iloc[valid_indices].reset_index(drop=True)
     
     logger.info(f"\n✓ Utworzono sekwencje")
@@ -442,7 +464,7 @@ def create_features(
         ])
         
         # Overcrowded flag
-        df[f'overcrowded_{dept}'] = (df[f'occ_pct_{dept}'] > 0.8).astype(int)
+        df[f'overcrowded_{dept}'] = (df[f'occ_pct_{dept}'] > OVERCROWDED_THRESHOLD).astype(int)
         occupancy_features.append(f'overcrowded_{dept}')
     
     # ========================================================================
@@ -472,34 +494,10 @@ def create_features(
     
     logger.info("🩺 Kompatybilność medyczna...")
     
-    # Mapowanie szablon → oddziały
-    szablon_to_depts = {
-        'ból w klatce piersiowej': ['Kardiologia', 'SOR'],
-        'zaostrzenie astmy': ['Interna', 'SOR'],
-        'uraz głowy': ['Neurologia', 'SOR', 'Chirurgia'],
-        'złamanie kończyny': ['Ortopedia', 'SOR'],
-        'udar': ['Neurologia', 'SOR'],
-        'zaburzenia rytmu serca': ['Kardiologia', 'SOR'],
-        'zapalenie płuc': ['Interna', 'SOR'],
-        'zapalenie wyrostka': ['Chirurgia', 'SOR'],
-        'silne krwawienie': ['Chirurgia', 'SOR'],
-        'krwawienie z przewodu pokarmowego': ['Chirurgia', 'Interna'],
-        'napad padaczkowy': ['Neurologia', 'SOR'],
-        'omdlenie': ['Kardiologia', 'Neurologia', 'SOR'],
-        'ból brzucha': ['Chirurgia', 'Interna', 'Ginekologia'],
-        'reakcja alergiczna': ['Interna', 'SOR'],
-        'migrena': ['Neurologia', 'SOR'],
-        'zatrucie pokarmowe': ['Interna', 'SOR'],
-        'infekcja układu moczowego': ['Interna', 'SOR'],
-        'zapalenie opon mózgowych': ['Neurologia', 'SOR'],
-        'zaostrzenie POChP': ['Interna', 'SOR'],
-        'uraz wielonarządowy': ['Chirurgia', 'SOR']
-    }
-    
     for dept in DEPARTMENTS:
         df[f'compat_{dept}'] = 0
     
-    for szablon, compatible_depts in szablon_to_depts.items():
+    for szablon, compatible_depts in SZABLON_TO_DEPTS.items():
         mask = df['szablon_przypadku'] == szablon
         for dept in compatible_depts:
             df.loc[mask, f'compat_{dept}'] = 1
@@ -735,8 +733,8 @@ def plot_confusion_matrices(results, test_data, label_encoder):
     plt.close()
 
 
-def save_best_model(models, results, scaler, label_encoder, feature_columns):
-    """Zapisuje najlepszy model"""
+def save_best_model(models, results, scaler, label_encoder, feature_columns, lstm_metadata):
+    """Zapisuje najlepszy model wraz ze specyfikacją cech"""
     print_header("Zapis najlepszego modelu")
     
     best_model_name = max(results, key=lambda x: results[x]['balanced_accuracy'])
@@ -762,9 +760,22 @@ def save_best_model(models, results, scaler, label_encoder, feature_columns):
             'label_encoder': label_encoder,
             'feature_columns': feature_columns,
             'departments': DEPARTMENTS,
-            'model_version': MODEL_VERSION
+            'model_version': MODEL_VERSION,
+            'feature_spec': {
+                'spec_version': FEATURE_SPEC_VERSION,
+                'columns': feature_columns,
+                'departments': DEPARTMENTS,
+                'capacity': DEPARTMENT_CAPACITY,
+                'overcrowded_threshold': OVERCROWDED_THRESHOLD,
+                'compatibility': SZABLON_TO_DEPTS,
+                'future_horizon_hours': lstm_metadata['prediction_horizon'],
+                'template_prefix': 'szablon_',
+                'scaler': {'type': type(scaler).__name__, 'n_features': int(scaler.n_features_in_)}
+            }
         }, f)
     logger.info(f"✓ Artifacts: {artifacts_path}")
+    
+    return {'model_path': model_path, 'artifacts_path': artifacts_path}
 
 
 # ============================================================================
@@ -808,7 +819,7 @@ def main():
     plot_confusion_matrices(results, (X_test, y_test), label_encoder)
     
     # 10. Save
-    save_best_model(models, results, scaler, label_encoder, feature_columns)
+    save_best_model(models, results, scaler, label_encoder, feature_columns, lstm_metadata)
     
     # Summary
     print_header("PODSUMOWANIE")
@@ -1,9 +1,11 @@
-import pandas as pd
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import numpy as np
 import json
 import pickle
 import warnings
-from pathlib import Path
 from datetime import datetime
 
 import matplotlib.pyplot as plt
@@ -17,6 +19,10 @@ from tensorflow import keras
 from tensorflow.keras import layers, Model
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
 
+from utils.sequences import as_float32, sample_anchors
+from utils.window_dataset import window_dataset
+from utils.occupancy_loader import load_arrangement_data
+
 warnings.filterwarnings('ignore')
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
@@ -46,6 +52,15 @@ DEPARTMENTS = ["SOR", "Interna", "Kardiologia", "Chirurgia",
                "Ortopedia", "Neurologia", "Pediatria", "Ginekologia"]
 N_DEPARTMENTS = len(DEPARTMENTS)
 
+# Okna agregatów (w godzinach) - serwowanie liczy je przyrostowo z tymi samymi oknami
+AGGREGATE_WINDOWS = {'avg_7d': 168, 'avg_30d': 720, 'std_7d': 168}
+
+TIME_COLUMNS = ['hour', 'day_of_week', 'month', 'day_of_month', 
+                'is_weekend', 'is_night']
+
+# Wersja formatu specyfikacji cech (backend/app/ml/feature_spec.py)
+FEATURE_SPEC_VERSION = 1
+
 # ============================================================================
 # FUNKCJE POMOCNICZE
 # ============================================================================
@@ -64,26 +79,13 @@ def load_and_preprocess_data():
     """Wczytuje i preprocessuje dane z CSV"""
     print_header("Wczytywanie danych")
     
-    df = pd.read_csv(DATA_PATH / 'department_arrangement_data.csv')
+    # Obłożenie oddziałów jako kolumny int16 (z Parquet zbioru, budowanego raz z CSV)
+    df = load_arrangement_data(DATA_PATH / 'department_arrangement_data.csv', DEPARTMENTS)
     print(f"✓ Wczytano {len(df)} rekordów")
     
-    # Parse timestamp
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.sort_values('timestamp').reset_index(drop=True)
-    
     print(f"  Zakres czasowy: {df['timestamp'].min()} → {df['timestamp'].max()}")
     print(f"  Okres: {(df['timestamp'].max() - df['timestamp'].min()).days} dni")
     
-    # Parse JSON obłożenia
-    print("\n Parsowanie obłożenia oddziałów...")
-    occupancy_data = []
-    
-    for idx, row in df.iterrows():
-        occ_dict = json.loads(row['obłożenie_oddziałów'])
-        occupancy_data.append([occ_dict[dept] for dept in DEPARTMENTS])
-    
-    occupancy_df = pd.DataFrame(occupancy_data, columns=DEPARTMENTS)
-    
     # Dodaj cechy czasowe
     df['hour'] = df['timestamp'].dt.hour
     df['day_of_week'] = df['timestamp'].dt.dayofweek
@@ -93,9 +95,8 @@ def load_and_preprocess_data():
     df['is_night'] = ((df['hour'] < 6) | (df['hour'] >= 22)).astype(int)
     
     # Połącz
-    df_full = pd.concat([df[['timestamp', 'hour', 'day_of_week', 'month', 
-                              'day_of_month', 'is_weekend', 'is_night']], 
-                         occupancy_df], axis=1)
+    df_full = df[['timestamp', 'hour', 'day_of_week', 'month', 
+                  'day_of_month', 'is_weekend', 'is_night'] + DEPARTMENTS]
     
     print(f"✓ Dane przetworzone: {df_full.shape}")
     print(f"\n Pierwsze 3 rekordy:")
@@ -118,144 +119,140 @@ def create_aggregate_features(df):
     
     for dept in DEPARTMENTS:
         # 7-dniowa średnia (168h)
-        df_feat[f'{dept}_avg_7d'] = df[dept].rolling(window=168, min_periods=1).mean()
+        df_feat[f'{dept}_avg_7d'] = df[dept].rolling(
+            window=AGGREGATE_WINDOWS['avg_7d'], min_periods=1
+        ).mean()
         
         # 30-dniowa średnia (720h)
-        df_feat[f'{dept}_avg_30d'] = df[dept].rolling(window=720, min_periods=1).mean()
+        df_feat[f'{dept}_avg_30d'] = df[dept].rolling(
+            window=AGGREGATE_WINDOWS['avg_30d'], min_periods=1
+        ).mean()
         
         # Odchylenie standardowe 7d (zmienność)
-        df_feat[f'{dept}_std_7d'] = df[dept].rolling(window=168, min_periods=1).std().fillna(0)
+        df_feat[f'{dept}_std_7d'] = df[dept].rolling(
+            window=AGGREGATE_WINDOWS['std_7d'], min_periods=1
+        ).std().fillna(0)
     
     print(f"✓ Dodano cechy agregowane")
     print(f"  Rozmiar danych: {df_feat.shape}")
     
     return df_feat
 
+def get_static_columns():
+    """Kolumny statyczne w kolejności wejścia modelu: cechy czasowe + agregaty"""
+    static_columns = list(TIME_COLUMNS)
+    
+    for dept in DEPARTMENTS:
+        static_columns.extend([f'{dept}_avg_7d', f'{dept}_avg_30d', f'{dept}_std_7d'])
+    
+    return static_columns
+
 def create_sequences(df, lookback=LOOKBACK_HOURS, horizon=PREDICTION_HORIZON):
     """
-    Tworzy sekwencje dla LSTM.
+    Przygotowuje dane sekwencji dla LSTM bez materializacji okien.
+    
+    Próbka i ma sekwencję z wierszy [i - lookback, i) tablicy obłożenia,
+    cechy statyczne z wiersza i i target z wiersza i + horizon. Okna są
+    składane na bieżąco w potoku tf.data (utils/window_dataset.py).
     
     Returns:
-        X_seq: (n_samples, lookback, n_departments) - sekwencje obłożenia
-        X_static: (n_samples, n_static_features) - cechy czasowe i agregaty
-        y: (n_samples, n_departments) - target obłożenie za 'horizon' godzin
+        seq_values: (n_rows, n_departments) - obłożenie (float32)
+        static_values: (n_rows, n_static_features) - cechy czasowe i agregaty
+        anchors: (n_samples,) - indeksy wierszy próbek
     """
     print_header(f"Tworzenie sekwencji (lookback={lookback}h, horizon={horizon}h)")
     
-    # Kolumny sekwencyjne (dla LSTM)
-    seq_columns = DEPARTMENTS
+    # Kolumny sekwencyjne (dla LSTM) - jednocześnie target
+    seq_values = as_float32(df, DEPARTMENTS)
     
     # Kolumny statyczne (dla Dense layer)
-    static_columns = ['hour', 'day_of_week', 'month', 'day_of_month', 
-                      'is_weekend', 'is_night']
+    static_values = as_float32(df, get_static_columns())
     
-    # Dodaj kolumny agregowane
-    for dept in DEPARTMENTS:
-        static_columns.extend([f'{dept}_avg_7d', f'{dept}_avg_30d', f'{dept}_std_7d'])
+    anchors = sample_anchors(len(df), lookback, horizon)
     
-    X_seq_list = []
-    X_static_list = []
-    y_list = []
+    print(f"\n✓ Utworzono {len(anchors)} sekwencji")
+    print(f"  X_seq shape:   {(len(anchors), lookback, seq_values.shape[1])}  (samples, timesteps, departments) - okna na bieżąco")
+    print(f"  X_static shape: {(len(anchors), static_values.shape[1])}  (samples, static_features)")
+    print(f"  y shape:       {(len(anchors), seq_values.shape[1])}  (samples, departments)")
     
-    # Sliding window
-    for i in range(lookback, len(df) - horizon):
-        # Sekwencja: ostatnie 'lookback' godzin
-        seq = df[seq_columns].iloc[i-lookback:i].values
-        X_seq_list.append(seq)
-        
-        # Static features: z ostatniego timestampu w oknie
-        static = df[static_columns].iloc[i].values
-        X_static_list.append(static)
-        
-        # Target: obłożenie za 'horizon' godzin
-        target = df[seq_columns].iloc[i + horizon].values
-        y_list.append(target)
-        
-        if (i - lookback) % 500 == 0:
-            progress = (i - lookback) / (len(df) - horizon - lookback) * 100
-            print(f"  Postęp: {progress:.1f}%", end='\r')
-    
-    X_seq = np.array(X_seq_list)
-    X_static = np.array(X_static_list)
-    y = np.array(y_list)
-    
-    print(f"\n✓ Utworzono {len(X_seq)} sekwencji")
-    print(f"  X_seq shape:   {X_seq.shape}  (samples, timesteps, departments)")
-    print(f"  X_static shape: {X_static.shape}  (samples, static_features)")
-    print(f"  y shape:       {y.shape}  (samples, departments)")
-    
-    return X_seq, X_static, y
+    return seq_values, static_values, anchors
 
 # ============================================================================
 # 3. SPLIT DANYCH
 # ============================================================================
 
-def train_val_test_split(X_seq, X_static, y, train_ratio=0.7, val_ratio=0.15):
-    """Dzieli dane chronologicznie (ważne dla time series!)"""
+def train_val_test_split(anchors, train_ratio=0.7, val_ratio=0.15):
+    """Dzieli próbki chronologicznie (ważne dla time series!)"""
     print_header("Podział danych Train/Val/Test")
     
-    n = len(X_seq)
+    n = len(anchors)
     train_end = int(n * train_ratio)
     val_end = int(n * (train_ratio + val_ratio))
     
-    X_seq_train, X_static_train, y_train = X_seq[:train_end], X_static[:train_end], y[:train_end]
-    X_seq_val, X_static_val, y_val = X_seq[train_end:val_end], X_static[train_end:val_end], y[train_end:val_end]
-    X_seq_test, X_static_test, y_test = X_seq[val_end:], X_static[val_end:], y[val_end:]
+    train_anchors = anchors[:train_end]
+    val_anchors = anchors[train_end:val_end]
+    test_anchors = anchors[val_end:]
     
     print(f"\n Podział chronologiczny:")
-    print(f"  Train: {len(X_seq_train)} próbek ({train_ratio*100:.0f}%)")
-    print(f"  Val:   {len(X_seq_val)} próbek ({val_ratio*100:.0f}%)")
-    print(f"  Test:  {len(X_seq_test)} próbek ({(1-train_ratio-val_ratio)*100:.0f}%)")
+    print(f"  Train: {len(train_anchors)} próbek ({train_ratio*100:.0f}%)")
+    print(f"  Val:   {len(val_anchors)} próbek ({val_ratio*100:.0f}%)")
+    print(f"  Test:  {len(test_anchors)} próbek ({(1-train_ratio-val_ratio)*100:.0f}%)")
     
-    return (X_seq_train, X_static_train, y_train), \
-           (X_seq_val, X_static_val, y_val), \
-           (X_seq_test, X_static_test, y_test)
+    return train_anchors, val_anchors, test_anchors
 
 # ============================================================================
 # 4. NORMALIZACJA
 # ============================================================================
 
-def normalize_data(train_data, val_data, test_data):
-    """Normalizuje dane używając StandardScaler"""
-    print_header("Normalizacja danych")
+def normalize_data(seq_values, static_values, train_anchors, horizon=PREDICTION_HORIZON):
+    """
+    Normalizuje bazowe tablice używając StandardScaler (fit na train)
     
-    X_seq_train, X_static_train, y_train = train_data
-    X_seq_val, X_static_val, y_val = val_data
-    X_seq_test, X_static_test, y_test = test_data
+    Scaler sekwencji jest dopasowany do wierszy objętych oknami
+    treningowymi, statyczny - do wierszy próbek treningowych, a target -
+    do wierszy targetów treningowych. Transformacja jest per wiersz, więc
+    okna złożone ze znormalizowanych wierszy są identyczne z
+    normalizacją gotowych okien.
     
-    # Scaler dla sekwencji (fit na train)
-    seq_scaler = StandardScaler()
-    X_seq_train_scaled = seq_scaler.fit_transform(
-        X_seq_train.reshape(-1, N_DEPARTMENTS)
-    ).reshape(X_seq_train.shape)
-    
-    X_seq_val_scaled = seq_scaler.transform(
-        X_seq_val.reshape(-1, N_DEPARTMENTS)
-    ).reshape(X_seq_val.shape)
+    Returns:
+        (seq_scaled, static_scaled, target_scaled) - tablice (n_rows, ...)
+        (seq_scaler, static_scaler, target_scaler)
+    """
+    print_header("Normalizacja danych")
     
-    X_seq_test_scaled = seq_scaler.transform(
-        X_seq_test.reshape(-1, N_DEPARTMENTS)
-    ).reshape(X_seq_test.shape)
+    # Scaler dla sekwencji (fit na wierszach okien train: [0, ostatnia próbka))
+    seq_scaler = StandardScaler()
+    seq_scaler.fit(seq_values[:train_anchors[-1]])
+    seq_scaled = seq_scaler.transform(seq_values).astype(np.float32)
     
     # Scaler dla static features
     static_scaler = StandardScaler()
-    X_static_train_scaled = static_scaler.fit_transform(X_static_train)
-    X_static_val_scaled = static_scaler.transform(X_static_val)
-    X_static_test_scaled = static_scaler.transform(X_static_test)
+    static_scaler.fit(static_values[train_anchors])
+    static_scaled = static_scaler.transform(static_values).astype(np.float32)
     
     # Target (y) też normalizujemy
     target_scaler = StandardScaler()
-    y_train_scaled = target_scaler.fit_transform(y_train)
-    y_val_scaled = target_scaler.transform(y_val)
-    y_test_scaled = target_scaler.transform(y_test)
+    target_scaler.fit(seq_values[train_anchors + horizon])
+    target_scaled = target_scaler.transform(seq_values).astype(np.float32)
     
     print(f"✓ Dane znormalizowane")
     
-    return (X_seq_train_scaled, X_static_train_scaled, y_train_scaled), \
-           (X_seq_val_scaled, X_static_val_scaled, y_val_scaled), \
-           (X_seq_test_scaled, X_static_test_scaled, y_test_scaled), \
+    return (seq_scaled, static_scaled, target_scaled), \
            (seq_scaler, static_scaler, target_scaler)
 
+def make_datasets(scaled, splits, lookback=LOOKBACK_HOURS, horizon=PREDICTION_HORIZON):
+    """Potoki tf.data dla train (tasowany), val i test"""
+    seq_scaled, static_scaled, target_scaled = scaled
+    train_anchors, val_anchors, test_anchors = splits
+    
+    def dataset(anchors, shuffle=False):
+        return window_dataset(
+            seq_scaled, static_scaled, target_scaled, anchors,
+            lookback, horizon, BATCH_SIZE, shuffle=shuffle, seed=RANDOM_STATE
+        )
+    
+    return dataset(train_anchors, shuffle=True), dataset(val_anchors), dataset(test_anchors)
+
 # ============================================================================
 # 5. BUDOWA MODELU LSTM
 # ============================================================================
@@ -319,13 +316,10 @@ def build_lstm_model(seq_shape, static_shape, n_outputs=N_DEPARTMENTS):
 # 6. TRENING MODELU
 # ============================================================================
 
-def train_model(model, train_data, val_data):
-    """Trenuje model z callbackami"""
+def train_model(model, train_ds, val_ds):
+    """Trenuje model z callbackami (dane z potoków tf.data)"""
     print_header("Trening modelu")
     
-    X_seq_train, X_static_train, y_train = train_data
-    X_seq_val, X_static_val, y_val = val_data
-    
     # Callbacks
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
@@ -356,10 +350,9 @@ def train_model(model, train_data, val_data):
     print(f"  Early stopping: patience=15")
     
     history = model.fit(
-        [X_seq_train, X_static_train], y_train,
-        validation_data=([X_seq_val, X_static_val], y_val),
+        train_ds,
+        validation_data=val_ds,
         epochs=EPOCHS,
-        batch_size=BATCH_SIZE,
         callbacks=[early_stop, checkpoint, reduce_lr],
         verbose=1
     )
@@ -373,15 +366,13 @@ def train_model(model, train_data, val_data):
 # 7. EWALUACJA
 # ============================================================================
 
-def evaluate_model(model, test_data, target_scaler):
+def evaluate_model(model, test_ds, y_test_scaled, target_scaler):
     """Ewaluuje model na zbiorze testowym"""
     print_header("Ewaluacja modelu")
     
-    X_seq_test, X_static_test, y_test_scaled = test_data
-    
-    # Predykcja
+    # Predykcja (kolejność batchy jak w test_ds - bez tasowania)
     print("\n Predykcja na zbiorze testowym...")
-    y_pred_scaled = model.predict([X_seq_test, X_static_test], verbose=0)
+    y_pred_scaled = model.predict(test_ds, verbose=0)
     
     # Denormalizacja
     y_test = target_scaler.inverse_transform(y_test_scaled)
@@ -512,19 +503,42 @@ def save_artifacts(model, scalers, timestamp):
         }, f)
     print(f"✓ Scalery zapisane: {scalers_path}")
     
+    # Specyfikacja cech - serwowanie buduje z niej wejście modelu
+    feature_spec = {
+        'spec_version': FEATURE_SPEC_VERSION,
+        'lookback_hours': LOOKBACK_HOURS,
+        'prediction_horizon': PREDICTION_HORIZON,
+        'sequence_columns': DEPARTMENTS,
+        'static_columns': get_static_columns(),
+        # Okno [i - lookback, i) + cechy statyczne wiersza i (godzina po oknie,
+        # agregaty kroczące włącznie z nią) - create_sequences
+        'static_alignment': 'next_hour',
+        'aggregate_windows': AGGREGATE_WINDOWS,
+        'aggregate_min_periods': 1,
+        'scalers': {
+            'file': scalers_path.name,
+            'seq': {'type': type(seq_scaler).__name__, 'n_features': int(seq_scaler.n_features_in_)},
+            'static': {'type': type(static_scaler).__name__, 'n_features': int(static_scaler.n_features_in_)},
+            'target': {'type': type(target_scaler).__name__, 'n_features': int(target_scaler.n_features_in_)}
+        }
+    }
+    
     # Metadata
     metadata = {
         'lookback_hours': LOOKBACK_HOURS,
         'prediction_horizon': PREDICTION_HORIZON,
         'departments': DEPARTMENTS,
         'n_departments': N_DEPARTMENTS,
-        'timestamp': timestamp
+        'timestamp': timestamp,
+        'feature_spec': feature_spec
     }
     
     metadata_path = MODEL_PATH / f'lstm_metadata_{timestamp}.json'
     with open(metadata_path, 'w') as f:
         json.dump(metadata, f, indent=2)
     print(f"✓ Metadata zapisana: {metadata_path}")
+    
+    return {'model_path': model_path, 'scalers_path': scalers_path, 'metadata_path': metadata_path}
 
 # ============================================================================
 # MAIN
@@ -543,24 +557,25 @@ def main():
     df_feat = create_aggregate_features(df)
     
     # 3. Create sequences
-    X_seq, X_static, y = create_sequences(df_feat)
+    seq_values, static_values, anchors = create_sequences(df_feat)
     
     # 4. Split
-    train_data, val_data, test_data = train_val_test_split(X_seq, X_static, y)
+    splits = train_val_test_split(anchors)
     
-    # 5. Normalize
-    train_norm, val_norm, test_norm, scalers = normalize_data(train_data, val_data, test_data)
+    # 5. Normalize + potoki tf.data
+    scaled, scalers = normalize_data(seq_values, static_values, splits[0])
+    train_ds, val_ds, test_ds = make_datasets(scaled, splits)
     
     # 6. Build model
     seq_shape = (LOOKBACK_HOURS, N_DEPARTMENTS)
-    static_shape = train_norm[1].shape[1]
+    static_shape = static_values.shape[1]
     model = build_lstm_model(seq_shape, static_shape)
     
     # 7. Train
-    history, timestamp = train_model(model, train_norm, val_norm)
+    history, timestamp = train_model(model, train_ds, val_ds)
     
     # 8. Evaluate
-    results = evaluate_model(model, test_norm, scalers[2])
+    results = evaluate_model(model, test_ds, scaled[2][splits[2] + PREDICTION_HORIZON], scalers[2])
     
     # 9. Visualize
     plot_training_history(history)
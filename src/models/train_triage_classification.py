@@ -1,3 +1,7 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -6,16 +10,15 @@ import warnings
 import pickle
 import json
 from datetime import datetime
-from pathlib import Path
 
-from imblearn.combine import SMOTETomek
 from imblearn.over_sampling import BorderlineSMOTE, ADASYN
 
 # Modele ML
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.utils.class_weight import compute_class_weight
 
 # Metryki
@@ -24,13 +27,18 @@ from sklearn.metrics import (
     classification_report, confusion_matrix, balanced_accuracy_score
 )
 
+from utils.datasets import VITALS, load_dataset
+from utils.model_search import best_params, fitted_candidates, grid_search, halving_search, resample_cached
+from utils.parallel import default_workers
+from utils.rebalancing import StratifiedRebalancer
+
 warnings.filterwarnings('ignore')
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
-DATA_PATH = Path('/home/dolfik/Projects/Clinic-data/data/raw/')
-MODEL_PATH = Path('/home/dolfik/Projects/Clinic-data/models/')
-RESULTS_PATH = Path('/home/dolfik/Projects/Clinic-data/results/')
+DATA_PATH = Path('data/raw/')
+MODEL_PATH = Path('models/')
+RESULTS_PATH = Path('results/')
 
 MODEL_PATH.mkdir(parents=True, exist_ok=True)
 RESULTS_PATH.mkdir(parents=True, exist_ok=True)
@@ -38,6 +46,11 @@ RESULTS_PATH.mkdir(parents=True, exist_ok=True)
 RANDOM_STATE = 42
 SAVE_PLOTS = True
 
+# Wyszukiwanie hiperparametrów RF: 'halving' (successive halving po liczbie
+# drzew, balansowanie klas w foldach) albo 'grid' (dotychczasowy pełny GridSearchCV)
+SEARCH = 'halving'
+SEARCH_JOBS = default_workers()
+
 
 def print_header(text):
     """Wyświetla sformatowany nagłówek"""
@@ -236,6 +249,8 @@ def save_model(model, model_name, metrics):
         json.dump(metrics_to_save, f, indent=2)
     
     print(f"Metryki zapisane: {metrics_filename}")
+    
+    return model_filename
 
 
 def main():
@@ -250,16 +265,19 @@ def main():
     print_header("Wczytanie i preprocessing surowych danych")
     
     try:
-        # ✅ Wczytaj surowe dane
-        df = pd.read_csv(DATA_PATH / 'triage_data.csv')
+        # ✅ Wczytaj surowe dane - bez kolumn niebędących cechami (projekcja z Parquet)
+        df = load_dataset(
+            DATA_PATH / 'triage_data.csv',
+            columns=['szablon_przypadku', 'wiek', 'płeć'] + VITALS + ['kategoria_triażu']
+        )
         print(f"✓ Wczytano {len(df)} rekordów surowych")
         print(f"  Kolumny: {list(df.columns)}")
         
         # Wydziel target
         y = df['kategoria_triażu'].values
         
-        # Usuń kolumny które nie są cechami
-        X = df.drop(['kategoria_triażu', 'id_przypadku', 'data_przyjęcia', 'oddział_docelowy'], axis=1)
+        # Usuń target (id, data przyjęcia i oddział nie są wczytywane)
+        X = df.drop(['kategoria_triażu'], axis=1)
         print(f"\n✓ Po usunięciu kolumn niebędących cechami: {X.shape[1]} kolumn")
         
         # One-hot encoding dla płci
@@ -300,12 +318,12 @@ def main():
     train_dist = analyze_class_distribution(y_train, "Treningowy (przed oversampling)")
     test_dist = analyze_class_distribution(y_test, "Testowy")
     
-    print_header("Balansowanie klas - SMOTETomek")
+    print_header("Balansowanie klas - SMOTE + Tomek per szablon")
     
     print(f"\n  Przed balansowaniem: {X_train.shape[0]} próbek")
     
-    resampler = SMOTETomek(random_state=RANDOM_STATE)
-    X_train_balanced, y_train_balanced = resampler.fit_resample(X_train, y_train)
+    resampler = StratifiedRebalancer(random_state=RANDOM_STATE, n_jobs=SEARCH_JOBS)
+    X_train_balanced, y_train_balanced = resample_cached(resampler, X_train, y_train)
     
     print(f"  Po balansowaniu:  {X_train_balanced.shape[0]} próbek")
     analyze_class_distribution(y_train_balanced, "Treningowy (po oversampling)")
@@ -327,7 +345,7 @@ def main():
     
     feature_names = X_train_balanced.columns.tolist()
     
-    print("\n🔍 Hyperparameter tuning dla Random Forest...")
+    print(f"\n🔍 Hyperparameter tuning dla Random Forest ({SEARCH}, {SEARCH_JOBS} procesów)...")
     param_grid = {
         'n_estimators': [200, 300, 400],
         'max_depth': [20, 25, 30],
@@ -336,31 +354,34 @@ def main():
         'class_weight': ['balanced', 'balanced_subsample']
     }
     
+    # n_jobs=1: równoległość tylko na poziomie procesów wyszukiwania
     rf_base = RandomForestClassifier(
         random_state=RANDOM_STATE,
-        n_jobs=-1,
+        n_jobs=1,
         max_features='sqrt'
     )
     
     cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=RANDOM_STATE)
     
-    grid_search = GridSearchCV(
-        rf_base, 
-        param_grid, 
-        cv=cv,
-        scoring='balanced_accuracy',  
-        n_jobs=-1,
-        verbose=2
-    )
-    
-    grid_search.fit(X_train_balanced, y_train_balanced)
+    search_start = datetime.now()
+    if SEARCH == 'halving':
+        search = halving_search(
+            rf_base, param_grid, X_train, y_train, clone(resampler).set_params(n_jobs=1), cv, SEARCH_JOBS,
+            random_state=RANDOM_STATE
+        )
+    else:
+        search = grid_search(rf_base, param_grid, X_train_balanced, y_train_balanced, cv, SEARCH_JOBS)
+    search_seconds = (datetime.now() - search_start).total_seconds()
     
+    rf_params = best_params(search)
     print("\n  Najlepsze parametry:")
-    for param, value in grid_search.best_params_.items():
+    for param, value in rf_params.items():
         print(f"    {param}: {value}")
-    print(f"  Best CV Score: {grid_search.best_score_:.4f}")
+    print(f"  Best CV Score: {search.best_score_:.4f}")
+    print(f"  Czas wyszukiwania: {search_seconds:.0f}s ({fitted_candidates(search)} dopasowań)")
     
-    best_rf = grid_search.best_estimator_
+    best_rf = clone(rf_base).set_params(**rf_params, n_jobs=-1)
+    best_rf.fit(X_train_balanced, y_train_balanced)
     
     models = {}
     models['Random Forest'] = best_rf
@@ -435,12 +456,14 @@ def main():
     print(f"   F1-Score:          {best_metrics['f1_score']:.2%}")
     
     print_header("Zapis modelu")
-    save_model(best_model, best_model_name, results[best_model_name])
+    model_filename = save_model(best_model, best_model_name, results[best_model_name])
     
     print("\n" + "="*70)
     print("✅ TRENING ZAKOŃCZONY - MODEL BEZ SKALOWANIA")
     print("   Backend używa surowych danych → kompatybilny!")
     print("="*70)
     
+    return model_filename
+    
 if __name__ == "__main__":
     main()
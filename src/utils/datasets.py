@@ -0,0 +1,363 @@
+"""
+Kolumnowy format zbiorów danych (Parquet) dla danych surowych i przetworzonych
+
+CSV pozostaje formatem wymiany (generatory, preprocessing), ale skrypty
+czytają zbiory przez ten moduł: przy pierwszym wczytaniu CSV jest
+parsowany raz, z typowanym schematem, i zapisywany jako Parquet
+(data/cache/<plik>.parquet). Kolejne wczytania czytają tylko Parquet -
+bez parsowania tekstu, z projekcją kolumn (columns=...) i filtrami
+wierszy po stronie pyarrow. Parquet jest przebudowywany, gdy CSV jest
+nowszy.
+
+Zbiór może być też katalogiem części (part-00000.parquet, ...) zapisanym
+bezpośrednio przez generatory (write_part/publish_parts) - wtedy CSV nie
+jest potrzebny, a export_csv tworzy go na żądanie.
+
+Schematy:
+    - szablony przypadków, płeć, oddziały -> category
+    - parametry życiowe -> float32, wiek -> int16, kategoria triażu -> int8
+    - obłożenie oddziałów (JSON w CSV arrangement) -> kolumny occ_<oddział> int16
+    - zbiory bez schematu (X_*/y_* z preprocessingu) -> float32, najmniejszy
+      typ całkowity, tekst o małej liczbie wartości -> category
+
+Wymaga pyarrow.
+"""
+
+import os
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+OCCUPANCY_COLUMN = 'obłożenie_oddziałów'
+OCCUPANCY_PREFIX = 'occ_'
+
+VITALS = [
+    'tętno', 'ciśnienie_skurczowe', 'ciśnienie_rozkurczowe', 'temperatura',
+    'saturacja', 'GCS', 'ból', 'częstotliwość_oddechów', 'czas_od_objawów_h'
+]
+
+TRIAGE_SCHEMA: Dict[str, str] = {
+    'id_przypadku': 'object',
+    'szablon_przypadku': 'category',
+    'data_przyjęcia': 'datetime64[ns]',
+    'wiek': 'int16',
+    'płeć': 'category',
+    **{column: 'float32' for column in VITALS},
+    'kategoria_triażu': 'int8',
+    'oddział_docelowy': 'category',
+}
+
+ARRANGEMENT_SCHEMA: Dict[str, str] = {
+    'id_scenariusza': 'object',
+    'timestamp': 'datetime64[ns]',
+    'id_pacjenta': 'object',
+    'wiek_pacjenta': 'int16',
+    'płeć_pacjenta': 'category',
+    'kategoria_triażu': 'int8',
+    'szablon_przypadku': 'category',
+    'oddział_docelowy': 'category',
+    'optymalne_przypisanie': 'category',
+    'faktyczne_przypisanie': 'category',
+    'wynik': 'category',
+}
+
+# Schematy po nazwie pliku (stem); pozostałe zbiory - typy wyznaczane z danych
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    'triage_data': TRIAGE_SCHEMA,
+    'department_arrangement_data': ARRANGEMENT_SCHEMA,
+}
+
+# Kolumna tekstowa staje się category, gdy unikalnych wartości jest mniej niż ten ułamek wierszy
+CATEGORY_MAX_RATIO = 0.5
+
+
+def parquet_path(csv_path: Path) -> Path:
+    """Plik Parquet dla zbioru CSV (data/raw/x.csv -> data/cache/x.parquet)"""
+    csv_path = Path(csv_path)
+    return csv_path.parent.parent / 'cache' / f'{csv_path.stem}.parquet'
+
+
+def parse_occupancy(values: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Parsuje kolumnę JSON obłożenia zbiorczo
+    
+    Args:
+        values: Teksty JSON (jeden słownik oddział -> liczba na wiersz)
+    
+    Returns:
+        departments: Oddziały w kolejności kluczy pierwszego wiersza
+        occupancy: Macierz int16 (n_rows, n_departments)
+    """
+    records = json.loads('[' + ','.join(values) + ']')
+    departments = list(records[0]) if records else []
+    occupancy = pd.DataFrame.from_records(records, columns=departments).to_numpy(dtype=np.int16)
+    return departments, occupancy
+
+
+def format_occupancy(departments: Sequence[str], occupancy: np.ndarray) -> np.ndarray:
+    """
+    Odwrotność parse_occupancy - tekst JSON obłożenia dla każdego wiersza
+    
+    Args:
+        departments: Oddziały (kolejność kolumn occupancy)
+        occupancy: Macierz (n_rows, n_departments)
+    
+    Returns:
+        Tablica tekstów jak json.dumps({oddział: liczba, ...})
+    """
+    text = np.full(len(occupancy), '{', dtype=object)
+    for k, dept in enumerate(departments):
+        separator = ', ' if k else ''
+        text = text + f'{separator}{json.dumps(dept)}: ' + occupancy[:, k].astype(str).astype(object)
+    return text + '}'
+
+
+def _cast(series: pd.Series, dtype: str) -> pd.Series:
+    if dtype == 'datetime64[ns]':
+        return pd.to_datetime(series)
+    if dtype.startswith('int') and series.isna().any():
+        # Braki w kolumnie całkowitej - float32 zamiast błędu rzutowania
+        return series.astype('float32')
+    return series.astype(dtype)
+
+
+def _infer(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_float_dtype(series):
+        return series.astype('float32')
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if series.dtype == object and series.nunique() < CATEGORY_MAX_RATIO * max(len(series), 1):
+        return series.astype('category')
+    return series
+
+
+def apply_schema(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """
+    Rzutuje kolumny DataFrame na typy schematu zbioru
+    
+    Args:
+        df: Dane wczytane z CSV albo wygenerowane
+        name: Nazwa zbioru (stem pliku CSV)
+    
+    Returns:
+        DataFrame z typowanymi kolumnami (JSON obłożenia rozwinięty do occ_*)
+    """
+    df = df.copy()
+    
+    if OCCUPANCY_COLUMN in df.columns:
+        departments, occupancy = parse_occupancy(df.pop(OCCUPANCY_COLUMN).tolist())
+        df_occ = pd.DataFrame(
+            occupancy,
+            columns=[f'{OCCUPANCY_PREFIX}{dept}' for dept in departments],
+            index=df.index
+        )
+        df = pd.concat([df, df_occ], axis=1)
+    
+    schema = SCHEMAS.get(name)
+    for column in df.columns:
+        if schema is not None and column in schema:
+            df[column] = _cast(df[column], schema[column])
+        elif not column.startswith(OCCUPANCY_PREFIX):
+            df[column] = _infer(df[column])
+    
+    return df
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def write_parquet(df: pd.DataFrame, path: Path) -> Path:
+    """Zapisuje DataFrame jako Parquet (przez plik tymczasowy - bez częściowych plików)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.part')
+    df.to_parquet(tmp_path, index=False, engine='pyarrow', compression='zstd')
+    if path.is_dir():
+        _remove(path)
+    tmp_path.replace(path)
+    return path
+
+
+def parts_directory(path: Path) -> Path:
+    """
+    Pusty katalog tymczasowy na części zbioru zapisywanego porcjami
+    
+    Generatory zapisują każdy chunk jako osobny plik (write_part), a po
+    zakończeniu publish_parts podmienia zbiór jednym rename - czytelnicy
+    nigdy nie widzą częściowego zbioru.
+    """
+    tmp_dir = Path(path).with_name(Path(path).name + '.part')
+    _remove(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    return tmp_dir
+
+
+def write_part(df: pd.DataFrame, directory: Path, index: int) -> Path:
+    """Zapisuje jedną część zbioru (part-<index>.parquet)"""
+    path = Path(directory) / f'part-{index:05d}.parquet'
+    df.to_parquet(path, index=False, engine='pyarrow', compression='zstd')
+    return path
+
+
+def publish_parts(directory: Path, path: Path) -> Path:
+    """Podmienia zbiór (plik albo katalog części) na gotowy katalog części"""
+    path = Path(path)
+    _remove(path)
+    Path(directory).replace(path)
+    return path
+
+
+def build_parquet(csv_path: Path, force: bool = False) -> Path:
+    """
+    Zapisuje zbiór CSV jako typowany Parquet (raz, dopóki CSV się nie zmieni)
+    
+    Args:
+        csv_path: Plik CSV zbioru
+        force: Przebuduj nawet jeśli Parquet jest aktualny
+    
+    Returns:
+        Ścieżka pliku Parquet
+    """
+    csv_path = Path(csv_path)
+    path = parquet_path(csv_path)
+    
+    if not csv_path.exists():
+        if path.exists():
+            return path
+        raise FileNotFoundError(f"Brak zbioru: {csv_path}")
+    
+    if not force and path.exists() and path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns:
+        return path
+    
+    df = apply_schema(pd.read_csv(csv_path), csv_path.stem)
+    return write_parquet(df, path)
+
+
+def _arrow_dataset(path: Path):
+    """Zbiór pyarrow z pliku albo katalogu części (części w kolejności nazw)"""
+    import pyarrow.dataset as ds
+    
+    path = Path(path)
+    if path.is_dir():
+        return ds.dataset([str(part) for part in sorted(path.glob('part-*.parquet'))], format='parquet')
+    return ds.dataset(str(path), format='parquet')
+
+
+def dataset_columns(csv_path: Path) -> List[str]:
+    """Nazwy kolumn zbioru (ze schematu Parquet, bez wczytywania danych)"""
+    return _arrow_dataset(build_parquet(csv_path)).schema.names
+
+
+def load_dataset(
+    csv_path: Path,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[list] = None
+) -> pd.DataFrame:
+    """
+    Wczytuje zbiór z Parquet (budując go z CSV przy pierwszym użyciu)
+    
+    Args:
+        csv_path: Plik CSV zbioru (np. DATA_PATH / 'triage_data.csv')
+        columns: Wczytywane kolumny (None = wszystkie) - pozostałe nie są czytane z dysku
+        filters: Filtry wierszy pyarrow, np. [('kategoria_triażu', '<=', 2)]
+    
+    Returns:
+        DataFrame z typami schematu
+    """
+    import pyarrow.parquet as pq
+    
+    table = _arrow_dataset(build_parquet(csv_path)).to_table(
+        columns=list(columns) if columns is not None else None,
+        filter=pq.filters_to_expression(filters) if filters else None
+    )
+    return table.to_pandas()
+
+
+def iter_batches(
+    csv_path: Path,
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = 65536
+) -> Iterator[pd.DataFrame]:
+    """
+    Wczytuje zbiór porcjami (pamięć zależy od batch_size, nie od rozmiaru zbioru)
+    
+    Args:
+        csv_path: Plik CSV zbioru
+        columns: Wczytywane kolumny (None = wszystkie)
+        batch_size: Wierszy na porcję
+    
+    Yields:
+        DataFrame z kolejnymi wierszami zbioru
+    """
+    dataset = _arrow_dataset(build_parquet(csv_path))
+    for fragment in dataset.get_fragments():
+        for batch in fragment.to_batches(
+            batch_size=batch_size,
+            columns=list(columns) if columns is not None else None
+        ):
+            yield batch.to_pandas()
+
+
+def save_dataset(df, csv_path: Path) -> Path:
+    """
+    Zapisuje zbiór jako CSV (format wymiany) i od razu jako typowany Parquet
+    
+    Args:
+        df: Dane do zapisania (DataFrame albo Series, np. y_train)
+        csv_path: Docelowy plik CSV
+    
+    Returns:
+        Ścieżka pliku Parquet
+    """
+    csv_path = Path(csv_path)
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    df.to_csv(csv_path, index=False)
+    return write_parquet(apply_schema(df, csv_path.stem), parquet_path(csv_path))
+
+
+def export_csv(csv_path: Path, batch_size: int = 65536) -> Path:
+    """
+    Eksportuje zbiór z Parquet do CSV (format wymiany) porcjami
+    
+    Kolumny occ_<oddział> są z powrotem składane w kolumnę JSON
+    'obłożenie_oddziałów' (w miejscu pierwszej z nich). Po eksporcie
+    Parquet jest oznaczany jako aktualny - nie zostanie przebudowany z CSV.
+    
+    Args:
+        csv_path: Docelowy plik CSV (Parquet w parquet_path(csv_path) musi istnieć)
+        batch_size: Wierszy na porcję
+    
+    Returns:
+        Ścieżka pliku CSV
+    """
+    csv_path = Path(csv_path)
+    path = parquet_path(csv_path)
+    tmp_path = csv_path.with_name(csv_path.name + '.part')
+    
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        header = True
+        for batch in iter_batches(csv_path, batch_size=batch_size):
+            occ_columns = [column for column in batch.columns if column.startswith(OCCUPANCY_PREFIX)]
+            if occ_columns:
+                position = batch.columns.get_loc(occ_columns[0])
+                departments = [column[len(OCCUPANCY_PREFIX):] for column in occ_columns]
+                text = format_occupancy(departments, batch[occ_columns].to_numpy())
+                batch = batch.drop(columns=occ_columns)
+                batch.insert(position, OCCUPANCY_COLUMN, text)
+            batch.to_csv(f, index=False, header=header)
+            header = False
+    
+    tmp_path.replace(csv_path)
+    os.utime(path)
+    return csv_path
@@ -0,0 +1,190 @@
+"""
+Wyszukiwanie hiperparametrów: successive halving z resamplingiem w foldach
+
+Resampler (np. SMOTETomek) jest krokiem pipeline'u imblearn, więc działa
+tylko na części treningowej każdego foldu - syntetyczne próbki nie trafiają
+do foldu walidacyjnego (dotychczas resampling całego zbioru przed CV
+zawyżał wynik CV). Wynik resamplingu jest cache'owany na dysku
+(joblib.Memory w data/cache/resampling/<hash kodu resamplera>, klucz =
+hash parametrów resamplera i danych foldu - klasa jest piklowana przez
+referencję, więc zmiana jej kodu zmienia katalog cache). Halving po liczbie drzew nie zmienia danych foldu między
+iteracjami i kandydatami, więc każdy fold jest resamplowany raz, także
+między kolejnymi uruchomieniami na tych samych danych.
+
+Budżet równoległości jest jawny: jobs procesów wyszukiwania, estymator
+z n_jobs=1 (bez zagnieżdżonej równoległości drzew w procesach CV).
+
+Wymaga imbalanced-learn i scikit-learn >= 0.24 (HalvingGridSearchCV).
+"""
+
+import sys
+import math
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from joblib import Memory
+from imblearn.pipeline import Pipeline
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterGrid
+
+from utils.pipeline import code_version
+
+RESAMPLING_CACHE = Path(__file__).parent.parent.parent / 'data' / 'cache' / 'resampling'
+
+MODEL_STEP = 'model'
+
+
+def _fit_resample(resampler, X, y):
+    return resampler.fit_resample(X, y)
+
+
+def resampler_version(resampler) -> str:
+    """Hash kodu modułów klasy resamplera i jego zagnieżdżonych estymatorów"""
+    estimators = [resampler] + [
+        value for value in resampler.get_params(deep=True).values() if hasattr(value, 'get_params')
+    ]
+    modules = sorted({type(estimator).__module__ for estimator in estimators})
+    return code_version(sys.modules[name] for name in modules)[:16]
+
+
+def resampling_memory(resampler, cache_dir: Path = RESAMPLING_CACHE) -> Memory:
+    """Cache resamplingu w podkatalogu wersji kodu resamplera"""
+    return Memory(str(Path(cache_dir) / resampler_version(resampler)), verbose=0)
+
+
+def resample_cached(resampler, X, y, cache_dir: Path = RESAMPLING_CACHE):
+    """fit_resample z cache na dysku (klucz: kod i parametry resamplera, hash danych)"""
+    return resampling_memory(resampler, cache_dir).cache(_fit_resample)(clone(resampler), X, y)
+
+
+def resampled_pipeline(estimator, resampler, cache_dir: Path = RESAMPLING_CACHE) -> Pipeline:
+    """Pipeline resampler -> estymator; resampling tylko przy fit, z cache"""
+    return Pipeline(
+        [('resample', resampler), (MODEL_STEP, estimator)],
+        memory=resampling_memory(resampler, cache_dir)
+    )
+
+
+def halving_resources(n_candidates: int, max_resource: int, factor: int) -> tuple:
+    """
+    (min_resources, max_resources) halvingu, w którym ostatnia iteracja
+    dostaje co najmniej max_resource
+    
+    Liczba iteracji jak w HalvingGridSearchCV: 1 + floor(log_factor(n_candidates)).
+    Zasób rośnie factor razy na iterację, więc max_resource jest
+    zaokrąglany w górę do wielokrotności factor ** (iteracje - 1)
+    (np. 54 kandydatów, factor 3, 400 drzew: 15/45/135/405 zamiast
+    14/42/126/378 przy min_resources='exhaust').
+    """
+    steps = factor ** int(math.floor(math.log(n_candidates, factor)))
+    min_resources = -(-max_resource // steps)
+    return min_resources, min_resources * steps
+
+
+def halving_search(
+    estimator,
+    param_grid: Dict[str, list],
+    X,
+    y,
+    resampler,
+    cv,
+    jobs: int,
+    resource: str = 'n_estimators',
+    factor: int = 3,
+    scoring: str = 'balanced_accuracy',
+    random_state: Optional[int] = None,
+    cache_dir: Path = RESAMPLING_CACHE
+) -> HalvingGridSearchCV:
+    """
+    Successive halving po parametrze zasobu (domyślnie liczbie drzew)
+    
+    Wszyscy kandydaci startują z małą liczbą drzew, do kolejnej iteracji
+    przechodzi 1/factor najlepszych z factor razy większym zasobem; pełny
+    zasób (co najmniej maksimum z param_grid[resource], halving_resources)
+    dostają tylko finaliści.
+    
+    Args:
+        estimator: Estymator bazowy (n_jobs=1)
+        param_grid: Siatka parametrów estymatora (z resource)
+        X, y: Zbiór treningowy PRZED resamplingiem
+        resampler: Resampler imblearn stosowany w każdym foldzie
+        cv: Walidacja krzyżowa
+        jobs: Liczba procesów wyszukiwania
+        resource: Parametr zasobu
+        factor: Współczynnik redukcji kandydatów
+        scoring: Metryka
+        random_state: Ziarno
+        cache_dir: Katalog cache resamplingu
+    
+    Returns:
+        Dopasowany HalvingGridSearchCV (refit=False - model końcowy
+        trenuje wywołujący, na resamplowanym pełnym zbiorze)
+    """
+    grid = {f'{MODEL_STEP}__{name}': values for name, values in param_grid.items() if name != resource}
+    min_resources, max_resources = halving_resources(
+        len(ParameterGrid(grid)), max(param_grid[resource]), factor
+    )
+    
+    search = HalvingGridSearchCV(
+        resampled_pipeline(estimator, resampler, cache_dir),
+        grid,
+        resource=f'{MODEL_STEP}__{resource}',
+        max_resources=max_resources,
+        min_resources=min_resources,
+        factor=factor,
+        cv=cv,
+        scoring=scoring,
+        n_jobs=jobs,
+        refit=False,
+        random_state=random_state,
+        verbose=1
+    )
+    search.fit(X, y)
+    return search
+
+
+def grid_search(
+    estimator,
+    param_grid: Dict[str, list],
+    X_resampled,
+    y_resampled,
+    cv,
+    jobs: int,
+    scoring: str = 'balanced_accuracy'
+) -> GridSearchCV:
+    """
+    Dotychczasowy pełny GridSearchCV na zbiorze resamplowanym przed CV
+    
+    Zostawiony do porównań - wynik CV jest zawyżony przeciekiem
+    syntetycznych próbek między foldami.
+    """
+    search = GridSearchCV(
+        estimator,
+        param_grid,
+        cv=cv,
+        scoring=scoring,
+        n_jobs=jobs,
+        refit=False,
+        verbose=1
+    )
+    search.fit(X_resampled, y_resampled)
+    return search
+
+
+def best_params(search) -> Dict[str, object]:
+    """Najlepsze parametry estymatora (bez prefiksu kroku pipeline'u)"""
+    prefix = f'{MODEL_STEP}__'
+    return {
+        name[len(prefix):] if name.startswith(prefix) else name: value
+        for name, value in search.best_params_.items()
+    }
+
+
+def fitted_candidates(search) -> int:
+    """Liczba dopasowań modelu w wyszukiwaniu (kandydaci × foldy)"""
+    n_splits = search.n_splits_
+    if hasattr(search, 'n_candidates_'):
+        return int(np.sum(search.n_candidates_)) * n_splits
+    return len(search.cv_results_['params']) * n_splits
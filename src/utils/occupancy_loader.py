@@ -0,0 +1,44 @@
+"""
+Wczytywanie danych arrangement z rozwiniętą kolumną obłożenia oddziałów
+
+Kolumna 'obłożenie_oddziałów' to JSON (słownik oddział -> liczba pacjentów)
+w każdym wierszu CSV. Jest parsowana zbiorczo (parse_occupancy) raz, przy
+budowie Parquet zbioru (utils/datasets.py), do kolumn occ_<oddział> int16.
+Kolejne wczytania czytają z Parquet tylko potrzebne kolumny obłożenia.
+"""
+
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+
+from utils.datasets import OCCUPANCY_PREFIX, dataset_columns, load_dataset
+
+
+def load_arrangement_data(
+    csv_path: Path,
+    departments: Sequence[str],
+    prefix: str = ''
+) -> pd.DataFrame:
+    """
+    Wczytuje zbiór arrangement z obłożeniem jako kolumnami int16
+    
+    Args:
+        csv_path: Plik surowy (department_arrangement_data.csv)
+        departments: Oddziały do rozwinięcia (kolejność kolumn)
+        prefix: Prefiks nazw kolumn obłożenia (np. 'occ_')
+    
+    Returns:
+        DataFrame bez kolumny JSON, z kolumnami f'{prefix}{oddział}' (int16),
+        z timestamp jako datetime, posortowany po timestamp
+    """
+    columns = [
+        column for column in dataset_columns(csv_path) if not column.startswith(OCCUPANCY_PREFIX)
+    ] + [f'{OCCUPANCY_PREFIX}{dept}' for dept in departments]
+    
+    df = load_dataset(csv_path, columns=columns)
+    df = df.rename(columns={
+        f'{OCCUPANCY_PREFIX}{dept}': f'{prefix}{dept}' for dept in departments
+    })
+    
+    return df.sort_values('timestamp', kind='stable').reset_index(drop=True)
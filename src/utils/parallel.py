@@ -0,0 +1,90 @@
+"""
+Równoległe generowanie danych porcjami (chunkami) w wielu procesach
+
+Każdy chunk ma własny, deterministyczny generator liczb losowych
+(SeedSequence(seed, spawn_key=(index,))) - wynik zależy od ziarna
+i podziału na chunki, ale nie od liczby procesów ani kolejności ich
+zakończenia. Chunki zapisują wyniki same (np. plik części Parquet),
+do procesu głównego wracają tylko małe podsumowania.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def chunk_ranges(total: int, chunk_size: int) -> List[Tuple[int, int, int]]:
+    """Podział [0, total) na chunki: lista (index, start, stop)"""
+    return [
+        (index, start, min(start + chunk_size, total))
+        for index, start in enumerate(range(0, total, chunk_size))
+    ]
+
+
+def chunk_rng(seed: int, index: int) -> np.random.Generator:
+    """Niezależny, powtarzalny generator dla chunku o danym indeksie"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def run_chunks(
+    fn: Callable,
+    tasks: Sequence[tuple],
+    workers: int,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    max_pending: Optional[int] = None
+) -> Iterator:
+    """
+    Uruchamia fn(*task) dla każdego zadania, równolegle w procesach
+    
+    Args:
+        fn: Funkcja chunku (musi być na poziomie modułu - pickle)
+        tasks: Argumenty kolejnych wywołań
+        workers: Liczba procesów (1 = w bieżącym procesie, bez puli)
+        initializer: Funkcja inicjalizująca proces (np. wczytanie danych wejściowych)
+        initargs: Argumenty initializer
+        max_pending: Maksymalna liczba zleconych, nieodebranych zadań
+            (None = wszystkie naraz). Kolejne zadanie jest zlecane dopiero
+            po odebraniu wyniku, więc wolny konsument (np. COPY do bazy)
+            ogranicza pamięć zajętą przez gotowe wyniki
+    
+    Yields:
+        Wyniki fn w kolejności zakończenia
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield fn(*task)
+        return
+    
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(tasks)),
+        initializer=initializer,
+        initargs=initargs
+    ) as executor:
+        if max_pending is None:
+            futures = [executor.submit(fn, *task) for task in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+            return
+        
+        remaining = iter(tasks)
+        pending = set()
+        while True:
+            for task in remaining:
+                pending.add(executor.submit(fn, *task))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return
+            
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
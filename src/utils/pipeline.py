@@ -0,0 +1,217 @@
+"""
+Mały runner potoku trenowania (DAG etapów) z cache artefaktów
+
+Każdy etap to funkcja wyników etapów, od których zależy. Wynik etapu
+(sparsowane dane, tablice, predykcje, ścieżki modeli) jest zapisywany
+w data/cache/pipeline/<etap>/<klucz>.pkl, gdzie klucz to hash:
+
+    - kodu etapu (źródła funkcji etapu i wskazanych funkcji/modułów)
+    - parametrów etapu (stałe konfiguracji, JSON)
+    - plików wejściowych (ścieżka, rozmiar, mtime)
+    - kluczy etapów nadrzędnych (zmiana na górze unieważnia wszystko niżej)
+
+Ponowne uruchomienie liczy tylko etapy, których klucz się zmienił.
+Wyniki z cache są wczytywane leniwie - etap z aktualnym wynikiem nie
+wczytuje danych etapów nadrzędnych. Wymuszenie etapu (force) przelicza
+też wszystkie etapy zależne (wynik etapu, np. wytrenowany model, nie
+jest deterministyczny względem klucza). Tak samo traktowany jest etap,
+którego wynik z cache nie przechodzi walidacji (check) - sprawdzanej
+przed liczeniem dla wszystkich potrzebnych etapów.
+
+Funkcje etapów nie powinny modyfikować wyników etapów nadrzędnych
+(ten sam obiekt trafia do wszystkich etapów zależnych w jednym uruchomieniu).
+"""
+
+import json
+import time
+import pickle
+import hashlib
+import inspect
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+PIPELINE_CACHE = Path(__file__).parent.parent.parent / 'data' / 'cache' / 'pipeline'
+
+
+def file_fingerprint(path: Path) -> List[tuple]:
+    """(ścieżka, rozmiar, mtime) pliku albo wszystkich plików katalogu"""
+    path = Path(path)
+    if path.is_dir():
+        files = sorted(p for p in path.rglob('*') if p.is_file())
+    else:
+        files = [path] if path.exists() else []
+    return [(str(p), p.stat().st_size, p.stat().st_mtime_ns) for p in files] or [(str(path), None, None)]
+
+
+def code_version(objects: Iterable) -> str:
+    """Hash źródeł funkcji/modułów"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Stage:
+    """
+    Etap potoku
+    
+    Args:
+        name: Nazwa (unikalna)
+        fn: Funkcja etapu - argumenty to wyniki etapów z deps, w tej kolejności
+        deps: Etapy nadrzędne
+        files: Pliki/katalogi wejściowe
+        params: Parametry wpływające na wynik (serializowalne do JSON)
+        code: Dodatkowe funkcje/moduły, których zmiana unieważnia wynik
+        check: Walidacja wyniku z cache (np. czy pliki modelu istnieją)
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        fn: Callable,
+        deps: Sequence[str] = (),
+        files: Sequence[Path] = (),
+        params: Optional[Dict] = None,
+        code: Sequence = (),
+        check: Optional[Callable[[object], bool]] = None
+    ):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.files = list(files)
+        self.params = params or {}
+        self.code = list(code)
+        self.check = check
+
+
+class Pipeline:
+    """DAG etapów (w kolejności topologicznej) z cache wyników"""
+    
+    def __init__(self, stages: List[Stage], cache_dir: Path = PIPELINE_CACHE):
+        self.stages = {}
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Etap {stage.name}: nieznane lub późniejsze zależności {missing}")
+            self.stages[stage.name] = stage
+        self.cache_dir = Path(cache_dir)
+        self._keys: Dict[str, str] = {}
+    
+    def key(self, name: str) -> str:
+        """Klucz wyniku etapu (hash kodu, parametrów, plików i kluczy zależności)"""
+        if name not in self._keys:
+            stage = self.stages[name]
+            payload = {
+                'stage': name,
+                'code': code_version([stage.fn] + stage.code),
+                'params': stage.params,
+                'files': [file_fingerprint(path) for path in stage.files],
+                'deps': {dep: self.key(dep) for dep in stage.deps},
+            }
+            encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+            self._keys[name] = hashlib.sha256(encoded).hexdigest()[:16]
+        return self._keys[name]
+    
+    def _path(self, name: str) -> Path:
+        return self.cache_dir / name / f'{self.key(name)}.pkl'
+    
+    def descendants(self, names: Iterable[str]) -> set:
+        """Etapy podane i wszystkie od nich zależne"""
+        result = set(names)
+        for stage in self.stages.values():
+            if any(dep in result for dep in stage.deps):
+                result.add(stage.name)
+        return result
+    
+    def ancestors(self, names: Iterable[str]) -> set:
+        """Etapy podane i wszystkie, od których zależą"""
+        result = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name not in result:
+                result.add(name)
+                pending.extend(self.stages[name].deps)
+        return result
+    
+    def is_cached(self, name: str) -> bool:
+        return self._path(name).exists()
+    
+    def status(self) -> List[tuple]:
+        """(etap, klucz, czy w cache) dla wszystkich etapów"""
+        return [(name, self.key(name), self.is_cached(name)) for name in self.stages]
+    
+    def _load(self, name: str):
+        with open(self._path(name), 'rb') as f:
+            return pickle.load(f)
+    
+    def _store(self, name: str, result, seconds: float) -> None:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+        
+        meta = {
+            'stage': name,
+            'key': self.key(name),
+            'deps': {dep: self.key(dep) for dep in self.stages[name].deps},
+            'seconds': round(seconds, 2),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with open(path.with_suffix('.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+    
+    def run(self, targets: Optional[Sequence[str]] = None, force: Sequence[str] = ()) -> Dict[str, object]:
+        """
+        Udostępnia wyniki etapów docelowych, licząc tylko unieważnione
+        
+        Args:
+            targets: Etapy docelowe (domyślnie wszystkie)
+            force: Etapy do przeliczenia mimo wyniku w cache (wraz z zależnymi)
+        
+        Returns:
+            Wyniki etapów docelowych
+        """
+        targets = targets or list(self.stages)
+        needed = self.ancestors(targets)
+        forced = self.descendants(force)
+        results: Dict[str, object] = {}
+        checked: Dict[str, object] = {}
+        
+        # Nieaktualny wynik działa jak force: etapy zależne mają ten sam
+        # klucz, ale zbudowano je na starym wyniku (kolejność topologiczna)
+        for name, stage in self.stages.items():
+            if name not in needed or name in forced or stage.check is None or not self.is_cached(name):
+                continue
+            result = self._load(name)
+            if stage.check(result):
+                checked[name] = result
+            else:
+                print(f"  ! {name} [{self.key(name)}] - wynik w cache nieaktualny")
+                forced |= self.descendants([name])
+        
+        def get(name: str):
+            if name in results:
+                return results[name]
+            
+            stage = self.stages[name]
+            if name not in forced and self.is_cached(name):
+                result = checked[name] if name in checked else self._load(name)
+                print(f"  ✓ {name} [{self.key(name)}] - z cache")
+                results[name] = result
+                return result
+            
+            args = [get(dep) for dep in stage.deps]
+            print(f"  ▶ {name} [{self.key(name)}] - liczenie...")
+            start = time.perf_counter()
+            result = stage.fn(*args)
+            seconds = time.perf_counter() - start
+            self._store(name, result, seconds)
+            print(f"  ✓ {name} - {seconds:.1f}s")
+            
+            results[name] = result
+            return result
+        
+        return {name: get(name) for name in targets}
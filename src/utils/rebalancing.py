@@ -0,0 +1,208 @@
+"""
+Skalowalne balansowanie klas (SMOTE + Tomek) per warstwa
+
+Zamiennik SMOTETomek dla dużych zbiorów triażu. SMOTETomek szuka
+dokładnych najbliższych sąsiadów w całej klasie / całym zbiorze, więc
+czas i pamięć rosną ponadliniowo. Tutaj:
+
+    - zbiór dzielony jest na warstwy (szablon przypadku - kolumny one-hot
+      szablon_*), warstwy przetwarzane są niezależnie, równolegle w procesach
+    - brakujące próbki klasy (do liczności klasy większościowej, jak
+      SMOTE 'auto') rozdzielane są między warstwy proporcjonalnie do
+      liczności klasy w warstwie, więc rozkład klas wyniku jest taki sam
+      jak w SMOTETomek
+    - sąsiedzi szukani są w losowych porcjach (chunk_size punktów) -
+      przybliżenie z ograniczoną pamięcią i czasem O(n · chunk_size)
+    - linki Tomka (wzajemni najbliżsi sąsiedzi z różnych klas) usuwane
+      tak samo, w porcjach warstwy
+
+Wynik zależy od random_state i podziału na warstwy, nie od n_jobs.
+API zgodne z imblearn (fit_resample) - działa w Pipeline imblearn
+i z resample_cached (model_search.py).
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator
+from sklearn.neighbors import NearestNeighbors
+
+from utils.parallel import chunk_rng, run_chunks
+
+STRATA_PREFIX = 'szablon_'
+CHUNK_SIZE = 4096
+
+
+def stratum_codes(X, prefix: str = STRATA_PREFIX) -> np.ndarray:
+    """Numer warstwy każdego wiersza (indeks aktywnej kolumny one-hot prefix*)"""
+    columns = [col for col in getattr(X, 'columns', []) if str(col).startswith(prefix)]
+    if not columns:
+        return np.zeros(len(X), dtype=np.int64)
+    return np.argmax(X[columns].to_numpy(), axis=1)
+
+
+def allocate(counts: np.ndarray, deficit: np.ndarray) -> np.ndarray:
+    """
+    Podział brakujących próbek klas między warstwy
+    
+    Args:
+        counts: Liczności (n_warstw, n_klas)
+        deficit: Brakujące próbki każdej klasy
+    
+    Returns:
+        Liczba nowych próbek (n_warstw, n_klas), sumy kolumn = deficit
+        (metoda największych reszt)
+    """
+    share = counts * (deficit / counts.sum(axis=0))
+    new = np.floor(share).astype(np.int64)
+    for c in range(counts.shape[1]):
+        missing = deficit[c] - new[:, c].sum()
+        if missing:
+            new[np.argsort(new[:, c] - share[:, c])[:missing], c] += 1
+    return new
+
+
+def _chunks(rng: np.random.Generator, n: int, chunk_size: int) -> List[np.ndarray]:
+    """Losowy podział indeksów [0, n) na porcje po najwyżej chunk_size"""
+    return np.array_split(rng.permutation(n), -(-n // chunk_size))
+
+
+def smote_samples(
+    rng: np.random.Generator,
+    points: np.ndarray,
+    n: int,
+    k_neighbors: int,
+    chunk_size: int
+) -> np.ndarray:
+    """
+    n syntetycznych próbek SMOTE z punktów jednej klasy
+    
+    Sąsiedzi punktu to k najbliższych w jego losowej porcji (przybliżenie
+    pełnego kNN klasy).
+    """
+    if len(points) == 1:
+        return np.repeat(points, n, axis=0)
+    
+    chunks = _chunks(rng, len(points), chunk_size)
+    k = min(k_neighbors, min(len(chunk) for chunk in chunks) - 1)
+    neighbours = np.empty((len(points), k), dtype=np.int64)
+    for chunk in chunks:
+        nn = NearestNeighbors(n_neighbors=k + 1).fit(points[chunk])
+        neighbours[chunk] = chunk[nn.kneighbors(points[chunk], return_distance=False)[:, 1:]]
+    
+    base = rng.integers(0, len(points), n)
+    neighbour = neighbours[base, rng.integers(0, k, n)]
+    gap = rng.random((n, 1))
+    return points[base] + gap * (points[neighbour] - points[base])
+
+
+def tomek_links(rng: np.random.Generator, X: np.ndarray, y: np.ndarray, chunk_size: int) -> np.ndarray:
+    """Maska wierszy w linkach Tomka (w losowych porcjach) - do usunięcia"""
+    drop = np.zeros(len(X), dtype=bool)
+    for chunk in _chunks(rng, len(X), chunk_size):
+        if len(chunk) < 2:
+            continue
+        nn = NearestNeighbors(n_neighbors=2).fit(X[chunk]).kneighbors(X[chunk], return_distance=False)[:, 1]
+        link = (y[chunk][nn] != y[chunk]) & (nn[nn] == np.arange(len(chunk)))
+        drop[chunk[link]] = True
+    return drop
+
+
+def rebalance_stratum(
+    index: int,
+    X: np.ndarray,
+    y: np.ndarray,
+    classes: np.ndarray,
+    n_new: np.ndarray,
+    k_neighbors: int,
+    chunk_size: int,
+    tomek: bool,
+    seed: int
+) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Warstwa: oryginał + próbki SMOTE każdej klasy, bez linków Tomka"""
+    rng = chunk_rng(seed, index)
+    parts_X, parts_y = [X], [y]
+    
+    for cls, n in zip(classes, n_new):
+        if n:
+            parts_X.append(smote_samples(rng, X[y == cls], n, k_neighbors, chunk_size))
+            parts_y.append(np.full(n, cls, dtype=y.dtype))
+    
+    X_out = np.concatenate(parts_X)
+    y_out = np.concatenate(parts_y)
+    
+    if tomek:
+        keep = ~tomek_links(rng, X_out, y_out, chunk_size)
+        X_out, y_out = X_out[keep], y_out[keep]
+    
+    return index, X_out, y_out
+
+
+class StratifiedRebalancer(BaseEstimator):
+    """
+    SMOTE + Tomek per warstwa, z przybliżonymi sąsiadami
+    
+    Args:
+        strata_prefix: Prefiks kolumn one-hot wyznaczających warstwy
+        k_neighbors: Liczba sąsiadów SMOTE
+        chunk_size: Maksymalny rozmiar porcji wyszukiwania sąsiadów
+        tomek: Czy usuwać linki Tomka
+        n_jobs: Liczba procesów (warstwy równolegle)
+        random_state: Ziarno
+    """
+    
+    def __init__(
+        self,
+        strata_prefix: str = STRATA_PREFIX,
+        k_neighbors: int = 5,
+        chunk_size: int = CHUNK_SIZE,
+        tomek: bool = True,
+        n_jobs: int = 1,
+        random_state: int = 0
+    ):
+        self.strata_prefix = strata_prefix
+        self.k_neighbors = k_neighbors
+        self.chunk_size = chunk_size
+        self.tomek = tomek
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+    
+    def fit_resample(self, X, y, **params):
+        """
+        Zbiór zbalansowany: każda klasa do liczności klasy większościowej
+        
+        Returns:
+            (X_resampled, y_resampled) - DataFrame z typami kolumn X,
+            jeśli X był DataFrame; wiersze pogrupowane warstwami
+        """
+        values = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        strata = stratum_codes(X, self.strata_prefix)
+        
+        classes, class_index = np.unique(y, return_inverse=True)
+        stratum_ids, stratum_index = np.unique(strata, return_inverse=True)
+        counts = np.zeros((len(stratum_ids), len(classes)), dtype=np.int64)
+        np.add.at(counts, (stratum_index, class_index), 1)
+        
+        totals = counts.sum(axis=0)
+        n_new = allocate(counts, totals.max() - totals)
+        
+        tasks = [
+            (index, values[stratum_index == index], y[stratum_index == index], classes,
+             n_new[index], self.k_neighbors, self.chunk_size, self.tomek, self.random_state)
+            for index in range(len(stratum_ids))
+        ]
+        results = sorted(run_chunks(rebalance_stratum, tasks, self.n_jobs), key=lambda result: result[0])
+        
+        X_res = np.concatenate([result[1] for result in results])
+        y_res = np.concatenate([result[2] for result in results])
+        
+        if isinstance(X, pd.DataFrame):
+            X_res = pd.DataFrame(X_res, columns=X.columns)
+            for col, dtype in X.dtypes.items():
+                if dtype.kind in 'iub':
+                    X_res[col] = X_res[col].round()
+            X_res = X_res.astype(X.dtypes.to_dict())
+        
+        return X_res, y_res
@@ -0,0 +1,76 @@
+"""
+Budowa okien czasowych dla modeli LSTM bez kopiowania
+
+Wszystkie okna są widokiem (sliding_window_view) na jedną ciągłą tablicę
+float32 z kolumnami sekwencji - okno i-tej próbki to wiersze
+[i - lookback, i) tej tablicy. Cechy statyczne (wiersz i) i targety
+(wiersz i + horizon) są zbierane jednym indeksowaniem tablicą indeksów.
+Pamięć widoku nie zależy od lookback; kopia powstaje dopiero przy
+operacjach, które jej wymagają (np. reshape w normalizacji).
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def as_float32(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """Kolumny DataFrame jako jedna ciągła tablica float32 (n_rows, n_columns)"""
+    return np.ascontiguousarray(df[list(columns)].to_numpy(dtype=np.float32))
+
+
+def sliding_windows(values: np.ndarray, lookback: int) -> np.ndarray:
+    """
+    Wszystkie okna długości lookback jako widok (bez kopii)
+    
+    Args:
+        values: Tablica (n_rows, n_features)
+        lookback: Długość okna
+    
+    Returns:
+        Widok (n_rows - lookback + 1, lookback, n_features) - tylko do odczytu
+    """
+    return sliding_window_view(values, lookback, axis=0).transpose(0, 2, 1)
+
+
+def sample_anchors(n_rows: int, lookback: int, horizon: int = 0) -> np.ndarray:
+    """Indeksy wierszy próbek i: lookback <= i < n_rows - horizon"""
+    return np.arange(lookback, n_rows - horizon)
+
+
+def build_windows(
+    seq_values: np.ndarray,
+    lookback: int,
+    horizon: int = 0,
+    static_values: Optional[np.ndarray] = None,
+    target_values: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray], np.ndarray]:
+    """
+    Próbki (okno, cechy statyczne, target) dla kolejnych godzin
+    
+    Próbka i (lookback <= i < n_rows - horizon) ma okno z wierszy
+    [i - lookback, i), cechy statyczne z wiersza i i target z wiersza
+    i + horizon - tak jak w pętli po godzinach z iloc.
+    
+    Args:
+        seq_values: Tablica sekwencji (n_rows, n_seq_features)
+        lookback: Długość okna
+        horizon: Przesunięcie targetu (0 = bez targetu w przyszłości)
+        static_values: Tablica cech statycznych (n_rows, n_static) - opcjonalna
+        target_values: Tablica targetów (n_rows, n_targets) - opcjonalna
+    
+    Returns:
+        X_seq: Widok (n_samples, lookback, n_seq_features)
+        X_static: (n_samples, n_static) albo None
+        y: (n_samples, n_targets) albo None
+        anchors: Indeksy wierszy próbek (i)
+    """
+    anchors = sample_anchors(len(seq_values), lookback, horizon)
+    
+    X_seq = sliding_windows(seq_values, lookback)[:len(anchors)]
+    X_static = static_values[anchors] if static_values is not None else None
+    y = target_values[anchors + horizon] if target_values is not None else None
+    
+    return X_seq, X_static, y, anchors
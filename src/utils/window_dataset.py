@@ -0,0 +1,70 @@
+"""
+Strumieniowy potok tf.data z oknami czasowymi dla modeli LSTM
+
+Zamiast materializować (n_samples, lookback, n_features) i jego kopie
+(train/val/test, wersje znormalizowane), dataset trzyma tylko bazowe
+tablice (n_rows, n_features) - już znormalizowane - i indeksy próbek.
+Okna są składane na bieżąco dla każdego batcha (tf.gather z indeksów
+i - lookback .. i - 1), równolegle i z prefetchingiem. Pamięć zależy od
+liczby wierszy i rozmiaru batcha, nie od lookback × liczba próbek.
+"""
+
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+
+
+def window_dataset(
+    seq_values: np.ndarray,
+    static_values: np.ndarray,
+    target_values: Optional[np.ndarray],
+    anchors: np.ndarray,
+    lookback: int,
+    horizon: int,
+    batch_size: int,
+    shuffle: bool = False,
+    seed: Optional[int] = None
+) -> tf.data.Dataset:
+    """
+    Dataset batchy ({sequence_input, static_input}, target)
+    
+    Próbka i ma okno z wierszy [i - lookback, i) seq_values, cechy
+    statyczne z wiersza i i target z wiersza i + horizon - tak jak
+    build_windows w utils/sequences.py.
+    
+    Args:
+        seq_values: Bazowa tablica sekwencji (n_rows, n_seq_features)
+        static_values: Bazowa tablica cech statycznych (n_rows, n_static)
+        target_values: Bazowa tablica targetów (n_rows, n_targets);
+            None = dataset tylko z wejściami (do predict)
+        anchors: Indeksy wierszy próbek (np. z sample_anchors)
+        lookback: Długość okna
+        horizon: Przesunięcie targetu
+        batch_size: Rozmiar batcha
+        shuffle: Tasowanie próbek w każdej epoce (dla zbioru treningowego)
+        seed: Ziarno tasowania
+    
+    Returns:
+        tf.data.Dataset z nazwami wejść jak w modelu (sequence_input, static_input)
+    """
+    seq = tf.constant(seq_values, dtype=tf.float32)
+    static = tf.constant(static_values, dtype=tf.float32)
+    target = tf.constant(target_values, dtype=tf.float32) if target_values is not None else None
+    offsets = tf.range(-lookback, 0, dtype=tf.int64)
+    
+    dataset = tf.data.Dataset.from_tensor_slices(np.asarray(anchors, dtype=np.int64))
+    if shuffle:
+        dataset = dataset.shuffle(len(anchors), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    
+    def gather(index):
+        inputs = {
+            'sequence_input': tf.gather(seq, index[:, None] + offsets[None, :]),
+            'static_input': tf.gather(static, index)
+        }
+        if target is None:
+            return inputs
+        return inputs, tf.gather(target, index + horizon)
+    
+    return dataset.map(gather, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
@@ -1,10 +1,13 @@
-import pandas as pd
+import sys
 import numpy as np
 import pickle
 from pathlib import Path
 import tensorflow as tf
 from tensorflow import keras
 
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+from utils.datasets import load_dataset
+
 DATA_PATH = Path('/home/dolfik/Projects/Clinic-data/data/processed/')
 MODEL_PATH = Path('/home/dolfik/Projects/Clinic-data/models/')
 
@@ -39,10 +42,10 @@ print(f" Scaler załadowany")
 
 print("\nŁadowanie danych testowych...")
 
-X_test = pd.read_csv(DATA_PATH / 'X_test.csv')
-y_test = pd.read_csv(DATA_PATH / 'y_test.csv').values.ravel()
+X_test = load_dataset(DATA_PATH / 'X_test.csv')
+y_test = load_dataset(DATA_PATH / 'y_test.csv').values.ravel()
 
-text_cols = X_test.select_dtypes(include=['object']).columns
+text_cols = X_test.select_dtypes(include=['object', 'category']).columns
 if len(text_cols) > 0:
     X_test = X_test.drop(columns=text_cols)
 
@@ -1,8 +1,11 @@
 
+import sys
 import pickle
-import pandas as pd
 import numpy as np
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from utils.datasets import load_dataset
 
 MODEL_PATH = Path('models/random_forest_20251017_123356.pkl')
 DATA_PATH = Path('data/processed/')
@@ -16,10 +19,10 @@ with open(MODEL_PATH, 'rb') as f:
 print(f"✓ Model załadowany: {MODEL_PATH}")
 
 print("\nŁadowanie danych testowych...")
-X_test = pd.read_csv(DATA_PATH / 'X_test.csv')
-y_test = pd.read_csv(DATA_PATH / 'y_test.csv').values.ravel()
+X_test = load_dataset(DATA_PATH / 'X_test.csv')
+y_test = load_dataset(DATA_PATH / 'y_test.csv').values.ravel()
 
-text_columns = X_test.select_dtypes(include=['object']).columns.tolist()
+text_columns = X_test.select_dtypes(include=['object', 'category']).columns.tolist()
 if text_columns:
     X_test = X_test.drop(columns=text_columns)
 
@@ -28,8 +31,7 @@ X_test = X_test.astype(float)
 print(f" Dane testowe: {len(X_test)} przypadków")
 print(f" Liczba cech: {X_test.shape[1]}")
 
-df_original = pd.read_csv('data/raw/triage_data.csv')
-df_original['data_przyjęcia'] = pd.to_datetime(df_original['data_przyjęcia'])
+df_original = load_dataset(Path('data/raw/triage_data.csv'))
 
 # Wybierz losowe przypadki z każdej kategorii
 np.random.seed(42)